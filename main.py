@@ -1,5 +1,6 @@
 import sys
 import os
+import pandas as pd
 import requests
 from pipelines.season_pipeline import run_season_pipeline
 from repositories.coach.supabase_coach_repository import SupabaseCoachRepository
@@ -8,20 +9,22 @@ from repositories.pipeline_context import PipelineContext
 from repositories.tenure.supabase_coach_tenure_repository import SupabaseCoachTenureRepository
 from repositories.league_season_state.supabase_league_season_state_repository import SupabaseLeagueSeasonStateRepository
 from utils.db_utils import fetch_league_data, get_league_seasons
-from services.supabase_service import create_supabase_client
+from services.supabase_service import get_supabase_client
+from utils.id_set import IdSet
+from utils.warm_cache import WarmCache
 
 # Add project root (../) to PYTHONPATH at runtime
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-def create_context() -> PipelineContext:
-    client = create_supabase_client()
+def create_context(warm_cache: WarmCache = None) -> PipelineContext:
+    client = get_supabase_client()
     return PipelineContext(
-        coach_repo=SupabaseCoachRepository(client=client),
-        match_repo=SupabaseMatchRepository(client=client),
-        tenure_repo=SupabaseCoachTenureRepository(client=client),
+        coach_repo=SupabaseCoachRepository(client=client, warm_cache=warm_cache),
+        match_repo=SupabaseMatchRepository(client=client, warm_cache=warm_cache),
+        tenure_repo=SupabaseCoachTenureRepository(client=client, warm_cache=warm_cache),
         state_repo=SupabaseLeagueSeasonStateRepository(client=client),
-        coach_cache=set(),
-        match_cache=set(),
+        coach_cache=IdSet(),
+        match_cache=IdSet(),
         tenure_cache=set(),
     )
 
@@ -31,16 +34,28 @@ def main():
     session.verify = False  # Bypass SSL certificate verification
     import urllib3
     urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-    for league in fetch_league_data(create_supabase_client()).itertuples():
-        db_league_seasons = get_league_seasons(create_supabase_client(), league.tm_league_id) 
-        db_league_seasons=db_league_seasons.drop_duplicates()
+    client = get_supabase_client()
+    # Start from the previous run's snapshot and pull only what changed since
+    warm_cache = WarmCache.load()
+    warm_cache.sync(client)
+    context = create_context(warm_cache)
+    try:
+        leagues = warm_cache.metadata.get_or_load("leagues", lambda: fetch_league_data(client).to_dict("records"))
+        for league in pd.DataFrame(leagues).itertuples():
+            seasons = warm_cache.metadata.get_or_load(
+                ("league_seasons", int(league.tm_league_id)),
+                lambda: get_league_seasons(client, league.tm_league_id).to_dict("records"))
+            db_league_seasons = pd.DataFrame(seasons).drop_duplicates()
 
-        # Loop through all seasons 
-        for row in db_league_seasons.itertuples():
-            if(row.tm_league_id>65):
-                print(f"\n----------------------")
-                print(f"League: {row.name}, Season ID: {row.season_id}, Country: {row.country}, TM Code: {row.tm_code}")
-                run_season_pipeline(league_id=row.tm_league_id, league_code=row.tm_code, season_id=row.season_id, session=session, context=create_context())        
+            # Loop through all seasons 
+            for row in db_league_seasons.itertuples():
+                if(row.tm_league_id>65):
+                    print(f"\n----------------------")
+                    print(f"League: {row.name}, Season ID: {row.season_id}, Country: {row.country}, TM Code: {row.tm_code}")
+                    run_season_pipeline(league_id=row.tm_league_id, league_code=row.tm_code, season_id=row.season_id, session=session, context=context)        
+    finally:
+        warm_cache.save()
+        warm_cache.print_report()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
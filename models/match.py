@@ -12,7 +12,7 @@ class Match(BaseModel):
     date: date
     home_coach_id: int
     away_coach_id: int
-    attendance: int
+    attendance: Optional[int] = None  # None when ingested without the match report
     home_team_score: int
     away_team_score: int
     home_team_points: int
@@ -0,0 +1,192 @@
+import asyncio
+import traceback
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+from requests import Session
+from models.coach import Coach
+from models.coach_tenure import CoachTenure
+from models.league_season_state import LeagueSeasonState
+from models.match import Match
+from pages.coach_page import CoachPage
+from pages.match_page import MatchPage
+from pipelines.season_pipeline import get_matches_with_dates
+from repositories.pipeline_context import AsyncPipelineContext
+from services.coach_service import CoachService
+from services.match_service import MatchService
+from utils.write_filter import async_save_through_filter
+
+
+@dataclass
+class FetchedMatch:
+    """Everything parsed for one match, ready to be written."""
+    match: Match
+    coaches: list[tuple[Coach, list[CoachTenure]]] = field(default_factory=list)
+
+
+def fetch_match(session: Session, match_id: int, league_id: int, season_id: int,
+                context: AsyncPipelineContext, match_date: str = None) -> Match:
+    """Blocking: parse a match through the context's match source or the HTML report."""
+    if context.match_source is not None:
+        return context.match_source.get_match(match_id, league_id, season_id, match_date)
+    page = MatchPage(match_id=match_id, session=session)
+    return MatchService.parse(league_id, season_id, page)
+
+
+def fetch_coach(session: Session, coach_id: int) -> tuple[Coach, list[CoachTenure]]:
+    """Blocking: parse a coach profile and its tenures."""
+    page = CoachPage(session=session, coach_id=coach_id)
+    return CoachService.parse_general_info(page), CoachService.parse_tenures(page)
+
+
+async def fetch_match_bundle(session: Session, match_id: int, league_id: int, season_id: int,
+                             context: AsyncPipelineContext, reserved_coaches: set[int],
+                             match_date: str = None) -> FetchedMatch:
+    """
+    Fetch a match and the coach pages still missing from the session, in a worker
+    thread so the event loop keeps running earlier writes meanwhile.
+
+    Coaches whose write is still in flight are listed in `reserved_coaches` and
+    are not fetched twice.
+    """
+    match = await asyncio.to_thread(fetch_match, session, match_id, league_id, season_id, context, match_date)
+    fetched = FetchedMatch(match=match)
+    for coach_id in dict.fromkeys((match.home_coach_id, match.away_coach_id)):
+        if coach_id in context.coach_cache or coach_id in reserved_coaches:
+            continue
+        reserved_coaches.add(coach_id)
+        try:
+            fetched.coaches.append(await asyncio.to_thread(fetch_coach, session, coach_id))
+        except Exception:
+            reserved_coaches.discard(coach_id)
+            raise
+    return fetched
+
+
+async def write_fetched_match(fetched: FetchedMatch, context: AsyncPipelineContext) -> None:
+    """Write coaches, then their tenures (concurrently), then the match."""
+    wf = context.write_filter
+    for coach, tenures in fetched.coaches:
+        await async_save_through_filter(wf, "Coach", coach.tm_coach_id, coach, context.coach_repo.save)
+        await asyncio.gather(*(
+            async_save_through_filter(wf, "Coach_tenure", (t.coach_id, t.club_id, t.start_date), t,
+                                      context.tenure_repo.save)
+            for t in tenures
+        ))
+        if context.tenure_index is not None:
+            for tenure in tenures:
+                context.tenure_index.add_tenure(tenure)
+        context.coach_cache.add(coach.tm_coach_id)
+        print(f"✅ Saved coach {coach.name} ({coach.tm_coach_id}, with {len(tenures)} tenures)")
+
+    match = fetched.match
+    await async_save_through_filter(wf, "Match", match.tm_match_id, match, context.match_repo.save)
+    context.match_cache.add(match.tm_match_id)
+    if context.standings is not None:
+        context.standings.add_match(match)
+    print(f"✅ Saved match {match.tm_match_id}")
+
+
+async def run_async_season_pipeline(league_id: int, league_code: str, season_id: int, session: Session,
+                                    context: AsyncPipelineContext) -> list:
+    """
+    Async variant of run_season_pipeline.
+
+    Matches are processed in date order with one write in flight: while match k
+    is written through the async repositories, match k+1 (and its coaches) is
+    fetched in a worker thread. A failed fetch or write marks only that match as
+    failed.
+
+    Returns:
+        List of match IDs that had errors during processing
+    """
+    err_match_ids = []
+
+    existing_state = await context.state_repo.get_state(league_id, season_id)
+    if existing_state:
+        print(f"📊 Current state: {existing_state.total_matches_processed} matches processed previously")
+
+    try:
+        matches_with_dates = await asyncio.to_thread(get_matches_with_dates, league_code, season_id, session)
+        print(f"🔍 Found {len(matches_with_dates)} total matches for {league_code} {season_id}")
+    except Exception as e:
+        print(f"❌ Error fetching matches: {e}")
+        return err_match_ids
+
+    processed_match_ids = await context.match_repo.fetch_ids_by_year_league(season_id=season_id, league_id=league_id)
+    matches_to_process = [
+        m for m in matches_with_dates
+        if m.get('match_id') is not None
+        and int(m['match_id']) not in processed_match_ids
+        and int(m['match_id']) not in context.match_cache
+    ]
+    print(f"🔎 {len(matches_to_process)} match IDs to process")
+    if not matches_to_process:
+        print(f"✅ All matches for league_id={league_id} season_id={season_id} already processed.")
+        return err_match_ids
+
+    current_date = datetime.now().date()
+    reserved_coaches: set[int] = set()
+    total_processed = 0
+    last_processed_id = None
+    last_processed_date = None
+    in_flight: Optional[tuple[dict, FetchedMatch, asyncio.Task]] = None
+
+    async def finish(pending: tuple[dict, FetchedMatch, asyncio.Task]) -> None:
+        nonlocal total_processed, last_processed_id, last_processed_date
+        match_data, fetched, task = pending
+        try:
+            await task
+            total_processed += 1
+        except Exception as e:
+            err_match_ids.append(match_data['match_id'])
+            print(f"❌ Error saving match {match_data['match_id']}: {e}")
+            traceback.print_exc()
+        finally:
+            for coach, _ in fetched.coaches:
+                reserved_coaches.discard(coach.tm_coach_id)
+        if match_data.get('date'):
+            last_processed_id = match_data['match_id']
+            last_processed_date = datetime.strptime(match_data['date'], '%Y-%m-%d')
+
+    for idx, match_data in enumerate(matches_to_process, 1):
+        match_id = match_data['match_id']
+        match_date_str = match_data.get('date')
+        if match_date_str and datetime.strptime(match_date_str, '%Y-%m-%d').date() >= current_date:
+            print(f"🛑 Stopping: Match {match_id} on {match_date_str} is in the future or today")
+            break
+
+        print(f"💬 Processing match={match_id} ({idx}/{len(matches_to_process)}) Date: {match_date_str}")
+        try:
+            # The previous match's write task runs on the loop while this fetch waits on its thread
+            fetched = await fetch_match_bundle(session, match_id, league_id, season_id, context, reserved_coaches,
+                                               match_date=match_date_str)
+        except Exception as e:
+            err_match_ids.append(match_id)
+            print(f"❌ Error processing match {match_id}: {e}")
+            continue
+
+        if in_flight is not None:
+            await finish(in_flight)
+        in_flight = (match_data, fetched, asyncio.create_task(write_fetched_match(fetched, context)))
+
+    if in_flight is not None:
+        await finish(in_flight)
+
+    if total_processed > 0 or err_match_ids:
+        base_total = existing_state.total_matches_processed if existing_state else 0
+        state = LeagueSeasonState(
+            league_id=league_id,
+            season_id=season_id,
+            last_processed_match_date=last_processed_date,
+            last_processed_match_id=last_processed_id,
+            total_matches_processed=base_total + total_processed,
+            failed_match_ids=err_match_ids,
+            last_updated_at=datetime.now(),
+            status='completed' if not err_match_ids else 'completed_with_errors',
+        )
+        await context.state_repo.save_state(state)
+        print(f"✅ Async season pipeline: {total_processed} matches processed, {len(err_match_ids)} failed")
+
+    return err_match_ids
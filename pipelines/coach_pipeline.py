@@ -4,6 +4,7 @@ from pages.coach_page import CoachPage
 from repositories.pipeline_context import PipelineContext
 from services.coach_service import CoachService
 from repositories.coach.supabase_coach_repository import ICoachRepository
+from utils.write_filter import save_through_filter
 
 
 def run_coach_pipeline(session: Session, coach_id: int, context: PipelineContext, page: CoachPage = None):
@@ -20,7 +21,7 @@ def run_coach_pipeline(session: Session, coach_id: int, context: PipelineContext
 
     # Always save/update coach info (in case of updates)
     coach = CoachService.parse_general_info(page)
-    context.coach_repo.save(coach)
+    save_through_filter(context.write_filter, "Coach", coach.tm_coach_id, coach, context.coach_repo.save)
     
     # Always update tenures (even for existing coaches)
     tenures = CoachService.parse_tenures(page)
@@ -28,7 +29,10 @@ def run_coach_pipeline(session: Session, coach_id: int, context: PipelineContext
     print(f"✅ {status} coach {coach.name} ({coach.tm_coach_id}, with {len(tenures)} tenures)")
     
     for tenure in tenures:
-        context.tenure_repo.save(tenure)
+        save_through_filter(context.write_filter, "Coach_tenure",
+                            (tenure.coach_id, tenure.club_id, tenure.start_date), tenure, context.tenure_repo.save)
+        if context.tenure_index is not None:
+            context.tenure_index.add_tenure(tenure)
     
     # Add to cache to avoid reprocessing in the same session
     context.coach_cache.add(coach.tm_coach_id)
@@ -4,19 +4,23 @@ from pipelines.coach_pipeline import run_coach_pipeline
 from repositories.match.match_base_repository import IMatchRepository
 from repositories.pipeline_context import PipelineContext
 from services.match_service import MatchService
+from utils.write_filter import save_through_filter
 
-def run_match_pipeline(session: Session, match_id: int, league_id: int, season_id: int, context: PipelineContext, page: MatchPage = None):
+def run_match_pipeline(session: Session, match_id: int, league_id: int, season_id: int, context: PipelineContext, page: MatchPage = None,
+                       match_date: str = None):
     db_match_ids = context.match_repo.fetch_all_ids()
     if int(match_id) in context.match_cache or int(match_id) in db_match_ids:
         print(f"⏭️  Skipping match={match_id}")
         return 
 
-    if(page is None):
-        page = MatchPage(match_id=match_id, session=session)
-    
     # Parse match data - will raise exceptions if coach info or result is missing
     try:
-        match = MatchService.parse(league_id, season_id, page)
+        if page is None and context.match_source is not None:
+            match = context.match_source.get_match(match_id, league_id, season_id, match_date)
+        else:
+            if(page is None):
+                page = MatchPage(match_id=match_id, session=session)
+            match = MatchService.parse(league_id, season_id, page)
     except MissingCoachException as e:
         print(f"❌ Match {match_id}: {e.message}")
         raise  # Re-raise to mark this match as failed
@@ -30,7 +34,38 @@ def run_match_pipeline(session: Session, match_id: int, league_id: int, season_i
     run_coach_pipeline(session=session, coach_id=match.away_coach_id, context=context)
 
     # save match
-    context.match_repo.save(match)
+    save_through_filter(context.write_filter, "Match", match.tm_match_id, match, context.match_repo.save)
     context.match_cache.add(match.tm_match_id)
+    if context.standings is not None:
+        context.standings.add_match(match)
     print(f"✅ Saved match {match.tm_match_id}")
     print(f"-----------------------")
+
+
+def run_lightweight_match_pipeline(match_data: dict, league_id: int, season_id: int, context: PipelineContext) -> bool:
+    """
+    Save a match straight from its fixture-list row, resolving coaches through
+    `context.tenure_index` instead of fetching the match report.
+
+    Returns False (nothing saved) when the row lacks a result/date/club or the
+    index has no unique coach for either side; the caller should then fall back
+    to run_match_pipeline.
+    """
+    if context.tenure_index is None:
+        return False
+    match_date = match_data.get('date')
+    if match_data.get('home_goals') is None or match_data.get('away_goals') is None or not match_date:
+        return False
+
+    home_coach_id = context.tenure_index.lookup(match_data.get('home_club_id'), match_date)
+    away_coach_id = context.tenure_index.lookup(match_data.get('away_club_id'), match_date)
+    if home_coach_id is None or away_coach_id is None:
+        return False
+
+    match = MatchService.parse_fixture(league_id, season_id, match_data, home_coach_id, away_coach_id)
+    save_through_filter(context.write_filter, "Match", match.tm_match_id, match, context.match_repo.save)
+    context.match_cache.add(match.tm_match_id)
+    if context.standings is not None:
+        context.standings.add_match(match)
+    print(f"✅ Saved match {match.tm_match_id} (lightweight, coaches {home_coach_id}/{away_coach_id})")
+    return True
@@ -2,7 +2,7 @@ import traceback
 from datetime import datetime
 from requests import Session
 from pages.league_page_matches import LeaguePageMatches
-from pipelines.match_pipeline import run_match_pipeline
+from pipelines.match_pipeline import run_match_pipeline, run_lightweight_match_pipeline
 from repositories.pipeline_context import PipelineContext
 from models.league_season_state import LeagueSeasonState
 
@@ -39,7 +39,8 @@ def update_season_state(context: PipelineContext, league_id: int, season_id: int
     return state
 
 def run_season_pipeline(league_id: int, league_code: str, season_id: int, session: Session, 
-                        context: PipelineContext, incremental: bool = False) -> list:
+                        context: PipelineContext, incremental: bool = False,
+                        lightweight: bool = False) -> list:
     """
     Run the season pipeline to process matches for a league-season.
     
@@ -53,6 +54,9 @@ def run_season_pipeline(league_id: int, league_code: str, season_id: int, sessio
         session: HTTP session for requests
         context: Pipeline context with repositories
         incremental: Deprecated - kept for backward compatibility but ignored
+        lightweight: Build matches from the fixture list + context.tenure_index and only
+            fetch the match report when the index can't resolve both coaches
+            (attendance is stored as unknown for lightweight matches)
     
     Returns:
         List of match IDs that had errors during processing
@@ -109,6 +113,8 @@ def run_season_pipeline(league_id: int, league_code: str, season_id: int, sessio
     # Track last processed match for informational/state tracking purposes only
     last_processed_id = None
     last_processed_date = None
+    reports_avoided = 0
+    reports_fetched = 0
     
     for idx, match_data in enumerate(matches_to_process, 1):
         match_id = match_data.get('match_id')
@@ -125,8 +131,12 @@ def run_season_pipeline(league_id: int, league_code: str, season_id: int, sessio
                 break
         try:
             print(f"💬 Processing match={match_id} ({idx}/{len(matches_to_process)}) Date: {match_date_str}")
-            run_match_pipeline(session=session, match_id=match_id, league_id=league_id, 
-                             season_id=season_id, context=context)
+            if lightweight and run_lightweight_match_pipeline(match_data, league_id, season_id, context):
+                reports_avoided += 1
+            else:
+                run_match_pipeline(session=session, match_id=match_id, league_id=league_id, 
+                                 season_id=season_id, context=context, match_date=match_date_str)
+                reports_fetched += 1
             total_processed += 1
             # Update tracking info
             if match_date_str:
@@ -144,6 +154,9 @@ def run_season_pipeline(league_id: int, league_code: str, season_id: int, sessio
                 last_processed_id = match_id
                 last_processed_date = match_datetime
 
+    if lightweight:
+        print(f"🪶 Lightweight ingestion: {reports_avoided} match reports avoided, {reports_fetched} fetched")
+
     # Update final state for tracking/informational purposes
     if total_processed > 0 or accumulated_errors:
         # Calculate total across all runs
@@ -18,4 +18,18 @@ class ICoachRepository(Protocol):
         ...
 
     def get_coach_id_by_date(self, club_id: int, match_date) -> int:
-        ...
\ No newline at end of file
+        ...
+
+
+class IAsyncCoachRepository(Protocol):
+    async def fetch_all_ids(self) -> set[int]:
+        ...
+
+    async def save(self, coach: Coach) -> Any:
+        ...
+
+    async def get_coach_id_by_name(self, name: str) -> int:
+        ...
+
+    async def get_coach_id_by_date(self, club_id: int, match_date) -> int:
+        ...
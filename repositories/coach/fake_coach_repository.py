@@ -1,6 +1,7 @@
+import asyncio
 from typing import List
 from models.coach import Coach
-from repositories.coach.coach_base_repository import ICoachRepository
+from repositories.coach.coach_base_repository import ICoachRepository, IAsyncCoachRepository
 
 class FakeCoachRepository(ICoachRepository):
     def __init__(self, initial_coaches=None):
@@ -14,4 +15,19 @@ class FakeCoachRepository(ICoachRepository):
         return coach  # mimic persistence result
 
     def fetch_all_ids(self) -> set[int]:
-        return self.coaches
\ No newline at end of file
+        return self.coaches
+
+
+class AsyncFakeCoachRepository(IAsyncCoachRepository):
+    """Async twin of FakeCoachRepository; each call yields to the event loop like a real request."""
+    def __init__(self, initial_coaches=None):
+        self._repo = FakeCoachRepository(initial_coaches)
+        self.coaches = self._repo.coaches
+
+    async def save(self, coach: Coach):
+        await asyncio.sleep(0)
+        return self._repo.save(coach)
+
+    async def fetch_all_ids(self) -> set[int]:
+        await asyncio.sleep(0)
+        return self._repo.fetch_all_ids()
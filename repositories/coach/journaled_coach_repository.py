@@ -0,0 +1,27 @@
+from datetime import date
+
+from models.coach import Coach
+from repositories.coach.coach_base_repository import ICoachRepository
+from repositories.write_journal import WriteJournal
+
+
+class JournaledCoachRepository(ICoachRepository):
+    """Appends saves to the write-behind journal; reads go to `reader` plus unflushed rows."""
+
+    def __init__(self, journal: WriteJournal, reader: ICoachRepository):
+        self.journal = journal
+        self.reader = reader
+
+    def save(self, coach: Coach):
+        data = coach.model_dump(mode="json")
+        self.journal.append("Coach", data)
+        return [data]
+
+    def fetch_all_ids(self) -> set[int]:
+        return set(self.reader.fetch_all_ids()) | {r["tm_coach_id"] for r in self.journal.pending_rows("Coach")}
+
+    def get_coach_id_by_name(self, name: str) -> int:
+        return self.reader.get_coach_id_by_name(name)
+
+    def get_coach_id_by_date(self, club_id: int, match_date: date) -> int:
+        return self.reader.get_coach_id_by_date(club_id, match_date)
@@ -0,0 +1,37 @@
+from datetime import date
+from typing import Optional
+
+from models.coach import Coach
+from repositories.coach.coach_base_repository import ICoachRepository
+from repositories.sqlite_database import SqliteDatabase
+
+
+class SqliteCoachRepository(ICoachRepository):
+    """
+    Coach repository backed by a local SQLite database. With `upstream` set it is
+    a read-through replica: reads stay local, saves go upstream first and are
+    mirrored locally once upstream accepted them.
+    """
+
+    def __init__(self, db: SqliteDatabase, upstream: Optional[ICoachRepository] = None):
+        self.db = db
+        self.upstream = upstream
+
+    def save(self, coach: Coach):
+        data = coach.model_dump(mode="json")
+        result = self.upstream.save(coach) if self.upstream is not None else [data]
+        self.db.upsert("Coach", [data])
+        return result
+
+    def fetch_all_ids(self) -> set[int]:
+        return self.db.scalar_set('SELECT tm_coach_id FROM "Coach"')
+
+    def get_coach_id_by_name(self, name: str) -> int:
+        return self.db.query('SELECT tm_coach_id FROM "Coach" WHERE name = ?', (name,))
+
+    def get_coach_id_by_date(self, club_id: int, match_date: date) -> int:
+        return self.db.query(
+            'SELECT coach_id FROM "Coach_tenure" WHERE club_id = ? AND start_date <= ? '
+            'AND (end_date IS NULL OR end_date >= ?) LIMIT 1',
+            (club_id, str(match_date), str(match_date)),
+        )
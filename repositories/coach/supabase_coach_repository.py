@@ -2,21 +2,31 @@ from datetime import date
 from supabase import create_client, Client
 from models.coach import Coach
 from repositories.coach.coach_base_repository import ICoachRepository
+from repositories.tenure.coach_tenure_index import CoachTenureIndex, FIRST_MATCH
+from utils.warm_cache import WarmCache
 import os
 
 class SupabaseCoachRepository(ICoachRepository):
-    def __init__(self, client: Client):
+    def __init__(self, client: Client, tenure_index: CoachTenureIndex = None, warm_cache: WarmCache = None):
         self.client = client
+        # When set, coach-at-date lookups are answered in memory instead of querying Coach_tenure
+        self.tenure_index = tenure_index
+        # When set, ID lookups are served from the cross-run cache
+        self.warm_cache = warm_cache
 
     def save(self, coach: Coach):
         try:
             data = coach.model_dump(mode="json")
             response = self.client.table("Coach").upsert(data).execute()
+            if self.warm_cache is not None:
+                self.warm_cache.add_id("Coach", coach.tm_coach_id)
             return response.data  # APIResponse has .data
         except Exception as e:
             raise Exception(f"Supabase save error: {e}")
         
     def fetch_all_ids(self) -> set[int]:
+        if self.warm_cache is not None:
+            return self.warm_cache.ids["Coach"]
         response = self.client.table("Coach").select("tm_coach_id").execute()
         return {row["tm_coach_id"] for row in response.data}
     
@@ -25,6 +35,9 @@ class SupabaseCoachRepository(ICoachRepository):
         return response.data
     
     def get_coach_id_by_date(self, club_id: int, match_date: date) -> int:
+        if self.tenure_index is not None:
+            coach_id = self.tenure_index.lookup(club_id, match_date, policy=FIRST_MATCH)
+            return [{"coach_id": coach_id}] if coach_id is not None else []
         response = self.client.table("Coach_tenure") \
             .select("coach_id") \
             .eq("club_id", club_id) \
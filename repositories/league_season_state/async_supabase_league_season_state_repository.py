@@ -0,0 +1,54 @@
+from datetime import datetime
+from typing import Optional
+from supabase import AsyncClient
+from models.league_season_state import LeagueSeasonState
+from repositories.league_season_state.league_season_state_base_repository import IAsyncLeagueSeasonStateRepository
+
+
+class AsyncSupabaseLeagueSeasonStateRepository(IAsyncLeagueSeasonStateRepository):
+    def __init__(self, client: AsyncClient):
+        self.client = client
+
+    async def get_state(self, league_id: int, season_id: int) -> Optional[LeagueSeasonState]:
+        """Get the state for a specific league-season combination"""
+        try:
+            response = await self.client.table("league_season_state") \
+                .select("*") \
+                .eq("league_id", league_id) \
+                .eq("season_id", season_id) \
+                .execute()
+
+            if response.data and len(response.data) > 0:
+                data = response.data[0]
+                if data.get('last_processed_match_date'):
+                    data['last_processed_match_date'] = datetime.fromisoformat(data['last_processed_match_date'])
+                if data.get('last_updated_at'):
+                    data['last_updated_at'] = datetime.fromisoformat(data['last_updated_at'])
+                return LeagueSeasonState(**data)
+            return None
+        except Exception as e:
+            print(f"Error fetching state for league_id={league_id}, season_id={season_id}: {e}")
+            return None
+
+    async def save_state(self, state: LeagueSeasonState):
+        """Save or update the state for a league-season"""
+        try:
+            data = state.model_dump(mode="json")
+            response = await self.client.table("league_season_state") \
+                .upsert(data, on_conflict="league_id,season_id") \
+                .execute()
+            return response.data
+        except Exception as e:
+            raise Exception(f"Supabase save state error: {e}")
+
+    async def delete_state(self, league_id: int, season_id: int):
+        """Delete the state for a league-season"""
+        try:
+            response = await self.client.table("league_season_state") \
+                .delete() \
+                .eq("league_id", league_id) \
+                .eq("season_id", season_id) \
+                .execute()
+            return response.data
+        except Exception as e:
+            raise Exception(f"Supabase delete state error: {e}")
@@ -1,6 +1,7 @@
+import asyncio
 from typing import Optional
 from models.league_season_state import LeagueSeasonState
-from repositories.league_season_state.league_season_state_base_repository import ILeagueSeasonStateRepository
+from repositories.league_season_state.league_season_state_base_repository import ILeagueSeasonStateRepository, IAsyncLeagueSeasonStateRepository
 
 
 class FakeLeagueSeasonStateRepository(ILeagueSeasonStateRepository):
@@ -23,3 +24,22 @@ class FakeLeagueSeasonStateRepository(ILeagueSeasonStateRepository):
         if key in self.states:
             del self.states[key]
         return None
+
+
+class AsyncFakeLeagueSeasonStateRepository(IAsyncLeagueSeasonStateRepository):
+    """Async twin of FakeLeagueSeasonStateRepository"""
+    def __init__(self):
+        self._repo = FakeLeagueSeasonStateRepository()
+        self.states = self._repo.states
+
+    async def get_state(self, league_id: int, season_id: int) -> Optional[LeagueSeasonState]:
+        await asyncio.sleep(0)
+        return self._repo.get_state(league_id, season_id)
+
+    async def save_state(self, state: LeagueSeasonState):
+        await asyncio.sleep(0)
+        return self._repo.save_state(state)
+
+    async def delete_state(self, league_id: int, season_id: int):
+        await asyncio.sleep(0)
+        return self._repo.delete_state(league_id, season_id)
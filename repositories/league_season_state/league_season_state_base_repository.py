@@ -19,3 +19,17 @@ class ILeagueSeasonStateRepository(Protocol):
     def delete_state(self, league_id: int, season_id: int) -> Any:
         """Delete the state for a league-season"""
         ...
+
+
+class IAsyncLeagueSeasonStateRepository(Protocol):
+    async def get_state(self, league_id: int, season_id: int) -> Optional[LeagueSeasonState]:
+        """Get the state for a specific league-season combination"""
+        ...
+
+    async def save_state(self, state: LeagueSeasonState) -> Any:
+        """Save or update the state for a league-season"""
+        ...
+
+    async def delete_state(self, league_id: int, season_id: int) -> Any:
+        """Delete the state for a league-season"""
+        ...
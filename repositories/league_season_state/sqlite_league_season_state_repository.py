@@ -0,0 +1,50 @@
+from datetime import datetime
+from typing import Optional
+
+from models.league_season_state import LeagueSeasonState
+from repositories.league_season_state.league_season_state_base_repository import ILeagueSeasonStateRepository
+from repositories.sqlite_database import SqliteDatabase
+
+
+class SqliteLeagueSeasonStateRepository(ILeagueSeasonStateRepository):
+    """league_season_state on local SQLite; forwards saves and deletes to `upstream` when set."""
+
+    def __init__(self, db: SqliteDatabase, upstream: Optional[ILeagueSeasonStateRepository] = None):
+        self.db = db
+        self.upstream = upstream
+
+    def get_state(self, league_id: int, season_id: int) -> Optional[LeagueSeasonState]:
+        """Get the state for a specific league-season combination"""
+        rows = self.db.query(
+            'SELECT * FROM "league_season_state" WHERE league_id = ? AND season_id = ?', (league_id, season_id)
+        )
+        if not rows:
+            if self.upstream is None:
+                return None
+            # Not mirrored yet: read through once and keep a local copy
+            state = self.upstream.get_state(league_id, season_id)
+            if state is not None:
+                self.db.upsert("league_season_state", [state.model_dump(mode="json")])
+            return state
+        data = rows[0]
+        data.pop("updated_at", None)
+        if data.get('last_processed_match_date'):
+            data['last_processed_match_date'] = datetime.fromisoformat(data['last_processed_match_date'])
+        if data.get('last_updated_at'):
+            data['last_updated_at'] = datetime.fromisoformat(data['last_updated_at'])
+        data['failed_match_ids'] = data.get('failed_match_ids') or []
+        return LeagueSeasonState(**data)
+
+    def save_state(self, state: LeagueSeasonState):
+        """Save or update the state for a league-season"""
+        data = state.model_dump(mode="json")
+        result = self.upstream.save_state(state) if self.upstream is not None else [data]
+        self.db.upsert("league_season_state", [data])
+        return result
+
+    def delete_state(self, league_id: int, season_id: int):
+        """Delete the state for a league-season"""
+        if self.upstream is not None:
+            self.upstream.delete_state(league_id, season_id)
+        self.db.delete("league_season_state", league_id=league_id, season_id=season_id)
+        return None
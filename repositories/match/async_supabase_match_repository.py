@@ -0,0 +1,25 @@
+from supabase import AsyncClient
+from models.match import Match
+from repositories.match.match_base_repository import IAsyncMatchRepository
+
+
+class AsyncSupabaseMatchRepository(IAsyncMatchRepository):
+    def __init__(self, client: AsyncClient):
+        self.client = client
+
+    async def save(self, match: Match):
+        try:
+            data = match.model_dump(mode="json")
+            response = await self.client.table("Match").upsert(data).execute()
+            return response.data
+        except Exception as e:
+            raise Exception(f"Supabase save error: {e}")
+
+    async def fetch_all_ids(self) -> set[int]:
+        response = await self.client.table("Match").select("tm_match_id").execute()
+        return {row["tm_match_id"] for row in response.data}
+
+    async def fetch_ids_by_year_league(self, season_id: int, league_id: int) -> set[int]:
+        response = await self.client.table("Match").select("tm_match_id") \
+            .eq("season_id", season_id).eq("league_id", league_id).execute()
+        return {row["tm_match_id"] for row in response.data}
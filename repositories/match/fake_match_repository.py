@@ -1,6 +1,7 @@
+import asyncio
 from typing import List
 from models.match import Match
-from repositories.match.match_base_repository import IMatchRepository
+from repositories.match.match_base_repository import IMatchRepository, IAsyncMatchRepository
 
 class FakeMatchRepository(IMatchRepository):
     def __init__(self, initial_matches=None):
@@ -17,4 +18,23 @@ class FakeMatchRepository(IMatchRepository):
         return set()
 
     def fetch_all_ids(self) -> set[int]:
-        return self.matches
\ No newline at end of file
+        return self.matches
+
+
+class AsyncFakeMatchRepository(IAsyncMatchRepository):
+    """Async twin of FakeMatchRepository; each call yields to the event loop like a real request."""
+    def __init__(self, initial_matches=None):
+        self._repo = FakeMatchRepository(initial_matches)
+        self.matches = self._repo.matches
+
+    async def save(self, match: Match):
+        await asyncio.sleep(0)
+        return self._repo.save(match)
+
+    async def fetch_ids_by_year_league(self, season_id: int, league_id: int) -> set[int]:
+        await asyncio.sleep(0)
+        return self._repo.fetch_ids_by_year_league(season_id, league_id)
+
+    async def fetch_all_ids(self) -> set[int]:
+        await asyncio.sleep(0)
+        return self._repo.fetch_all_ids()
@@ -0,0 +1,26 @@
+from models.match import Match
+from repositories.match.match_base_repository import IMatchRepository
+from repositories.write_journal import WriteJournal
+
+
+class JournaledMatchRepository(IMatchRepository):
+    """Appends saves to the write-behind journal; reads go to `reader` plus unflushed rows."""
+
+    def __init__(self, journal: WriteJournal, reader: IMatchRepository):
+        self.journal = journal
+        self.reader = reader
+
+    def save(self, match: Match):
+        data = match.model_dump(mode="json")
+        self.journal.append("Match", data)
+        return [data]
+
+    def fetch_all_ids(self) -> set[int]:
+        return set(self.reader.fetch_all_ids()) | {r["tm_match_id"] for r in self.journal.pending_rows("Match")}
+
+    def fetch_ids_by_year_league(self, season_id: int, league_id: int) -> set[int]:
+        pending = {
+            r["tm_match_id"] for r in self.journal.pending_rows("Match")
+            if r["season_id"] == season_id and r["league_id"] == league_id
+        }
+        return set(self.reader.fetch_ids_by_year_league(season_id=season_id, league_id=league_id)) | pending
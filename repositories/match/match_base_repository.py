@@ -17,4 +17,14 @@ class IMatchRepository(Protocol):
     def save(self, match: Match) -> Any:
         ...
 
-    
\ No newline at end of file
+    
+
+class IAsyncMatchRepository(Protocol):
+    async def fetch_all_ids(self) -> set[int]:
+        ...
+
+    async def fetch_ids_by_year_league(self, season_id: int, league_id: int) -> set[int]:
+        ...
+
+    async def save(self, match: Match) -> Any:
+        ...
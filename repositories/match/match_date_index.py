@@ -0,0 +1,88 @@
+from collections import defaultdict
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional
+
+import pandas as pd
+from supabase import Client
+
+MATCH_COLUMNS = "tm_match_id, date, home_team_score, away_team_score, home_club_id, away_club_id, league_id"
+FRAME_COLUMNS = [c.strip() for c in MATCH_COLUMNS.split(",")]
+
+# Keep `in.(...)` filters well below URL length limits
+_IN_CHUNK = 300
+
+
+def _chunks(values: List[Any], size: int = _IN_CHUNK) -> Iterable[List[Any]]:
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+class MatchDateIndex:
+    """
+    In-memory `date -> matches` index over a prefetched slice of the Match table,
+    plus the names of every club those matches reference.
+
+    Built with a handful of keyset-paginated reads (`from_client`) instead of one
+    Match query and one Club query per odds row.
+    """
+
+    def __init__(self, matches: Iterable[Dict[str, Any]] = (), club_names: Optional[Dict[int, str]] = None):
+        self.by_date: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self.club_names: Dict[int, str] = dict(club_names or {})
+        self.match_count = 0
+        self.add_matches(matches)
+
+    def add_matches(self, matches: Iterable[Dict[str, Any]]) -> None:
+        for match in matches:
+            self.by_date[str(match["date"])[:10]].append(match)
+            self.match_count += 1
+
+    def candidates(self, match_date: Any, league_ids: Optional[Iterable[int]] = None) -> List[Dict[str, Any]]:
+        """Matches played on `match_date`, optionally restricted to `league_ids`."""
+        matches = self.by_date.get(str(match_date)[:10], [])
+        if league_ids is None:
+            return list(matches)
+        league_ids = set(league_ids)
+        return [m for m in matches if m.get("league_id") in league_ids]
+
+    def to_frame(self) -> pd.DataFrame:
+        """All indexed matches as a DataFrame with the MATCH_COLUMNS columns."""
+        rows = [m for matches in self.by_date.values() for m in matches]
+        return pd.DataFrame(rows, columns=FRAME_COLUMNS)
+
+    def club_ids(self) -> set:
+        ids = set()
+        for matches in self.by_date.values():
+            for m in matches:
+                ids.update(i for i in (m.get("home_club_id"), m.get("away_club_id")) if i)
+        return ids
+
+    @classmethod
+    def from_client(cls, client: Client, start_date: date, end_date: date,
+                    league_ids: Optional[Iterable[int]] = None, page_size: int = 1000) -> "MatchDateIndex":
+        """
+        Load every Match in [start_date, end_date] (restricted to `league_ids` when
+        given, all leagues otherwise) and the names of the clubs involved.
+        """
+        index = cls()
+        league_chunks = list(_chunks(sorted(set(league_ids)))) if league_ids is not None else [None]
+        for chunk in league_chunks:
+            last_id = None
+            while True:
+                query = client.table("Match").select(MATCH_COLUMNS) \
+                    .gte("date", str(start_date)) \
+                    .lte("date", str(end_date))
+                if chunk is not None:
+                    query = query.in_("league_id", chunk)
+                if last_id is not None:
+                    query = query.gt("tm_match_id", last_id)
+                batch = query.order("tm_match_id").limit(page_size).execute().data or []
+                index.add_matches(batch)
+                if len(batch) < page_size:
+                    break
+                last_id = batch[-1]["tm_match_id"]
+
+        for chunk in _chunks(sorted(index.club_ids())):
+            rows = client.table("Club").select("tm_club_id, name").in_("tm_club_id", chunk).execute().data or []
+            index.club_names.update({r["tm_club_id"]: r["name"] for r in rows})
+        return index
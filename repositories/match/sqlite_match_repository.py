@@ -0,0 +1,27 @@
+from typing import Optional
+
+from models.match import Match
+from repositories.match.match_base_repository import IMatchRepository
+from repositories.sqlite_database import SqliteDatabase
+
+
+class SqliteMatchRepository(IMatchRepository):
+    """Match repository on local SQLite; forwards saves to `upstream` when set."""
+
+    def __init__(self, db: SqliteDatabase, upstream: Optional[IMatchRepository] = None):
+        self.db = db
+        self.upstream = upstream
+
+    def save(self, match: Match):
+        data = match.model_dump(mode="json")
+        result = self.upstream.save(match) if self.upstream is not None else [data]
+        self.db.upsert("Match", [data])
+        return result
+
+    def fetch_all_ids(self) -> set[int]:
+        return self.db.scalar_set('SELECT tm_match_id FROM "Match"')
+
+    def fetch_ids_by_year_league(self, season_id: int, league_id: int) -> set[int]:
+        return self.db.scalar_set(
+            'SELECT tm_match_id FROM "Match" WHERE season_id = ? AND league_id = ?', (season_id, league_id)
+        )
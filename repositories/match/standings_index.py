@@ -0,0 +1,252 @@
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from supabase import Client
+
+MATCH_COLUMNS = "tm_match_id, date, league_id, season_id, home_club_id, away_club_id, home_team_score, away_team_score"
+
+# Cumulative per-club columns of a table, in the order they are stored
+STATS = ["played", "won", "drawn", "lost", "points", "goals_for", "goals_against"]
+_POINTS, _GF, _GA = STATS.index("points"), STATS.index("goals_for"), STATS.index("goals_against")
+
+SeasonKey = Tuple[int, int]  # (league_id, season_id)
+
+
+def _day(value: Any) -> np.datetime64:
+    return np.datetime64(str(value)[:10], "D")
+
+
+def _get(match: Any, field: str) -> Any:
+    return match.get(field) if isinstance(match, dict) else getattr(match, field, None)
+
+
+class SeasonStandings:
+    """
+    League table of one league-season after every matchday.
+
+    Matches are expanded to one row per club and side; per-matchday increments
+    are summed into a (days x clubs x STATS) array with `np.add.at` and turned
+    into cumulative tables with one `cumsum` down the date axis. Positions come
+    from a row-wise `lexsort` on points, goal difference, goals scored (club id
+    breaks remaining ties).
+
+    A match on or after the last matchday extends the tables in place; an
+    earlier or re-saved match makes the next lookup rebuild the season.
+    """
+
+    def __init__(self):
+        # tm_match_id -> (day, home, away, home_goals, away_goals)
+        self.matches: Dict[int, Tuple[np.datetime64, int, int, int, int]] = {}
+        self.days = np.empty(0, dtype="datetime64[D]")
+        self.clubs = np.empty(0, dtype=np.int64)
+        self.tables = np.zeros((0, 0, len(STATS)), dtype=np.int64)
+        self.positions = np.zeros((0, 0), dtype=np.int64)
+        self._stale = False
+
+    def __len__(self) -> int:
+        return len(self.matches)
+
+    def add(self, match_id: Any, match_date: Any, home: Any, away: Any, home_goals: Any, away_goals: Any) -> bool:
+        """Add or replace one played match; returns False when it is not usable."""
+        if any(v in (None, "") for v in (match_id, match_date, home, away, home_goals, away_goals)):
+            return False
+        entry = (_day(match_date), int(home), int(away), int(home_goals), int(away_goals))
+        match_id = int(match_id)
+        previous = self.matches.get(match_id)
+        if previous == entry:
+            return True
+        self.matches[match_id] = entry
+        known = {int(home), int(away)} <= set(self.clubs.tolist())
+        if self._stale or previous is not None or not known or (len(self.days) and entry[0] < self.days[-1]):
+            self._stale = True
+        else:
+            self._append(entry)
+        return True
+
+    # ── Building ─────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _increments(entries: List[Tuple]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Per club-side rows: (day, club, stat increments)."""
+        arr = np.array([(e[1], e[2], e[3], e[4]) for e in entries], dtype=np.int64).reshape(-1, 4)
+        days = np.array([e[0] for e in entries], dtype="datetime64[D]")
+        club = np.concatenate([arr[:, 0], arr[:, 1]])
+        goals_for = np.concatenate([arr[:, 2], arr[:, 3]])
+        goals_against = np.concatenate([arr[:, 3], arr[:, 2]])
+        won, drawn = goals_for > goals_against, goals_for == goals_against
+        lost = goals_for < goals_against
+        stats = np.column_stack([np.ones_like(club), won, drawn, lost, 3 * won + drawn, goals_for, goals_against])
+        return np.concatenate([days, days]), club, stats.astype(np.int64)
+
+    def _rank(self, tables: np.ndarray) -> np.ndarray:
+        points, gf, ga = tables[..., _POINTS], tables[..., _GF], tables[..., _GA]
+        club_order = np.broadcast_to(self.clubs, points.shape)
+        order = np.lexsort((club_order, -gf, -(gf - ga), -points), axis=-1)
+        positions = np.empty_like(order)
+        np.put_along_axis(positions, order, np.arange(1, points.shape[-1] + 1), axis=-1)
+        return positions
+
+    def _build(self) -> None:
+        entries = list(self.matches.values())
+        self._stale = False
+        if not entries:
+            self.__init__()
+            return
+        days, club, stats = self._increments(entries)
+        self.days = np.unique(days)
+        self.clubs = np.unique(club)
+        increments = np.zeros((len(self.days), len(self.clubs), len(STATS)), dtype=np.int64)
+        np.add.at(increments, (np.searchsorted(self.days, days), np.searchsorted(self.clubs, club)), stats)
+        self.tables = np.cumsum(increments, axis=0)
+        self.positions = self._rank(self.tables)
+
+    def _append(self, entry: Tuple) -> None:
+        days, club, stats = self._increments([entry])
+        row = self.tables[-1].copy() if len(self.days) else np.zeros((len(self.clubs), len(STATS)), dtype=np.int64)
+        np.add.at(row, np.searchsorted(self.clubs, club), stats)
+        if len(self.days) and self.days[-1] == days[0]:
+            self.tables[-1] = row
+            self.positions[-1] = self._rank(row)
+        else:
+            self.days = np.append(self.days, days[0])
+            self.tables = np.concatenate([self.tables, row[None]])
+            self.positions = np.concatenate([self.positions, self._rank(row)[None]])
+
+    def _ensure(self) -> None:
+        if self._stale:
+            self._build()
+
+    # ── Lookups ──────────────────────────────────────────────────────────────
+
+    def table(self, as_of: Any, before: bool = True) -> pd.DataFrame:
+        """The whole table as of `as_of` (matches strictly before it unless `before=False`), by position."""
+        self._ensure()
+        row = np.searchsorted(self.days, _day(as_of), side="left" if before else "right") - 1
+        stats = self.tables[row] if row >= 0 else np.zeros((len(self.clubs), len(STATS)), dtype=np.int64)
+        df = pd.DataFrame(stats, columns=STATS).assign(club_id=self.clubs)
+        df["goal_difference"] = df["goals_for"] - df["goals_against"]
+        df["position"] = self.positions[row] if row >= 0 else None
+        return df.sort_values("position" if row >= 0 else "club_id").reset_index(drop=True)
+
+    def as_of_many(self, club_ids: Iterable[Any], dates: Iterable[Any], before: bool = True) -> pd.DataFrame:
+        """
+        Vectorized `as_of`: one row per (club, date) with position, points,
+        played, ... (NaN for clubs not in the season; position NaN before the
+        first matchday).
+        """
+        self._ensure()
+        clubs = np.asarray(pd.to_numeric(pd.Series(list(club_ids)), errors="coerce"), dtype=float)
+        days = np.asarray(list(dates), dtype="datetime64[D]")
+        col = np.searchsorted(self.clubs, np.nan_to_num(clubs, nan=-1).astype(np.int64))
+        known = (col < len(self.clubs)) & ~np.isnan(clubs) & ~np.isnat(days)
+        known[known] = self.clubs[col[known]] == clubs[known]
+        row = np.searchsorted(self.days, days, side="left" if before else "right") - 1
+
+        out = pd.DataFrame(np.nan, index=range(len(clubs)), columns=["position"] + STATS + ["goal_difference"])
+        hit = known & (row >= 0)
+        out.loc[known, STATS] = 0
+        out.loc[hit, STATS] = self.tables[row[hit], col[hit]]
+        out.loc[hit, "position"] = self.positions[row[hit], col[hit]]
+        out["goal_difference"] = out["goals_for"] - out["goals_against"]
+        return out
+
+    def as_of(self, club_id: Any, match_date: Any, before: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        `club_id`'s position, points, played, ... after the matches before
+        `match_date` (on or before it with `before=False`). None when the club
+        is not in this season; position None before the first matchday.
+        """
+        row = self.as_of_many([club_id], [_day(match_date)], before=before).iloc[0]
+        if np.isnan(row["played"]):
+            return None
+        result = {c: int(row[c]) for c in STATS + ["goal_difference"]}
+        result["position"] = None if np.isnan(row["position"]) else int(row["position"])
+        return result
+
+    def span(self) -> Optional[Tuple[np.datetime64, np.datetime64]]:
+        self._ensure()
+        return (self.days[0], self.days[-1]) if len(self.days) else None
+
+
+class StandingsIndex:
+    """
+    In-memory league tables of every loaded league-season, kept current as
+    matches are saved (`add_match`), answering "where did club X stand
+    before date D?".
+    """
+
+    def __init__(self):
+        self.seasons: Dict[SeasonKey, SeasonStandings] = {}
+        self.club_seasons: Dict[int, set] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return sum(len(s) for s in self.seasons.values())
+
+    def season(self, league_id: Any, season_id: Any) -> Optional[SeasonStandings]:
+        return self.seasons.get((int(league_id), int(season_id)))
+
+    def add_match(self, match: Any) -> bool:
+        """Add a Match model or Match row (dict); ignored without league, season or result."""
+        league_id, season_id = _get(match, "league_id"), _get(match, "season_id")
+        if league_id in (None, "") or season_id in (None, ""):
+            return False
+        key = (int(league_id), int(season_id))
+        standings = self.seasons.setdefault(key, SeasonStandings())
+        home, away = _get(match, "home_club_id"), _get(match, "away_club_id")
+        added = standings.add(_get(match, "tm_match_id"), _get(match, "date"), home, away,
+                              _get(match, "home_team_score"), _get(match, "away_team_score"))
+        if added:
+            self.club_seasons[int(home)].add(key)
+            self.club_seasons[int(away)].add(key)
+        return added
+
+    def add_matches(self, matches: Iterable[Any]) -> int:
+        return sum(self.add_match(m) for m in matches)
+
+    def _season_for(self, club_id: int, day: np.datetime64) -> Optional[SeasonStandings]:
+        """The club's loaded season with the latest first matchday on or before `day`."""
+        best, best_start = None, None
+        for key in sorted(self.club_seasons.get(club_id, ())):
+            span = self.seasons[key].span()
+            if span is not None and span[0] <= day and (best_start is None or span[0] > best_start):
+                best, best_start = self.seasons[key], span[0]
+        return best
+
+    def as_of(self, club_id: Any, match_date: Any, league_id: Any = None, season_id: Any = None,
+              before: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Standing of `club_id` before `match_date` in the given league-season, or
+        (without one) in its latest loaded season that had started by the date.
+        Clubs also playing cup competitions should pass league_id/season_id.
+        """
+        if club_id in (None, "") or match_date in (None, ""):
+            return None
+        if league_id is not None and season_id is not None:
+            standings = self.season(league_id, season_id)
+        else:
+            standings = self._season_for(int(club_id), _day(match_date))
+        return standings.as_of(club_id, match_date, before=before) if standings is not None else None
+
+    @classmethod
+    def from_client(cls, client: Client, seasons: Iterable[SeasonKey], page_size: int = 1000) -> "StandingsIndex":
+        index = cls()
+        for league_id, season_id in seasons:
+            index.load(client, league_id, season_id, page_size=page_size)
+        return index
+
+    def load(self, client: Client, league_id: int, season_id: int, page_size: int = 1000) -> int:
+        """Keyset scan of one league-season's Match rows."""
+        added, last_id = 0, None
+        while True:
+            query = client.table("Match").select(MATCH_COLUMNS) \
+                .eq("league_id", league_id) \
+                .eq("season_id", season_id)
+            if last_id is not None:
+                query = query.gt("tm_match_id", last_id)
+            batch = query.order("tm_match_id").limit(page_size).execute().data or []
+            added += self.add_matches(batch)
+            if len(batch) < page_size:
+                return added
+            last_id = batch[-1]["tm_match_id"]
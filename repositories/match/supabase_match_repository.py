@@ -1,24 +1,37 @@
 from supabase import create_client, Client
 from models.match import Match
 from repositories.match.match_base_repository import IMatchRepository
+from utils.warm_cache import WarmCache
 
 class SupabaseMatchRepository(IMatchRepository):
-    def __init__(self, client: Client):
+    def __init__(self, client: Client, warm_cache: WarmCache = None):
         self.client = client
+        # When set, ID lookups are served from the cross-run cache
+        self.warm_cache = warm_cache
 
     def save(self, match: Match):
         try:
             data = match.model_dump(mode="json")
             response = self.client.table("Match").upsert(data).execute()
+            if self.warm_cache is not None:
+                self.warm_cache.add_match(match.tm_match_id, match.season_id, match.league_id)
             return response.data  # APIResponse has .data
         except Exception as e:
             raise Exception(f"Supabase save error: {e}")
         
     def fetch_all_ids(self) -> set[int]:
+        if self.warm_cache is not None:
+            return self.warm_cache.ids["Match"]
         response = self.client.table("Match").select("tm_match_id").execute()
         return {row["tm_match_id"] for row in response.data}
     
     def fetch_ids_by_year_league(self, season_id: int, league_id: int) -> set[int]:
+        if self.warm_cache is not None:
+            return self.warm_cache.match_ids(season_id, league_id,
+                                             lambda: self._query_ids_by_year_league(season_id, league_id))
+        return self._query_ids_by_year_league(season_id, league_id)
+
+    def _query_ids_by_year_league(self, season_id: int, league_id: int) -> set[int]:
         response = self.client.table("Match").select("tm_match_id").eq("season_id", season_id).eq("league_id", league_id).execute()
         return {row["tm_match_id"] for row in response.data}
     
@@ -1,10 +1,17 @@
 from dataclasses import dataclass
 from datetime import date
+from typing import Optional
 
-from repositories.coach.coach_base_repository import ICoachRepository
-from repositories.match.match_base_repository import IMatchRepository
-from repositories.tenure.coach_tenure_base_repository import ICoachTenureRepository
-from repositories.league_season_state.league_season_state_base_repository import ILeagueSeasonStateRepository
+from repositories.coach.coach_base_repository import ICoachRepository, IAsyncCoachRepository
+from repositories.match.match_base_repository import IMatchRepository, IAsyncMatchRepository
+from repositories.tenure.coach_tenure_base_repository import ICoachTenureRepository, IAsyncCoachTenureRepository
+from repositories.league_season_state.league_season_state_base_repository import (
+    ILeagueSeasonStateRepository, IAsyncLeagueSeasonStateRepository)
+from repositories.match.standings_index import StandingsIndex
+from repositories.tenure.coach_tenure_index import CoachTenureIndex
+from services.match_source import IMatchSource
+from utils.id_set import IdSet
+from utils.write_filter import WriteFilter
 
 @dataclass
 class PipelineContext:
@@ -13,6 +20,26 @@ class PipelineContext:
     tenure_repo: ICoachTenureRepository
     state_repo: ILeagueSeasonStateRepository
 
-    coach_cache: set[int]
-    match_cache: set[int]
-    tenure_cache: list[tuple[int, int, date]]
\ No newline at end of file
+    coach_cache: set[int] | IdSet
+    match_cache: set[int] | IdSet
+    tenure_cache: list[tuple[int, int, date]]
+    write_filter: Optional[WriteFilter] = None
+    tenure_index: Optional[CoachTenureIndex] = None
+    standings: Optional[StandingsIndex] = None  # kept current with every saved match
+    match_source: Optional[IMatchSource] = None  # None = parse the HTML match report
+
+
+@dataclass
+class AsyncPipelineContext:
+    coach_repo: IAsyncCoachRepository
+    match_repo: IAsyncMatchRepository
+    tenure_repo: IAsyncCoachTenureRepository
+    state_repo: IAsyncLeagueSeasonStateRepository
+
+    coach_cache: set[int] | IdSet
+    match_cache: set[int] | IdSet
+    tenure_cache: list[tuple[int, int, date]]
+    write_filter: Optional[WriteFilter] = None
+    tenure_index: Optional[CoachTenureIndex] = None
+    standings: Optional[StandingsIndex] = None  # kept current with every saved match
+    match_source: Optional[IMatchSource] = None  # None = parse the HTML match report
@@ -0,0 +1,231 @@
+import json
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from supabase import Client
+
+# table -> (key columns, CREATE TABLE statement). Column names mirror Supabase,
+# plus updated_at so replica rows can be compared with upstream deltas.
+SCHEMA: Dict[str, tuple] = {
+    "Coach": (("tm_coach_id",), """
+        CREATE TABLE IF NOT EXISTS "Coach" (
+            tm_coach_id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            dob TEXT,
+            country TEXT,
+            coaching_license TEXT,
+            updated_at TEXT
+        )"""),
+    "Club": (("tm_club_id",), """
+        CREATE TABLE IF NOT EXISTS "Club" (
+            tm_club_id INTEGER PRIMARY KEY,
+            name TEXT,
+            country TEXT,
+            updated_at TEXT
+        )"""),
+    "Season": (("league_id", "club_id", "season_id"), """
+        CREATE TABLE IF NOT EXISTS "Season" (
+            league_id INTEGER NOT NULL,
+            club_id INTEGER NOT NULL,
+            season_id INTEGER NOT NULL,
+            updated_at TEXT,
+            PRIMARY KEY (league_id, club_id, season_id)
+        )"""),
+    "Match": (("tm_match_id",), """
+        CREATE TABLE IF NOT EXISTS "Match" (
+            tm_match_id INTEGER PRIMARY KEY,
+            home_club_id INTEGER NOT NULL,
+            away_club_id INTEGER NOT NULL,
+            season_id INTEGER NOT NULL,
+            league_id INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            home_coach_id INTEGER,
+            away_coach_id INTEGER,
+            attendance INTEGER,
+            home_team_score INTEGER,
+            away_team_score INTEGER,
+            home_team_points INTEGER,
+            away_team_points INTEGER,
+            updated_at TEXT
+        )"""),
+    "Coach_tenure": (("coach_id", "club_id", "start_date"), """
+        CREATE TABLE IF NOT EXISTS "Coach_tenure" (
+            id INTEGER,
+            coach_id INTEGER NOT NULL,
+            club_id INTEGER NOT NULL,
+            start_date TEXT,
+            end_date TEXT,
+            role TEXT,
+            is_current INTEGER,
+            updated_at TEXT,
+            UNIQUE (coach_id, club_id, start_date)
+        )"""),
+    "league_season_state": (("league_id", "season_id"), """
+        CREATE TABLE IF NOT EXISTS "league_season_state" (
+            league_id INTEGER NOT NULL,
+            season_id INTEGER NOT NULL,
+            last_processed_match_date TEXT,
+            last_processed_match_id INTEGER,
+            total_matches_processed INTEGER DEFAULT 0,
+            failed_match_ids TEXT,
+            last_updated_at TEXT,
+            status TEXT,
+            updated_at TEXT,
+            PRIMARY KEY (league_id, season_id)
+        )"""),
+}
+
+INDEXES = [
+    'CREATE INDEX IF NOT EXISTS idx_match_season_league ON "Match" (season_id, league_id)',
+    'CREATE INDEX IF NOT EXISTS idx_tenure_club_start ON "Coach_tenure" (club_id, start_date)',
+    'CREATE INDEX IF NOT EXISTS idx_coach_name ON "Coach" (name)',
+]
+
+# Tables pulled by `sync_from`. league_season_state is crawler-local bookkeeping
+# and is only forwarded upstream, never pulled.
+SYNC_TABLES = ["Club", "Season", "Coach", "Coach_tenure", "Match"]
+
+JSON_COLUMNS = {"failed_match_ids"}
+
+
+class SqliteDatabase:
+    """
+    Local SQLite copy of the core crawler tables.
+
+    Used on its own as the primary store (offline runs, benchmarks) or as a
+    read-through replica of Supabase: `sync_from(client)` pulls rows whose
+    `updated_at` is newer than the last sync of each table.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.lock = threading.RLock()
+        if path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.columns: Dict[str, List[str]] = {}
+        self._create_schema()
+
+    def _create_schema(self) -> None:
+        with self.lock, self.conn:
+            for table, (_, ddl) in SCHEMA.items():
+                self.conn.execute(ddl)
+                self.columns[table] = [r[1] for r in self.conn.execute(f'PRAGMA table_info("{table}")')]
+            for ddl in INDEXES:
+                self.conn.execute(ddl)
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS _sync_state (table_name TEXT PRIMARY KEY, watermark TEXT)"
+            )
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # --- reads -----------------------------------------------------------------
+
+    def query(self, sql: str, params: Sequence[Any] = ()) -> List[Dict[str, Any]]:
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [self._decode(dict(r)) for r in rows]
+
+    def scalar_set(self, sql: str, params: Sequence[Any] = ()) -> set:
+        with self.lock:
+            return {r[0] for r in self.conn.execute(sql, params)}
+
+    def has_row(self, table: str, **where: Any) -> bool:
+        clause = " AND ".join(f"{k} = ?" for k in where)
+        with self.lock:
+            return self.conn.execute(
+                f'SELECT 1 FROM "{table}" WHERE {clause} LIMIT 1', tuple(where.values())
+            ).fetchone() is not None
+
+    @staticmethod
+    def _decode(row: Dict[str, Any]) -> Dict[str, Any]:
+        for col in JSON_COLUMNS & row.keys():
+            if isinstance(row[col], str):
+                row[col] = json.loads(row[col])
+        return row
+
+    # --- writes ----------------------------------------------------------------
+
+    def upsert(self, table: str, rows: Iterable[Dict[str, Any]]) -> int:
+        """Insert or update rows by the table's key; unknown columns are dropped."""
+        rows = list(rows)
+        if not rows:
+            return 0
+        key_cols = SCHEMA[table][0]
+        cols = [c for c in self.columns[table] if any(c in r for r in rows)]
+        updates = [c for c in cols if c not in key_cols]
+        sql = (
+            f'INSERT INTO "{table}" ({", ".join(cols)}) VALUES ({", ".join("?" for _ in cols)}) '
+            f'ON CONFLICT ({", ".join(key_cols)}) DO '
+            + (f'UPDATE SET {", ".join(f"{c} = excluded.{c}" for c in updates)}' if updates else "NOTHING")
+        )
+        values = [tuple(self._encode(c, r.get(c)) for c in cols) for r in rows]
+        with self.lock, self.conn:
+            self.conn.executemany(sql, values)
+        return len(rows)
+
+    def delete(self, table: str, **where: Any) -> None:
+        clause = " AND ".join(f"{k} = ?" for k in where)
+        with self.lock, self.conn:
+            self.conn.execute(f'DELETE FROM "{table}" WHERE {clause}', tuple(where.values()))
+
+    @staticmethod
+    def _encode(column: str, value: Any) -> Any:
+        if column in JSON_COLUMNS and value is not None and not isinstance(value, str):
+            return json.dumps(value)
+        if isinstance(value, bool):
+            return int(value)
+        return value
+
+    # --- replica sync ------------------------------------------------------------
+
+    def get_watermark(self, table: str) -> Optional[str]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT watermark FROM _sync_state WHERE table_name = ?", (table,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_watermark(self, table: str, watermark: str) -> None:
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO _sync_state (table_name, watermark) VALUES (?, ?) "
+                "ON CONFLICT (table_name) DO UPDATE SET watermark = excluded.watermark",
+                (table, watermark),
+            )
+
+    def sync_table(self, client: Client, table: str, page_size: int = 1000) -> int:
+        """Pull rows of `table` changed upstream since the last sync (all rows the first time)."""
+        key_cols = SCHEMA[table][0]
+        watermark = self.get_watermark(table)
+        newest = watermark
+        offset = 0
+        total = 0
+        while True:
+            query = client.table(table).select("*")
+            if watermark:
+                query = query.gt("updated_at", watermark)
+            query = query.order("updated_at")
+            for col in key_cols:
+                query = query.order(col)
+            batch = query.range(offset, offset + page_size - 1).execute().data or []
+            self.upsert(table, batch)
+            total += len(batch)
+            for row in batch:
+                if row.get("updated_at") and (newest is None or row["updated_at"] > newest):
+                    newest = row["updated_at"]
+            if len(batch) < page_size:
+                break
+            offset += page_size
+        if newest and newest != watermark:
+            self.set_watermark(table, newest)
+        return total
+
+    def sync_from(self, client: Client, tables: Sequence[str] = SYNC_TABLES, page_size: int = 1000) -> Dict[str, int]:
+        counts = {table: self.sync_table(client, table, page_size=page_size) for table in tables}
+        print(f"🔄 Replica sync: " + ", ".join(f"{t}={n}" for t, n in counts.items()))
+        return counts
@@ -0,0 +1,34 @@
+from supabase import AsyncClient
+from models.coach_tenure import CoachTenure
+from repositories.tenure.coach_tenure_base_repository import IAsyncCoachTenureRepository
+
+
+class AsyncSupabaseCoachTenureRepository(IAsyncCoachTenureRepository):
+    def __init__(self, client: AsyncClient):
+        self.client = client
+
+    async def save(self, tenure: CoachTenure):
+        try:
+            data = tenure.model_dump(mode="json")
+            club_id = data["club_id"]
+
+            club_exists = await self.client.table("Club") \
+                .select("tm_club_id") \
+                .eq("tm_club_id", club_id) \
+                .execute()
+
+            if not club_exists.data:
+                print(f"Club with tm_club_id={club_id} does not exist, skipping insert.")
+                return None
+
+            response = await self.client.table("Coach_tenure") \
+                .upsert(data, on_conflict="coach_id,club_id,start_date") \
+                .execute()
+            return response.data
+
+        except Exception as e:
+            raise Exception(f"Supabase save error: {e}")
+
+    async def fetch_all_ids(self) -> list[tuple]:
+        response = await self.client.table("Coach_tenure").select("coach_id, club_id, start_date").execute()
+        return [(r["coach_id"], r["club_id"], r["start_date"]) for r in response.data]
@@ -12,4 +12,12 @@ class ICoachTenureRepository(Protocol):
         return {}
     
     def save(self, coach: CoachTenure) -> Any:
-        ...
\ No newline at end of file
+        ...
+
+
+class IAsyncCoachTenureRepository(Protocol):
+    async def fetch_all_ids(self) -> tuple[int, int]:
+        ...
+
+    async def save(self, coach: CoachTenure) -> Any:
+        ...
@@ -0,0 +1,232 @@
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import date
+from itertools import accumulate
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from supabase import Client
+from models.coach_tenure import CoachTenure
+
+MANAGER_ROLE = "Manager"
+
+# Lookup policies
+UNIQUE = "unique"        # a coach only when exactly one coach covers the date
+FIRST_MATCH = "first"    # first covering tenure in load order (what the MTE ETL has always done)
+
+NO_COACH = -1            # placeholder in lookup_many results
+
+# Tenures are stored as day numbers; club and day are packed into one int64 key
+# (club_id * _CLUB_SHIFT + day) so all clubs can be searched in a single sorted array.
+_DAY_OFFSET = 1 << 19    # keeps day numbers positive back to ~560 AD
+_CLUB_SHIFT = 1 << 20
+_OPEN_END = _CLUB_SHIFT - 1
+_EPOCH = date(1970, 1, 1)
+
+
+def _to_date(value: Any) -> Optional[date]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _day_number(value: Any) -> Optional[int]:
+    day = _to_date(value)
+    if day is None:
+        return None
+    return (day - _EPOCH).days + _DAY_OFFSET
+
+
+class CoachTenureIndex:
+    """
+    In-memory interval index of Manager tenures answering "who coached club X on date D?".
+
+    Per club, tenures are sorted by start date together with a running maximum of
+    their end dates, so a lookup bisects to the last tenure starting on or before
+    the date and walks back only while an earlier tenure could still cover it.
+    `lookup_many` does the same for whole columns with `numpy.searchsorted`.
+
+    Two policies are supported: UNIQUE returns None when no coach or more than one
+    coach covers the date (used by lightweight ingestion, which then falls back to
+    the match report); FIRST_MATCH returns the first covering tenure in load order.
+    """
+
+    def __init__(self):
+        # club_id -> {(start_day, coach_id): [end_day, load_seq]}
+        self._entries: Dict[int, Dict[Tuple[int, int], list]] = defaultdict(dict)
+        self._seq = 0
+        self._per_club = None
+        self._arrays = None
+        self.max_id = 0  # highest Coach_tenure.id loaded, for incremental refresh
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self._entries.values())
+
+    def add(self, coach_id: Any, club_id: Any, start_date: Any, end_date: Any = None,
+            role: Optional[str] = MANAGER_ROLE) -> None:
+        if role != MANAGER_ROLE or coach_id in (None, "") or club_id in (None, ""):
+            return
+        start = _day_number(start_date)
+        if start is None:
+            return
+        end = _day_number(end_date)
+        end = _OPEN_END if end is None else end
+        club_entries = self._entries[int(club_id)]
+        key = (start, int(coach_id))
+        if key in club_entries:
+            if club_entries[key][0] == end:
+                return
+            club_entries[key][0] = end  # tenure re-saved with a new end date
+        else:
+            club_entries[key] = [end, self._seq]
+            self._seq += 1
+        self._per_club = None
+        self._arrays = None
+
+    def add_tenure(self, tenure: CoachTenure) -> None:
+        self.add(tenure.coach_id, tenure.club_id, tenure.start_date, tenure.end_date, tenure.role)
+
+    def _compile(self) -> None:
+        per_club = {}
+        keys, end_keys, coaches, seqs = [], [], [], []
+        for club_id in sorted(self._entries):
+            ordered = sorted(self._entries[club_id].items())
+            starts = [start for (start, _), _ in ordered]
+            ends = [end for _, (end, _) in ordered]
+            club_coaches = [coach_id for (_, coach_id), _ in ordered]
+            club_seqs = [seq for _, (_, seq) in ordered]
+            per_club[club_id] = (starts, ends, list(accumulate(ends, max)), club_coaches, club_seqs)
+
+            base = club_id * _CLUB_SHIFT
+            keys.extend(base + s for s in starts)
+            end_keys.extend(base + e for e in ends)
+            coaches.extend(club_coaches)
+            seqs.extend(club_seqs)
+
+        end_keys = np.asarray(end_keys, dtype=np.int64)
+        self._per_club = per_club
+        self._arrays = (
+            np.asarray(keys, dtype=np.int64),
+            end_keys,
+            # Club bases grow with club_id, so a global running max never leaks across clubs
+            np.maximum.accumulate(end_keys) if len(end_keys) else end_keys,
+            np.asarray(coaches, dtype=np.int64),
+            np.asarray(seqs, dtype=np.int64),
+        )
+
+    def lookup(self, club_id: Any, match_date: Any, policy: str = UNIQUE) -> Optional[int]:
+        """Return the coach in charge of `club_id` on `match_date`, or None if unknown/ambiguous."""
+        if club_id in (None, "") or match_date in (None, ""):
+            return None
+        if self._per_club is None:
+            self._compile()
+        club = self._per_club.get(int(club_id))
+        if club is None:
+            return None
+        day = _day_number(match_date)
+        starts, ends, reach, coaches, seqs = club
+
+        found, found_seq = None, None
+        i = bisect_right(starts, day) - 1
+        while i >= 0 and reach[i] >= day:
+            if ends[i] >= day:
+                if policy == FIRST_MATCH:
+                    if found_seq is None or seqs[i] < found_seq:
+                        found, found_seq = coaches[i], seqs[i]
+                elif found is None:
+                    found = coaches[i]
+                elif found != coaches[i]:
+                    return None
+            i -= 1
+        return found
+
+    def lookup_many(self, club_ids: Iterable[Any], match_dates: Iterable[Any], policy: str = UNIQUE) -> np.ndarray:
+        """
+        Vectorized `lookup` over aligned club/date columns. Returns an int64 array
+        with NO_COACH where the index has no answer.
+        """
+        if self._arrays is None:
+            self._compile()
+        keys, end_keys, reach, coaches, seqs = self._arrays
+
+        clubs = np.asarray(club_ids, dtype=np.float64)
+        days = np.asarray(match_dates, dtype="datetime64[D]")
+        valid = ~np.isnan(clubs) & ~np.isnat(days)
+        query = np.zeros(len(clubs), dtype=np.int64)
+        query[valid] = (clubs[valid].astype(np.int64) * _CLUB_SHIFT
+                        + days[valid].astype(np.int64) + _DAY_OFFSET)
+
+        result = np.full(len(clubs), NO_COACH, dtype=np.int64)
+        if not len(keys):
+            return result
+        best_seq = np.full(len(clubs), np.iinfo(np.int64).max, dtype=np.int64)
+        ambiguous = np.zeros(len(clubs), dtype=bool)
+
+        pos = np.searchsorted(keys, query, side="right") - 1
+        active = np.flatnonzero(valid & (pos >= 0))
+        while len(active):
+            j = pos[active]
+            # Stop once no earlier tenure of this club can reach the date
+            active = active[reach[j] >= query[active]]
+            j = pos[active]
+            covers = end_keys[j] >= query[active]
+            hit, hit_j = active[covers], j[covers]
+            if policy == FIRST_MATCH:
+                better = seqs[hit_j] < best_seq[hit]
+                result[hit[better]] = coaches[hit_j[better]]
+                best_seq[hit[better]] = seqs[hit_j[better]]
+            else:
+                first = result[hit] == NO_COACH
+                result[hit[first]] = coaches[hit_j[first]]
+                ambiguous[hit[~first & (result[hit] != coaches[hit_j])]] = True
+            pos[active] -= 1
+            active = active[pos[active] >= 0]
+
+        result[ambiguous] = NO_COACH
+        return result
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]]) -> "CoachTenureIndex":
+        index = cls()
+        index.add_rows(rows)
+        return index
+
+    def add_rows(self, rows: Iterable[Dict[str, Any]]) -> int:
+        count = 0
+        for row in rows:
+            self.add(row.get("coach_id"), row.get("club_id"), row.get("start_date"),
+                     row.get("end_date"), row.get("role", MANAGER_ROLE))
+            if row.get("id") is not None:
+                self.max_id = max(self.max_id, int(row["id"]))
+            count += 1
+        return count
+
+    @classmethod
+    def from_client(cls, client: Client, page_size: int = 1000) -> "CoachTenureIndex":
+        """Load every Manager tenure from Coach_tenure."""
+        index = cls()
+        index.refresh(client, page_size=page_size)
+        return index
+
+    def refresh(self, client: Client, page_size: int = 1000) -> int:
+        """
+        Keyset scan of Coach_tenure rows with id > max_id. Only picks up new rows;
+        tenures updated in place (an end date filled in later) need a fresh index,
+        unless they also pass through `add_tenure` from the coach pipeline.
+        """
+        added = 0
+        while True:
+            response = client.table("Coach_tenure") \
+                .select("id, coach_id, club_id, start_date, end_date, role") \
+                .eq("role", MANAGER_ROLE) \
+                .gt("id", self.max_id) \
+                .order("id") \
+                .limit(page_size) \
+                .execute()
+            batch = response.data or []
+            added += self.add_rows(batch)
+            if len(batch) < page_size:
+                break
+        return added
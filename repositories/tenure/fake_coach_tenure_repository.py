@@ -1,16 +1,37 @@
+import asyncio
 from models.coach_tenure import CoachTenure
-from repositories.tenure.coach_tenure_base_repository import ICoachTenureRepository
+from repositories.tenure.coach_tenure_base_repository import ICoachTenureRepository, IAsyncCoachTenureRepository
 
 class FakeCoachTenureRepository(ICoachTenureRepository):
     def __init__(self, initial_coach_tenures=None):
         self.coach_tenures = {}
         if initial_coach_tenures:
             for coach_tenure in initial_coach_tenures:
-                self.coach_tenures[coach_tenure.tenure_id] = coach_tenure
+                self.coach_tenures[self._key(coach_tenure)] = coach_tenure
+
+    @staticmethod
+    def _key(coach_tenure: CoachTenure):
+        # Mirrors the (coach_id, club_id, start_date) unique constraint on Coach_tenure
+        return (coach_tenure.coach_id, coach_tenure.club_id, coach_tenure.start_date)
 
     def save(self, coach_tenure: CoachTenure):
-        self.coach_tenures[coach_tenure.tenure_id] = coach_tenure
+        self.coach_tenures[self._key(coach_tenure)] = coach_tenure
         return coach_tenure  # mimic persistence result
 
     def fetch_all_ids(self) -> tuple[int, int]:
-        return self.coach_tenures
\ No newline at end of file
+        return self.coach_tenures
+
+
+class AsyncFakeCoachTenureRepository(IAsyncCoachTenureRepository):
+    """Async twin of FakeCoachTenureRepository; each call yields to the event loop like a real request."""
+    def __init__(self, initial_coach_tenures=None):
+        self._repo = FakeCoachTenureRepository(initial_coach_tenures)
+        self.coach_tenures = self._repo.coach_tenures
+
+    async def save(self, coach_tenure: CoachTenure):
+        await asyncio.sleep(0)
+        return self._repo.save(coach_tenure)
+
+    async def fetch_all_ids(self) -> tuple[int, int]:
+        await asyncio.sleep(0)
+        return self._repo.fetch_all_ids()
@@ -0,0 +1,33 @@
+from typing import Callable, Optional
+
+from models.coach_tenure import CoachTenure
+from repositories.tenure.coach_tenure_base_repository import ICoachTenureRepository
+from repositories.write_journal import WriteJournal
+
+
+class JournaledCoachTenureRepository(ICoachTenureRepository):
+    """
+    Appends saves to the write-behind journal. Tenures at unknown clubs are
+    skipped here, before anything is journaled, and `save` returns None like
+    the Supabase repository, so the write filter doesn't record them and they
+    are retried once the club exists.
+    """
+
+    def __init__(self, journal: WriteJournal, reader: ICoachTenureRepository = None,
+                 club_exists: Optional[Callable[[int], bool]] = None):
+        self.journal = journal
+        self.reader = reader
+        self.club_exists = club_exists
+
+    def save(self, tenure: CoachTenure):
+        data = tenure.model_dump(mode="json")
+        if self.club_exists is not None and not self.club_exists(data["club_id"]):
+            print(f"Club with tm_club_id={data['club_id']} does not exist, skipping insert.")
+            return None
+        self.journal.append("Coach_tenure", data)
+        return [data]
+
+    def fetch_all_ids(self) -> list[tuple]:
+        pending = [(r["coach_id"], r["club_id"], r["start_date"]) for r in self.journal.pending_rows("Coach_tenure")]
+        existing = list(self.reader.fetch_all_ids()) if self.reader is not None else []
+        return existing + pending
@@ -0,0 +1,40 @@
+from typing import Optional
+
+from models.coach_tenure import CoachTenure
+from repositories.sqlite_database import SqliteDatabase
+from repositories.tenure.coach_tenure_base_repository import ICoachTenureRepository
+
+
+class SqliteCoachTenureRepository(ICoachTenureRepository):
+    """
+    Coach_tenure repository on local SQLite; forwards saves to `upstream` when set.
+    Standalone, it applies the same rule as Supabase and skips tenures whose club
+    is not in the local Club table.
+    """
+
+    def __init__(self, db: SqliteDatabase, upstream: Optional[ICoachTenureRepository] = None):
+        self.db = db
+        self.upstream = upstream
+
+    def club_exists(self, club_id: int) -> bool:
+        if self.db.has_row("Club", tm_club_id=club_id):
+            return True
+        return self.upstream is not None and hasattr(self.upstream, "club_exists") and self.upstream.club_exists(club_id)
+
+    def save(self, tenure: CoachTenure):
+        data = tenure.model_dump(mode="json")
+        if self.upstream is not None:
+            result = self.upstream.save(tenure)
+            if result is None:
+                return None
+        elif not self.db.has_row("Club", tm_club_id=data["club_id"]):
+            print(f"Club with tm_club_id={data['club_id']} does not exist, skipping insert.")
+            return None
+        else:
+            result = [data]
+        self.db.upsert("Coach_tenure", [data])
+        return result
+
+    def fetch_all_ids(self) -> list[tuple]:
+        rows = self.db.query('SELECT coach_id, club_id, start_date FROM "Coach_tenure"')
+        return [(r["coach_id"], r["club_id"], r["start_date"]) for r in rows]
@@ -1,10 +1,24 @@
 from supabase import Client
 from models.coach_tenure import CoachTenure
 from repositories.tenure.coach_tenure_base_repository import ICoachTenureRepository
+from utils.warm_cache import WarmCache
 
 class SupabaseCoachTenureRepository(ICoachTenureRepository):
-    def __init__(self, client: Client):
+    def __init__(self, client: Client, warm_cache: WarmCache = None):
         self.client = client
+        # When set, known clubs are checked in memory; unknown ones still go to the DB
+        self.warm_cache = warm_cache
+
+    def club_exists(self, club_id: int) -> bool:
+        if self.warm_cache is not None and self.warm_cache.has_id("Club", club_id):
+            return True
+        club_exists = self.client.table("Club") \
+            .select("tm_club_id") \
+            .eq("tm_club_id", club_id) \
+            .execute()
+        if club_exists.data and self.warm_cache is not None:
+            self.warm_cache.add_id("Club", club_id)
+        return bool(club_exists.data)
 
     def save(self, tenure: CoachTenure):
         try:
@@ -12,12 +26,7 @@ class SupabaseCoachTenureRepository(ICoachTenureRepository):
             club_id = data["club_id"]
             
             # 1️⃣ Check if the referenced club exists
-            club_exists = self.client.table("Club") \
-                .select("*") \
-                .eq("tm_club_id", club_id) \
-                .execute()
-            
-            if not club_exists.data:
+            if not self.club_exists(club_id):
                 # Club does not exist, skip insert
                 print(f"Club with tm_club_id={club_id} does not exist, skipping insert.")
                 return None
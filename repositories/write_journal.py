@@ -0,0 +1,267 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from postgrest.exceptions import APIError
+from supabase import Client
+
+from repositories.sqlite_database import SqliteDatabase
+
+DEFAULT_JOURNAL_FILE = Path(__file__).parent.parent / "data" / "write_journal.sqlite"
+
+# Flush order follows the foreign keys: matches reference coaches, tenures reference coaches.
+FLUSH_ORDER = ["Coach", "Coach_tenure", "Match"]
+CONFLICT_KEYS = {
+    "Coach": ("tm_coach_id",),
+    "Coach_tenure": ("coach_id", "club_id", "start_date"),
+    "Match": ("tm_match_id",),
+}
+
+
+def _key_str(table: str, row: Dict[str, Any]) -> str:
+    return json.dumps([row.get(k) for k in CONFLICT_KEYS[table]], default=str)
+
+
+class WriteJournal:
+    """
+    Append-only SQLite journal of pending upserts. Rows stay in the journal until
+    the flusher acknowledges them, so parsed data survives DB outages and crashes.
+    """
+
+    def __init__(self, path: Optional[Path] = DEFAULT_JOURNAL_FILE):
+        if path is None:
+            path = ":memory:"
+        else:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = str(path)
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        if self.path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS journal (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    table_name TEXT NOT NULL,
+                    row_key TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    created_at REAL NOT NULL
+                )""")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_journal_table_seq ON journal (table_name, seq)")
+
+    def append(self, table: str, row: Dict[str, Any]) -> int:
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO journal (table_name, row_key, payload, created_at) VALUES (?, ?, ?, ?)",
+                (table, _key_str(table, row), json.dumps(row, default=str), time.time()),
+            )
+            return cursor.lastrowid
+
+    def pending(self, table: str, limit: int = 500, max_attempts: Optional[int] = None,
+                after_seq: int = 0, upto_seq: Optional[int] = None) -> List[Tuple[int, Dict[str, Any]]]:
+        sql = "SELECT seq, payload FROM journal WHERE table_name = ? AND seq > ?"
+        params: List[Any] = [table, after_seq]
+        if upto_seq is not None:
+            sql += " AND seq <= ?"
+            params.append(upto_seq)
+        if max_attempts is not None:
+            sql += " AND attempts < ?"
+            params.append(max_attempts)
+        sql += " ORDER BY seq LIMIT ?"
+        params.append(limit)
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [(seq, json.loads(payload)) for seq, payload in rows]
+
+    def pending_rows(self, table: str) -> List[Dict[str, Any]]:
+        """All unflushed rows of `table` (used by repositories to answer reads)."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT payload FROM journal WHERE table_name = ? ORDER BY seq", (table,)
+            ).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+    def max_seq(self) -> int:
+        """Highest seq appended so far (0 for an empty journal)."""
+        with self.lock:
+            return self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM journal").fetchone()[0]
+
+    def ack(self, seqs: Sequence[int]) -> None:
+        if not seqs:
+            return
+        with self.lock, self.conn:
+            self.conn.executemany("DELETE FROM journal WHERE seq = ?", [(s,) for s in seqs])
+
+    def fail(self, seqs: Sequence[int], error: str) -> None:
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "UPDATE journal SET attempts = attempts + 1, last_error = ? WHERE seq = ?",
+                [(error[:500], s) for s in seqs],
+            )
+
+    def counts(self) -> Dict[str, int]:
+        with self.lock:
+            return dict(self.conn.execute("SELECT table_name, COUNT(*) FROM journal GROUP BY table_name").fetchall())
+
+    def dead_letters(self, max_attempts: int) -> List[Dict[str, Any]]:
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT seq, table_name, payload, attempts, last_error FROM journal WHERE attempts >= ?",
+                (max_attempts,),
+            ).fetchall()
+        return [dict(seq=r[0], table=r[1], row=json.loads(r[2]), attempts=r[3], error=r[4]) for r in rows]
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class JournalFlusher:
+    """
+    Background thread that drains the journal into Supabase with bulk upserts,
+    table by table in FLUSH_ORDER. Transient errors are retried with backoff and
+    otherwise end the pass with the rows left in place. A batch the database
+    rejects is split in halves until the bad rows are isolated; those rows keep
+    an attempt count and are skipped once they reach `max_attempts`.
+
+    With a `replica` (the --replica SQLite database), acknowledged rows are
+    written there too, so local lookups see them once they leave the journal.
+    """
+
+    def __init__(self, journal: WriteJournal, client: Client, batch_size: int = 500,
+                 interval: float = 1.0, retries: int = 3, backoff: float = 0.5, max_attempts: int = 5,
+                 replica: Optional[SqliteDatabase] = None):
+        self.journal = journal
+        self.client = client
+        self.replica = replica
+        self.batch_size = batch_size
+        self.interval = interval
+        self.retries = retries
+        self.backoff = backoff
+        self.max_attempts = max_attempts
+        self.flushed: Dict[str, int] = defaultdict(int)
+        self.skipped: Dict[str, int] = defaultdict(int)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Per-table hooks that drop rows Supabase would reject anyway
+        self.prefilters: Dict[str, Callable[[List[Dict[str, Any]]], List[bool]]] = {
+            "Coach_tenure": self._tenure_clubs_exist,
+        }
+
+    def _tenure_clubs_exist(self, rows: List[Dict[str, Any]]) -> List[bool]:
+        # JournaledCoachTenureRepository already skips unknown clubs at save time; this
+        # only catches rows journaled without that check (e.g. by an older run)
+        club_ids = sorted({r["club_id"] for r in rows})
+        found = self.client.table("Club").select("tm_club_id").in_("tm_club_id", club_ids).execute().data or []
+        known = {r["tm_club_id"] for r in found}
+        return [r["club_id"] in known for r in rows]
+
+    def _upsert(self, table: str, rows: List[Dict[str, Any]]) -> None:
+        self.client.table(table).upsert(rows, on_conflict=",".join(CONFLICT_KEYS[table])).execute()
+
+    def _write(self, table: str, batch: List[Tuple[int, Dict[str, Any]]], retry: bool = True) -> None:
+        """Upsert a batch, retrying transient errors and splitting it when the DB rejects rows."""
+        # Later journal entries for the same key win; Postgres rejects duplicate keys in one upsert
+        latest: Dict[str, Dict[str, Any]] = {}
+        for _, row in batch:
+            latest[_key_str(table, row)] = row
+        seqs = [seq for seq, _ in batch]
+
+        error = None
+        for attempt in range(self.retries if retry else 1):
+            try:
+                self._upsert(table, list(latest.values()))
+                if self.replica is not None:
+                    self.replica.upsert(table, list(latest.values()))
+                self.journal.ack(seqs)
+                self.flushed[table] += len(latest)
+                return
+            except APIError as e:
+                # The database rejected the data (constraint, FK, type): isolate the bad rows
+                error = e
+                break
+            except Exception:
+                # Network/timeout: back off, and leave the rows for the next pass if it persists
+                if attempt == self.retries - 1 or not retry:
+                    raise
+                self._stop.wait(self.backoff * 2 ** attempt)
+
+        if len(batch) > 1:
+            mid = len(batch) // 2
+            self._write(table, batch[:mid], retry=False)
+            self._write(table, batch[mid:], retry=False)
+        else:
+            print(f"⚠️  Journal flush failed for {table} row {batch[0][1]}: {error}")
+            self.journal.fail(seqs, str(error))
+
+    def flush_table(self, table: str, upto_seq: Optional[int] = None) -> int:
+        written = 0
+        last_seq = 0
+        while True:
+            batch = self.journal.pending(table, limit=self.batch_size, max_attempts=self.max_attempts,
+                                         after_seq=last_seq, upto_seq=upto_seq)
+            if not batch:
+                return written
+            last_seq = batch[-1][0]  # rows that fail now wait for the next pass
+            fetched = len(batch)
+            prefilter = self.prefilters.get(table)
+            if prefilter is not None:
+                keep = prefilter([row for _, row in batch])
+                dropped = [seq for (seq, _), ok in zip(batch, keep) if not ok]
+                self.journal.ack(dropped)
+                self.skipped[table] += len(dropped)
+                batch = [item for item, ok in zip(batch, keep) if ok]
+            if batch:
+                self._write(table, batch)
+                written += len(batch)
+            if fetched < self.batch_size:
+                return written
+
+    def flush_once(self) -> Dict[str, int]:
+        """
+        One pass over every table, up to the journal's seq when the pass starts.
+        A Coach and its Match appended mid-pass wait for the next pass together,
+        instead of the Match reaching Supabase before its Coach.
+        """
+        upto_seq = self.journal.max_seq()
+        return {table: self.flush_table(table, upto_seq=upto_seq) for table in FLUSH_ORDER}
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.flush_once()
+            except Exception as e:
+                print(f"⚠️  Journal flusher error: {e}")
+            self._stop.wait(self.interval)
+
+    def start(self) -> "JournalFlusher":
+        self._thread = threading.Thread(target=self._run, name="journal-flusher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, drain: bool = True) -> None:
+        """Stop the background thread; with `drain`, flush whatever is still pending first."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if drain:
+            self._stop.clear()
+            try:
+                self.flush_once()
+            except Exception as e:
+                print(f"⚠️  Journal drain incomplete, rows kept for the next run: {e}")
+            self._stop.set()
+
+    def print_report(self) -> None:
+        print("📝 Write-behind journal:")
+        for table in FLUSH_ORDER:
+            print(f"   {table}: {self.flushed.get(table, 0)} flushed, {self.skipped.get(table, 0)} skipped")
+        pending = self.journal.counts()
+        if pending:
+            print(f"   ⚠️  still pending (kept for next run): {pending}")
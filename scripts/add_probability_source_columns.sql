@@ -0,0 +1,19 @@
+-- Add probability_source to match_team_expectation and coach_performance_aggregate created
+-- before it existed (new tables get it from create_*_table.sql).
+-- Existing rows were priced from odds; Elo rows written by
+-- populate_match_team_expectation.py --with-ratings need a --full-rebuild --with-ratings run afterwards.
+
+ALTER TABLE match_team_expectation
+    ADD COLUMN IF NOT EXISTS probability_source VARCHAR(4) NOT NULL DEFAULT 'odds';
+ALTER TABLE match_team_expectation DROP CONSTRAINT IF EXISTS probability_source_valid;
+ALTER TABLE match_team_expectation
+    ADD CONSTRAINT probability_source_valid CHECK (probability_source IN ('odds', 'elo'));
+
+ALTER TABLE coach_performance_aggregate
+    ADD COLUMN IF NOT EXISTS probability_source VARCHAR(4) NOT NULL DEFAULT 'odds';
+ALTER TABLE coach_performance_aggregate DROP CONSTRAINT IF EXISTS coach_performance_aggregate_source;
+ALTER TABLE coach_performance_aggregate
+    ADD CONSTRAINT coach_performance_aggregate_source CHECK (probability_source IN ('odds', 'elo'));
+ALTER TABLE coach_performance_aggregate DROP CONSTRAINT IF EXISTS coach_performance_aggregate_unique;
+ALTER TABLE coach_performance_aggregate
+    ADD CONSTRAINT coach_performance_aggregate_unique UNIQUE (coach_id, club_id, season, difficulty, probability_source);
@@ -0,0 +1,28 @@
+-- Add updated_at to the tables mirrored by the SQLite replica
+-- (repositories/sqlite_database.py and utils/warm_cache.py pull rows with updated_at > last sync)
+
+CREATE OR REPLACE FUNCTION set_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    t TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['Coach', 'Club', 'Match', 'Coach_tenure', 'Season', 'League', 'league_season_state']
+    LOOP
+        EXECUTE format(
+            'ALTER TABLE %I ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()', t
+        );
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', t || '_updated_at', t);
+        EXECUTE format(
+            'CREATE TRIGGER %I BEFORE UPDATE ON %I FOR EACH ROW EXECUTE FUNCTION set_updated_at()',
+            t || '_updated_at', t
+        );
+        EXECUTE format('CREATE INDEX IF NOT EXISTS %I ON %I (updated_at)', 'idx_' || lower(t) || '_updated_at', t);
+    END LOOP;
+END $$;
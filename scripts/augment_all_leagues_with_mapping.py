@@ -2,49 +2,45 @@
 """
 Augment all_leagues_full.csv with Transfermarkt team information from oddscheck_to_db_mapping.csv
 Adds columns: tm_home_team_name, tm_home_team_id, tm_away_team_name, tm_away_team_id
+Only the columns the odds update needs are loaded (AUGMENT_COLUMNS), with team
+and league names as categoricals.
 """
 
+import sys
 import pandas as pd
 from pathlib import Path
-from datetime import datetime
 
-def parse_date(date_str):
-    """Parse date from various formats to YYYY-MM-DD"""
-    if pd.isna(date_str) or date_str == '':
-        return None
-    
-    date_str = str(date_str).strip()
-    
-    # Try different date formats
-    formats = [
-        '%d/%m/%Y',   # 03/08/2012
-        '%d/%m/%y',   # 14/08/10
-        '%Y-%m-%d',   # 2012-08-03
-        '%d-%m-%Y',   # 03-08-2012
-        '%m/%d/%Y',   # 08/03/2012
-        '%m/%d/%y',   # 08/14/10
-    ]
-    
-    for fmt in formats:
-        try:
-            parsed = datetime.strptime(date_str, fmt)
-            return parsed.strftime('%Y-%m-%d')
-        except ValueError:
-            continue
-    
-    # If no format worked, return original
-    return date_str
+sys.path.insert(0, str(Path(__file__).parent.parent))
 
-def augment_all_leagues():
-    """Add Transfermarkt team info to all_leagues_full.csv"""
+from utils.odds_store import CATEGORY_COLS, load_football_data, parse_match_dates
+
+# Match key and closing odds; the bookmaker columns are never read
+AUGMENT_COLUMNS = ['Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'OddsH', 'OddsD', 'OddsA', 'league_code']
+
+def augment_all_leagues(all_leagues_df=None, mapping_df=None, output_file='data/all_leagues_full_augmented.csv'):
+    """
+    Add Transfermarkt team info to all_leagues_full.csv
+    
+    Args:
+        all_leagues_df: Football-data rows already in memory (read from the store otherwise)
+        mapping_df: Team mapping already in memory (read from oddscheck_to_db_mapping.csv otherwise)
+        output_file: Where to save the augmented rows, or None to keep them in memory only
+    
+    Returns:
+        The augmented rows
+    """
     
     # Load the files
-    print("Loading all_leagues_full.csv...")
-    all_leagues_df = pd.read_csv('data/all_leagues_full.csv')
+    if all_leagues_df is None:
+        print("Loading football-data rows (Parquet store, or all_leagues_full.csv)...")
+        all_leagues_df = load_football_data(columns=AUGMENT_COLUMNS, categories=CATEGORY_COLS)
+    else:
+        all_leagues_df = all_leagues_df[[c for c in AUGMENT_COLUMNS if c in all_leagues_df.columns]].copy()
     print(f"Loaded {len(all_leagues_df)} rows")
     
-    print("\nLoading oddscheck_to_db_mapping.csv...")
-    mapping_df = pd.read_csv('data/oddscheck_to_db_mapping.csv')
+    if mapping_df is None:
+        print("\nLoading oddscheck_to_db_mapping.csv...")
+        mapping_df = pd.read_csv('data/oddscheck_to_db_mapping.csv')
     print(f"Loaded {len(mapping_df)} mapping entries")
     
     # Create mapping dictionaries
@@ -59,9 +55,10 @@ def augment_all_leagues():
     
     # Add new columns
     print("\nAdding Transfermarkt columns...")
-    all_leagues_df['tm_home_team_id'] = all_leagues_df['HomeTeam'].map(team_to_id)
+    # On categoricals, map() looks up each distinct team once
+    all_leagues_df['tm_home_team_id'] = all_leagues_df['HomeTeam'].map(team_to_id).astype(float)
     all_leagues_df['tm_home_team_name'] = all_leagues_df['HomeTeam'].map(team_to_name)
-    all_leagues_df['tm_away_team_id'] = all_leagues_df['AwayTeam'].map(team_to_id)
+    all_leagues_df['tm_away_team_id'] = all_leagues_df['AwayTeam'].map(team_to_id).astype(float)
     all_leagues_df['tm_away_team_name'] = all_leagues_df['AwayTeam'].map(team_to_name)
     
     # Statistics before filtering
@@ -93,30 +90,24 @@ def augment_all_leagues():
     all_leagues_df['FTHG'] = pd.to_numeric(all_leagues_df['FTHG'], errors='coerce').fillna(0).astype(int)
     all_leagues_df['FTAG'] = pd.to_numeric(all_leagues_df['FTAG'], errors='coerce').fillna(0).astype(int)
     
-    # Remove unwanted columns
-    print("Removing columns: Div, HTHG, HTAG, HTR, season_code...")
-    columns_to_drop = ['Div', 'HTHG', 'HTAG', 'HTR', 'season_code']
-    existing_columns_to_drop = [col for col in columns_to_drop if col in all_leagues_df.columns]
-    if existing_columns_to_drop:
-        all_leagues_df = all_leagues_df.drop(columns=existing_columns_to_drop)
-        print(f"Removed {len(existing_columns_to_drop)} columns: {', '.join(existing_columns_to_drop)}")
-    
-    # Standardize date format
+    # Standardize date format (dates no format fits are kept as they were)
     print("Standardizing date format to YYYY-MM-DD...")
-    all_leagues_df['Date'] = all_leagues_df['Date'].apply(parse_date)
-    standardized_dates = all_leagues_df['Date'].notna().sum()
-    print(f"Standardized {standardized_dates:,} dates")
+    parsed = parse_match_dates(all_leagues_df['Date'])
+    all_leagues_df['Date'] = parsed.dt.strftime('%Y-%m-%d').where(parsed.notna(), all_leagues_df['Date'].astype(object))
+    print(f"Standardized {int(parsed.notna().sum()):,} dates")
     
     # Save augmented file
-    output_file = 'data/all_leagues_full_augmented.csv'
-    print(f"\nSaving augmented file to {output_file}...")
-    all_leagues_df.to_csv(output_file, index=False)
-    print("Done!")
+    if output_file:
+        print(f"\nSaving augmented file to {output_file}...")
+        all_leagues_df.to_csv(output_file, index=False)
+        print("Done!")
     
     # Show sample of augmented data
     print("\nSample of augmented data (first 5 rows with matches):")
     sample = all_leagues_df[all_leagues_df['tm_home_team_id'].notna()].head()
     print(sample[['HomeTeam', 'tm_home_team_name', 'tm_home_team_id', 'AwayTeam', 'tm_away_team_name', 'tm_away_team_id']].to_string())
+    
+    return all_leagues_df
 
 if __name__ == '__main__':
     augment_all_leagues()
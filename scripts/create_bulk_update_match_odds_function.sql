@@ -0,0 +1,22 @@
+-- Bulk odds write used by services/odds_reconciliation.py (scripts/update_odds_batch.py):
+-- one call updates every Match in the parallel arrays, instead of one UPDATE request per match.
+
+CREATE OR REPLACE FUNCTION bulk_update_match_odds(
+    p_match_ids BIGINT[],
+    p_odds_home DOUBLE PRECISION[],
+    p_odds_draw DOUBLE PRECISION[],
+    p_odds_away DOUBLE PRECISION[]
+)
+RETURNS INTEGER AS $$
+    WITH updated AS (
+        UPDATE "Match" m
+        SET odds_home = u.odds_home,
+            odds_draw = u.odds_draw,
+            odds_away = u.odds_away
+        FROM unnest(p_match_ids, p_odds_home, p_odds_draw, p_odds_away)
+             AS u(tm_match_id, odds_home, odds_draw, odds_away)
+        WHERE m.tm_match_id = u.tm_match_id
+        RETURNING 1
+    )
+    SELECT count(*)::INTEGER FROM updated;
+$$ LANGUAGE sql;
@@ -0,0 +1,65 @@
+-- Rolling coach performance aggregates over match_team_expectation, maintained by
+-- services/coach_performance.py (scripts/populate_match_team_expectation.py refreshes
+-- the coaches it touched; scripts/populate_coach_performance_aggregate.py rebuilds).
+-- One row per coach x club x season x difficulty x probability_source; difficulty 'all'
+-- covers every match, and rows priced from odds and from Elo ratings are kept apart.
+
+CREATE TABLE IF NOT EXISTS coach_performance_aggregate (
+    id BIGSERIAL PRIMARY KEY,
+
+    coach_id BIGINT NOT NULL,
+    club_id BIGINT NOT NULL,
+    season INTEGER NOT NULL,             -- start year of a July-June season
+    difficulty VARCHAR(10) NOT NULL,     -- 'all', 'high', 'medium', 'low'
+    probability_source VARCHAR(4) NOT NULL DEFAULT 'odds',  -- 'odds', 'elo' (see match_team_expectation)
+
+    matches INTEGER NOT NULL,
+    xpts_total NUMERIC(8, 3) NOT NULL,
+    actual_pts_total NUMERIC(8, 3) NOT NULL,
+    delta_pts_total NUMERIC(8, 3) NOT NULL,
+
+    -- Sums over the group's last N matches (fewer when the group is shorter)
+    matches_last_5 INTEGER NOT NULL,
+    xpts_last_5 NUMERIC(7, 3) NOT NULL,
+    actual_pts_last_5 NUMERIC(7, 3) NOT NULL,
+    delta_pts_last_5 NUMERIC(7, 3) NOT NULL,
+    matches_last_10 INTEGER NOT NULL,
+    xpts_last_10 NUMERIC(7, 3) NOT NULL,
+    actual_pts_last_10 NUMERIC(7, 3) NOT NULL,
+    delta_pts_last_10 NUMERIC(7, 3) NOT NULL,
+    matches_last_20 INTEGER NOT NULL,
+    xpts_last_20 NUMERIC(7, 3) NOT NULL,
+    actual_pts_last_20 NUMERIC(7, 3) NOT NULL,
+    delta_pts_last_20 NUMERIC(7, 3) NOT NULL,
+
+    first_match_date DATE,
+    last_match_date DATE,
+    last_match_id BIGINT,
+
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+
+    CONSTRAINT coach_performance_aggregate_unique UNIQUE (coach_id, club_id, season, difficulty, probability_source),
+    CONSTRAINT coach_performance_aggregate_difficulty CHECK (difficulty IN ('all', 'high', 'medium', 'low')),
+    CONSTRAINT coach_performance_aggregate_source CHECK (probability_source IN ('odds', 'elo'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_coach_performance_aggregate_coach ON coach_performance_aggregate(coach_id);
+CREATE INDEX IF NOT EXISTS idx_coach_performance_aggregate_club_season ON coach_performance_aggregate(club_id, season);
+
+CREATE OR REPLACE FUNCTION update_coach_performance_aggregate_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER coach_performance_aggregate_updated_at
+    BEFORE UPDATE ON coach_performance_aggregate
+    FOR EACH ROW
+    EXECUTE FUNCTION update_coach_performance_aggregate_updated_at();
+
+GRANT SELECT, INSERT, UPDATE, DELETE ON coach_performance_aggregate TO anon, authenticated;
+GRANT USAGE, SELECT ON SEQUENCE coach_performance_aggregate_id_seq TO anon, authenticated;
+
+COMMENT ON TABLE coach_performance_aggregate IS 'Per coach/club/season/difficulty/probability source totals and rolling last-N sums of xPts, actual points and delta_pts';
@@ -30,6 +30,9 @@ CREATE TABLE IF NOT EXISTS match_team_expectation (
     -- Goals
     goals_for INTEGER NOT NULL,
     goals_against INTEGER NOT NULL,
+
+    -- Where p_win/p_draw/p_loss come from: bookmaker odds, or Elo ratings for matches without odds
+    probability_source VARCHAR(4) NOT NULL DEFAULT 'odds',
     
     -- Metadata
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
@@ -50,7 +53,8 @@ CREATE TABLE IF NOT EXISTS match_team_expectation (
         p_draw >= 0 AND p_draw <= 1 AND
         p_loss >= 0 AND p_loss <= 1
     ),
-    CONSTRAINT goals_non_negative CHECK (goals_for >= 0 AND goals_against >= 0)
+    CONSTRAINT goals_non_negative CHECK (goals_for >= 0 AND goals_against >= 0),
+    CONSTRAINT probability_source_valid CHECK (probability_source IN ('odds', 'elo'))
 );
 
 -- Indexes for query performance
@@ -84,3 +88,4 @@ COMMENT ON TABLE match_team_expectation IS 'Pre-computed team performance metric
 COMMENT ON COLUMN match_team_expectation.x_pts IS 'Expected points calculated from betting odds probabilities';
 COMMENT ON COLUMN match_team_expectation.delta_pts IS 'Performance delta: actual_pts - x_pts (positive = overperformance)';
 COMMENT ON COLUMN match_team_expectation.difficulty IS 'Match difficulty based on opponent strength/odds';
+COMMENT ON COLUMN match_team_expectation.probability_source IS 'odds: probabilities from betting odds; elo: from Elo ratings (match without odds)';
@@ -1,16 +1,19 @@
 """
 Match team names from all_leagues_full.csv (oddscheck data) to database club names.
 
-This script:
+By default the whole CSV is resolved in bulk by services.team_name_resolver
+(blocked by country/tier, rapidfuzz cdist scoring plus score-line evidence).
+`--legacy` runs the original row-by-row matcher, which:
 1. Extracts all unique club names from all_leagues_full.csv
-2. For each match, queries the database for matches on the same date and country
-3. Uses score matching and fuzzy string matching to find the correct clubs
-4. Stores high-confidence matches in a mapping file
+2. Prefetches every database match in the CSV's date range and countries (plus club
+   names) into an in-memory date index, in a few paginated reads
+3. For each match, looks up the indexed matches on the same date and country
+4. Uses score matching and fuzzy string matching to find the correct clubs
+5. Stores high-confidence matches in a mapping file
 """
 
 import pandas as pd
 from pathlib import Path
-from datetime import datetime
 from thefuzz import fuzz
 from collections import defaultdict
 import sys
@@ -23,6 +26,12 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from config.football_data_league_mapping import get_league_info
 from config.settings import SUPABASE_URL, SUPABASE_KEY
+from repositories.match.match_date_index import MatchDateIndex
+from services.team_name_resolver import TeamNameResolver
+from utils.odds_store import CATEGORY_COLS, load_football_data, parse_match_dates
+
+# Columns of the football-data rows the matchers read
+ODDS_ROW_COLUMNS = ["Date", "HomeTeam", "AwayTeam", "FTHG", "FTAG", "league_code"]
 
 
 def get_supabase_client():
@@ -37,21 +46,11 @@ def normalize_team_name(name):
     return str(name).strip().lower()
 
 
-def parse_date(date_str):
-    """Parse date from various formats in the CSV."""
-    if pd.isna(date_str):
-        return None
-    
-    # Try different date formats (including 2-digit year format)
-    formats = ['%d/%m/%Y', '%Y-%m-%d', '%d-%m-%Y', '%m/%d/%Y', '%d/%m/%y', '%m/%d/%y']
-    
-    for fmt in formats:
-        try:
-            return datetime.strptime(str(date_str), fmt).date()
-        except ValueError:
-            continue
-    
-    return None
+def league_countries(league_codes):
+    """Country of each row's football-data league code, looked up once per distinct code."""
+    countries = {code: (get_league_info(code) or {}).get('country')
+                 for code in league_codes.dropna().unique() if code}
+    return league_codes.map(countries).astype(object)
 
 
 def calculate_match_confidence(odds_home, odds_away, odds_score_home, odds_score_away,
@@ -81,6 +80,94 @@ def calculate_match_confidence(odds_home, odds_away, odds_score_home, odds_score
     return confidence, home_ratio, away_ratio
 
 
+def prefetch_match_index(supabase, rows, country_to_league_ids):
+    """
+    Load the database matches the odds rows can be compared against.
+
+    Covers the rows' date range and the leagues of their countries. If any row's
+    country has no league in the database, the per-date lookup is not restricted
+    by country, so every league in the range is loaded.
+    """
+    dates = rows['match_date'].dropna()
+    if dates.empty:
+        return MatchDateIndex()
+    start_date, end_date = pd.Timestamp(dates.min()).date(), pd.Timestamp(dates.max()).date()
+
+    league_ids = set()
+    for country in rows['country'].dropna().unique():
+        if country not in country_to_league_ids:
+            league_ids = None
+            break
+        league_ids.update(country_to_league_ids[country])
+
+    return MatchDateIndex.from_client(supabase, start_date, end_date, league_ids=league_ids)
+
+
+def resolve_clubs_to_database(min_confidence=70, workers=-1, df=None, supabase=None, resume=True):
+    """
+    Resolve every oddscheck team name to a database club in one bulk pass and
+    write oddscheck_to_db_mapping.csv.
+    
+    With `resume`, teams already in the mapping file keep their rows and only
+    newly resolved teams are appended (the file is never overwritten).
+    
+    Args:
+        min_confidence: Minimum confidence score (0-100) to accept a match
+        workers: Cores used for fuzzy scoring (-1 for all)
+        df: Football-data rows already in memory (read from the store otherwise)
+        supabase: Client to reuse (a new one is created otherwise)
+        resume: Keep the existing mapping rows
+    
+    Returns:
+        The full mapping (existing rows plus new ones)
+    """
+    data_dir = Path(__file__).parent.parent / "data"
+    input_file = data_dir / "all_leagues_full.csv"
+    output_file = data_dir / "oddscheck_to_db_mapping.csv"
+    
+    if df is None:
+        print(f"Reading football-data rows (Parquet store, or {input_file})...")
+        df = load_football_data(columns=ODDS_ROW_COLUMNS, csv_path=input_file, categories=CATEGORY_COLS)
+    df = df[ODDS_ROW_COLUMNS].copy()
+    df['match_date'] = parse_match_dates(df['Date'])
+    df['country'] = league_countries(df['league_code'])
+    
+    if supabase is None:
+        print("Connecting to database...")
+        supabase = get_supabase_client()
+    leagues = supabase.table('League').select('tm_league_id, country, tm_code').execute().data
+    country_to_league_ids = defaultdict(list)
+    for league in leagues:
+        country_to_league_ids[league['country']].append(league['tm_league_id'])
+    
+    print(f"Prefetching database matches for {len(df)} rows...")
+    match_index = prefetch_match_index(supabase, df, country_to_league_ids)
+    print(f"Indexed {match_index.match_count} matches, {len(match_index.club_names)} clubs")
+    
+    resolver = TeamNameResolver(match_index.to_frame(), match_index.club_names, leagues, workers=workers)
+    result_df = resolver.resolve(df, min_confidence=min_confidence)
+    
+    if resume and output_file.exists():
+        existing_df = pd.read_csv(output_file)
+        new_df = result_df[~result_df['oddscheck_team_name'].isin(existing_df['oddscheck_team_name'])]
+        print(f"Keeping {existing_df['oddscheck_team_name'].nunique()} mapped teams, "
+              f"adding {new_df['oddscheck_team_name'].nunique()} new ones")
+        result_df = pd.concat([existing_df, new_df], ignore_index=True)
+    
+    tmp = output_file.with_name(output_file.name + ".tmp")
+    result_df.to_csv(tmp, index=False)
+    os.replace(tmp, output_file)
+    
+    all_clubs = set(df['HomeTeam'].dropna()) | set(df['AwayTeam'].dropna())
+    print(f"\nStatistics:")
+    print(f"Total unique clubs in oddscheck data: {len(all_clubs)}")
+    print(f"Clubs matched to database: {result_df['oddscheck_team_name'].nunique()}")
+    if all_clubs:
+        print(f"Match rate: {result_df['oddscheck_team_name'].nunique()/len(all_clubs)*100:.1f}%")
+    print(f"\nMapping saved to: {output_file}")
+    return result_df
+
+
 def match_clubs_to_database(min_confidence=70, resume=True):
     """
     Match clubs from all_leagues_full.csv to database clubs.
@@ -95,8 +182,8 @@ def match_clubs_to_database(min_confidence=70, resume=True):
     output_file = data_dir / "oddscheck_to_db_mapping.csv"
     checkpoint_file = data_dir / "oddscheck_mapping_checkpoint.txt"
     
-    print(f"Reading {input_file}...")
-    df = pd.read_csv(input_file)
+    print(f"Reading football-data rows (Parquet store, or {input_file})...")
+    df = load_football_data(columns=ODDS_ROW_COLUMNS, csv_path=input_file)
     
     # Initialize Supabase client
     print("Connecting to database...")
@@ -161,6 +248,15 @@ def match_clubs_to_database(min_confidence=70, resume=True):
     high_confidence_matches = 0
     skipped_matches = 0
     
+    # Parse dates and resolve countries once, then prefetch the matches for the rows still to process
+    df['match_date'] = parse_match_dates(df['Date']).dt.date
+    df['country'] = league_countries(df['league_code'])
+    pending = df[df.index >= start_row]
+    print(f"Prefetching database matches for {len(pending)} rows...")
+    match_index = prefetch_match_index(supabase, pending, country_to_league_ids)
+    print(f"Indexed {match_index.match_count} matches on {len(match_index.by_date)} dates, "
+          f"{len(match_index.club_names)} clubs")
+    
     print(f"\nProcessing {total_matches} matches (starting from row {start_row})...")
     
     for idx, row in df.iterrows():
@@ -170,14 +266,14 @@ def match_clubs_to_database(min_confidence=70, resume=True):
             
         processed += 1
         if processed % 100 == 0:
-            print(f"Processed {processed}/{total_matches - start_row} | DB queries: {total_db_matches} | High conf: {high_confidence_matches} | Skipped: {skipped_matches} | Mapped teams: {len(teams_with_mapping)}")
+            print(f"Processed {processed}/{total_matches - start_row} | DB candidates: {total_db_matches} | High conf: {high_confidence_matches} | Skipped: {skipped_matches} | Mapped teams: {len(teams_with_mapping)}")
             # Save checkpoint
             with open(checkpoint_file, 'w') as f:
                 f.write(str(idx + 1))
         
         # Parse match data
-        match_date = parse_date(row['Date'])
-        if not match_date:
+        match_date = row['match_date']
+        if pd.isna(match_date):
             continue
         
         home_team = row['HomeTeam']
@@ -187,7 +283,6 @@ def match_clubs_to_database(min_confidence=70, resume=True):
         if home_team in teams_with_mapping and away_team in teams_with_mapping:
             skipped_matches += 1
             continue
-        league_code = row.get('league_code')
         
         # Get scores
         try:
@@ -199,51 +294,19 @@ def match_clubs_to_database(min_confidence=70, resume=True):
         if home_score is None or away_score is None:
             continue
         
-        # Get country from league code
-        league_info = get_league_info(league_code) if league_code else {}
-        country = league_info.get('country')
-        tm_code = league_info.get('tm_code')
-        
-        if not country:
+        country = row['country']
+        if pd.isna(country) or not country:
             continue
         
-        # Query database for matches on the same date
         try:
-            # Search for matches in the database  
-            query = supabase.table('Match').select(
-                'tm_match_id, date, home_team_score, away_team_score, home_club_id, away_club_id, league_id'
-            ).eq('date', str(match_date))
-            
-            response = query.execute()
-            
-            if not response.data:
-                continue
-            
-            # Filter by country if we have it
-            filtered_matches = response.data
-            if country and country in country_to_league_ids:
-                league_ids = country_to_league_ids[country]
-                filtered_matches = [m for m in response.data if m.get('league_id') in league_ids]
+            # Matches on the same date, filtered by country if we have it
+            filtered_matches = match_index.candidates(match_date, country_to_league_ids.get(country))
             
             if not filtered_matches:
                 continue
                 
             total_db_matches += len(filtered_matches)
-            
-            # Get club info for all clubs in these matches
-            club_ids = set()
-            for m in filtered_matches:
-                if m.get('home_club_id'):
-                    club_ids.add(m['home_club_id'])
-                if m.get('away_club_id'):
-                    club_ids.add(m['away_club_id'])
-            
-            if not club_ids:
-                continue
-            
-            # Fetch club names
-            clubs_response = supabase.table('Club').select('tm_club_id, name').in_('tm_club_id', list(club_ids)).execute()
-            clubs_dict = {c['tm_club_id']: c['name'] for c in clubs_response.data}
+            clubs_dict = match_index.club_names
             
             # Check each database match
             for db_match in filtered_matches:
@@ -328,7 +391,7 @@ def match_clubs_to_database(min_confidence=70, resume=True):
     print(f"\nProcessing complete!")
     print(f"Total matches processed: {processed}")
     print(f"Matches skipped (both teams mapped): {skipped_matches}")
-    print(f"Total DB matches queried: {total_db_matches}")
+    print(f"Total DB candidate matches: {total_db_matches}")
     print(f"High confidence matches: {high_confidence_matches}")
     print(f"Teams with mapping: {len(teams_with_mapping)}")
     print(f"Teams with confident mapping: {len(confident_teams)}")
@@ -397,8 +460,16 @@ if __name__ == "__main__":
     parser.add_argument('--min-confidence', type=int, default=70,
                        help='Minimum confidence score (0-100) to accept a match (default: 70)')
     parser.add_argument('--no-resume', action='store_true',
-                       help='Start from beginning, ignoring checkpoint (default: resume from checkpoint)')
+                       help='Ignore the existing mapping (and the legacy matcher\'s checkpoint)')
+    parser.add_argument('--legacy', action='store_true',
+                       help='Use the row-by-row matcher instead of the bulk resolver')
+    parser.add_argument('--workers', type=int, default=-1,
+                       help='Cores used for fuzzy scoring by the bulk resolver (default: all)')
     
     args = parser.parse_args()
     
-    match_clubs_to_database(min_confidence=args.min_confidence, resume=not args.no_resume)
+    if args.legacy:
+        match_clubs_to_database(min_confidence=args.min_confidence, resume=not args.no_resume)
+    else:
+        resolve_clubs_to_database(min_confidence=args.min_confidence, workers=args.workers,
+                                  resume=not args.no_resume)
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Rebuild coach_performance_aggregate from match_team_expectation.
+
+populate_match_team_expectation.py keeps the table current for the coaches it
+touches; this script recomputes every coach (or the ones given), e.g. after
+creating the table (scripts/create_coach_performance_aggregate_table.sql).
+
+Usage:
+    python scripts/populate_coach_performance_aggregate.py [--coach ID ...]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Iterable, Optional, Set
+
+from supabase import create_client, Client
+
+# Allow imports from repo root
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.settings import SUPABASE_URL, SUPABASE_KEY
+from services.coach_performance import AGGREGATE_TABLE, coaches_of, refresh
+from services.match_team_expectation import MTE_TABLE, fetch_paged
+
+
+def all_coach_ids(supabase: Client, page_size: int = 1000) -> Set[int]:
+    """Coaches with MTE rows or aggregate rows (the latter may have none left)."""
+    coaches: Set[int] = set()
+    # offset pages need a unique order: (match_id, club_id) is MTE's key
+    for table, keys in ((MTE_TABLE, ('match_id', 'club_id')), (AGGREGATE_TABLE, ('id',))):
+        def query(table=table, keys=keys):
+            q = supabase.table(table).select('coach_id')
+            for key in keys:
+                q = q.order(key)
+            return q
+        coaches |= coaches_of(fetch_paged(query, page_size))
+    return coaches
+
+
+def run(coach_ids: Optional[Iterable[int]] = None, supabase: Optional[Client] = None):
+    if supabase is None:
+        supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+
+    start = time.time()
+    coach_ids = set(coach_ids) if coach_ids else all_coach_ids(supabase)
+    print(f"Refreshing coach performance aggregates for {len(coach_ids):,} coaches...")
+    written, failed = refresh(supabase, coach_ids)
+    print(f"  ✓ {written:,} aggregate rows written, {failed:,} failed in {time.time() - start:.1f}s")
+    return written, failed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Rebuild coach_performance_aggregate')
+    parser.add_argument('--coach', type=int, nargs='+', help='Only refresh these coach IDs')
+    args = parser.parse_args()
+    run(coach_ids=args.coach)
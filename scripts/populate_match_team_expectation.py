@@ -2,13 +2,27 @@
 """
 ETL Pipeline: Populate match_team_expectation table
 Converts Match data with odds into team-level performance metrics
+
+Runs incrementally once a full run has recorded its updated_at watermarks
+(data/match_team_expectation_state.json): only matches updated since, and
+matches of clubs whose Coach_tenure rows changed, are recomputed; their rows
+that no longer apply are deleted. --full-rebuild recomputes everything.
+Afterwards the coach_performance_aggregate rows of every coach involved are
+recomputed (services/coach_performance.py). --with-ratings also writes rows
+for matches without odds, with Elo probabilities (services/elo_ratings.py);
+a run without it leaves those rows alone. The flag is recorded with the
+watermarks, and a run with the other setting starts with a full run.
+
+Usage:
+    python scripts/populate_match_team_expectation.py [limit] [--full-rebuild] [--with-ratings]
 """
 
+import argparse
 import sys
 from pathlib import Path
 import pandas as pd
 from supabase import create_client, Client
-from typing import Dict, Tuple, Optional
+from typing import Optional
 from datetime import datetime
 import time
 
@@ -16,90 +30,27 @@ import time
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from config.settings import SUPABASE_URL, SUPABASE_KEY
+from repositories.tenure.coach_tenure_index import CoachTenureIndex
+from services.match_team_expectation import (
+    ODDS_SOURCE,
+    WATERMARK_TABLES,
+    affected_matches,
+    delete_expectations,
+    expectation_records,
+    latest_updated_at,
+    load_watermarks,
+    save_watermarks,
+    stale_keys,
+)
+from services.coach_performance import coaches_of, existing_coaches, refresh as refresh_coach_performance
+from services.elo_ratings import RatingStore, update_ratings
+from utils.bulk_loader import BulkLoader
 
-
-def odds_to_probabilities(odds_home: float, odds_draw: float, odds_away: float) -> Tuple[float, float, float]:
-    """
-    Convert decimal odds to probabilities with overround removal.
-    
-    Bookmaker odds include overround (margin). We remove it to get true probabilities.
-    Formula: p_i = (1/odds_i) / sum(1/odds_j)
-    """
-    if pd.isna(odds_home) or pd.isna(odds_draw) or pd.isna(odds_away):
-        return None, None, None
-    
-    if odds_home <= 0 or odds_draw <= 0 or odds_away <= 0:
-        return None, None, None
-    
-    # Convert to implied probabilities
-    implied_home = 1.0 / odds_home
-    implied_draw = 1.0 / odds_draw
-    implied_away = 1.0 / odds_away
-    
-    # Remove overround (normalize to sum to 1)
-    total = implied_home + implied_draw + implied_away
-    
-    p_home = implied_home / total
-    p_draw = implied_draw / total
-    p_away = implied_away / total
-    
-    return round(p_home, 4), round(p_draw, 4), round(p_away, 4)
-
-
-def calculate_expected_points(p_win: float, p_draw: float) -> float:
-    """
-    Calculate expected points from win/draw probabilities.
-    
-    xPts = 3 * P(win) + 1 * P(draw) + 0 * P(loss)
-    """
-    return round(3 * p_win + 1 * p_draw, 3)
+STATE_FILE = Path(__file__).parent.parent / 'data' / 'match_team_expectation_state.json'
 
 
-def calculate_actual_points(goals_for: int, goals_against: int) -> int:
-    """Calculate actual points from match result."""
-    if goals_for > goals_against:
-        return 3  # Win
-    elif goals_for == goals_against:
-        return 1  # Draw
-    else:
-        return 0  # Loss
-
-
-def determine_difficulty(p_win: float, p_draw: float, p_loss: float, is_home: bool) -> str:
-    """
-    Determine match difficulty based on win probability.
-    
-    For home teams:
-    - high: p_win < 0.35 (underdog)
-    - medium: 0.35 <= p_win <= 0.55
-    - low: p_win > 0.55 (favorite)
-    
-    For away teams (slightly adjusted):
-    - high: p_win < 0.25
-    - medium: 0.25 <= p_win <= 0.45
-    - low: p_win > 0.45
-    """
-    if pd.isna(p_win):
-        return None
-    
-    if is_home:
-        if p_win < 0.34:
-            return 'high'
-        elif p_win <= 0.532:
-            return 'medium'
-        else:
-            return 'low'
-    else:  # away
-        if p_win < 0.205:
-            return 'high'
-        elif p_win <= 0.367:
-            return 'medium'
-        else:
-            return 'low'
-
-
-def fetch_matches_with_odds(supabase: Client, limit: Optional[int] = None) -> pd.DataFrame:
-    """Fetch matches that have complete odds data."""
+def fetch_matches_with_odds(supabase: Client, limit: Optional[int] = None, odds_only: bool = True) -> pd.DataFrame:
+    """Fetch matches that have complete odds data (every match with `odds_only=False`)."""
     print("Fetching matches with odds from database...")
     
     all_matches = []
@@ -135,6 +86,9 @@ def fetch_matches_with_odds(supabase: Client, limit: Optional[int] = None) -> pd
     
     df = pd.DataFrame(all_matches)
     
+    if not odds_only:
+        return df
+    
     # Filter to matches with complete odds
     initial_count = len(df)
     df = df[df['odds_home'].notna() & df['odds_draw'].notna() & df['odds_away'].notna()]
@@ -143,193 +97,104 @@ def fetch_matches_with_odds(supabase: Client, limit: Optional[int] = None) -> pd
     return df
 
 
-def fetch_coach_data(supabase: Client) -> pd.DataFrame:
-    """Fetch coach tenure data to map coaches to matches."""
+def fetch_coach_data(supabase: Client) -> CoachTenureIndex:
+    """Load manager tenures into an interval index used to map coaches to matches."""
     print("Fetching coach tenure data...")
+    coach_index = CoachTenureIndex.from_client(supabase)
+    print(f"  ✓ Total manager tenures: {len(coach_index):,}")
+    return coach_index
+
+
+def batch_upsert_expectations(supabase: Client, expectations: list, batch_size: int = 500):
+    """Upsert team expectations through the concurrent chunked loader (see utils/bulk_loader.py)."""
+    print(f"\nUpserting {len(expectations):,} team expectation records...")
+    start_time = time.time()
     
-    all_tenures = []
-    batch_size = 1000
-    offset = 0
+    def progress(done: int, total: int) -> None:
+        elapsed = time.time() - start_time
+        rate = done / elapsed if elapsed > 0 else 0
+        print(f"  Progress: {done:,}/{total:,} ({done/total*100:.1f}%), Rate: {rate:.1f}/sec", end='\r')
     
-    while True:
-        result = supabase.table('Coach_tenure').select(
-            'coach_id, club_id, start_date, end_date, role'
-        ).eq('role', 'Manager').range(offset, offset + batch_size - 1).execute()
-        
-        if not result.data:
-            break
-        
-        all_tenures.extend(result.data)
-        offset += batch_size
-        print(f"  Fetched {len(all_tenures):,} tenures...", end='\r')
+    loader = BulkLoader(supabase, 'match_team_expectation', on_conflict='match_id,club_id', chunk_size=batch_size)
+    result = loader.load(expectations, on_progress=progress)
     
-    print(f"\n  ✓ Total manager tenures: {len(all_tenures):,}")
+    elapsed = time.time() - start_time
+    print(f"\n  ✓ Completed: {result.written:,} records in {elapsed:.1f}s "
+          f"({result.requests:,} requests, {result.retries:,} retries, {result.failed:,} rows rejected)")
     
-    return pd.DataFrame(all_tenures)
+    return result.written, result.failed
 
 
-def map_coach_to_match(team_id: int, match_date: str, coach_df: pd.DataFrame) -> Optional[int]:
-    """Find the coach for a team on a specific match date."""
-    if coach_df.empty or pd.isna(match_date):
-        return None
-    
-    # Filter to this team's coaches
-    team_coaches = coach_df[coach_df['club_id'] == team_id]
-    
-    if team_coaches.empty:
+def read_watermarks(supabase: Client) -> Optional[dict]:
+    """Current updated_at watermarks, or None (full run, nothing recorded) when they cannot be read."""
+    try:
+        return {table: latest_updated_at(supabase, table) for table in WATERMARK_TABLES}
+    except Exception as e:
+        print(f"  ⚠️  Could not read updated_at watermarks ({e}); running a full rebuild")
         return None
-    
-    # Find coach active on match date
-    match_date_pd = pd.to_datetime(match_date)
-    
-    for _, tenure in team_coaches.iterrows():
-        from_date = pd.to_datetime(tenure['start_date']) if tenure['start_date'] else pd.NaT
-        until_date = pd.to_datetime(tenure['end_date']) if tenure['end_date'] else pd.Timestamp.max
-        
-        if pd.notna(from_date) and from_date <= match_date_pd <= until_date:
-            return int(tenure['coach_id'])
-    
-    return None
 
 
-def transform_match_to_team_expectations(match_row: pd.Series, coach_df: pd.DataFrame) -> list:
+def build_expectations(matches_df: pd.DataFrame, coach_index: CoachTenureIndex,
+                       ratings: Optional[RatingStore] = None) -> list:
     """
-    Transform one match into zero, one, or two rows (one per team with a coach) with expectations.
+    Team expectation rows for every match in `matches_df` (see services.match_team_expectation).
+    With `ratings`, matches without odds use the stored Elo probabilities.
     """
-    # Convert odds to probabilities
-    p_home_win, p_draw, p_away_win = odds_to_probabilities(
-        match_row['odds_home'],
-        match_row['odds_draw'],
-        match_row['odds_away']
-    )
-    
-    if p_home_win is None:
-        return []  # Skip if odds conversion failed
-    
-    # Get coach IDs for each team independently
-    home_coach_id = map_coach_to_match(match_row['home_club_id'], match_row['date'], coach_df)
-    away_coach_id = map_coach_to_match(match_row['away_club_id'], match_row['date'], coach_df)
-    
-    # Only create rows for teams that have coaches
-    # (coach_id is NOT NULL constraint in database, but we can still create row for one team)
-    results = []
-    
-    # Home team row
-    if home_coach_id is not None:
-        home_x_pts = calculate_expected_points(p_home_win, p_draw)
-        home_actual_pts = calculate_actual_points(
-            match_row['home_team_score'],
-            match_row['away_team_score']
-        )
-        home_difficulty = determine_difficulty(p_home_win, p_draw, p_away_win, is_home=True)
-        
-        home_row = {
-            'match_id': int(match_row['tm_match_id']),
-            'match_date': match_row['date'],
-            'league_id': match_row['league_id'],
-            'club_id': int(match_row['home_club_id']),
-            'is_home': True,
-            'coach_id': home_coach_id,
-            'xpts': home_x_pts,
-            'actual_pts': home_actual_pts,
-            'delta_pts': round(home_actual_pts - home_x_pts, 3),
-            'difficulty': home_difficulty,
-            'p_win': p_home_win,
-            'p_draw': p_draw,
-            'p_loss': p_away_win,
-            'goals_for': int(match_row['home_team_score']),
-            'goals_against': int(match_row['away_team_score'])
-        }
-        results.append(home_row)
-    
-    # Away team row
-    if away_coach_id is not None:
-        away_x_pts = calculate_expected_points(p_away_win, p_draw)
-        away_actual_pts = calculate_actual_points(
-            match_row['away_team_score'],
-            match_row['home_team_score']
-        )
-        away_difficulty = determine_difficulty(p_away_win, p_draw, p_home_win, is_home=False)
-        
-        away_row = {
-            'match_id': int(match_row['tm_match_id']),
-            'match_date': match_row['date'],
-            'league_id': match_row['league_id'],
-            'club_id': int(match_row['away_club_id']),
-            'is_home': False,
-            'coach_id': away_coach_id,
-            'xpts': away_x_pts,
-            'actual_pts': away_actual_pts,
-            'delta_pts': round(away_actual_pts - away_x_pts, 3),
-            'difficulty': away_difficulty,
-            'p_win': p_away_win,
-            'p_draw': p_draw,
-            'p_loss': p_home_win,
-            'goals_for': int(match_row['away_team_score']),
-            'goals_against': int(match_row['home_team_score'])
-        }
-        results.append(away_row)
-    
-    return results
+    model = ratings.aligned(matches_df['tm_match_id']) if ratings is not None else None
+    return expectation_records(matches_df, coach_index, model)
 
 
-def batch_upsert_expectations(supabase: Client, expectations: list, batch_size: int = 100):
-    """Upsert team expectations in batches."""
-    print(f"\nUpserting {len(expectations):,} team expectation records...")
-    
-    success_count = 0
-    error_count = 0
-    start_time = time.time()
-    
-    for i in range(0, len(expectations), batch_size):
-        batch = expectations[i:i+batch_size]
-        
-        try:
-            supabase.table('match_team_expectation').upsert(
-                batch,
-                on_conflict='match_id,club_id'
-            ).execute()
-            
-            success_count += len(batch)
-            
-        except Exception as e:
-            error_count += len(batch)
-            print(f"\n  ❌ Error upserting batch {i//batch_size + 1}: {e}")
-            # Print first record of failed batch for debugging
-            if batch and error_count <= 10:
-                print(f"     First record in failed batch: {batch[0]}")
-        
-        # Progress update
-        if (i + batch_size) % 1000 == 0 or (i + batch_size) >= len(expectations):
-            elapsed = time.time() - start_time
-            progress = min(i + batch_size, len(expectations))
-            rate = success_count / elapsed if elapsed > 0 else 0
-            
-            print(f"  Progress: {progress:,}/{len(expectations):,} "
-                  f"({progress/len(expectations)*100:.1f}%), "
-                  f"Success: {success_count:,}, Errors: {error_count:,}, "
-                  f"Rate: {rate:.1f}/sec", end='\r')
-    
-    elapsed = time.time() - start_time
-    print(f"\n  ✓ Completed: {success_count:,} records in {elapsed:.1f}s")
-    
-    return success_count, error_count
-
-
-def run_etl(limit: Optional[int] = None):
-    """Main ETL pipeline."""
+def run_etl(limit: Optional[int] = None, matches_df: Optional[pd.DataFrame] = None,
+            supabase: Optional[Client] = None, full_rebuild: bool = False, with_ratings: bool = False):
+    """
+    Main ETL pipeline.
+    
+    Args:
+        limit: Only process the first `limit` matches (testing; no watermarks recorded)
+        matches_df: Matches with odds already in memory (fetched from Match otherwise)
+        supabase: Client to reuse (a new one is created otherwise)
+        full_rebuild: Recompute every match even when watermarks from a previous run exist
+        with_ratings: Also produce rows for matches without odds, from Elo ratings
+            (services/elo_ratings.py), which are brought up to date first
+    """
     print("="*80)
     print("MATCH TEAM EXPECTATION ETL PIPELINE")
     print("="*80)
     
     # Connect to Supabase
-    print("\n1. Connecting to Supabase...")
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-    print("  ✓ Connected")
+    if supabase is None:
+        print("\n1. Connecting to Supabase...")
+        supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+        print("  ✓ Connected")
+    
+    ratings = None
+    if with_ratings:
+        print("\n1b. Updating Elo club ratings...")
+        ratings = RatingStore()
+        update_ratings(supabase, ratings, full_rebuild=full_rebuild)
+    
+    # Watermarks are read before extracting, so changes made during the run are seen next time
+    watermarks = load_watermarks(STATE_FILE, with_ratings) if not full_rebuild else None
+    track = matches_df is None and limit is None
+    new_watermarks = read_watermarks(supabase) if track else None
+    track = new_watermarks is not None
+    incremental = track and watermarks is not None
     
     # Extract: Fetch matches with odds
-    print("\n2. EXTRACT: Fetching match data...")
-    matches_df = fetch_matches_with_odds(supabase, limit=limit)
+    if matches_df is None and incremental:
+        print(f"\n2. EXTRACT: Fetching matches affected by changes since {watermarks}...")
+        matches_df = affected_matches(supabase, watermarks)
+        if matches_df.empty:
+            print("  ✓ Nothing changed since the last run")
+            save_watermarks(STATE_FILE, new_watermarks, with_ratings)
+            return 0, 0
+    elif matches_df is None:
+        print("\n2. EXTRACT: Fetching match data...")
+        matches_df = fetch_matches_with_odds(supabase, limit=limit, odds_only=not with_ratings)
+    else:
+        print(f"\n2. EXTRACT: Using {len(matches_df):,} matches with odds from the odds update")
+        if limit:
+            matches_df = matches_df.head(limit)
     
     if matches_df.empty:
         print("  ✗ No matches with odds found!")
@@ -337,44 +202,75 @@ def run_etl(limit: Optional[int] = None):
     
     # Extract: Fetch coach data
     print("\n3. EXTRACT: Fetching coach tenure data...")
-    coach_df = fetch_coach_data(supabase)
+    coach_index = fetch_coach_data(supabase)
     
     # Transform: Convert matches to team expectations
     print("\n4. TRANSFORM: Calculating team expectations...")
-    all_expectations = []
-    
-    for idx, match_row in matches_df.iterrows():
-        team_expectations = transform_match_to_team_expectations(match_row, coach_df)
-        all_expectations.extend(team_expectations)
-        
-        if (idx + 1) % 1000 == 0:
-            print(f"  Processed {idx + 1:,}/{len(matches_df):,} matches...", end='\r')
+    all_expectations = build_expectations(matches_df, coach_index, ratings)
     
     print(f"\n  ✓ Generated {len(all_expectations):,} team expectation records "
           f"from {len(matches_df):,} matches")
     
     # Load: Upsert to database
+    # Coaches whose rows are about to be re-assigned or deleted need their aggregates redone too
+    previous_coaches = set()
+    if not full_rebuild:
+        try:
+            previous_coaches = existing_coaches(supabase, matches_df['tm_match_id'].tolist())
+        except Exception as e:
+            print(f"  ⚠️  Could not read the current coaches of these matches ({e})")
+    
     print("\n5. LOAD: Upserting to match_team_expectation table...")
     success, errors = batch_upsert_expectations(supabase, all_expectations)
     
+    if incremental:
+        # Rows of affected matches that lost their odds or their coach; without
+        # ratings no Elo rows were produced, so those are not stale
+        gone, pairs = stale_keys(matches_df, all_expectations)
+        try:
+            delete_expectations(supabase, gone, pairs, sources=None if with_ratings else (ODDS_SOURCE,))
+            print(f"  ✓ Cleared rows of {len(gone):,} matches and {len(pairs):,} sides that no longer apply")
+        except Exception as e:
+            errors += 1
+            print(f"  ❌ Error deleting stale rows: {e}")
+    
+    print("\n6. AGGREGATE: Refreshing coach_performance_aggregate...")
+    coaches = previous_coaches | coaches_of(all_expectations)
+    try:
+        written, failed = refresh_coach_performance(supabase, coaches)
+        errors += failed
+        print(f"  ✓ {written:,} aggregate rows for {len(coaches):,} coaches")
+    except Exception as e:
+        errors += 1
+        print(f"  ❌ Error refreshing coach aggregates: {e}")
+    
+    if track and not errors:
+        save_watermarks(STATE_FILE, new_watermarks, with_ratings)
+    
     # Summary
     print("\n" + "="*80)
     print("ETL COMPLETE!")
     print("="*80)
+    print(f"Mode: {'incremental' if incremental else 'full'}")
     print(f"Matches processed: {len(matches_df):,}")
     print(f"Team expectation records created: {len(all_expectations):,}")
     print(f"Successfully loaded: {success:,}")
     print(f"Errors: {errors:,}")
     print("="*80)
+    
+    return success, errors
 
 
 if __name__ == '__main__':
-    import sys
-    
-    # Optional: limit for testing
-    limit = None
-    if len(sys.argv) > 1:
-        limit = int(sys.argv[1])
-        print(f"Running in TEST mode with limit={limit}")
-    
-    run_etl(limit=limit)
+    parser = argparse.ArgumentParser(description='Populate the match_team_expectation table')
+    parser.add_argument('limit', nargs='?', type=int, help='Only process the first N matches (testing)')
+    parser.add_argument('--full-rebuild', action='store_true',
+                        help='Recompute every match instead of only what changed since the last run')
+    parser.add_argument('--with-ratings', action='store_true',
+                        help='Use Elo ratings for matches without odds (rows for every played match)')
+    args = parser.parse_args()
+    
+    if args.limit:
+        print(f"Running in TEST mode with limit={args.limit}")
+    
+    run_etl(limit=args.limit, full_rebuild=args.full_rebuild, with_ratings=args.with_ratings)
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Record a tmapi `/game/{id}` response verbatim as a test fixture.
+
+tests/unit/match/test_match_source.py compares the recorded payload of match
+1028917 with the recorded HTML report (tests/fixtures/match_page_1028917_test.html),
+which checks the payload paths in services/match_service.py against the real API.
+
+Usage:
+    python scripts/record_tmapi_game.py --match-id 1028917
+"""
+import argparse
+import json
+import os
+import sys
+
+# Add project root to PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.tm_api_client import TMApiClient
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "..", "tests", "fixtures")
+
+
+def fixture_path(match_id: int) -> str:
+    return os.path.join(FIXTURES_DIR, f"game_{match_id}_recorded.json")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record a tmapi /game/{id} response as a test fixture")
+    parser.add_argument("--match-id", type=int, required=True)
+    parser.add_argument("--out", help="Output file (default: tests/fixtures/game_<id>_recorded.json)")
+    args = parser.parse_args()
+
+    payload = TMApiClient().fetch_json(f"/game/{args.match_id}")
+    out = args.out or fixture_path(args.match_id)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+    print(f"✅ Recorded /game/{args.match_id} to {out}")
@@ -32,6 +32,7 @@ from repositories.tenure.supabase_coach_tenure_repository import SupabaseCoachTe
 from repositories.league_season_state.supabase_league_season_state_repository import SupabaseLeagueSeasonStateRepository
 from utils.db_utils import get_league_season_state
 from services.supabase_service import create_supabase_client
+from utils.id_set import IdSet
 from scripts.retry_failed_matches import retry_failed_matches
 
 def create_context() -> PipelineContext:
@@ -41,8 +42,8 @@ def create_context() -> PipelineContext:
         match_repo=SupabaseMatchRepository(client=client),
         tenure_repo=SupabaseCoachTenureRepository(client=client),
         state_repo=SupabaseLeagueSeasonStateRepository(client=client),
-        coach_cache=set(),
-        match_cache=set(),
+        coach_cache=IdSet(),
+        match_cache=IdSet(),
         tenure_cache=set(),
     )
 
@@ -43,6 +43,7 @@ from repositories.tenure.supabase_coach_tenure_repository import SupabaseCoachTe
 from repositories.league_season_state.supabase_league_season_state_repository import SupabaseLeagueSeasonStateRepository
 from utils.db_utils import get_league_id_by_code
 from services.supabase_service import create_supabase_client
+from utils.id_set import IdSet
 
 
 def create_context() -> PipelineContext:
@@ -53,8 +54,8 @@ def create_context() -> PipelineContext:
         match_repo=SupabaseMatchRepository(client=client),
         tenure_repo=SupabaseCoachTenureRepository(client=client),
         state_repo=SupabaseLeagueSeasonStateRepository(client=client),
-        coach_cache=set(),
-        match_cache=set(),
+        coach_cache=IdSet(),
+        match_cache=IdSet(),
         tenure_cache=set(),
     )
 
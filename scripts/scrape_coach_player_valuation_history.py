@@ -22,7 +22,6 @@ import json
 import os
 import re
 import sys
-import time
 import unicodedata
 from datetime import date, timedelta
 from pathlib import Path
@@ -35,9 +34,11 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")
 
 from config.constants import HEADERS
 from services.supabase_service import create_supabase_client
+from services.tm_api_client import TMApiClient, _to_int
 from utils.db_utils import get_seasons_for_club
+from utils.id_set import IdSet
+from utils.write_filter import DEFAULT_CACHE_FILE, WriteFilter
 
-TM_API_BASE = "https://tmapi-alpha.transfermarkt.technology"
 DEFAULT_OUTPUT_DIR = "data/coach_player_valuation_history"
 DEFAULT_COACH_NAMES = ["Ruben Amorim", "Jose Mourinho"]
 
@@ -53,193 +54,13 @@ def _slugify(value: str) -> str:
     return text or "coach"
 
 
-def _to_int(value: Any) -> Optional[int]:
-    if value is None:
-        return None
-    try:
-        return int(value)
-    except (TypeError, ValueError):
-        return None
-
-
-class TMApiClient:
-    def __init__(self, timeout: int = 40, retries: int = 3, retry_sleep_seconds: float = 1.5):
-        self.session = requests.Session()
-        self.session.headers.update(HEADERS)
-        self.timeout = timeout
-        self.retries = retries
-        self.retry_sleep_seconds = retry_sleep_seconds
-
-        self.club_name_cache: Dict[int, str] = {}
-        self.player_profile_cache: Dict[int, Dict[str, Any]] = {}
-        self.player_market_cache: Dict[int, List[Dict[str, Any]]] = {}
-
-    def fetch_json(self, endpoint: str) -> Dict[str, Any]:
-        url = f"{TM_API_BASE}{endpoint}"
-        last_error: Optional[Exception] = None
-
-        for attempt in range(1, self.retries + 1):
-            try:
-                response = self.session.get(url, timeout=self.timeout)
-                response.raise_for_status()
-                payload = response.json()
-                if not payload.get("success", False):
-                    raise RuntimeError(f"TM API returned success=false for {endpoint}: {payload.get('message')}")
-                return payload
-            except Exception as exc:
-                last_error = exc
-                if attempt < self.retries:
-                    time.sleep(self.retry_sleep_seconds * attempt)
-                else:
-                    raise RuntimeError(f"Failed to fetch {url}: {exc}") from exc
-
-        raise RuntimeError(f"Unreachable code in fetch_json for {url}: {last_error}")
-
-    def get_club_name(self, club_id: Optional[int]) -> Optional[str]:
-        if club_id is None or club_id <= 0:
-            return None
-        if club_id in self.club_name_cache:
-            return self.club_name_cache[club_id]
-
-        payload = self.fetch_json(f"/club/{club_id}")
-        data = payload.get("data", {})
-        name = data.get("name") or data.get("baseDetails", {}).get("shortName") or str(club_id)
-        self.club_name_cache[club_id] = name
-        return name
-
-    def get_player_profile(self, player_id: int) -> Dict[str, Any]:
-        if player_id in self.player_profile_cache:
-            return self.player_profile_cache[player_id]
-
-        payload = self.fetch_json(f"/player/{player_id}")
-        data = payload.get("data", {})
-
-        transfer_history: List[Dict[str, Any]] = []
-        for assignment in data.get("clubAssignments") or []:
-            club_id = _to_int(assignment.get("clubId"))
-            transfer_history.append(
-                {
-                    "club_id": club_id,
-                    "club_name": self.get_club_name(club_id),
-                    "type": assignment.get("type"),
-                    "start": assignment.get("start"),
-                    "debut": assignment.get("debut"),
-                    "shirt_number": assignment.get("shirtNumber"),
-                    "is_captain": assignment.get("isCaptain"),
-                    "source": "club_assignments",
-                }
-            )
-
-        # TM player profile often has only current assignment. Reconstruct broader club tenure
-        # history from valuation timeline so Player_tenure includes other clubs in the career.
-        inferred_tenures = self._infer_tenures_from_market_history(player_id)
-        transfer_history = self._merge_tenure_histories(transfer_history, inferred_tenures)
-
-        profile = {
-            "player_id": player_id,
-            "name": data.get("name"),
-            "dob": data.get("lifeDates", {}).get("dateOfBirth"),
-            "nationality": data.get("nationalityDetails", {}).get("nationalities", {}).get("nationalityId"),
-            "position": data.get("attributes", {}).get("position", {}).get("name"),
-            "transfer_history": transfer_history,
-        }
-        self.player_profile_cache[player_id] = profile
-        return profile
-
-    def _infer_tenures_from_market_history(self, player_id: int) -> List[Dict[str, Any]]:
-        history = self.get_player_market_value_history(player_id)
-        if not history:
-            return []
-
-        points = [h for h in history if h.get("club_id") is not None and h.get("date")]
-        points.sort(key=lambda h: h.get("date"))
-        if not points:
-            return []
-
-        tenures: List[Dict[str, Any]] = []
-        current = {
-            "club_id": points[0].get("club_id"),
-            "club_name": points[0].get("club_name"),
-            "start": points[0].get("date"),
-            "end": points[0].get("date"),
-            "type": "historical",
-            "debut": None,
-            "shirt_number": None,
-            "is_captain": False,
-            "source": "market_value_history",
-        }
-
-        for point in points[1:]:
-            point_club_id = point.get("club_id")
-            point_date = point.get("date")
-
-            if point_club_id == current.get("club_id"):
-                current["end"] = point_date
-            else:
-                tenures.append(current)
-                current = {
-                    "club_id": point_club_id,
-                    "club_name": point.get("club_name"),
-                    "start": point_date,
-                    "end": point_date,
-                    "type": "historical",
-                    "debut": None,
-                    "shirt_number": None,
-                    "is_captain": False,
-                    "source": "market_value_history",
-                }
-
-        tenures.append(current)
-        return tenures
-
-    def _merge_tenure_histories(
-        self,
-        primary: List[Dict[str, Any]],
-        secondary: List[Dict[str, Any]],
-    ) -> List[Dict[str, Any]]:
-        merged: List[Dict[str, Any]] = []
-        seen = set()
-
-        # Prefer clubAssignments for the same (club_id, start) pair and append inferred extras.
-        for row in primary + secondary:
-            key = (_to_int(row.get("club_id")), row.get("start"))
-            if key in seen:
-                continue
-            seen.add(key)
-            merged.append(row)
-
-        merged.sort(key=lambda r: (r.get("start") or "", r.get("club_name") or ""))
-        return merged
-
-    def get_player_market_value_history(self, player_id: int) -> List[Dict[str, Any]]:
-        if player_id in self.player_market_cache:
-            return self.player_market_cache[player_id]
-
-        payload = self.fetch_json(f"/player/{player_id}/market-value-history")
-        history = payload.get("data", {}).get("history") or []
-
-        mapped: List[Dict[str, Any]] = []
-        for item in history:
-            market_value = item.get("marketValue") or {}
-            club_id = _to_int(item.get("clubId"))
-            mapped.append(
-                {
-                    "date": market_value.get("determined"),
-                    "value": market_value.get("value"),
-                    "currency": market_value.get("currency"),
-                    "club_id": club_id,
-                    "club_name": self.get_club_name(club_id),
-                    "age": item.get("age"),
-                }
-            )
-
-        self.player_market_cache[player_id] = mapped
-        return mapped
-
-
 class PlayerDatabaseWriter:
-    def __init__(self, db_client: Any):
+    def __init__(self, db_client: Any, write_filter: Optional[WriteFilter] = None):
         self.client = db_client
+        # Skips Player / Player_tenure / Player_valuation_history rows whose content
+        # hasn't changed since the last run. Player_match is refreshed (delete +
+        # insert) per match, so it is never filtered.
+        self.write_filter = write_filter
         self.can_write_player = True
         self.can_write_tenure = True
         self.can_write_valuation = True
@@ -293,9 +114,15 @@ class PlayerDatabaseWriter:
             "position": player.get("position"),
         }
 
+        if self.write_filter is not None and not self.write_filter.should_write("Player", player_id, payload):
+            self.seen_players.add(player_id)
+            return
+
         try:
             self.client.table("Player").upsert(payload, on_conflict="player_id").execute()
             self.seen_players.add(player_id)
+            if self.write_filter is not None:
+                self.write_filter.mark_written("Player", player_id, payload)
         except Exception as exc:
             if self._is_rls_error(exc):
                 self._disable_table("player", "RLS policy denied writes to Player. Apply SQL policies or use service role key.")
@@ -323,6 +150,10 @@ class PlayerDatabaseWriter:
                 "is_current_tenure": is_current_tenure,
             }
 
+            if self.write_filter is not None and not self.write_filter.should_write("Player_tenure", dedupe_key, row):
+                self.seen_tenures.add(dedupe_key)
+                continue
+
             try:
                 existing_query = (
                     self.client.table("Player_tenure")
@@ -360,6 +191,8 @@ class PlayerDatabaseWriter:
                     self.client.table("Player_tenure").insert(row).execute()
 
                 self.seen_tenures.add(dedupe_key)
+                if self.write_filter is not None:
+                    self.write_filter.mark_written("Player_tenure", dedupe_key, row)
             except Exception as exc:
                 if self._is_rls_error(exc):
                     self._disable_table("tenure", "RLS policy denied writes to Player_tenure. Apply SQL policies or use service role key.")
@@ -414,12 +247,21 @@ class PlayerDatabaseWriter:
                 "age": _to_int(valuation.get("age")),
             }
 
+            filter_key = (player_id, valuation_date, club_id)
+            if self.write_filter is not None and not self.write_filter.should_write(
+                "Player_valuation_history", filter_key, payload
+            ):
+                self.seen_valuations.add(dedupe_key)
+                continue
+
             try:
                 self.client.table("Player_valuation_history").upsert(
                     payload,
                     on_conflict="player_id,valuation_date,club_id",
                 ).execute()
                 self.seen_valuations.add(dedupe_key)
+                if self.write_filter is not None:
+                    self.write_filter.mark_written("Player_valuation_history", filter_key, payload)
             except Exception as exc:
                 err_text = str(exc)
                 if "Could not find the table 'public.Player_valuation_history'" in err_text:
@@ -895,7 +737,7 @@ def ensure_matches_in_db(
     db_client: Any,
     http_session: requests.Session,
     match_metas: List[Dict[str, Any]],
-    existing_match_ids: Optional[Set[int]] = None,
+    existing_match_ids: Optional[IdSet] = None,
 ) -> Set[int]:
     """Ensure each match exists in the Match table.
 
@@ -922,9 +764,9 @@ def ensure_matches_in_db(
     # Fetch all match IDs currently in the DB only if not provided by caller.
     if existing_match_ids is None:
         existing_response = db_client.table("Match").select("tm_match_id").execute()
-        existing_match_ids = {
-            int(r["tm_match_id"]) for r in (existing_response.data or []) if r.get("tm_match_id")
-        }
+        existing_match_ids = IdSet(
+            r["tm_match_id"] for r in (existing_response.data or []) if r.get("tm_match_id")
+        )
 
     confirmed: Set[int] = set()
 
@@ -984,7 +826,7 @@ def scrape_by_match_id(
     tm_client: Optional[TMApiClient] = None,
     team_filter_club_id: Optional[int] = None,
     db_writer: Optional[PlayerDatabaseWriter] = None,
-    processed_match_ids: Optional[Set[int]] = None,
+    processed_match_ids: Optional[IdSet] = None,
 ) -> Dict[str, Any]:
     """Scrape and persist player data for a single match.
 
@@ -1006,8 +848,7 @@ def scrape_by_match_id(
             "player_count": 0,
         }
 
-    game_payload = tm_client.fetch_json(f"/game/{match_id}")
-    game_data = game_payload.get("data", {})
+    game_data = tm_client.get_game(match_id)
     game_date = game_data.get("baseDetails", {}).get("date", {}).get("dateTimeUTC")
 
     # Derive human-readable team names for progress output
@@ -1106,7 +947,10 @@ def scrape_by_coach(
 
     db_client = create_supabase_client()
     tm_client = tm_client or TMApiClient()
-    db_writer = PlayerDatabaseWriter(db_client) if persist_to_db else None
+    db_writer = (
+        PlayerDatabaseWriter(db_client, write_filter=WriteFilter(cache_file=DEFAULT_CACHE_FILE))
+        if persist_to_db else None
+    )
 
     resolved_name = coach_name
     resolved_id = coach_id
@@ -1131,13 +975,13 @@ def scrape_by_coach(
 
     # Fetch the set of match_ids already fully processed (have rows in Player_match).
     # Done once here and shared across both the coach match loop and the baseline loop.
-    processed_match_ids: Optional[Set[int]] = None
+    processed_match_ids: Optional[IdSet] = None
     if skip_processed:
         print("[skip] Fetching already-processed match IDs from Player_match...")
         _pm_resp = db_client.table("Player_match").select("match_id").execute()
-        processed_match_ids = {
-            int(r["match_id"]) for r in (_pm_resp.data or []) if r.get("match_id")
-        }
+        processed_match_ids = IdSet(
+            r["match_id"] for r in (_pm_resp.data or []) if r.get("match_id")
+        )
         print(f"[skip] {len(processed_match_ids)} match IDs already processed — will be skipped")
 
     match_rows = get_match_rows_for_coach(
@@ -1245,11 +1089,11 @@ def scrape_by_coach(
             # by ensure_matches_in_db as new rows are inserted.
             print("[baseline] Fetching existing Match IDs from DB (once)...")
             _existing_response = db_client.table("Match").select("tm_match_id").execute()
-            shared_existing_match_ids: Set[int] = {
-                int(r["tm_match_id"])
+            shared_existing_match_ids = IdSet(
+                r["tm_match_id"]
                 for r in (_existing_response.data or [])
                 if r.get("tm_match_id")
-            }
+            )
             print(f"[baseline] {len(shared_existing_match_ids)} match IDs loaded from DB")
 
             # confirmed_ids accumulated across all windows — avoids re-confirming
@@ -1427,6 +1271,9 @@ def scrape_by_coach(
     coach_file.write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding="utf-8")
 
     print(f"Saved coach output to: {coach_file}")
+    if db_writer is not None and db_writer.write_filter is not None:
+        db_writer.write_filter.save()
+        db_writer.write_filter.print_report()
     return result
 
 
@@ -1518,12 +1365,15 @@ def main() -> None:
     persist_to_db = not args.no_db
 
     if args.match_id:
-        db_writer = PlayerDatabaseWriter(create_supabase_client()) if persist_to_db else None
-        single_processed: Optional[Set[int]] = None
+        db_writer = (
+            PlayerDatabaseWriter(create_supabase_client(), write_filter=WriteFilter(cache_file=DEFAULT_CACHE_FILE))
+            if persist_to_db else None
+        )
+        single_processed: Optional[IdSet] = None
         if args.skip_processed:
             _pm = db_writer.client if db_writer else create_supabase_client()
             _resp = _pm.table("Player_match").select("match_id").execute()
-            single_processed = {int(r["match_id"]) for r in (_resp.data or []) if r.get("match_id")}
+            single_processed = IdSet(r["match_id"] for r in (_resp.data or []) if r.get("match_id"))
             print(f"[skip] {len(single_processed)} match IDs already processed")
         result = scrape_by_match_id(
             match_id=args.match_id,
@@ -1531,6 +1381,9 @@ def main() -> None:
             db_writer=db_writer,
             processed_match_ids=single_processed,
         )
+        if db_writer is not None:
+            db_writer.write_filter.save()
+            db_writer.write_filter.print_report()
 
         output_path = Path(args.output_dir)
         output_path.mkdir(parents=True, exist_ok=True)
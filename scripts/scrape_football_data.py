@@ -5,22 +5,28 @@ Scrape football-data.co.uk and download CSV files for all known leagues.
 This script replaces the manual Step 1 of the odds pipeline:
   - Fetches https://www.football-data.co.uk/data.php
   - Discovers all CSV links matching known league codes
-  - Downloads only new/updated files (via Last-Modified header comparison)
+  - Downloads only new/updated files (conditional GET: If-Modified-Since /
+    If-None-Match, a 304 means unchanged), several files in parallel
   - Adds a `league_code` column to each CSV
-  - Concatenates everything into data/all_leagues_full.csv
+  - Stores each season/league as a Parquet partition (utils/odds_store.py),
+    replacing only the partitions downloaded in this run
+  - Exports the store to data/all_leagues_full.csv for older consumers
 
 Usage:
     python scripts/scrape_football_data.py                    # current season only
     python scripts/scrape_football_data.py --season 2526      # specific season
     python scripts/scrape_football_data.py --all-seasons      # full backfill
     python scripts/scrape_football_data.py --force            # skip freshness check
+    python scripts/scrape_football_data.py --all-seasons --workers 16  # wider download pool
 """
 
 import argparse
 import io
 import re
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from email.utils import parsedate_to_datetime
 from pathlib import Path
@@ -34,6 +40,7 @@ from bs4 import BeautifulSoup
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from config.football_data_league_mapping import FOOTBALL_DATA_TO_TM_LEAGUE_MAP
+from utils.odds_store import OddsStore
 
 BASE_URL = "https://www.football-data.co.uk"
 DATA_PAGE = f"{BASE_URL}/data.php"
@@ -56,7 +63,10 @@ CSV_LINK_RE = re.compile(r"/mmz4281/(\d{4})/([A-Z0-9]+)\.csv", re.IGNORECASE)
 DATA_DIR = Path(__file__).parent.parent / "data"
 RAW_DIR = DATA_DIR / "raw_football_data"   # per-league per-season CSVs cached here
 OUTPUT_FILE = DATA_DIR / "all_leagues_full.csv"
-META_FILE = RAW_DIR / ".last_modified_cache.json"  # stores Last-Modified timestamps
+META_FILE = RAW_DIR / ".last_modified_cache.json"  # stores Last-Modified timestamps (and ETags)
+
+DEFAULT_WORKERS = 8      # parallel CSV downloads
+CRAWL_DELAY = 0.3        # polite delay before each request, per worker
 
 KNOWN_FD_CODES = set(FOOTBALL_DATA_TO_TM_LEAGUE_MAP.keys())
 
@@ -93,6 +103,21 @@ def _parse_last_modified(header_value: Optional[str]) -> Optional[datetime]:
         return None
 
 
+def _etag_key(cache_key: str) -> str:
+    """Meta key under which a file's ETag is kept, next to its Last-Modified entry."""
+    return f"{cache_key}:etag"
+
+
+def _conditional_headers(cache_key: str, meta: dict) -> dict:
+    """If-Modified-Since / If-None-Match headers from what the cache knows about a file."""
+    headers = {}
+    if meta.get(cache_key):
+        headers["If-Modified-Since"] = meta[cache_key]
+    if meta.get(_etag_key(cache_key)):
+        headers["If-None-Match"] = meta[_etag_key(cache_key)]
+    return headers
+
+
 def _load_meta(meta_file: Path) -> dict:
     """Load the Last-Modified cache from disk."""
     import json
@@ -174,8 +199,8 @@ def download_csv(
     """
     Download a single CSV from football-data.co.uk.
 
-    Uses conditional GET (Last-Modified check) to skip files that haven't
-    changed since the last download, unless `force=True`.
+    Sends a single conditional GET (If-Modified-Since / If-None-Match from the
+    cache) and returns None on 304 Not Modified, unless `force=True`.
 
     Args:
         url:     Full CSV URL.
@@ -195,34 +220,31 @@ def download_csv(
     sess.headers.update(HEADERS)
 
     cache_key = f"{season}/{fd_code}"
+    conditional = {} if force else _conditional_headers(cache_key, meta)
 
-    # --- freshness check via HEAD ---
-    if not force:
-        try:
-            head_resp = sess.head(url, timeout=15, allow_redirects=True)
-            server_lm = _parse_last_modified(
-                head_resp.headers.get("Last-Modified")
-            )
-            cached_lm_str = meta.get(cache_key)
-            if server_lm and cached_lm_str:
-                cached_lm = parsedate_to_datetime(cached_lm_str)
-                if cached_lm >= server_lm:
-                    return None  # nothing new
-        except Exception:
-            pass  # network hiccup — fall through to full download
-
-    # --- full download ---
     try:
-        get_resp = sess.get(url, timeout=60)
+        get_resp = sess.get(url, timeout=60, headers=conditional)
+        if get_resp.status_code == 304:
+            return None  # nothing new
         get_resp.raise_for_status()
     except requests.HTTPError as exc:
         print(f"  [WARN] HTTP {exc.response.status_code} for {url} — skipping")
         return None
 
-    # Update Last-Modified cache
+    # Servers that ignore the conditional headers: compare Last-Modified ourselves
     lm_header = get_resp.headers.get("Last-Modified")
+    if conditional.get("If-Modified-Since"):
+        server_lm = _parse_last_modified(lm_header)
+        cached_lm = _parse_last_modified(conditional["If-Modified-Since"])
+        if server_lm and cached_lm and cached_lm >= server_lm:
+            return None
+
+    # Update Last-Modified / ETag cache
     if lm_header:
         meta[cache_key] = lm_header
+    etag = get_resp.headers.get("ETag")
+    if etag:
+        meta[_etag_key(cache_key)] = etag
 
     content = get_resp.content
     if not content.strip():
@@ -267,55 +289,6 @@ def download_csv(
     return df
 
 
-# ---------------------------------------------------------------------------
-# Merge & write
-# ---------------------------------------------------------------------------
-
-def merge_and_write(
-    frames: list[pd.DataFrame],
-    output_file: Path,
-    existing_file: Optional[Path] = None,
-) -> pd.DataFrame:
-    """
-    Concatenate downloaded frames with any pre-existing data and write to disk.
-
-    New rows (identified by Date + HomeTeam + AwayTeam + league_code) replace
-    existing ones so re-running is idempotent.
-
-    Args:
-        frames:        List of DataFrames from this run.
-        output_file:   Destination CSV path.
-        existing_file: Path to the file that may already contain historic data.
-                       Defaults to output_file.
-
-    Returns:
-        The merged DataFrame that was written.
-    """
-    if existing_file is None:
-        existing_file = output_file
-
-    new_df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
-
-    if existing_file.exists() and not new_df.empty:
-        try:
-            old_df = pd.read_csv(existing_file, low_memory=False)
-            # Concatenate then deduplicate, keeping the newer (last) row per key
-            combined = pd.concat([old_df, new_df], ignore_index=True)
-            dedup_cols = ["Date", "HomeTeam", "AwayTeam", "league_code"]
-            existing_dedup = [c for c in dedup_cols if c in combined.columns]
-            combined = combined.drop_duplicates(subset=existing_dedup, keep="last")
-            merged = combined
-        except Exception as exc:
-            print(f"[WARN] Could not read existing file ({exc}); replacing it.")
-            merged = new_df
-    else:
-        merged = new_df
-
-    output_file.parent.mkdir(parents=True, exist_ok=True)
-    merged.to_csv(output_file, index=False)
-    return merged
-
-
 # ---------------------------------------------------------------------------
 # Main entry point
 # ---------------------------------------------------------------------------
@@ -326,6 +299,8 @@ def run(
     force: bool = False,
     output_file: Optional[Path] = None,
     session: Optional[requests.Session] = None,
+    workers: int = DEFAULT_WORKERS,
+    store: Optional[OddsStore] = None,
 ) -> pd.DataFrame:
     """
     Orchestrate the full scrape → download → merge cycle.
@@ -334,13 +309,16 @@ def run(
         season:      Specific season code (e.g. '2526'). Defaults to current.
         all_seasons: Download all seasons found on the page (ignores `season`).
         force:       Ignore Last-Modified cache; always re-download.
-        output_file: Override the default output path.
+        output_file: Override the default compatibility CSV path.
         session:     Optional requests.Session (useful in tests for mocking).
+        workers:     Number of CSVs downloaded in parallel.
+        store:       Parquet store to update (defaults to data/football_data_parquet).
 
     Returns:
-        The merged DataFrame written to disk.
+        The full dataset, as exported to the compatibility CSV.
     """
     out = output_file or OUTPUT_FILE
+    store = store or OddsStore()
     RAW_DIR.mkdir(parents=True, exist_ok=True)
 
     if all_seasons:
@@ -350,9 +328,19 @@ def run(
         season_filter = season or _current_season_code()
         print(f"Season filter: {season_filter}")
 
+    if session is None:
+        sess = requests.Session()
+        # One pooled connection per worker (requests keeps 10 per host by default)
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=max(workers, 1))
+        sess.mount("https://", adapter)
+        sess.mount("http://", adapter)
+    else:
+        sess = session
+    sess.headers.update(HEADERS)
+
     # Discover links
     print(f"Fetching {DATA_PAGE} ...")
-    links = discover_csv_links(season_filter=season_filter, session=session)
+    links = discover_csv_links(season_filter=season_filter, session=sess)
 
     if not links:
         print("No matching CSV links found. Nothing to download.")
@@ -372,26 +360,32 @@ def run(
     skipped = 0
     failed = 0
 
-    sess = session or requests.Session()
-    sess.headers.update(HEADERS)
-
-    for lnk in links:
-        fd_code = lnk["fd_code"]
-        s = lnk["season"]
-        url = lnk["url"]
-        label = f"{fd_code}/{s}"
-
-        time.sleep(0.3)  # polite crawl delay
+    meta_lock = threading.Lock()
 
+    def fetch(lnk: dict) -> Optional[pd.DataFrame]:
+        time.sleep(CRAWL_DELAY)  # polite crawl delay
+        # Each download works on its own entries so the shared cache is only touched under the lock
+        cache_key = f"{lnk['season']}/{lnk['fd_code']}"
+        with meta_lock:
+            file_meta = {k: meta[k] for k in (cache_key, _etag_key(cache_key)) if k in meta}
         df = download_csv(
-            url=url,
-            fd_code=fd_code,
-            season=s,
+            url=lnk["url"],
+            fd_code=lnk["fd_code"],
+            season=lnk["season"],
             force=force,
-            meta=meta,
+            meta=file_meta,
             session=sess,
         )
+        with meta_lock:
+            meta.update(file_meta)
+        return df
 
+    # map() keeps the link order, so frames are merged in the same order as before
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        results = list(pool.map(fetch, links))
+
+    for lnk, df in zip(links, results):
+        label = f"{lnk['fd_code']}/{lnk['season']}"
         if df is None:
             skipped += 1
             print(f"  [SKIP] {label} — unchanged or empty")
@@ -415,8 +409,14 @@ def run(
         print("No new data downloaded. Output file not changed.")
         return pd.DataFrame()
 
-    print(f"\nMerging into {out} ...")
-    merged = merge_and_write(frames, out)
+    if not store.exists() and out.exists():
+        # First run on the Parquet store: keep the history from the single CSV
+        print(f"Importing existing {out} into {store.root} ...")
+        store.import_csv(out)
+
+    written = store.write(frames)
+    print(f"\nReplaced {len(written)} partition(s) in {store.root}")
+    merged = store.export_csv(out)
     print(f"Output: {len(merged):,} total rows in {out}")
     return merged
 
@@ -450,6 +450,12 @@ if __name__ == "__main__":
         metavar="PATH",
         help=f"Override output CSV path (default: {OUTPUT_FILE})",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Number of parallel downloads (default: {DEFAULT_WORKERS})",
+    )
 
     args = parser.parse_args()
 
@@ -458,6 +464,7 @@ if __name__ == "__main__":
         all_seasons=args.all_seasons,
         force=args.force,
         output_file=Path(args.output) if args.output else None,
+        workers=args.workers,
     )
 
     if result.empty:
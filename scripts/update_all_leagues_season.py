@@ -19,6 +19,10 @@ Usage:
     python3 scripts/update_all_leagues_season.py --season 2025
     python3 scripts/update_all_leagues_season.py --season 2025 --full  # Force full reprocess
     python3 scripts/update_all_leagues_season.py --season 2025 --limit 5  # Test with first 5 leagues
+    python3 scripts/update_all_leagues_season.py --season 2015 --lightweight  # Skip match reports when coaches are known
+    python3 scripts/update_all_leagues_season.py --season 2025 --json-first  # tmapi JSON with HTML fallback
+    python3 scripts/update_all_leagues_season.py --season 2025 --cold  # Ignore the warm cache snapshot
+    python3 scripts/update_all_leagues_season.py --season 2025 --reconcile  # Drop rows deleted upstream from the cache
 """
 
 import sys
@@ -34,6 +38,7 @@ if sys.version_info[0] < 3:
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 import argparse
+import pandas as pd
 import requests
 
 from pipelines.season_pipeline import run_season_pipeline
@@ -41,22 +46,29 @@ from repositories.coach.supabase_coach_repository import SupabaseCoachRepository
 from repositories.match.supabase_match_repository import SupabaseMatchRepository
 from repositories.pipeline_context import PipelineContext
 from repositories.tenure.supabase_coach_tenure_repository import SupabaseCoachTenureRepository
+from repositories.tenure.coach_tenure_index import CoachTenureIndex
 from repositories.league_season_state.supabase_league_season_state_repository import SupabaseLeagueSeasonStateRepository
 from utils.db_utils import fetch_league_data
-from services.supabase_service import create_supabase_client
+from services.supabase_service import get_supabase_client
+from utils.id_set import IdSet
+from utils.warm_cache import WarmCache
+from services.match_source import create_json_first_source
 
 
-def create_context() -> PipelineContext:
+def create_context(tenure_index: CoachTenureIndex = None, match_source=None,
+                   warm_cache: WarmCache = None) -> PipelineContext:
     """Create a pipeline context with all necessary repositories"""
-    client = create_supabase_client()
+    client = get_supabase_client()
     return PipelineContext(
-        coach_repo=SupabaseCoachRepository(client=client),
-        match_repo=SupabaseMatchRepository(client=client),
-        tenure_repo=SupabaseCoachTenureRepository(client=client),
+        coach_repo=SupabaseCoachRepository(client=client, warm_cache=warm_cache),
+        match_repo=SupabaseMatchRepository(client=client, warm_cache=warm_cache),
+        tenure_repo=SupabaseCoachTenureRepository(client=client, warm_cache=warm_cache),
         state_repo=SupabaseLeagueSeasonStateRepository(client=client),
-        coach_cache=set(),
-        match_cache=set(),
+        coach_cache=IdSet(),
+        match_cache=IdSet(),
         tenure_cache=set(),
+        tenure_index=tenure_index,
+        match_source=match_source,
     )
 
 
@@ -80,6 +92,26 @@ def main():
         type=int,
         help='Limit to first N leagues (for testing)'
     )
+    parser.add_argument(
+        '--lightweight',
+        action='store_true',
+        help='Fill coaches from the Coach_tenure index and only fetch match reports when it is ambiguous (attendance left unknown)'
+    )
+    parser.add_argument(
+        '--json-first',
+        action='store_true',
+        help='Read matches from the tmapi game endpoint, falling back to the HTML match report'
+    )
+    parser.add_argument(
+        '--cold',
+        action='store_true',
+        help='Start with empty caches instead of the snapshot saved by the previous run'
+    )
+    parser.add_argument(
+        '--reconcile',
+        action='store_true',
+        help='Rescan all IDs to drop rows deleted upstream from the warm cache (otherwise done weekly)'
+    )
     
     args = parser.parse_args()
     
@@ -95,9 +127,13 @@ def main():
     print(f"{'='*80}\n")
     
     # Fetch all leagues from database
+    # Warm start: load the previous run's snapshot and pull only what changed since
+    warm_cache = WarmCache() if args.cold else WarmCache.load()
     try:
-        client = create_supabase_client()
-        leagues_df = fetch_league_data(client)
+        client = get_supabase_client()
+        warm_cache.sync(client, reconcile=args.reconcile)
+        leagues_df = pd.DataFrame(
+            warm_cache.metadata.get_or_load("leagues", lambda: fetch_league_data(client).to_dict("records")))
         print(f"✅ Found {len(leagues_df)} leagues in database\n")
     except Exception as e:
         print(f"❌ Error fetching leagues from database: {e}")
@@ -107,70 +143,83 @@ def main():
     if limit:
         leagues_df = leagues_df.head(limit)
     
+    # The tenure index is loaded once and shared across leagues (coaches move between them)
+    tenure_index = None
+    if args.lightweight:
+        tenure_index = CoachTenureIndex.from_client(client)
+        print(f"🗂️  Loaded {len(tenure_index)} manager tenures into the tenure index\n")
+    
     # Create session
     session = requests.session()
     session.verify = False  # Bypass SSL certificate verification
     import urllib3
     urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    match_source = create_json_first_source(session) if args.json_first else None
+    # One context for the whole run: the ID caches (coach_cache/match_cache) are unbounded IdSets, a few
+    # bytes per ID, so they stay warm across leagues; only the WarmCache LRU tiers are bounded
+    context = create_context(tenure_index=tenure_index, match_source=match_source, warm_cache=warm_cache)
     
     # Track results
     successful_leagues = []
     failed_leagues = []
     total_errors = 0
     
-    # Process each league
-    for idx, league in enumerate(leagues_df.itertuples(), 1):
-        league_id = league.tm_league_id
-        league_code = league.tm_code
-        country = league.country
+    try:
+        # Process each league
+        for idx, league in enumerate(leagues_df.itertuples(), 1):
+            league_id = league.tm_league_id
+            league_code = league.tm_code
+            country = league.country
         
-        print(f"\n{'='*80}")
-        print(f"[{idx}/{len(leagues_df)}] 🏆 Processing: {country} - {league_code}")
-        print(f"{'='*80}")
+            print(f"\n{'='*80}")
+            print(f"[{idx}/{len(leagues_df)}] 🏆 Processing: {country} - {league_code}")
+            print(f"{'='*80}")
         
-        # Create fresh context for each league to avoid cache bloat
-        context = create_context()
+            # If full reprocess, delete existing state
+            if full_reprocess:
+                try:
+                    context.state_repo.delete_state(league_id, season_id)
+                    print(f"🔄 Cleared state for full reprocess")
+                except Exception as e:
+                    print(f"⚠️  Could not clear state: {e}")
         
-        # If full reprocess, delete existing state
-        if full_reprocess:
+            # Run the season pipeline
             try:
-                context.state_repo.delete_state(league_id, season_id)
-                print(f"🔄 Cleared state for full reprocess")
-            except Exception as e:
-                print(f"⚠️  Could not clear state: {e}")
-        
-        # Run the season pipeline
-        try:
-            err_match_ids = run_season_pipeline(
-                league_id=league_id,
-                league_code=league_code,
-                season_id=season_id,
-                session=session,
-                context=context,
-                incremental=not full_reprocess
-            )
+                err_match_ids = run_season_pipeline(
+                    league_id=league_id,
+                    league_code=league_code,
+                    season_id=season_id,
+                    session=session,
+                    context=context,
+                    incremental=not full_reprocess,
+                    lightweight=args.lightweight
+                )
             
-            if err_match_ids:
-                total_errors += len(err_match_ids)
+                if err_match_ids:
+                    total_errors += len(err_match_ids)
+                    failed_leagues.append({
+                        'league_code': league_code,
+                        'country': country,
+                        'error_count': len(err_match_ids)
+                    })
+                    print(f"⚠️  Completed with {len(err_match_ids)} match errors")
+                else:
+                    successful_leagues.append(f"{country} - {league_code}")
+                    print(f"✅ Successfully completed")
+                
+            except Exception as e:
                 failed_leagues.append({
                     'league_code': league_code,
                     'country': country,
-                    'error_count': len(err_match_ids)
+                    'error': str(e)
                 })
-                print(f"⚠️  Completed with {len(err_match_ids)} match errors")
-            else:
-                successful_leagues.append(f"{country} - {league_code}")
-                print(f"✅ Successfully completed")
-                
-        except Exception as e:
-            failed_leagues.append({
-                'league_code': league_code,
-                'country': country,
-                'error': str(e)
-            })
-            print(f"❌ Fatal error: {e}")
-            import traceback
-            traceback.print_exc()
+                print(f"❌ Fatal error: {e}")
+                import traceback
+                traceback.print_exc()
+    finally:
+        # Persist the caches so the next run starts warm, also after a crash mid-run
+        warm_cache.save()
+    warm_cache.print_report()
     
     # Print summary
     print(f"\n{'='*80}")
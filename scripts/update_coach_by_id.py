@@ -36,6 +36,8 @@ from repositories.coach.supabase_coach_repository import SupabaseCoachRepository
 from repositories.tenure.supabase_coach_tenure_repository import SupabaseCoachTenureRepository
 from repositories.pipeline_context import PipelineContext
 from services.supabase_service import create_supabase_client
+from utils.id_set import IdSet
+from utils.write_filter import WriteFilter, DEFAULT_CACHE_FILE
 
 
 def create_context() -> PipelineContext:
@@ -46,9 +48,10 @@ def create_context() -> PipelineContext:
         match_repo=None,  # Not needed for coach updates
         tenure_repo=SupabaseCoachTenureRepository(client=client),
         state_repo=None,  # Not needed for coach updates
-        coach_cache=set(),
-        match_cache=set(),
+        coach_cache=IdSet(),
+        match_cache=IdSet(),
         tenure_cache=set(),
+        write_filter=WriteFilter(cache_file=DEFAULT_CACHE_FILE),
     )
 
 
@@ -105,6 +108,8 @@ def main():
             import traceback
             traceback.print_exc()
     
+    context.write_filter.save()
+
     # Print summary
     print(f"\n{'='*80}")
     print(f"📊 Update Summary")
@@ -116,6 +121,8 @@ def main():
     if failed_coaches:
         print(f"\n❌ Failed to update: {len(failed_coaches)} coach(es)")
         print(f"   Coach IDs: {', '.join(failed_coaches)}")
+
+    context.write_filter.print_report()
     
     print(f"\n{'='*80}\n")
     
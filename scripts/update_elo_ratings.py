@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Bring the Elo club ratings (services/elo_ratings.py) up to date.
+
+Streams the Match rows played since the stored watermark in date order,
+updates the ratings and stores each match's pre-match win/draw/loss
+probabilities under data/elo_ratings/.
+
+Usage:
+    python scripts/update_elo_ratings.py [--full-rebuild]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from supabase import create_client
+
+# Allow imports from repo root
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.settings import SUPABASE_URL, SUPABASE_KEY
+from services.elo_ratings import RatingStore, update_ratings
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Update Elo club ratings from new matches')
+    parser.add_argument('--full-rebuild', action='store_true', help='Re-rate every match from scratch')
+    args = parser.parse_args()
+
+    start = time.time()
+    print("Updating Elo club ratings...")
+    update_ratings(create_client(SUPABASE_URL, SUPABASE_KEY), RatingStore(), full_rebuild=args.full_rebuild)
+    print(f"Done in {time.time() - start:.1f}s")
@@ -16,6 +16,12 @@ The script will:
 Usage:
     python3 scripts/update_league_season.py --league GB1 --season 2025
     python3 scripts/update_league_season.py --league GB1 --season 2025 --full  # Force full reprocess
+    python3 scripts/update_league_season.py --league GB1 --season 2015 --lightweight  # Skip match reports when coaches are known
+    python3 scripts/update_league_season.py --league GB1 --season 2025 --json-first  # tmapi JSON with HTML fallback
+    python3 scripts/update_league_season.py --league GB1 --season 2025 --replica data/replica.sqlite  # Local read replica
+    python3 scripts/update_league_season.py --league GB1 --season 2025 --write-behind  # Journal writes, flush in background
+    python3 scripts/update_league_season.py --league GB1 --season 2025 --async  # Overlap DB writes with the next fetch
+    python3 scripts/update_league_season.py --league GB1 --season 2025 --standings  # Keep the league table current, print it
 """
 
 import sys
@@ -31,32 +37,130 @@ if sys.version_info[0] < 3:
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 import argparse
+import asyncio
 import requests
 
 from pipelines.season_pipeline import run_season_pipeline
+from pipelines.async_season_pipeline import run_async_season_pipeline
 from repositories.coach.supabase_coach_repository import SupabaseCoachRepository
 from repositories.match.supabase_match_repository import SupabaseMatchRepository
-from repositories.pipeline_context import PipelineContext
+from repositories.match.standings_index import STATS, StandingsIndex
+from repositories.pipeline_context import PipelineContext, AsyncPipelineContext
 from repositories.tenure.supabase_coach_tenure_repository import SupabaseCoachTenureRepository
+from repositories.tenure.coach_tenure_index import CoachTenureIndex
 from repositories.league_season_state.supabase_league_season_state_repository import SupabaseLeagueSeasonStateRepository
 from utils.db_utils import get_league_id_by_code
-from services.supabase_service import create_supabase_client
+from services.supabase_service import create_supabase_client, create_async_supabase_client
+from utils.id_set import IdSet
+from services.match_source import create_json_first_source
+from repositories.sqlite_database import SqliteDatabase
+from repositories.coach.sqlite_coach_repository import SqliteCoachRepository
+from repositories.match.sqlite_match_repository import SqliteMatchRepository
+from repositories.tenure.sqlite_coach_tenure_repository import SqliteCoachTenureRepository
+from repositories.league_season_state.sqlite_league_season_state_repository import SqliteLeagueSeasonStateRepository
+from repositories.write_journal import WriteJournal, JournalFlusher
+from repositories.coach.journaled_coach_repository import JournaledCoachRepository
+from repositories.match.journaled_match_repository import JournaledMatchRepository
+from repositories.tenure.journaled_coach_tenure_repository import JournaledCoachTenureRepository
+from repositories.coach.async_supabase_coach_repository import AsyncSupabaseCoachRepository
+from repositories.match.async_supabase_match_repository import AsyncSupabaseMatchRepository
+from repositories.tenure.async_supabase_coach_tenure_repository import AsyncSupabaseCoachTenureRepository
+from repositories.league_season_state.async_supabase_league_season_state_repository import AsyncSupabaseLeagueSeasonStateRepository
 
 
-def create_context() -> PipelineContext:
-    """Create a pipeline context with all necessary repositories"""
+def load_standings(client, standings_season: tuple) -> StandingsIndex:
+    """Standings index of one (league_id, season_id), loaded from its saved matches."""
+    standings = StandingsIndex.from_client(client, [standings_season])
+    print(f"📋 Loaded {len(standings)} matches into the standings index")
+    return standings
+
+
+def print_standings(standings: StandingsIndex, league_id: int, season_id: int) -> None:
+    season = standings.season(league_id, season_id)
+    if season is None or season.span() is None:
+        print("📋 No played matches in the standings index")
+        return
+    table = season.table(season.span()[1], before=False)
+    print(f"\n📋 Standings after {season.span()[1]}:")
+    print(table[["position", "club_id"] + STATS + ["goal_difference"]].to_string(index=False))
+
+
+def create_context(lightweight: bool = False, json_first: bool = False, session=None,
+                   replica: SqliteDatabase = None, journal: WriteJournal = None,
+                   standings_season: tuple = None) -> PipelineContext:
+    """
+    Create a pipeline context with all necessary repositories. With both a
+    `replica` and a `journal`, the journal's flusher must mirror into the same
+    replica (JournalFlusher(replica=...)) so flushed rows stay visible locally.
+    With `standings_season` ((league_id, season_id)), the context carries that
+    season's standings index, updated with every saved match.
+    """
     client = create_supabase_client()
+    tenure_index = None
+    if lightweight:
+        tenure_index = CoachTenureIndex.from_client(client)
+        print(f"🗂️  Loaded {len(tenure_index)} manager tenures into the tenure index")
+    standings = load_standings(client, standings_season) if standings_season else None
+    coach_repo = SupabaseCoachRepository(client=client)
+    match_repo = SupabaseMatchRepository(client=client)
+    tenure_repo = SupabaseCoachTenureRepository(client=client)
+    state_repo = SupabaseLeagueSeasonStateRepository(client=client)
+    if replica is not None:
+        # Local SQLite replica: lookups stay local, writes are forwarded to Supabase
+        coach_repo = SqliteCoachRepository(replica, upstream=coach_repo)
+        match_repo = SqliteMatchRepository(replica, upstream=match_repo)
+        tenure_repo = SqliteCoachTenureRepository(replica, upstream=tenure_repo)
+        state_repo = SqliteLeagueSeasonStateRepository(replica, upstream=state_repo)
+    if journal is not None:
+        # Write-behind: saves land in the local journal and a background flusher upserts them
+        coach_repo = JournaledCoachRepository(journal, reader=coach_repo)
+        match_repo = JournaledMatchRepository(journal, reader=match_repo)
+        tenure_repo = JournaledCoachTenureRepository(journal, reader=tenure_repo, club_exists=tenure_repo.club_exists)
     return PipelineContext(
-        coach_repo=SupabaseCoachRepository(client=client),
-        match_repo=SupabaseMatchRepository(client=client),
-        tenure_repo=SupabaseCoachTenureRepository(client=client),
-        state_repo=SupabaseLeagueSeasonStateRepository(client=client),
-        coach_cache=set(),
-        match_cache=set(),
+        coach_repo=coach_repo,
+        match_repo=match_repo,
+        tenure_repo=tenure_repo,
+        state_repo=state_repo,
+        coach_cache=IdSet(),
+        match_cache=IdSet(),
         tenure_cache=set(),
+        tenure_index=tenure_index,
+        standings=standings,
+        match_source=create_json_first_source(session) if json_first else None,
     )
 
 
+async def create_async_context(json_first: bool = False, session=None,
+                               standings_season: tuple = None) -> AsyncPipelineContext:
+    """Create a pipeline context backed by the async Supabase repositories"""
+    client = await create_async_supabase_client()
+    standings = load_standings(create_supabase_client(), standings_season) if standings_season else None
+    return AsyncPipelineContext(
+        coach_repo=AsyncSupabaseCoachRepository(client=client),
+        match_repo=AsyncSupabaseMatchRepository(client=client),
+        tenure_repo=AsyncSupabaseCoachTenureRepository(client=client),
+        state_repo=AsyncSupabaseLeagueSeasonStateRepository(client=client),
+        coach_cache=IdSet(),
+        match_cache=IdSet(),
+        tenure_cache=set(),
+        standings=standings,
+        match_source=create_json_first_source(session) if json_first else None,
+    )
+
+
+async def run_async(league_id: int, league_code: str, season_id: int, session, json_first: bool, full: bool,
+                    standings: bool = False) -> list:
+    context = await create_async_context(json_first=json_first, session=session,
+                                         standings_season=(league_id, season_id) if standings else None)
+    if full:
+        await context.state_repo.delete_state(league_id, season_id)
+    err_match_ids = await run_async_season_pipeline(league_id=league_id, league_code=league_code,
+                                                    season_id=season_id, session=session, context=context)
+    if context.standings is not None:
+        print_standings(context.standings, league_id, season_id)
+    return err_match_ids
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Update a specific league-season with incremental processing'
@@ -77,8 +181,44 @@ def main():
         action='store_true',
         help='Force full reprocessing (ignore checkpoint)'
     )
+    parser.add_argument(
+        '--lightweight',
+        action='store_true',
+        help='Fill coaches from the Coach_tenure index and only fetch match reports when it is ambiguous (attendance left unknown)'
+    )
+    parser.add_argument(
+        '--json-first',
+        action='store_true',
+        help='Read matches from the tmapi game endpoint, falling back to the HTML match report'
+    )
+    parser.add_argument(
+        '--replica',
+        metavar='PATH',
+        help='Serve lookups from a SQLite replica at PATH (synced from Supabase on start)'
+    )
+    parser.add_argument(
+        '--write-behind',
+        action='store_true',
+        help='Journal writes locally and flush them to Supabase in the background'
+    )
+    parser.add_argument(
+        '--async',
+        dest='use_async',
+        action='store_true',
+        help='Use the async repositories and write each match while the next one is fetched'
+    )
+    parser.add_argument(
+        '--standings',
+        action='store_true',
+        help='Load the season\'s league table, keep it current with every saved match and print it at the end'
+    )
     
     args = parser.parse_args()
+    if args.use_async:
+        unsupported = [flag for flag, on in (('--lightweight', args.lightweight), ('--replica', args.replica),
+                                             ('--write-behind', args.write_behind)) if on]
+        if unsupported:
+            parser.error(f"--async cannot be combined with {', '.join(unsupported)}")
     
     league_code = args.league
     season_id = args.season
@@ -99,11 +239,34 @@ def main():
         sys.exit(1)
     
     # Create context and session
-    context = create_context()
     session = requests.session()
     session.verify = False  # Bypass SSL certificate verification
     import urllib3
     urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    if args.use_async:
+        err_match_ids = asyncio.run(run_async(league_id, league_code, season_id, session,
+                                              json_first=args.json_first, full=full_reprocess,
+                                              standings=args.standings))
+        if err_match_ids:
+            print(f"\n⚠️  Completed with {len(err_match_ids)} errors")
+            print(f"Failed match IDs: {err_match_ids}")
+        else:
+            print(f"\n✅ Successfully completed update for {league_code} {season_id}")
+        return
+
+    replica = journal = flusher = None
+    if args.replica:
+        replica = SqliteDatabase(args.replica)
+        replica.sync_from(client)
+    if args.write_behind:
+        journal = WriteJournal()
+        flusher = JournalFlusher(journal, client, replica=replica).start()
+        pending = journal.counts()
+        if pending:
+            print(f"📝 Resuming journal with unflushed rows from a previous run: {pending}")
+    context = create_context(lightweight=args.lightweight, json_first=args.json_first, session=session,
+                             replica=replica, journal=journal,
+                             standings_season=(league_id, season_id) if args.standings else None)
     
     # If full reprocess, delete existing state
     if full_reprocess:
@@ -122,7 +285,8 @@ def main():
             season_id=season_id,
             session=session,
             context=context,
-            incremental=not full_reprocess  # Incremental unless full reprocess requested
+            incremental=not full_reprocess,  # Incremental unless full reprocess requested
+            lightweight=args.lightweight
         )
         
         if err_match_ids:
@@ -130,12 +294,18 @@ def main():
             print(f"Failed match IDs: {err_match_ids}")
         else:
             print(f"\n✅ Successfully completed update for {league_code} {season_id}")
+        if context.standings is not None:
+            print_standings(context.standings, league_id, season_id)
             
     except Exception as e:
         print(f"\n❌ Fatal error during pipeline execution: {e}")
         import traceback
         traceback.print_exc()
         sys.exit(1)
+    finally:
+        if flusher is not None:
+            flusher.stop(drain=True)
+            flusher.print_report()
     
     print(f"\n{'='*60}")
     print(f"🏁 Update complete!")
@@ -22,6 +22,8 @@ from repositories.tenure.supabase_coach_tenure_repository import SupabaseCoachTe
 from repositories.league_season_state.supabase_league_season_state_repository import SupabaseLeagueSeasonStateRepository
 from utils.db_utils import get_league_id_by_code
 from services.supabase_service import create_supabase_client
+from utils.id_set import IdSet
+from utils.write_filter import WriteFilter, DEFAULT_CACHE_FILE
 
 def create_context() -> PipelineContext:
     client = create_supabase_client()
@@ -30,9 +32,10 @@ def create_context() -> PipelineContext:
         match_repo=SupabaseMatchRepository(client=client),
         tenure_repo=SupabaseCoachTenureRepository(client=client),
         state_repo=SupabaseLeagueSeasonStateRepository(client=client),
-        coach_cache=set(),
-        match_cache=set(),
+        coach_cache=IdSet(),
+        match_cache=IdSet(),
         tenure_cache=set(),
+        write_filter=WriteFilter(cache_file=DEFAULT_CACHE_FILE),
     )
 
 def main():
@@ -79,6 +82,9 @@ def main():
         import traceback
         traceback.print_exc()
         sys.exit(1)
+    finally:
+        context.write_filter.save()
+        context.write_filter.print_report()
 
 if __name__ == "__main__":
     main()
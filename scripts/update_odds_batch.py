@@ -1,13 +1,16 @@
 #!/usr/bin/env python3
 """
 Batch update Match table with odds data from all_leagues_full_augmented.csv
-Uses efficient batch processing and logs all matches/non-matches
+Joins CSV and database rows on a typed composite key, matches the leftovers to
+a Match of the same clubs and score up to --date-tolerance days apart, writes
+odds through the bulk_update_match_odds RPC
+(scripts/create_bulk_update_match_odds_function.sql) and logs all matches/non-matches
 """
 
 import sys
 from pathlib import Path
 import pandas as pd
-from supabase import create_client, Client
+from supabase import create_client
 import time
 from datetime import datetime
 
@@ -15,241 +18,202 @@ from datetime import datetime
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from config.settings import SUPABASE_URL, SUPABASE_KEY
+from services.odds_reconciliation import (
+    DEFAULT_CHUNK_SIZE, DEFAULT_DATE_TOLERANCE_DAYS, REASON_NO_AWAY, REASON_NO_HOME, REASON_NO_MATCH, REASON_NO_TEAMS,
+    OddsUpdate, fetch_match_odds_frame, prepare_csv_frame, prepare_db_frame, read_augmented_csv, reconcile, write_odds,
+)
 
-def batch_update_odds():
-    """Batch update Match records with odds data"""
-    
-    print("="*80)
-    print("BATCH ODDS UPDATE WITH LOGGING")
-    print("="*80)
-    
-    # Initialize Supabase client
-    print("\n1. Connecting to Supabase...")
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-    print("   ✓ Connected")
-    
-    # Load CSV data
-    print("\n2. Loading all_leagues_full_augmented.csv...")
-    csv_df = pd.read_csv('data/all_leagues_full_augmented.csv')
-    print(f"   ✓ Loaded {len(csv_df):,} rows")
-    
-    # Filter rows with complete odds
-    csv_df = csv_df[csv_df['OddsH'].notna() & csv_df['OddsD'].notna() & csv_df['OddsA'].notna()].copy()
+# Log files keep the CSV's column names
+LOG_COLUMNS = {
+    'home_team_score': 'FTHG', 'away_team_score': 'FTAG',
+    'home_club_id': 'tm_home_team_id', 'away_club_id': 'tm_away_team_id',
+    'odds_home': 'OddsH', 'odds_draw': 'OddsD', 'odds_away': 'OddsA',
+}
+
+def prepare_odds_update(supabase, raw_csv_df, date_tolerance_days=DEFAULT_DATE_TOLERANCE_DAYS):
+    """
+    Match augmented CSV rows to Match rows. Only matches within the CSV rows'
+    date range (widened by the date tolerance) are read, so a delta of recent
+    rows reads a few hundred matches.
+    """
+    print(f"   ✓ Loaded {len(raw_csv_df):,} rows")
+    
+    # Keep rows with complete odds and a complete, typed match key
+    csv_df = prepare_csv_frame(raw_csv_df)
     print(f"   ✓ {len(csv_df):,} rows have complete odds data")
     
-    # Fetch all Match data from database
+    # Fetch the Match rows the CSV rows can match (the key includes the date)
     print("\n3. Fetching Match data from database...")
-    print("   This may take a moment...")
-    
-    # Fetch in batches to avoid timeouts
-    all_matches = []
-    batch_size = 1000
-    offset = 0
-    
-    while True:
-        result = supabase.table('Match').select(
-            'tm_match_id, date, home_club_id, away_club_id, home_team_score, away_team_score, odds_home, odds_draw, odds_away'
-        ).range(offset, offset + batch_size - 1).execute()
-        
-        if not result.data:
-            break
-        
-        all_matches.extend(result.data)
-        offset += batch_size
-        print(f"   Fetched {len(all_matches):,} matches...", end='\r')
-    
-    print(f"\n   ✓ Fetched {len(all_matches):,} matches from database")
-    
-    # Convert to DataFrame
-    db_df_all = pd.DataFrame(all_matches)
-    
-    # Create a copy for matches with odds (for filtering unmatched later)
-    db_df_with_odds = db_df_all[
-        db_df_all['odds_home'].notna() & 
-        db_df_all['odds_draw'].notna() & 
-        db_df_all['odds_away'].notna()
-    ].copy()
-    
-    # Filter to matches that need odds data
-    before_filter = len(db_df_all)
-    db_df = db_df_all[
-        db_df_all['odds_home'].isna() | 
-        db_df_all['odds_draw'].isna() | 
-        db_df_all['odds_away'].isna()
-    ].copy()
-    matches_with_odds = before_filter - len(db_df)
+    if csv_df['match_date'].isna().all():
+        db_df_all = prepare_db_frame(pd.DataFrame())
+    else:
+        margin = pd.Timedelta(days=date_tolerance_days)
+        start_date = (csv_df['match_date'].min() - margin).strftime('%Y-%m-%d')
+        end_date = (csv_df['match_date'].max() + margin).strftime('%Y-%m-%d')
+        print(f"   Matches from {start_date} to {end_date}...")
+        db_df_all = prepare_db_frame(fetch_match_odds_frame(supabase, start_date=start_date, end_date=end_date))
+    print(f"\n   ✓ Fetched {len(db_df_all):,} matches from database")
+    
+    matches_with_odds = int(db_df_all['has_odds'].sum())
     print(f"   ✓ Filtered out {matches_with_odds:,} matches that already have complete odds")
-    print(f"   ✓ {len(db_df):,} matches need odds data")
+    print(f"   ✓ {len(db_df_all) - matches_with_odds:,} matches need odds data")
     
-    if len(db_df) == 0:
+    if matches_with_odds == len(db_df_all):
         print("\n✓ All matches already have odds data! Nothing to update.")
-        return
-    
-    # Create composite key for matching
-    print("\n4. Creating match keys...")
-    csv_df['match_key'] = (
-        csv_df['Date'].astype(str) + '|' +
-        csv_df['tm_home_team_id'].astype(str) + '|' +
-        csv_df['tm_away_team_id'].astype(str) + '|' +
-        csv_df['FTHG'].astype(str) + '|' +
-        csv_df['FTAG'].astype(str)
-    )
-    
-    db_df['match_key'] = (
-        db_df['date'].astype(str) + '|' +
-        db_df['home_club_id'].astype(str) + '|' +
-        db_df['away_club_id'].astype(str) + '|' +
-        db_df['home_team_score'].astype(str) + '|' +
-        db_df['away_team_score'].astype(str)
-    )
-    
-    # Create lookup dictionary
-    db_lookup = db_df.set_index('match_key')['tm_match_id'].to_dict()
-    print(f"   ✓ Created lookup for {len(db_lookup):,} unique match keys")
-    
-    # Debug: Show sample keys
-    print(f"\n   Sample database keys (without odds):")
-    for i, key in enumerate(list(db_lookup.keys())[:5]):
-        print(f"     {i+1}. {key}")
-    
-    print(f"\n   Sample CSV keys:")
-    for i, key in enumerate(csv_df['match_key'].head(5)):
-        print(f"     {i+1}. {key}")
-    
-    # Match CSV rows to database
-    print("\n5. Matching CSV rows to database records...")
-    csv_df['tm_match_id'] = csv_df['match_key'].map(db_lookup)
-    csv_df['match_status'] = csv_df['tm_match_id'].notna()
-    
-    matched_df = csv_df[csv_df['match_status']].copy()
-    unmatched_df = csv_df[~csv_df['match_status']].copy()
-    
-    # Filter out CSV rows that would match DB records already with complete odds
-    if len(db_df_with_odds) > 0:
-        db_with_odds_keys = set(
-            db_df_with_odds['date'].astype(str) + '|' +
-            db_df_with_odds['home_club_id'].astype(str) + '|' +
-            db_df_with_odds['away_club_id'].astype(str) + '|' +
-            db_df_with_odds['home_team_score'].astype(str) + '|' +
-            db_df_with_odds['away_team_score'].astype(str)
-        )
-        rows_matching_complete = unmatched_df['match_key'].isin(db_with_odds_keys).sum()
-        unmatched_df = unmatched_df[~unmatched_df['match_key'].isin(db_with_odds_keys)]
-        print(f"   ✓ Excluded {rows_matching_complete:,} CSV rows that match DB records with complete odds")
-    
-    print(f"   ✓ Matched: {len(matched_df):,} ({len(matched_df)/len(csv_df)*100:.1f}%)")
-    print(f"   ✓ Unmatched (need attention): {len(unmatched_df):,} ({len(unmatched_df)/len(csv_df)*100:.1f}%)")
-    
-    # Save match results
-    print("\n6. Saving match results...")
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    
+    # Match CSV rows to database on (date, home club, away club, home score, away score)
+    print("\n4. Matching CSV rows to database records...")
+    result = reconcile(csv_df, db_df_all, date_tolerance_days=date_tolerance_days)
+    print(f"   ✓ Excluded {len(result.already_complete):,} CSV rows that match DB records with complete odds")
+    print(f"   ✓ Matched: {len(result.matched):,} ({len(result.matched)/max(len(csv_df), 1)*100:.1f}%)")
+    if date_tolerance_days > 0:
+        print(f"   ✓ Of which dated up to {date_tolerance_days} day(s) apart: {len(result.shifted()):,}")
+    print(f"   ✓ Unmatched (need attention): {len(result.unmatched):,} "
+          f"({len(result.unmatched)/max(len(csv_df), 1)*100:.1f}%)")
+    return OddsUpdate(csv_rows=csv_df, matches=db_df_all, reconciliation=result)
+
+
+def save_match_logs(update, timestamp=None, data_dir='data'):
+    """Write the matched / unmatched CSV logs; returns their paths (None when there is nothing unmatched)."""
+    print("\n5. Saving match results...")
+    timestamp = timestamp or datetime.now().strftime('%Y%m%d_%H%M%S')
+    matched_df = update.reconciliation.matched
+    unmatched_df = update.reconciliation.unmatched
     
     # Save matched records
     matched_log = matched_df[[
-        'Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG',
-        'tm_home_team_id', 'tm_away_team_id', 'tm_match_id',
-        'OddsH', 'OddsD', 'OddsA'
-    ]].copy()
+        'Date', 'HomeTeam', 'AwayTeam', 'home_team_score', 'away_team_score',
+        'home_club_id', 'away_club_id', 'tm_match_id',
+        'odds_home', 'odds_draw', 'odds_away', 'date_offset_days'
+    ]].rename(columns=LOG_COLUMNS)
     matched_log['status'] = 'MATCHED'
-    matched_log_file = f'data/odds_update_matched_{timestamp}.csv'
+    matched_log_file = f'{data_dir}/odds_update_matched_{timestamp}.csv'
     matched_log.to_csv(matched_log_file, index=False)
     print(f"   ✓ Saved matched records to {matched_log_file}")
     
-    # Save unmatched records with analysis
-    if len(unmatched_df) > 0:
-        # Analyze unmatched reasons
-        unmatched_df['reason'] = 'No matching record in database'
-        
-        # Check if teams exist
-        db_home_teams = set(db_df['home_club_id'].unique())
-        db_away_teams = set(db_df['away_club_id'].unique())
-        
-        unmatched_df['home_team_exists'] = unmatched_df['tm_home_team_id'].isin(db_home_teams)
-        unmatched_df['away_team_exists'] = unmatched_df['tm_away_team_id'].isin(db_away_teams)
-        
-        # Refine reasons
-        unmatched_df.loc[~unmatched_df['home_team_exists'], 'reason'] = 'Home team not in database'
-        unmatched_df.loc[~unmatched_df['away_team_exists'], 'reason'] = 'Away team not in database'
-        unmatched_df.loc[~unmatched_df['home_team_exists'] & ~unmatched_df['away_team_exists'], 'reason'] = 'Both teams not in database'
-        
-        unmatched_log = unmatched_df[[
-            'Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG',
-            'tm_home_team_id', 'tm_away_team_id', 'reason'
-        ]].copy()
-        unmatched_log['status'] = 'UNMATCHED'
-        unmatched_log_file = f'data/odds_update_unmatched_{timestamp}.csv'
-        unmatched_log.to_csv(unmatched_log_file, index=False)
-        print(f"   ✓ Saved unmatched records to {unmatched_log_file}")
-        
-        # Print reason breakdown
-        print("\n   Unmatched breakdown:")
-        reason_counts = unmatched_df['reason'].value_counts()
-        for reason, count in reason_counts.items():
-            print(f"     - {reason}: {count:,}")
-    
-    # Batch update matched records
-    if len(matched_df) == 0:
+    if len(unmatched_df) == 0:
+        return matched_log_file, None
+    
+    # Analyze unmatched reasons (rows without team IDs already carry theirs)
+    unmatched_df = unmatched_df.copy()
+    no_match = unmatched_df['reason'] == REASON_NO_MATCH
+    
+    # Check if teams exist among the matches that still need odds
+    db_df = update.matches[~update.matches['has_odds']]
+    db_home_teams = set(db_df['home_club_id'].unique())
+    db_away_teams = set(db_df['away_club_id'].unique())
+    
+    unmatched_df['home_team_exists'] = unmatched_df['home_club_id'].isin(db_home_teams)
+    unmatched_df['away_team_exists'] = unmatched_df['away_club_id'].isin(db_away_teams)
+    
+    # Refine reasons
+    unmatched_df.loc[no_match & ~unmatched_df['home_team_exists'], 'reason'] = REASON_NO_HOME
+    unmatched_df.loc[no_match & ~unmatched_df['away_team_exists'], 'reason'] = REASON_NO_AWAY
+    unmatched_df.loc[no_match & ~unmatched_df['home_team_exists'] & ~unmatched_df['away_team_exists'], 'reason'] = REASON_NO_TEAMS
+    
+    unmatched_log = unmatched_df[[
+        'Date', 'HomeTeam', 'AwayTeam', 'home_team_score', 'away_team_score',
+        'home_club_id', 'away_club_id', 'reason'
+    ]].rename(columns=LOG_COLUMNS)
+    unmatched_log['status'] = 'UNMATCHED'
+    unmatched_log_file = f'{data_dir}/odds_update_unmatched_{timestamp}.csv'
+    unmatched_log.to_csv(unmatched_log_file, index=False)
+    print(f"   ✓ Saved unmatched records to {unmatched_log_file}")
+    
+    # Print reason breakdown
+    print("\n   Unmatched breakdown:")
+    reason_counts = unmatched_df['reason'].value_counts()
+    for reason, count in reason_counts.items():
+        print(f"     - {reason}: {count:,}")
+    return matched_log_file, unmatched_log_file
+
+
+def apply_odds_update(supabase, update, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Write the matched odds through the bulk_update_match_odds RPC; returns the rows updated."""
+    updates = update.reconciliation.updates()
+    if len(updates) == 0:
         print("\n✗ No matches found to update!")
-        return
+        return 0
     
-    print(f"\n7. Updating {len(matched_df):,} matches in database...")
-    print("   Processing in batches...")
+    print(f"\n6. Updating {len(updates):,} matches in database...")
+    print(f"   Writing in chunks of {chunk_size:,} through the bulk_update_match_odds RPC...")
     
-    updated_count = 0
-    error_count = 0
-    batch_size = 50  # Smaller batches for stability
+    start_time = time.time()
+    
+    def report(done, total):
+        elapsed = time.time() - start_time
+        rate = done / elapsed if elapsed > 0 else 0
+        print(f"   Progress: {done:,}/{total:,} ({done/total*100:.1f}%), Rate: {rate:.1f}/sec")
+    
+    update.written = write_odds(supabase, updates, chunk_size=chunk_size, on_progress=report)
+    return update.written
+
+
+def batch_update_odds(chunk_size=DEFAULT_CHUNK_SIZE, csv_df=None, supabase=None, write_logs=True,
+                      date_tolerance_days=DEFAULT_DATE_TOLERANCE_DAYS):
+    """
+    Batch update Match records with odds data
+    
+    Args:
+        chunk_size: Matches per bulk_update_match_odds call
+        csv_df: Augmented rows already in memory (read from all_leagues_full_augmented.csv otherwise)
+        supabase: Client to reuse (a new one is created otherwise)
+        write_logs: Save the matched / unmatched logs (callers can do it later with save_match_logs)
+        date_tolerance_days: Match leftover rows to a Match up to this many days apart (0 = exact dates only)
+    
+    Returns:
+        The OddsUpdate (with no updates when every match already had odds)
+    """
+    
+    print("="*80)
+    print("BATCH ODDS UPDATE WITH LOGGING")
+    print("="*80)
+    
+    if supabase is None:
+        print("\n1. Connecting to Supabase...")
+        supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+        print("   ✓ Connected")
+    
+    print("\n2. Loading all_leagues_full_augmented.csv...")
+    if csv_df is None:
+        csv_df = read_augmented_csv('data/all_leagues_full_augmented.csv')
     
     start_time = time.time()
+    update = prepare_odds_update(supabase, csv_df, date_tolerance_days=date_tolerance_days)
     
-    for i in range(0, len(matched_df), batch_size):
-        batch = matched_df.iloc[i:i+batch_size]
-        
-        for _, row in batch.iterrows():
-            try:
-                supabase.table('Match').update({
-                    'odds_home': float(row['OddsH']),
-                    'odds_draw': float(row['OddsD']),
-                    'odds_away': float(row['OddsA'])
-                }).eq('tm_match_id', int(row['tm_match_id'])).execute()
-                
-                updated_count += 1
-                
-            except Exception as e:
-                error_count += 1
-                if error_count <= 5:
-                    print(f"\n   Error updating match {row['tm_match_id']}: {e}")
-        
-        # Progress update
-        if (i + batch_size) % 500 == 0 or (i + batch_size) >= len(matched_df):
-            elapsed = time.time() - start_time
-            progress = min(i + batch_size, len(matched_df))
-            rate = updated_count / elapsed if elapsed > 0 else 0
-            remaining = len(matched_df) - progress
-            eta = remaining / rate if rate > 0 else 0
-            
-            print(f"   Progress: {progress:,}/{len(matched_df):,} "
-                  f"({progress/len(matched_df)*100:.1f}%), "
-                  f"Updated: {updated_count:,}, Errors: {error_count:,}, "
-                  f"Rate: {rate:.1f}/sec, ETA: {eta/60:.1f}min")
+    matched_log_file, unmatched_log_file = save_match_logs(update) if write_logs else (None, None)
+    updated_count = apply_odds_update(supabase, update, chunk_size=chunk_size)
     
     # Final summary
+    result = update.reconciliation
+    total = max(len(update.csv_rows), 1)
     elapsed = time.time() - start_time
     print("\n" + "="*80)
     print("UPDATE COMPLETE!")
     print("="*80)
-    print(f"Total CSV rows processed: {len(csv_df):,}")
-    print(f"Database matches already with odds: {matches_with_odds:,}")
-    print(f"Matched to database: {len(matched_df):,} ({len(matched_df)/len(csv_df)*100:.1f}%)")
+    print(f"Total CSV rows processed: {len(update.csv_rows):,}")
+    print(f"Database matches already with odds: {int(update.matches['has_odds'].sum()):,}")
+    print(f"Matched to database: {len(result.matched):,} ({len(result.matched)/total*100:.1f}%)")
     print(f"Successfully updated: {updated_count:,}")
-    print(f"Errors: {error_count:,}")
-    print(f"Not matched: {len(unmatched_df):,} ({len(unmatched_df)/len(csv_df)*100:.1f}%)")
+    print(f"Not matched: {len(result.unmatched):,} ({len(result.unmatched)/total*100:.1f}%)")
     print(f"Time elapsed: {elapsed/60:.1f} minutes")
-    print(f"Average rate: {updated_count/elapsed:.1f} updates/sec")
-    print(f"\nLog files:")
-    print(f"  - Matched: {matched_log_file}")
-    if len(unmatched_df) > 0:
+    if matched_log_file:
+        print(f"\nLog files:")
+        print(f"  - Matched: {matched_log_file}")
+    if unmatched_log_file:
         print(f"  - Unmatched: {unmatched_log_file}")
     print("="*80)
+    return update
 
 if __name__ == '__main__':
-    batch_update_odds()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Bulk update Match odds from all_leagues_full_augmented.csv')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f'Matches per bulk_update_match_odds call (default: {DEFAULT_CHUNK_SIZE})')
+    parser.add_argument('--date-tolerance', type=int, default=DEFAULT_DATE_TOLERANCE_DAYS, metavar='DAYS',
+                        help='Match rows to a Match of the same clubs and score up to DAYS apart when no '
+                             f'exact date matches (default: {DEFAULT_DATE_TOLERANCE_DAYS}, 0 = exact only)')
+    args = parser.parse_args()
+    
+    batch_update_odds(chunk_size=args.chunk_size, date_tolerance_days=args.date_tolerance)
@@ -1,17 +1,41 @@
 #!/usr/bin/env python3
 """
-Odds pipeline orchestrator — runs all 5 steps end-to-end.
+Odds pipeline orchestrator — runs all 5 steps end-to-end, in-process.
 
-Steps:
+Steps (nodes of a DAG, see utils/dag.py):
   1. scrape_football_data   — download CSVs from football-data.co.uk
   2. match_oddscheck_to_db  — fuzzy-match team names → DB club_id
   3. augment_all_leagues    — join mapping back onto the full CSV
   4. update_odds_batch      — bulk-update Match.odds_home/draw/away in DB
+     + odds update report   — matched / unmatched log files
   5. populate_match_team_expectation — compute xPts / delta_pts, write MTE table
 
-Any step can be skipped with the corresponding --skip-* flag, which is useful
-when you've already done part of the work manually or want to re-run from a
-specific point.
+Steps hand their DataFrames to each other in memory. The report and step 5
+only depend on step 4, so they run concurrently. Intermediate files
+(all_leagues_full_augmented.csv) are written as checkpoints unless
+--no-checkpoints is given; a skipped step's successor reads the checkpoint.
+
+Every step after the download records the fingerprints of its inputs
+(file size/mtime/sha256, the Parquet odds store, the updated_at watermark of
+the tables it reads, its parameters) and of its outputs in
+data/odds_pipeline_manifest.json (utils/step_manifest.py). A step whose inputs
+fingerprint the same as on its last successful run, and whose output files are
+untouched, is skipped automatically; --no-auto-skip runs it regardless.
+Step 1 is not fingerprinted: its conditional GETs already skip unchanged CSVs,
+and when nothing new was downloaded it hands None to the next steps.
+
+The --skip-* flags are overrides: they skip a step whatever its fingerprints
+say, e.g. when you've already done part of the work manually.
+
+Runs are incremental: the odds store stamps every new or modified row
+(utils/odds_store.py), and steps 1-4 only process the rows stamped since the
+last run that got through the odds update (the "delta"), so a weekly refresh
+matches, augments and reconciles a few hundred rows. The delta's augmented
+checkpoint is all_leagues_delta_augmented.csv. --full-history processes the
+whole store instead, for backfills or after editing the mapping by hand.
+Delta rows the odds update could not reconcile (no Match yet, a team not
+mapped yet) are kept in odds_delta_unmatched.csv and retried by the next
+runs until they match or their match is UNMATCHED_RETRY_DAYS old.
 
 Usage:
     python scripts/update_odds_pipeline.py                    # current season, all steps
@@ -23,18 +47,28 @@ Usage:
     python scripts/update_odds_pipeline.py --skip-mte         # skip step 5
     python scripts/update_odds_pipeline.py --force-scrape     # force re-download even if unchanged
     python scripts/update_odds_pipeline.py --dry-run          # steps 1-3 only (no DB writes)
+    python scripts/update_odds_pipeline.py --no-checkpoints   # keep intermediate frames in memory only
+    python scripts/update_odds_pipeline.py --no-auto-skip     # run steps even if their inputs are unchanged
+    python scripts/update_odds_pipeline.py --full-history     # backfill: process every stored row
 """
 
 import argparse
-import subprocess
+import os
 import sys
 import time
+from functools import partial
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pandas as pd
 
 # Allow imports from repo root
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from utils.dag import SKIPPED, Dag
+from utils.odds_store import DEDUP_COLS, DEFAULT_STORE_DIR, OddsStore, parse_match_dates
+from utils.step_manifest import StepManifest, fingerprint_file, fingerprint_frame, fingerprint_tree
+
 DATA_DIR = Path(__file__).parent.parent / "data"
 SCRIPTS_DIR = Path(__file__).parent
 
@@ -42,10 +76,25 @@ SCRIPTS_DIR = Path(__file__).parent
 ALL_LEAGUES_FULL = DATA_DIR / "all_leagues_full.csv"
 MAPPING_FILE = DATA_DIR / "oddscheck_to_db_mapping.csv"
 AUGMENTED_FILE = DATA_DIR / "all_leagues_full_augmented.csv"
+AUGMENTED_DELTA_FILE = DATA_DIR / "all_leagues_delta_augmented.csv"
+ODDS_STORE_DIR = DEFAULT_STORE_DIR
+MANIFEST_FILE = DATA_DIR / "odds_pipeline_manifest.json"
+# Manifest entry whose output is the ingested_at stamp the next delta starts after
+DELTA_ENTRY = "odds_delta"
+# Keys (DEDUP_COLS) of delta rows left unreconciled, added to the next delta
+UNMATCHED_FILE = DATA_DIR / "odds_delta_unmatched.csv"
+UNMATCHED_RETRY_DAYS = 28
 
 
 # ---------------------------------------------------------------------------
 # Step runners
+#
+# Each step returns its output (handed to the next steps in memory) on
+# success and False on failure. An input of None means the producing step was
+# skipped, so the step falls back to the file on disk.
+#
+# `since` is the ingested_at stamp the delta starts after; None means the
+# full history.
 # ---------------------------------------------------------------------------
 
 def _separator(title: str) -> None:
@@ -67,15 +116,68 @@ def _check_file(path: Path, label: str) -> bool:
     return True
 
 
+def _odds_delta(since: str) -> pd.DataFrame:
+    """Football-data rows new or modified after `since`, plus the unreconciled rows of earlier runs."""
+    store = OddsStore(ODDS_STORE_DIR)
+    delta = store.read(ingested_after=since)
+    retry = pd.read_csv(UNMATCHED_FILE, dtype=str) if UNMATCHED_FILE.exists() else pd.DataFrame()
+    if retry.empty or not store.exists():
+        return delta
+    stored = store.read(filters={"league_code": sorted(retry["league_code"].unique())})
+    carried = stored.merge(retry, on=DEDUP_COLS)
+    if carried.empty:
+        return delta
+    # A retried row that was modified since is already in the delta
+    return pd.concat([delta, carried], ignore_index=True).drop_duplicates(subset=DEDUP_COLS, ignore_index=True)
+
+
+def _match_key(df: pd.DataFrame) -> pd.Series:
+    """(YYYY-MM-DD date, home, away, league) per row, whatever the Date format."""
+    parsed = parse_match_dates(df["Date"])
+    dates = parsed.dt.strftime("%Y-%m-%d").where(parsed.notna(), df["Date"].astype(str))
+    return pd.Series(list(zip(dates, df["HomeTeam"].astype(str), df["AwayTeam"].astype(str),
+                              df["league_code"].astype(str))), index=df.index)
+
+
+def _save_unreconciled(rows: pd.DataFrame, odds_update, today: Optional[pd.Timestamp] = None) -> int:
+    """
+    Record the keys of `rows` (the run's delta) that the odds update neither
+    matched nor found with complete odds, if their match is recent enough to
+    be retried. Returns how many were recorded.
+    """
+    result = odds_update.reconciliation
+    reconciled = pd.concat([result.matched, result.already_complete])
+    done = set(_match_key(reconciled)) if not reconciled.empty else set()
+    left = rows[~_match_key(rows).isin(done)] if not rows.empty else rows
+    if not left.empty:
+        today = today if today is not None else pd.Timestamp.now().normalize()
+        recent = parse_match_dates(left["Date"]) >= today - pd.Timedelta(days=UNMATCHED_RETRY_DAYS)
+        left = left[recent.to_numpy()]
+    keys = left[DEDUP_COLS] if not left.empty else pd.DataFrame(columns=DEDUP_COLS)
+    UNMATCHED_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = UNMATCHED_FILE.with_name(UNMATCHED_FILE.name + ".tmp")
+    keys.drop_duplicates().to_csv(tmp, index=False)
+    os.replace(tmp, UNMATCHED_FILE)
+    return len(keys)
+
+
+def _augmented_file(since: Optional[str]) -> Path:
+    return AUGMENTED_FILE if since is None else AUGMENTED_DELTA_FILE
+
+
 def step1_scrape(
     season: Optional[str],
     force: bool,
     session=None,
-) -> bool:
+    since: Optional[str] = None,
+):
     """
-    Download CSVs from football-data.co.uk and merge into all_leagues_full.csv.
+    Download CSVs from football-data.co.uk into the Parquet odds store and
+    export it to all_leagues_full.csv.
 
-    Returns True on success.
+    Returns the rows stamped after `since` (possibly none), or with `since`
+    None the full football-data frame (None when nothing new was downloaded,
+    so the next steps read the existing data); False on failure.
     """
     _separator("STEP 1 / 5 — Download odds CSVs from football-data.co.uk")
 
@@ -92,33 +194,49 @@ def step1_scrape(
         if df.empty and not ALL_LEAGUES_FULL.exists():
             print("[ERROR] Scrape returned no data and no existing file found.")
             return False
+        if since is not None:
+            delta = _odds_delta(since)
+            print(f"[OK] Step 1 complete — {len(delta):,} new or modified rows since {since}")
+            return delta
+        if df.empty:
+            print(f"[OK] Step 1 complete — nothing new, keeping {ALL_LEAGUES_FULL}")
+            return None
         print(f"[OK] Step 1 complete — {len(df):,} rows in {ALL_LEAGUES_FULL}")
-        return True
+        return df
     except Exception as exc:
         print(f"[ERROR] Step 1 failed: {exc}")
         return False
 
 
 def step2_match_oddscheck(
+    football_data: Optional[pd.DataFrame] = None,
     min_confidence: int = 70,
     no_resume: bool = False,
-) -> bool:
+    since: Optional[str] = None,
+):
     """
-    Fuzzy-match team names from all_leagues_full.csv to DB club IDs.
-    Appends new matches to oddscheck_to_db_mapping.csv (precious file — never overwritten).
+    Resolve team names from the football-data rows to DB club IDs.
+    Adds new teams to oddscheck_to_db_mapping.csv (precious file — existing rows are kept).
 
-    Returns True on success.
+    Returns the mapping frame on success (None when the delta is empty and the
+    mapping file is unchanged), False otherwise.
     """
     _separator("STEP 2 / 5 — Fuzzy-match team names → DB club IDs")
 
-    if not _check_file(ALL_LEAGUES_FULL, "Step 1 (scrape)"):
+    if football_data is None and since is not None:
+        football_data = _odds_delta(since)
+    if football_data is None and not _check_file(ALL_LEAGUES_FULL, "Step 1 (scrape)"):
         return False
+    if football_data is not None and football_data.empty and MAPPING_FILE.exists():
+        print(f"[OK] Step 2 complete — no new or modified rows, keeping {MAPPING_FILE}")
+        return None
 
-    from scripts.match_oddscheck_to_db import match_clubs_to_database
+    from scripts.match_oddscheck_to_db import resolve_clubs_to_database
 
     try:
-        result_df = match_clubs_to_database(
+        result_df = resolve_clubs_to_database(
             min_confidence=min_confidence,
+            df=football_data,
             resume=not no_resume,
         )
         if result_df is None or result_df.empty:
@@ -127,103 +245,122 @@ def step2_match_oddscheck(
         print(
             f"[OK] Step 2 complete — {len(result_df):,} club mappings in {MAPPING_FILE}"
         )
-        return True
+        return result_df
     except Exception as exc:
         print(f"[ERROR] Step 2 failed: {exc}")
         return False
 
 
-def step3_augment() -> bool:
+def step3_augment(
+    football_data: Optional[pd.DataFrame] = None,
+    mapping: Optional[pd.DataFrame] = None,
+    checkpoint: bool = True,
+    since: Optional[str] = None,
+):
     """
-    Join the mapping back onto all_leagues_full.csv to add TM club IDs.
-    Outputs all_leagues_full_augmented.csv.
+    Join the mapping back onto the football-data rows to add TM club IDs.
+    Writes all_leagues_full_augmented.csv (all_leagues_delta_augmented.csv for
+    a delta) as a checkpoint when `checkpoint` is set.
 
-    Returns True on success.
+    Returns the augmented frame on success, False otherwise.
     """
     _separator("STEP 3 / 5 — Augment CSV with TM club IDs")
 
-    if not _check_file(ALL_LEAGUES_FULL, "Step 1 (scrape)"):
-        return False
-    if not _check_file(MAPPING_FILE, "Step 2 (match_oddscheck_to_db)"):
+    if football_data is None and since is not None:
+        football_data = _odds_delta(since)
+    if football_data is None and not _check_file(ALL_LEAGUES_FULL, "Step 1 (scrape)"):
         return False
-
-    # augment_all_leagues uses hardcoded relative paths — run via subprocess
-    # so it picks up the correct working directory (repo root).
-    try:
-        result = subprocess.run(
-            [sys.executable, str(SCRIPTS_DIR / "augment_all_leagues_with_mapping.py")],
-            cwd=str(SCRIPTS_DIR.parent),
-            capture_output=True,
-            text=True,
-        )
-        if result.returncode != 0:
-            print(f"[ERROR] Step 3 failed (exit {result.returncode}):")
-            print(result.stderr[-2000:] if result.stderr else "(no stderr)")
+    if mapping is None:
+        if not _check_file(MAPPING_FILE, "Step 2 (match_oddscheck_to_db)"):
             return False
+        mapping = pd.read_csv(MAPPING_FILE)
 
-        if not _check_file(AUGMENTED_FILE, "Step 3 output"):
-            return False
+    from scripts.augment_all_leagues_with_mapping import augment_all_leagues
 
-        print(f"[OK] Step 3 complete — augmented file at {AUGMENTED_FILE}")
-        return True
+    output_file = _augmented_file(since)
+    try:
+        if football_data is not None and football_data.empty:
+            augmented = football_data
+            if checkpoint:
+                augmented.to_csv(output_file, index=False)
+        else:
+            augmented = augment_all_leagues(
+                all_leagues_df=football_data,
+                mapping_df=mapping,
+                output_file=str(output_file) if checkpoint else None,
+            )
+        where = f"checkpoint at {output_file}" if checkpoint else "kept in memory"
+        print(f"[OK] Step 3 complete — {len(augmented):,} augmented rows ({where})")
+        return augmented
     except Exception as exc:
         print(f"[ERROR] Step 3 failed: {exc}")
         return False
 
 
-def step4_update_odds() -> bool:
+def step4_update_odds(augmented: Optional[pd.DataFrame] = None, since: Optional[str] = None):
     """
     Batch-update Match.odds_home / odds_draw / odds_away in the database.
 
-    Returns True on success.
+    Returns the OddsUpdate on success, False otherwise.
     """
     _separator("STEP 4 / 5 — Batch update odds in the database")
 
-    if not _check_file(AUGMENTED_FILE, "Step 3 (augment)"):
-        return False
-
-    try:
-        result = subprocess.run(
-            [sys.executable, str(SCRIPTS_DIR / "update_odds_batch.py")],
-            cwd=str(SCRIPTS_DIR.parent),
-            capture_output=True,
-            text=True,
-        )
-        # Print output so the user sees progress notes
-        if result.stdout:
-            print(result.stdout[-4000:])
-        if result.returncode != 0:
-            print(f"[ERROR] Step 4 failed (exit {result.returncode}):")
-            print(result.stderr[-2000:] if result.stderr else "(no stderr)")
+    if augmented is None:
+        checkpoint = _augmented_file(since)
+        if not _check_file(checkpoint, "Step 3 (augment)"):
             return False
+        from services.odds_reconciliation import read_augmented_csv
+        augmented = read_augmented_csv(checkpoint)
 
+    from scripts.update_odds_batch import batch_update_odds
+
+    try:
+        update = batch_update_odds(csv_df=augmented, write_logs=False)
         print("[OK] Step 4 complete")
-        return True
+        return update
     except Exception as exc:
         print(f"[ERROR] Step 4 failed: {exc}")
         return False
 
 
-def step5_populate_mte() -> bool:
+def step4_report(odds_update=None) -> bool:
+    """
+    Write the matched / unmatched log files of the odds update.
+
+    Returns True on success.
+    """
+    if odds_update is None:
+        print("\n[SKIP] Odds update report — nothing was reconciled")
+        return True
+
+    from scripts.update_odds_batch import save_match_logs
+
+    try:
+        save_match_logs(odds_update, data_dir=str(DATA_DIR))
+        print("[OK] Odds update report complete")
+        return True
+    except Exception as exc:
+        print(f"[ERROR] Odds update report failed: {exc}")
+        return False
+
+
+def step5_populate_mte(odds_update=None) -> bool:
     """
     Compute xPts / delta_pts and upsert into match_team_expectation.
+    Uses the matches (with their new odds) read by step 4, or reads them from
+    the database when step 4 did not run.
 
     Returns True on success.
     """
     _separator("STEP 5 / 5 — Populate match_team_expectation table")
 
+    from scripts.populate_match_team_expectation import run_etl
+
     try:
-        result = subprocess.run(
-            [sys.executable, str(SCRIPTS_DIR / "populate_match_team_expectation.py")],
-            cwd=str(SCRIPTS_DIR.parent),
-            capture_output=True,
-            text=True,
-        )
-        if result.stdout:
-            print(result.stdout[-4000:])
-        if result.returncode != 0:
-            print(f"[ERROR] Step 5 failed (exit {result.returncode}):")
-            print(result.stderr[-2000:] if result.stderr else "(no stderr)")
+        matches_df = odds_update.matches_with_odds() if odds_update is not None else None
+        result = run_etl(matches_df=matches_df)
+        if result is not None and result[1]:
+            print(f"[ERROR] Step 5 failed: {result[1]:,} rows were not written")
             return False
 
         print("[OK] Step 5 complete")
@@ -233,6 +370,71 @@ def step5_populate_mte() -> bool:
         return False
 
 
+# ---------------------------------------------------------------------------
+# Step fingerprints
+#
+# Inputs are fingerprinted before a step runs (to decide whether it can be
+# skipped) and again after it succeeded, so a step's own DB writes (step 4
+# moves Match.updated_at) do not invalidate it on the next run. Step 2 reads
+# Match before step 4 writes it, so run_pipeline carries step 4's watermark
+# over to step 2 once the odds update succeeded.
+# ---------------------------------------------------------------------------
+
+def _db_watermark(table: str) -> Optional[str]:
+    """Latest updated_at of `table` ('' if empty), or None when it cannot be read."""
+    try:
+        from services.supabase_service import get_supabase_client
+
+        rows = (
+            get_supabase_client().table(table).select("updated_at")
+            .order("updated_at", desc=True).limit(1).execute().data
+        )
+        return str(rows[0]["updated_at"]) if rows else ""
+    except Exception as exc:
+        print(f"[WARN] Could not read the {table} watermark ({exc}); not skipping on it")
+        return None
+
+
+def _odds_source_fingerprint() -> Optional[str]:
+    """The Parquet odds store, or all_leagues_full.csv when there is no store yet."""
+    tree = fingerprint_tree(ODDS_STORE_DIR, "**/*.parquet")
+    if tree is not None:
+        return tree
+    csv = fingerprint_file(ALL_LEAGUES_FULL)
+    return csv["sha256"] if csv else None
+
+
+Fingerprints = Callable[..., Dict[str, Any]]
+Outputs = Callable[[Any], Tuple[Optional[str], Dict[Path, Any]]]
+
+
+def _fingerprinted(manifest: StepManifest, name: str, step: Callable[..., Any],
+                   inputs: Fingerprints, outputs: Outputs, auto_skip: bool = True):
+    """
+    Wrap `step` so it returns SKIPPED when `manifest` says its inputs are
+    unchanged (and `auto_skip` is set), and records its fingerprints when it
+    succeeds. `inputs(**kwargs)` fingerprints the step's inputs;
+    `outputs(result)` returns (output fingerprint, {output file: fingerprint}).
+    """
+    def node(**kwargs):
+        if auto_skip and manifest.is_current(name, inputs(**kwargs)):
+            since = manifest.entry(name).get("completed_at")
+            print(f"\n[SKIP] {STEP_LABELS[name]} — inputs unchanged since {since}")
+            return SKIPPED
+        result = step(**kwargs)
+        if result is False:
+            manifest.forget(name)
+            return result
+        output, files = outputs(result)
+        manifest.record(name, inputs(**kwargs), output=output, files=files)
+        return result
+    return node
+
+
+def _frame_fingerprint(result: Any) -> Optional[str]:
+    return fingerprint_frame(result) if isinstance(result, pd.DataFrame) else None
+
+
 # ---------------------------------------------------------------------------
 # Orchestrator
 # ---------------------------------------------------------------------------
@@ -248,6 +450,9 @@ def run_pipeline(
     dry_run: bool = False,
     min_confidence: int = 70,
     no_resume: bool = False,
+    checkpoints: bool = True,
+    auto_skip: bool = True,
+    full_history: bool = False,
 ) -> bool:
     """
     Run the full odds pipeline.
@@ -258,17 +463,19 @@ def run_pipeline(
         skip_scrape:      Skip step 1.
         skip_matching:    Skip step 2 (fuzzy matching).
         skip_augment:     Skip step 3 (augment CSV).
-        skip_odds_update: Skip step 4 (DB odds update).
+        skip_odds_update: Skip step 4 (DB odds update and its report).
         skip_mte:         Skip step 5 (match_team_expectation).
         dry_run:          Run steps 1–3 only; skip any DB writes (steps 4–5).
         min_confidence:   Minimum fuzzy-match confidence for step 2.
-        no_resume:        Do not resume step 2 from checkpoint.
+        no_resume:        Rebuild the step 2 mapping instead of extending it.
+        checkpoints:      Write intermediate files (all_leagues_*_augmented.csv).
+        auto_skip:        Skip steps whose input fingerprints match the manifest.
+        full_history:     Process every stored row instead of the delta since the last run.
 
     Returns:
         True if all executed steps succeeded, False otherwise.
     """
     start = time.time()
-    results: dict[str, bool] = {}
 
     print("\n" + "=" * 72)
     print("  ODDS PIPELINE — football-data.co.uk → Supabase")
@@ -276,71 +483,128 @@ def run_pipeline(
     if dry_run:
         print("  [DRY RUN] Steps 4 and 5 will be skipped (no DB writes).")
 
-    # Step 1
-    if not skip_scrape:
-        ok = step1_scrape(season=season, force=force_scrape)
-        results["step1_scrape"] = ok
-        if not ok:
-            _print_summary(results, start)
-            return False
-    else:
-        print("\n[SKIP] Step 1 — scrape (--skip-scrape)")
-        results["step1_scrape"] = None
-
-    # Step 2
-    if not skip_matching:
-        ok = step2_match_oddscheck(
-            min_confidence=min_confidence,
-            no_resume=no_resume,
-        )
-        results["step2_matching"] = ok
-        if not ok:
-            _print_summary(results, start)
-            return False
-    else:
-        print("\n[SKIP] Step 2 — matching (--skip-matching)")
-        results["step2_matching"] = None
-
-    # Step 3
-    if not skip_augment:
-        ok = step3_augment()
-        results["step3_augment"] = ok
-        if not ok:
-            _print_summary(results, start)
-            return False
-    else:
-        print("\n[SKIP] Step 3 — augment (--skip-augment)")
-        results["step3_augment"] = None
-
     # Steps 4–5 are skipped in dry-run mode
     if dry_run:
         skip_odds_update = True
         skip_mte = True
 
-    # Step 4
-    if not skip_odds_update:
-        ok = step4_update_odds()
-        results["step4_odds_update"] = ok
-        if not ok:
-            _print_summary(results, start)
-            return False
-    else:
-        print("\n[SKIP] Step 4 — odds DB update (--skip-odds-update or --dry-run)")
-        results["step4_odds_update"] = None
-
-    # Step 5
-    if not skip_mte:
-        ok = step5_populate_mte()
-        results["step5_mte"] = ok
-        if not ok:
-            _print_summary(results, start)
-            return False
+    manifest = StepManifest(MANIFEST_FILE)
+    since = None if full_history else manifest.output_of(DELTA_ENTRY)
+    if since is None:
+        print("  Processing the full odds history.")
     else:
-        print("\n[SKIP] Step 5 — match_team_expectation (--skip-mte or --dry-run)")
-        results["step5_mte"] = None
+        print(f"  Processing odds rows new or modified since {since}.")
+    augmented_file = _augmented_file(since)
+
+    def mapping_inputs(**_):
+        return {
+            "odds": _odds_source_fingerprint(),
+            "min_confidence": min_confidence,
+            "Match": _db_watermark("Match"),
+            "Club": _db_watermark("Club"),
+            "League": _db_watermark("League"),
+        }
+
+    def mapping_outputs(result):
+        return _frame_fingerprint(result), {MAPPING_FILE: fingerprint_file(MAPPING_FILE)}
+
+    def recorded_file(step, path):
+        return manifest.entry(step).get("files", {}).get(str(path))
+
+    def file_hash(path, previous=None):
+        fingerprint = fingerprint_file(path, previous=previous)
+        return fingerprint["sha256"] if fingerprint else None
+
+    def augment_inputs(**_):
+        # By content: step 2 rewrites the mapping file on every run
+        mapping = file_hash(MAPPING_FILE, previous=recorded_file("step2_matching", MAPPING_FILE))
+        return {"odds": _odds_source_fingerprint(), "mapping": mapping,
+                "history": "full" if since is None else "delta"}
+
+    def augment_outputs(result):
+        if not checkpoints:
+            return _frame_fingerprint(result), {}
+        checkpoint = fingerprint_file(augmented_file)
+        return file_hash(augmented_file, previous=checkpoint), {augmented_file: checkpoint}
+
+    def odds_update_inputs(augmented=None):
+        if augmented is None:
+            # Step 3 was skipped: step 4 reads the checkpoint
+            source = file_hash(augmented_file, previous=recorded_file("step3_augment", augmented_file))
+        else:
+            source = manifest.output_of("step3_augment")
+        return {"augmented": source, "Match": _db_watermark("Match")}
+
+    def mte_inputs(**_):
+        return {"Match": _db_watermark("Match"), "Coach_tenure": _db_watermark("Coach_tenure")}
+
+    def no_outputs(result):
+        return None, {}
+
+    dag = Dag()
+    dag.add("step1_scrape", partial(step1_scrape, season=season, force=force_scrape, since=since),
+            skip=skip_scrape)
+    dag.add("step2_matching",
+            _fingerprinted(manifest, "step2_matching",
+                           partial(step2_match_oddscheck, min_confidence=min_confidence, no_resume=no_resume,
+                                   since=since),
+                           mapping_inputs, mapping_outputs, auto_skip=auto_skip and not no_resume),
+            inputs={"football_data": "step1_scrape"}, skip=skip_matching)
+    dag.add("step3_augment",
+            _fingerprinted(manifest, "step3_augment", partial(step3_augment, checkpoint=checkpoints, since=since),
+                           augment_inputs, augment_outputs, auto_skip=auto_skip and checkpoints),
+            inputs={"football_data": "step1_scrape", "mapping": "step2_matching"}, skip=skip_augment)
+    dag.add("step4_odds_update",
+            _fingerprinted(manifest, "step4_odds_update", partial(step4_update_odds, since=since),
+                           odds_update_inputs, no_outputs, auto_skip=auto_skip),
+            inputs={"augmented": "step3_augment"}, skip=skip_odds_update)
+    dag.add("step4_report", step4_report,
+            inputs={"odds_update": "step4_odds_update"}, skip=skip_odds_update)
+    dag.add("step5_mte",
+            _fingerprinted(manifest, "step5_mte", step5_populate_mte,
+                           mte_inputs, no_outputs, auto_skip=auto_skip),
+            inputs={"odds_update": "step4_odds_update"}, skip=skip_mte)
+
+    for name, node in dag.nodes.items():
+        if node.skip:
+            print(f"\n[SKIP] {STEP_LABELS[name]}")
+
+    results = dag.run()
+    success = all(ok is not False for ok in results.values()) and len(results) == len(dag.nodes)
+
+    # Step 4's odds writes move the Match watermark step 2 recorded; without
+    # this, step 2 would rerun on every run after an odds update
+    if results.get("step4_odds_update") and not skip_matching and results.get("step2_matching") is not False:
+        odds_update_match = manifest.entry("step4_odds_update").get("inputs", {}).get("Match")
+        manifest.refresh_inputs("step2_matching", {"Match": odds_update_match})
+
+    # The delta moves on once its rows made it into the database; a run that
+    # forced steps 2-4 off (or failed) leaves them for the next run
+    if success and not (skip_matching or skip_augment or skip_odds_update):
+        store = OddsStore(ODDS_STORE_DIR)
+        odds_update = dag.outputs.get("step4_odds_update")
+        if hasattr(odds_update, "reconciliation"):
+            # Rows left unreconciled come back with the next delta instead of being passed by
+            rows = _odds_delta(since) if since is not None else store.read(columns=DEDUP_COLS)
+            retried = _save_unreconciled(rows, odds_update)
+            if retried:
+                print(f"  {retried:,} unreconciled odds rows will be retried by the next run.")
+        watermark = store.latest_ingested()
+        if watermark is not None:
+            manifest.record(DELTA_ENTRY, {}, output=watermark)
 
     _print_summary(results, start)
-    return True
+    return success
+
+
+STEP_LABELS = {
+    "step1_scrape": "Step 1 — scrape CSVs",
+    "step2_matching": "Step 2 — fuzzy match",
+    "step3_augment": "Step 3 — augment",
+    "step4_odds_update": "Step 4 — odds DB update",
+    "step4_report": "Step 4 — odds update report",
+    "step5_mte": "Step 5 — match_team_expectation",
+}
 
 
 def _print_summary(results: dict, start: float) -> None:
@@ -348,14 +612,7 @@ def _print_summary(results: dict, start: float) -> None:
     print("\n" + "=" * 72)
     print("  PIPELINE SUMMARY")
     print("=" * 72)
-    labels = {
-        "step1_scrape": "Step 1 — scrape CSVs",
-        "step2_matching": "Step 2 — fuzzy match",
-        "step3_augment": "Step 3 — augment",
-        "step4_odds_update": "Step 4 — odds DB update",
-        "step5_mte": "Step 5 — match_team_expectation",
-    }
-    for key, label in labels.items():
+    for key, label in STEP_LABELS.items():
         status = results.get(key)
         if status is None:
             tag = "SKIP"
@@ -426,7 +683,22 @@ if __name__ == "__main__":
     parser.add_argument(
         "--no-resume",
         action="store_true",
-        help="Do not resume step 2 from checkpoint; restart from scratch.",
+        help="Rebuild the step 2 mapping from scratch instead of extending it.",
+    )
+    parser.add_argument(
+        "--no-checkpoints",
+        action="store_true",
+        help="Do not write intermediate files; hand step outputs over in memory only.",
+    )
+    parser.add_argument(
+        "--full-history",
+        action="store_true",
+        help="Process every stored odds row, not just those new or modified since the last run.",
+    )
+    parser.add_argument(
+        "--no-auto-skip",
+        action="store_true",
+        help="Run every step that is not --skip-*'ed, even if its inputs are unchanged.",
     )
 
     args = parser.parse_args()
@@ -442,6 +714,9 @@ if __name__ == "__main__":
         dry_run=args.dry_run,
         min_confidence=args.min_confidence,
         no_resume=args.no_resume,
+        checkpoints=not args.no_checkpoints,
+        auto_skip=not args.no_auto_skip,
+        full_history=args.full_history,
     )
 
     sys.exit(0 if success else 1)
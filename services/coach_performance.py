@@ -0,0 +1,142 @@
+"""
+Rolling coach performance aggregates over match_team_expectation.
+
+One coach_performance_aggregate row per coach x club x season x difficulty
+(plus an 'all' difficulty bucket) x probability_source holds the totals of
+xPts, actual points and delta_pts and the same sums over the last N matches
+(ROLLING_WINDOWS), so a dashboard reads one row instead of scanning the fact
+table. Rows priced from odds and from Elo ratings are aggregated apart.
+
+Groups are computed with one sort and prefix sums: with P the running sum of
+a column padded with a leading 0 and a group occupying rows [s, e), its total
+is P[e] - P[s] and its last-N sum is P[e] - P[max(s, e - N)].
+
+Maintenance is incremental per coach: `refresh` recomputes the groups of the
+coaches whose MTE rows were upserted, re-assigned or deleted.
+"""
+
+from typing import Any, Dict, Iterable, List, Sequence, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from services.match_team_expectation import MTE_TABLE, ODDS_SOURCE, fetch_paged
+from utils.bulk_loader import BulkLoader
+
+AGGREGATE_TABLE = 'coach_performance_aggregate'
+AGGREGATE_CONFLICT = 'coach_id,club_id,season,difficulty,probability_source'
+GROUP_COLUMNS = ['coach_id', 'club_id', 'season']
+KEY_COLUMNS = ['difficulty', 'probability_source']  # the rest of AGGREGATE_CONFLICT
+VALUE_COLUMNS = ['xpts', 'actual_pts', 'delta_pts']
+ROLLING_WINDOWS = (5, 10, 20)
+ALL_DIFFICULTIES = 'all'
+DIFFICULTIES = (ALL_DIFFICULTIES, 'high', 'medium', 'low')
+SEASON_START_MONTH = 7  # a season is named after the year it starts in (2024 = 2024/25)
+
+MTE_COLUMNS = 'match_id, match_date, club_id, coach_id, difficulty, xpts, actual_pts, delta_pts, probability_source'
+
+
+def season_of(dates: Any) -> np.ndarray:
+    """Start year of the season each date falls in (July-June seasons)."""
+    dates = pd.to_datetime(pd.Series(dates).astype(str).str[:10], format='%Y-%m-%d', errors='coerce')
+    return (dates.dt.year - (dates.dt.month < SEASON_START_MONTH)).to_numpy(dtype=float)
+
+
+def _aggregate_bucket(rows: pd.DataFrame, difficulty: str, windows: Sequence[int]) -> pd.DataFrame:
+    rows = rows.sort_values(GROUP_COLUMNS + ['match_date', 'match_id'], kind='stable')
+    keys = rows[GROUP_COLUMNS].to_numpy(dtype='int64')
+    starts = np.flatnonzero(np.r_[True, (keys[1:] != keys[:-1]).any(axis=1)])
+    ends = np.r_[starts[1:], len(rows)]
+    counts = ends - starts
+
+    out = {column: keys[starts, i] for i, column in enumerate(GROUP_COLUMNS)}
+    out['difficulty'] = difficulty
+    out['matches'] = counts
+    values = {column: rows[column].to_numpy(dtype=float) for column in VALUE_COLUMNS}
+    prefix = {column: np.r_[0.0, np.cumsum(v)] for column, v in values.items()}
+    for column in VALUE_COLUMNS:
+        out[f'{column}_total'] = np.round(prefix[column][ends] - prefix[column][starts], 3)
+    for n in windows:
+        window_start = np.maximum(starts, ends - n)
+        out[f'matches_last_{n}'] = ends - window_start
+        for column in VALUE_COLUMNS:
+            out[f'{column}_last_{n}'] = np.round(prefix[column][ends] - prefix[column][window_start], 3)
+    dates = rows['match_date'].astype(str).str[:10].to_numpy()
+    out['first_match_date'] = dates[starts]
+    out['last_match_date'] = dates[ends - 1]
+    out['last_match_id'] = rows['match_id'].to_numpy(dtype='int64')[ends - 1]
+    return pd.DataFrame(out)
+
+
+def aggregate(mte_rows: pd.DataFrame, windows: Sequence[int] = ROLLING_WINDOWS) -> pd.DataFrame:
+    """
+    Aggregate rows per coach x club x season x difficulty x probability_source
+    from MTE rows (MTE_COLUMNS; rows without a source count as odds). Rows
+    without a coach or a parseable date are ignored.
+    """
+    sources = mte_rows['probability_source'] if 'probability_source' in mte_rows else None
+    rows = mte_rows.assign(season=season_of(mte_rows['match_date']),
+                           probability_source=pd.Series(sources, index=mte_rows.index, dtype=object)
+                           .fillna(ODDS_SOURCE))
+    rows = rows.dropna(subset=['coach_id', 'club_id', 'season'])
+    frames = []
+    for source, by_source in rows.groupby('probability_source', sort=True):
+        frames.append(_aggregate_bucket(by_source, ALL_DIFFICULTIES, windows).assign(probability_source=source))
+        for difficulty, bucket in by_source.groupby('difficulty', sort=True):
+            frames.append(_aggregate_bucket(bucket, difficulty, windows).assign(probability_source=source))
+    if not frames:
+        return pd.DataFrame(columns=GROUP_COLUMNS + KEY_COLUMNS + ['matches'])
+    return pd.concat(frames, ignore_index=True).sort_values(GROUP_COLUMNS + KEY_COLUMNS, ignore_index=True)
+
+
+def coaches_of(rows: Iterable[Dict[str, Any]]) -> Set[int]:
+    return {int(r['coach_id']) for r in rows if r.get('coach_id') is not None}
+
+
+def fetch_mte_rows(client, coach_ids: Iterable[int], chunk_size: int = 100, page_size: int = 1000) -> pd.DataFrame:
+    """MTE rows (MTE_COLUMNS) of the given coaches."""
+    coach_ids = sorted(set(coach_ids))
+    rows: List[Dict[str, Any]] = []
+    for start in range(0, len(coach_ids), chunk_size):
+        rows.extend(fetch_paged(lambda: client.table(MTE_TABLE).select(MTE_COLUMNS)
+                           .in_('coach_id', coach_ids[start:start + chunk_size])
+                           .order('match_id').order('club_id'), page_size))
+    return pd.DataFrame(rows, columns=[c.strip() for c in MTE_COLUMNS.split(',')])
+
+
+def existing_coaches(client, match_ids: Sequence[int], chunk_size: int = 200) -> Set[int]:
+    """Coaches the MTE rows of `match_ids` belong to now (before they are overwritten or deleted)."""
+    match_ids = list(dict.fromkeys(int(m) for m in match_ids))
+    coaches: Set[int] = set()
+    for start in range(0, len(match_ids), chunk_size):
+        coaches |= coaches_of(client.table(MTE_TABLE).select('coach_id')
+                              .in_('match_id', match_ids[start:start + chunk_size]).execute().data or [])
+    return coaches
+
+
+def refresh(client, coach_ids: Iterable[int], windows: Sequence[int] = ROLLING_WINDOWS,
+            chunk_size: int = 100) -> Tuple[int, int]:
+    """
+    Recompute the aggregate rows of `coach_ids` from their current MTE rows:
+    upsert every group, then delete their aggregate rows that no longer have
+    a group (matches moved to another coach, rows deleted).
+
+    Returns (rows written, rows that failed).
+    """
+    coach_ids = sorted(set(coach_ids))
+    if not coach_ids:
+        return 0, 0
+    aggregates = aggregate(fetch_mte_rows(client, coach_ids, chunk_size=chunk_size), windows)
+    loader = BulkLoader(client, AGGREGATE_TABLE, on_conflict=AGGREGATE_CONFLICT)
+    result = loader.load(aggregates.to_dict('records'))
+
+    produced = set(zip(*(aggregates[c].astype('int64').tolist() for c in GROUP_COLUMNS),
+                       *(aggregates[c].tolist() for c in KEY_COLUMNS)))
+    for start in range(0, len(coach_ids), chunk_size):
+        existing = fetch_paged(lambda: client.table(AGGREGATE_TABLE).select('id, ' + AGGREGATE_CONFLICT.replace(',', ', '))
+                          .in_('coach_id', coach_ids[start:start + chunk_size]).order('id'), 1000)
+        stale = [r['id'] for r in existing
+                 if tuple(r[c] for c in GROUP_COLUMNS + KEY_COLUMNS) not in produced]
+        if stale:
+            client.table(AGGREGATE_TABLE).delete().in_('id', stale).execute()
+    return result.written, result.failed
@@ -1,5 +1,25 @@
 from pages.match_page import MatchPage, MissingCoachException, MissingResultException
 from models.match import Match
+from utils.page_utils import get_points_from_score
+
+# Where the tmapi `/game/{id}` payload keeps the fields MatchPage scrapes from HTML.
+# homeClub/awayClub.clubId and baseDetails.date.dateTimeUTC are the paths the
+# player-valuation scraper already relies on; the score, coach and attendance
+# paths are checked against a recorded payload (scripts/record_tmapi_game.py,
+# tests/unit/match/test_match_source.py). A path that does not resolve makes
+# parse_game raise, so the json-first source falls back to the HTML report.
+GAME_HOME_GOALS_PATH = ("result", "finalResult", "homeGoals")
+GAME_AWAY_GOALS_PATH = ("result", "finalResult", "awayGoals")
+GAME_COACH_PATH = ("coach", "id")  # under homeClub / awayClub
+GAME_ATTENDANCE_PATH = ("baseDetails", "attendance")
+
+
+def _dig(data: dict, path: tuple):
+    """Return the value at `path` in a nested dict, None when absent or empty."""
+    value = data
+    for key in path:
+        value = value.get(key) if isinstance(value, dict) else None
+    return None if value == "" else value
 
 class MatchService:
     @staticmethod
@@ -37,3 +57,75 @@ class MatchService:
         )
         return match
 
+    @staticmethod
+    def parse_fixture(league_id: int, season_id: int, fixture: dict,
+                      home_coach_id: int, away_coach_id: int) -> Match:
+        """
+        Build a Match from a fixture-list row (LeaguePageMatches.get_matches) plus
+        coach IDs resolved elsewhere. Attendance is not on the fixture list, so it
+        is left unknown (None).
+        """
+        home_points, away_points = get_points_from_score(f"{fixture['home_goals']}:{fixture['away_goals']}")
+        return Match(
+            tm_match_id=fixture['match_id'],
+            home_club_id=fixture['home_club_id'],
+            away_club_id=fixture['away_club_id'],
+            season_id=season_id,
+            league_id=league_id,
+            home_coach_id=home_coach_id,
+            away_coach_id=away_coach_id,
+            date=fixture['date'],
+            attendance=None,
+            home_team_score=fixture['home_goals'],
+            away_team_score=fixture['away_goals'],
+            home_team_points=home_points,
+            away_team_points=away_points
+        )
+
+
+    @staticmethod
+    def parse_game(league_id: int, season_id: int, match_id: int, game: dict, match_date=None) -> Match:
+        """
+        Build a Match from the tmapi game payload (the `data` block of `/game/{id}`).
+        Raises the same exceptions as `parse` when the result or a coach is missing;
+        attendance is None when the payload doesn't carry it.
+
+        `match_date` is the local date from the fixture list. The payload only
+        carries the UTC kickoff, which is a day later for late kickoffs west of
+        UTC (Brazil, MLS) and would break the (date, clubs) odds join, so the
+        match is not built without it.
+        """
+        if not match_date:
+            raise ValueError(f"Match {match_id}: no local match date to go with the tmapi UTC kickoff")
+        home_club = game.get("homeClub") or {}
+        away_club = game.get("awayClub") or {}
+
+        home_goals = _dig(game, GAME_HOME_GOALS_PATH)
+        away_goals = _dig(game, GAME_AWAY_GOALS_PATH)
+        if home_goals is None or away_goals is None:
+            raise MissingResultException(match_id=match_id)
+        home_goals, away_goals = int(home_goals), int(away_goals)
+
+        home_coach_id = _dig(home_club, GAME_COACH_PATH)
+        away_coach_id = _dig(away_club, GAME_COACH_PATH)
+        if home_coach_id is None or away_coach_id is None:
+            missing_side = "both" if home_coach_id is None and away_coach_id is None else \
+                "home" if home_coach_id is None else "away"
+            raise MissingCoachException(match_id=match_id, missing_side=missing_side)
+
+        home_points, away_points = get_points_from_score(f"{home_goals}:{away_goals}")
+        return Match(
+            tm_match_id=match_id,
+            home_club_id=home_club.get("clubId"),
+            away_club_id=away_club.get("clubId"),
+            season_id=season_id,
+            league_id=league_id,
+            home_coach_id=home_coach_id,
+            away_coach_id=away_coach_id,
+            date=str(match_date)[:10],
+            attendance=_dig(game, GAME_ATTENDANCE_PATH),
+            home_team_score=home_goals,
+            away_team_score=away_goals,
+            home_team_points=home_points,
+            away_team_points=away_points
+        )
@@ -0,0 +1,66 @@
+from typing import Protocol
+
+from requests import Session
+
+from models.match import Match
+from pages.match_page import MatchPage
+from services.match_service import MatchService
+from services.tm_api_client import TMApiClient
+
+
+class IMatchSource(Protocol):
+    """Something that can turn a Transfermarkt match id into a Match."""
+
+    def get_match(self, match_id: int, league_id: int, season_id: int, match_date: str = None) -> Match:
+        """`match_date` is the local date from the fixture list, when the caller has it."""
+        ...
+
+
+class HtmlMatchSource(IMatchSource):
+    """Parses the HTML match report (`spielbericht`) page."""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def get_match(self, match_id: int, league_id: int, season_id: int, match_date: str = None) -> Match:
+        page = MatchPage(match_id=match_id, session=self.session)
+        return MatchService.parse(league_id, season_id, page)
+
+
+class JsonMatchSource(IMatchSource):
+    """
+    Reads the compact tmapi `/game/{id}` JSON instead of the HTML report. Needs
+    the fixture-list `match_date`, as the payload only has the UTC kickoff.
+    """
+
+    def __init__(self, client: TMApiClient = None):
+        self.client = client or TMApiClient()
+
+    def get_match(self, match_id: int, league_id: int, season_id: int, match_date: str = None) -> Match:
+        game = self.client.get_game(match_id)
+        return MatchService.parse_game(league_id, season_id, match_id, game, match_date=match_date)
+
+
+class FallbackMatchSource(IMatchSource):
+    """Tries `primary` first and falls back to `fallback` on any error (missing fields, API down)."""
+
+    def __init__(self, primary: IMatchSource, fallback: IMatchSource):
+        self.primary = primary
+        self.fallback = fallback
+        self.primary_hits = 0
+        self.fallback_hits = 0
+
+    def get_match(self, match_id: int, league_id: int, season_id: int, match_date: str = None) -> Match:
+        try:
+            match = self.primary.get_match(match_id, league_id, season_id, match_date)
+            self.primary_hits += 1
+            return match
+        except Exception as e:
+            print(f"↩️  Match {match_id}: {type(self.primary).__name__} failed ({e}), using {type(self.fallback).__name__}")
+        match = self.fallback.get_match(match_id, league_id, season_id, match_date)
+        self.fallback_hits += 1
+        return match
+
+
+def create_json_first_source(session: Session, client: TMApiClient = None) -> FallbackMatchSource:
+    return FallbackMatchSource(primary=JsonMatchSource(client), fallback=HtmlMatchSource(session))
@@ -0,0 +1,281 @@
+"""
+Column-wise transform of Match rows with odds into match_team_expectation rows.
+
+Odds become overround-free probabilities and xPts as numpy arrays, difficulty
+comes from `np.select` over per-side thresholds, and coaches are assigned with
+one `CoachTenureIndex.lookup_many` interval join per side. The result is the
+same rows, values and order the per-match loop produced (home before away,
+a side without a coach left out). Each row records whether its probabilities
+came from the odds or from Elo ratings (`probability_source`).
+
+For incremental maintenance, `affected_matches` finds the Match rows whose
+expectation rows can have changed since per-table `updated_at` watermarks:
+matches updated since (odds, result), and the matches of every club with a
+Coach_tenure row inserted or edited since, from that tenure's start date on.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from repositories.tenure.coach_tenure_index import CoachTenureIndex, FIRST_MATCH, NO_COACH
+from utils.step_manifest import StepManifest
+
+ODDS_COLUMNS = ['odds_home', 'odds_draw', 'odds_away']
+MATCH_COLUMNS = 'tm_match_id, date, league_id, home_club_id, away_club_id, ' \
+                'home_team_score, away_team_score, odds_home, odds_draw, odds_away'
+MTE_TABLE = 'match_team_expectation'
+
+# Where a row's probabilities come from (probability_source)
+ODDS_SOURCE = 'odds'
+ELO_SOURCE = 'elo'
+
+# Tables whose updated_at watermarks drive incremental maintenance
+WATERMARK_TABLES = ('Match', 'Coach_tenure')
+WATERMARK_ENTRY = 'watermarks'
+WITH_RATINGS_KEY = 'with_ratings'
+
+# is_home -> (p_win below which a match is 'high', p_win up to which it is 'medium')
+DIFFICULTY_THRESHOLDS = {
+    True: (0.34, 0.532),
+    False: (0.205, 0.367),
+}
+
+EXPECTATION_COLUMNS = [
+    'match_id', 'match_date', 'league_id', 'club_id', 'is_home', 'coach_id',
+    'xpts', 'actual_pts', 'delta_pts', 'difficulty',
+    'p_win', 'p_draw', 'p_loss', 'goals_for', 'goals_against', 'probability_source',
+]
+
+
+def _round(values: np.ndarray, ndigits: int) -> np.ndarray:
+    """
+    `np.round`, except that values within float noise of a rounding boundary
+    go through Python's round(), which decides from the exact double (np.round
+    scales first and can land on the other side, e.g. 0.9745 -> 0.974).
+    """
+    values = np.asarray(values, dtype=float)
+    flat = values.ravel()
+    rounded = np.round(flat, ndigits)
+    scaled = flat * 10.0 ** ndigits
+    boundary = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+    rounded[boundary] = [round(v, ndigits) for v in flat[boundary].tolist()]
+    return rounded.reshape(values.shape)
+
+
+def odds_to_probabilities(odds: pd.DataFrame) -> np.ndarray:
+    """
+    (n, 3) home/draw/away probabilities with the overround removed,
+    p_i = (1/odds_i) / sum(1/odds_j), rounded to 4 places; NaN rows where
+    any odd is missing or not positive.
+    """
+    values = odds[ODDS_COLUMNS].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+    valid = (values > 0).all(axis=1)  # NaN compares False
+    implied = np.full_like(values, np.nan)
+    implied[valid] = 1.0 / values[valid]
+    return _round(implied / implied.sum(axis=1, keepdims=True), 4)
+
+
+def expected_points(p_win: np.ndarray, p_draw: np.ndarray) -> np.ndarray:
+    """xPts = 3 * P(win) + 1 * P(draw), rounded to 3 places."""
+    return _round(3 * p_win + p_draw, 3)
+
+
+def actual_points(goals_for: np.ndarray, goals_against: np.ndarray) -> np.ndarray:
+    return np.select([goals_for > goals_against, goals_for == goals_against], [3, 1], 0)
+
+
+def difficulty(p_win: np.ndarray, is_home: bool) -> np.ndarray:
+    """'high' for underdogs, 'low' for favourites, 'medium' in between (see DIFFICULTY_THRESHOLDS)."""
+    high, medium = DIFFICULTY_THRESHOLDS[is_home]
+    return np.select([p_win < high, p_win <= medium], ['high', 'medium'], 'low').astype(object)
+
+
+def _side(matches: pd.DataFrame, probs: np.ndarray, sources: np.ndarray, coaches: np.ndarray,
+          is_home: bool) -> pd.DataFrame:
+    """Rows of one side for the matches where that side has a coach."""
+    has_coach = coaches != NO_COACH
+    order = np.flatnonzero(has_coach) * 2 + (0 if is_home else 1)
+    matches, probs, sources, coaches = matches[has_coach], probs[has_coach], sources[has_coach], coaches[has_coach]
+    own, other = ('home', 'away') if is_home else ('away', 'home')
+    p_win, p_draw, p_loss = probs[:, 0 if is_home else 2], probs[:, 1], probs[:, 2 if is_home else 0]
+    goals_for = matches[f'{own}_team_score'].to_numpy(dtype='int64')
+    goals_against = matches[f'{other}_team_score'].to_numpy(dtype='int64')
+    xpts = expected_points(p_win, p_draw)
+    actual = actual_points(goals_for, goals_against)
+    return pd.DataFrame({
+        'match_id': matches['tm_match_id'].to_numpy(dtype='int64'),
+        'match_date': matches['date'].to_numpy(),
+        'league_id': matches['league_id'].to_numpy(),
+        'club_id': matches[f'{own}_club_id'].to_numpy(dtype='int64'),
+        'is_home': is_home,
+        'coach_id': coaches,
+        'xpts': xpts,
+        'actual_pts': actual,
+        'delta_pts': _round(actual - xpts, 3),
+        'difficulty': difficulty(p_win, is_home),
+        'p_win': p_win,
+        'p_draw': p_draw,
+        'p_loss': p_loss,
+        'goals_for': goals_for,
+        'goals_against': goals_against,
+        'probability_source': sources,
+        '_order': order,
+    })
+
+
+def expectation_frame(matches_df: pd.DataFrame, coach_index: CoachTenureIndex,
+                      model_probabilities: Optional[np.ndarray] = None) -> pd.DataFrame:
+    """
+    One row per team with a coach for every match in `matches_df` whose odds
+    convert, in match order with the home side first (EXPECTATION_COLUMNS).
+
+    `model_probabilities` ((n, 3) home/draw/away aligned with `matches_df`,
+    NaN where unknown, e.g. from services.elo_ratings) stand in for the odds
+    of matches whose odds do not convert (probability_source ELO_SOURCE);
+    matches without a result are skipped.
+    """
+    probs = odds_to_probabilities(matches_df)
+    sources = np.full(len(probs), ODDS_SOURCE, dtype=object)
+    if model_probabilities is not None:
+        no_odds = np.isnan(probs[:, 0])
+        probs[no_odds] = np.asarray(model_probabilities, dtype=float)[no_odds]
+        sources[no_odds] = ELO_SOURCE
+        scores = matches_df[['home_team_score', 'away_team_score']].apply(pd.to_numeric, errors='coerce')
+        probs[scores.isna().any(axis=1).to_numpy()] = np.nan
+    ok = ~np.isnan(probs[:, 0])
+    matches, probs, sources = matches_df[ok], probs[ok], sources[ok]
+    if matches.empty:
+        return pd.DataFrame(columns=EXPECTATION_COLUMNS)
+
+    dates = pd.to_datetime(matches['date'].astype(str).str[:10], format='%Y-%m-%d', errors='coerce')
+    dates = dates.to_numpy(dtype='datetime64[D]')
+    sides = []
+    for is_home in (True, False):
+        club_ids = pd.to_numeric(matches['home_club_id' if is_home else 'away_club_id'], errors='coerce')
+        coaches = coach_index.lookup_many(club_ids.to_numpy(dtype=float), dates, policy=FIRST_MATCH)
+        sides.append(_side(matches, probs, sources, coaches, is_home))
+    rows = pd.concat(sides).sort_values('_order', kind='stable')
+    return rows.drop(columns='_order').reset_index(drop=True)
+
+
+def expectation_records(matches_df: pd.DataFrame, coach_index: CoachTenureIndex,
+                        model_probabilities: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+    """`expectation_frame` as a list of JSON-ready dicts for the upsert."""
+    return expectation_frame(matches_df, coach_index, model_probabilities).to_dict('records')
+
+
+def latest_updated_at(client, table: str) -> str:
+    """Latest updated_at of `table` ('' when it is empty)."""
+    rows = client.table(table).select('updated_at').order('updated_at', desc=True).limit(1).execute().data
+    return str(rows[0]['updated_at']) if rows else ''
+
+
+def fetch_paged(build_query, page_size: int) -> List[Dict[str, Any]]:
+    """Every row of the (ordered) query `build_query()` returns, read with range pagination."""
+    rows, offset = [], 0
+    while True:
+        batch = build_query().range(offset, offset + page_size - 1).execute().data or []
+        rows.extend(batch)
+        if len(batch) < page_size:
+            return rows
+        offset += page_size
+
+
+def _changed_since(client, table: str, columns: str, since: str, key: str, page_size: int) -> List[Dict[str, Any]]:
+    return fetch_paged(lambda: client.table(table).select(columns).gt('updated_at', since)
+                  .order('updated_at').order(key), page_size)
+
+
+def tenure_changes(client, since: str, page_size: int = 1000) -> Dict[int, str]:
+    """
+    club_id -> earliest start_date of its Coach_tenure rows (any role) updated
+    after `since`. The old end date of an edited tenure is not known, so the
+    whole stretch from the start date on has to be looked at again.
+    """
+    starts: Dict[int, str] = {}
+    for row in _changed_since(client, 'Coach_tenure', 'id, club_id, start_date', since, 'id', page_size):
+        if row.get('club_id') in (None, '') or not row.get('start_date'):
+            continue
+        club_id, start = int(row['club_id']), str(row['start_date'])[:10]
+        starts[club_id] = min(start, starts.get(club_id, start))
+    return starts
+
+
+def affected_matches(client, watermarks: Dict[str, str], page_size: int = 1000) -> pd.DataFrame:
+    """
+    Match rows (MATCH_COLUMNS) whose expectation rows may be out of date
+    after the changes since `watermarks` ({table: updated_at}).
+    """
+    rows = _changed_since(client, 'Match', MATCH_COLUMNS, watermarks['Match'], 'tm_match_id', page_size)
+    changed = len(rows)
+    clubs = tenure_changes(client, watermarks['Coach_tenure'], page_size=page_size)
+    for club_id, start in sorted(clubs.items()):
+        rows.extend(fetch_paged(lambda: client.table('Match').select(MATCH_COLUMNS)
+                           .or_(f'home_club_id.eq.{club_id},away_club_id.eq.{club_id}')
+                           .gte('date', start).order('tm_match_id'), page_size))
+    print(f"  ✓ {changed:,} matches updated, {len(clubs):,} clubs with tenure changes")
+    if not rows:
+        return pd.DataFrame(columns=[c.strip() for c in MATCH_COLUMNS.split(',')])
+    return pd.DataFrame(rows).drop_duplicates(subset='tm_match_id', keep='first').reset_index(drop=True)
+
+
+def stale_keys(matches_df: pd.DataFrame, records: Iterable[Dict[str, Any]]) -> Tuple[List[int], Set[Tuple[int, int]]]:
+    """
+    Expectation rows of `matches_df` that the new `records` no longer cover:
+    (match ids with no row left, (match_id, club_id) pairs of a side that lost its row).
+    A run without ratings does not produce Elo rows, so delete these keys with
+    `sources=(ODDS_SOURCE,)` then.
+    """
+    if matches_df.empty:
+        return [], set()
+    kept = {(r['match_id'], r['club_id']) for r in records}
+    kept_matches = {match_id for match_id, _ in kept}
+    match_ids = pd.to_numeric(matches_df['tm_match_id']).astype('int64').tolist()
+    gone = [m for m in dict.fromkeys(match_ids) if m not in kept_matches]
+    pairs = set()
+    for side in ('home_club_id', 'away_club_id'):
+        clubs = pd.to_numeric(matches_df[side], errors='coerce')
+        for match_id, club_id in zip(match_ids, clubs):
+            if match_id in kept_matches and pd.notna(club_id) and (match_id, int(club_id)) not in kept:
+                pairs.add((match_id, int(club_id)))
+    return gone, pairs
+
+
+def delete_expectations(client, match_ids: List[int], pairs: Iterable[Tuple[int, int]] = (),
+                        chunk_size: int = 200, sources: Optional[Sequence[str]] = None) -> int:
+    """
+    Delete the expectation rows of whole matches (in chunks) and of single
+    sides; with `sources`, only rows whose probability_source is one of them.
+    """
+    def delete():
+        query = client.table(MTE_TABLE).delete()
+        return query if sources is None else query.in_('probability_source', list(sources))
+
+    requests = 0
+    for start in range(0, len(match_ids), chunk_size):
+        delete().in_('match_id', match_ids[start:start + chunk_size]).execute()
+        requests += 1
+    for match_id, club_id in sorted(pairs):
+        delete().eq('match_id', match_id).eq('club_id', club_id).execute()
+        requests += 1
+    return requests
+
+
+def load_watermarks(path, with_ratings: bool = False) -> Optional[Dict[str, str]]:
+    """
+    Watermarks of the last complete run, or None when there was none or it
+    ran with a different `with_ratings`: the rows of the other source were
+    not kept up to date since, so the run has to start over.
+    """
+    marks = StepManifest(path).entry(WATERMARK_ENTRY).get('inputs')
+    if not marks or any(marks.get(table) is None for table in WATERMARK_TABLES):
+        return None
+    if bool(marks.get(WITH_RATINGS_KEY, False)) != with_ratings:
+        return None
+    return {table: marks[table] for table in WATERMARK_TABLES}
+
+
+def save_watermarks(path, watermarks: Dict[str, str], with_ratings: bool = False) -> None:
+    StepManifest(path).record(WATERMARK_ENTRY, inputs={**watermarks, WITH_RATINGS_KEY: with_ratings})
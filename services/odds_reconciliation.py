@@ -0,0 +1,262 @@
+"""
+Set-oriented reconciliation of football-data odds with Match rows.
+
+CSV rows and database rows are joined on a typed composite key
+(date as datetime64, club IDs and scores as int64) with a single `merge`,
+and the odds are written back in chunks through the `bulk_update_match_odds`
+RPC (see scripts/create_bulk_update_match_odds_function.sql), one request per
+chunk instead of one UPDATE per match.
+
+CSV rows without an exact match get a second, date-tolerant pass: a
+`merge_asof` on the date, by club pair and score, to the nearest free Match
+within ±`date_tolerance_days` (fixtures the two sources date a day apart).
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterator, Optional
+
+import pandas as pd
+from supabase import Client
+
+KEY_COLUMNS = ['match_date', 'home_club_id', 'away_club_id', 'home_team_score', 'away_team_score']
+ODDS_COLUMNS = ['odds_home', 'odds_draw', 'odds_away']
+DB_COLUMNS = 'tm_match_id, date, league_id, home_club_id, away_club_id, home_team_score, away_team_score, ' \
+             'odds_home, odds_draw, odds_away'
+
+# CSV column -> key/odds column
+CSV_COLUMNS = {
+    'tm_home_team_id': 'home_club_id',
+    'tm_away_team_id': 'away_club_id',
+    'FTHG': 'home_team_score',
+    'FTAG': 'away_team_score',
+    'OddsH': 'odds_home',
+    'OddsD': 'odds_draw',
+    'OddsA': 'odds_away',
+}
+
+# Augmented CSV columns the reconciliation and its logs read (league_code keys the
+# unreconciled rows the odds pipeline retries)
+AUGMENTED_COLUMNS = ['Date', 'HomeTeam', 'AwayTeam', 'league_code'] + list(CSV_COLUMNS)
+
+BULK_UPDATE_RPC = 'bulk_update_match_odds'
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_DATE_TOLERANCE_DAYS = 1
+
+# Reconciliation.unmatched reasons
+REASON_NO_MATCH = 'No matching record in database'
+REASON_NO_HOME = 'Home team not in database'
+REASON_NO_AWAY = 'Away team not in database'
+REASON_NO_TEAMS = 'Both teams not in database'
+REASON_BAD_KEY = 'Missing date or score'
+
+
+def _typed_keys(df: pd.DataFrame, date_column: str, keep_incomplete: bool = False) -> pd.DataFrame:
+    """
+    Add the typed key columns, dropping rows whose key is incomplete or not
+    numeric (or, with `keep_incomplete`, keeping them with a nullable Int64 key).
+    """
+    df = df.assign(match_date=pd.to_datetime(df[date_column].astype(str).str[:10],
+                                             format='%Y-%m-%d', errors='coerce'))
+    for column in KEY_COLUMNS[1:]:
+        df[column] = pd.to_numeric(df[column], errors='coerce')
+    if keep_incomplete:
+        return df.astype({column: 'Int64' for column in KEY_COLUMNS[1:]})
+    df = df.dropna(subset=KEY_COLUMNS)
+    return df.astype({column: 'int64' for column in KEY_COLUMNS[1:]})
+
+
+def _missing_key_reasons(rows: pd.DataFrame) -> pd.Series:
+    """Why rows with an incomplete key cannot match: unmapped teams, else a bad date or score."""
+    home, away = rows['home_club_id'].isna(), rows['away_club_id'].isna()
+    reason = pd.Series(REASON_BAD_KEY, index=rows.index, dtype=object)
+    reason[home] = REASON_NO_HOME
+    reason[away] = REASON_NO_AWAY
+    reason[home & away] = REASON_NO_TEAMS
+    return reason
+
+
+def read_augmented_csv(path) -> pd.DataFrame:
+    """
+    Load an augmented CSV with the pyarrow parser, reading only
+    AUGMENTED_COLUMNS and keeping team names as categoricals.
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    columns = [c for c in AUGMENTED_COLUMNS if c in header]
+    return pd.read_csv(path, usecols=columns, engine='pyarrow',
+                       dtype={'HomeTeam': 'category', 'AwayTeam': 'category'})
+
+
+def prepare_csv_frame(csv_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Augmented CSV rows with complete odds, keyed for the merge. Rows whose key
+    is incomplete (e.g. a team without tm_home_team_id) are kept with a null
+    key, so `reconcile` can report them as unmatched.
+    """
+    if csv_df.empty:
+        csv_df = pd.DataFrame(columns=['Date'] + list(CSV_COLUMNS))
+    df = csv_df.rename(columns=CSV_COLUMNS)
+    df = df[df[ODDS_COLUMNS].notna().all(axis=1)]
+    return _typed_keys(df, 'Date', keep_incomplete=True)
+
+
+def prepare_db_frame(db_df: pd.DataFrame) -> pd.DataFrame:
+    """Match rows keyed for the merge; `has_odds` marks rows whose odds are complete."""
+    if db_df.empty:
+        db_df = pd.DataFrame(columns=[c.strip() for c in DB_COLUMNS.split(',')])
+    df = _typed_keys(db_df, 'date')
+    return df.assign(has_odds=df[ODDS_COLUMNS].notna().all(axis=1))
+
+
+@dataclass
+class Reconciliation:
+    matched: pd.DataFrame            # CSV rows with the tm_match_id of a Match that still needs odds
+    already_complete: pd.DataFrame   # CSV rows whose Match already has complete odds
+    unmatched: pd.DataFrame          # CSV rows with no Match on the key, with a `reason`
+
+    def shifted(self) -> pd.DataFrame:
+        """Matched rows whose Match is dated differently (`date_offset_days` != 0)."""
+        return self.matched[self.matched['date_offset_days'] != 0]
+
+    def updates(self) -> pd.DataFrame:
+        """One (tm_match_id, odds_home, odds_draw, odds_away) row per Match to write."""
+        updates = self.matched.drop_duplicates(subset='tm_match_id', keep='last')
+        return updates[['tm_match_id'] + ODDS_COLUMNS].reset_index(drop=True)
+
+
+@dataclass
+class OddsUpdate:
+    """Everything one odds update run knows, handed from step to step in memory."""
+    csv_rows: pd.DataFrame        # prepare_csv_frame output
+    matches: pd.DataFrame         # prepare_db_frame output (odds as read, before the update)
+    reconciliation: Reconciliation
+    written: int = 0
+
+    def matches_with_odds(self) -> pd.DataFrame:
+        """Match rows with complete odds once the update's odds are applied."""
+        updates = self.reconciliation.updates()
+        merged = self.matches.merge(updates, on='tm_match_id', how='left', suffixes=('', '_new'))
+        for column in ODDS_COLUMNS:
+            merged[column] = merged[column + '_new'].combine_first(merged[column])
+        merged = merged.drop(columns=[c + '_new' for c in ODDS_COLUMNS])
+        return merged[merged[ODDS_COLUMNS].notna().all(axis=1)].reset_index(drop=True)
+
+
+def _nearest_within(csv_rows: pd.DataFrame, db_keys: pd.DataFrame, tolerance_days: int) -> pd.DataFrame:
+    """
+    CSV rows joined to the nearest Match of the same club pair and score within
+    ±`tolerance_days`; a Match claimed by several rows goes to the nearest one.
+    Keeps the CSV rows' index.
+    """
+    if csv_rows.empty or db_keys.empty:
+        return csv_rows.iloc[0:0].assign(tm_match_id=pd.Series(dtype='int64'), has_odds=pd.Series(dtype=bool),
+                                         date_offset_days=pd.Series(dtype='int64'))
+    left = csv_rows.assign(_row=csv_rows.index).sort_values('match_date')
+    right = db_keys.assign(db_match_date=db_keys['match_date']).sort_values('match_date')
+    joined = pd.merge_asof(left, right, on='match_date', by=KEY_COLUMNS[1:],
+                           tolerance=pd.Timedelta(days=tolerance_days), direction='nearest')
+    joined = joined.dropna(subset=['tm_match_id'])
+    offset = (joined['db_match_date'] - joined['match_date']).dt.days
+    joined = joined.assign(date_offset_days=offset, _gap=offset.abs()) \
+        .sort_values(['_gap', '_row']).drop_duplicates(subset='tm_match_id', keep='first')
+    joined = joined.astype({'tm_match_id': 'int64', 'has_odds': bool, 'date_offset_days': 'int64'})
+    return joined.set_index('_row').rename_axis(csv_rows.index.name).drop(columns=['db_match_date', '_gap'])
+
+
+def reconcile(csv_df: pd.DataFrame, db_df: pd.DataFrame,
+              date_tolerance_days: int = DEFAULT_DATE_TOLERANCE_DAYS) -> Reconciliation:
+    """
+    Join prepared CSV rows (`prepare_csv_frame`) with prepared Match rows
+    (`prepare_db_frame`) on the composite key; rows left over are matched
+    within ±`date_tolerance_days` (0 disables the tolerant pass). CSV rows
+    with an incomplete key go straight to `unmatched`.
+    """
+    complete = csv_df[KEY_COLUMNS].notna().all(axis=1)
+    incomplete = csv_df[~complete].assign(reason=_missing_key_reasons(csv_df[~complete]))
+    csv_df = csv_df[complete].astype({column: 'int64' for column in KEY_COLUMNS[1:]})
+
+    # Same rule as the old dict lookup: one Match per key
+    db_keys = db_df.drop_duplicates(subset=KEY_COLUMNS, keep='last')[KEY_COLUMNS + ['tm_match_id', 'has_odds']]
+    joined = csv_df.merge(db_keys, on=KEY_COLUMNS, how='left', indicator=True)
+    found = (joined['_merge'] == 'both').to_numpy()
+    joined = joined.drop(columns=['_merge']).assign(date_offset_days=0)
+    exact = joined[found].astype({'tm_match_id': 'int64', 'has_odds': bool})
+    unmatched = joined[~found].drop(columns=['tm_match_id', 'has_odds', 'date_offset_days'])
+
+    if date_tolerance_days > 0:
+        # Matches taken by an exact key are not up for grabs
+        free = db_keys[~db_keys['tm_match_id'].isin(exact['tm_match_id'])]
+        shifted = _nearest_within(unmatched, free, date_tolerance_days)
+        unmatched = unmatched.drop(index=shifted.index)
+        exact = pd.concat([exact, shifted])
+    unmatched = unmatched.assign(reason=REASON_NO_MATCH)
+    if not incomplete.empty:
+        unmatched = pd.concat([unmatched, incomplete], ignore_index=True)
+
+    return Reconciliation(
+        matched=exact[~exact['has_odds']].drop(columns=['has_odds']),
+        already_complete=exact[exact['has_odds']].drop(columns=['has_odds']),
+        unmatched=unmatched,
+    )
+
+
+def fetch_match_odds_frame(client: Client, page_size: int = 1000, start_date: Optional[str] = None,
+                           end_date: Optional[str] = None) -> pd.DataFrame:
+    """
+    Match rows with the reconciliation columns, read with keyset pagination.
+    `start_date` / `end_date` (YYYY-MM-DD, inclusive) restrict the scan to a date range.
+    """
+    rows, last_id = [], None
+    while True:
+        query = client.table('Match').select(DB_COLUMNS)
+        if start_date is not None:
+            query = query.gte('date', start_date)
+        if end_date is not None:
+            query = query.lte('date', end_date)
+        if last_id is not None:
+            query = query.gt('tm_match_id', last_id)
+        batch = query.order('tm_match_id').limit(page_size).execute().data or []
+        rows.extend(batch)
+        print(f"   Fetched {len(rows):,} matches...", end='\r')
+        if len(batch) < page_size:
+            break
+        last_id = batch[-1]['tm_match_id']
+    return pd.DataFrame(rows)
+
+
+def _chunks(df: pd.DataFrame, size: int) -> Iterator[pd.DataFrame]:
+    for start in range(0, len(df), size):
+        yield df.iloc[start:start + size]
+
+
+def write_odds(client: Client, updates: pd.DataFrame, chunk_size: int = DEFAULT_CHUNK_SIZE,
+               max_retries: int = 3, on_progress: Optional[Callable[[int, int], None]] = None) -> int:
+    """
+    Write (tm_match_id, odds_home, odds_draw, odds_away) rows through the
+    bulk_update_match_odds RPC, one call per chunk of parallel arrays.
+
+    Returns the number of Match rows updated. A chunk that keeps failing raises.
+    """
+    written = 0
+    for chunk in _chunks(updates, chunk_size):
+        params = {
+            'p_match_ids': chunk['tm_match_id'].astype('int64').tolist(),
+            'p_odds_home': chunk['odds_home'].astype(float).tolist(),
+            'p_odds_draw': chunk['odds_draw'].astype(float).tolist(),
+            'p_odds_away': chunk['odds_away'].astype(float).tolist(),
+        }
+        delay = 1.0
+        for attempt in range(max_retries):
+            try:
+                result = client.rpc(BULK_UPDATE_RPC, params).execute()
+                break
+            except Exception as e:
+                if attempt == max_retries - 1:
+                    raise
+                print(f"   Chunk of {len(chunk)} failed ({e}), retrying in {delay:.0f}s...")
+                time.sleep(delay)
+                delay *= 2
+        written += result.data if isinstance(result.data, int) else len(chunk)
+        if on_progress:
+            on_progress(written, len(updates))
+    return written
@@ -11,3 +11,40 @@ def create_supabase_client() -> Client:
     ssl._create_default_https_context = ssl._create_unverified_context
     
     return create_client(SUPABASE_URL, SUPABASE_KEY)
+
+
+_client = None
+
+
+def get_supabase_client() -> Client:
+    """Process-wide client, created on first use (create_supabase_client() always makes a new one)."""
+    global _client
+    if _client is None:
+        _client = create_supabase_client()
+    return _client
+
+
+# One HTTP/2 connection pool shared by every async client in the process
+_async_http_client = None
+
+
+def get_shared_async_http_client():
+    global _async_http_client
+    import httpx
+    if _async_http_client is None or _async_http_client.is_closed:
+        _async_http_client = httpx.AsyncClient(
+            http2=True,
+            verify=False,  # same certificate bypass as the sync client
+            timeout=120,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+    return _async_http_client
+
+
+async def create_async_supabase_client():
+    from supabase import AsyncClientOptions, acreate_client
+    return await acreate_client(
+        SUPABASE_URL, SUPABASE_KEY,
+        options=AsyncClientOptions(httpx_client=get_shared_async_http_client()),
+    )
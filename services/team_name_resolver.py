@@ -0,0 +1,167 @@
+"""
+Bulk resolution of football-data.co.uk team names to database clubs.
+
+Instead of scoring every CSV row against every database match played that day
+one query at a time, the resolver joins all of them at once:
+
+1. Blocking: a game is only compared with database games of the league of its
+   tier (FOOTBALL_DATA_TO_TM_LEAGUE_MAP), or of any league of its country when
+   that tier is not in the database.
+2. Score line: the candidates of a game are the block's database games on the
+   same date with the same score.
+3. Fuzzy score: `rapidfuzz.process.cdist` of the block's names against the
+   block's candidate club names, computed in bulk across cores.
+
+Each (game, candidate) pair is scored like `calculate_match_confidence`: 50
+points for the score line plus 25 per side's name similarity, so a name that
+fuzzy-matches poorly (QPR / Queens Park Rangers) is carried by its opponent's.
+Pairs below `min_confidence` are dropped; a team name maps to the club it was
+paired with most, once that happened in at least MIN_MATCHES games. The output
+has the oddscheck_to_db_mapping.csv columns.
+"""
+
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz, process
+
+from config.football_data_league_mapping import get_league_info
+
+MAPPING_COLUMNS = ['oddscheck_team_name', 'db_club_id', 'db_club_name',
+                   'match_count', 'avg_confidence', 'avg_fuzzy_score']
+
+# A team name is only mapped to a club it was paired with in this many games
+MIN_MATCHES = 3
+
+KEY = ['team', 'country', 'tier']
+BLOCK = ['country', 'tier']
+SCORE_LINE = ['match_date', 'league_id', 'home_score', 'away_score']
+
+
+def _normalize(name) -> str:
+    # Same normalization as match_oddscheck_to_db.normalize_team_name
+    return '' if pd.isna(name) else str(name).strip().lower()
+
+
+class TeamNameResolver:
+    """
+    Args:
+        db_matches: Match rows with tm_match_id, date, league_id, home/away_club_id
+            and home/away_team_score (e.g. `MatchDateIndex.to_frame()`).
+        club_names: tm_club_id -> club name.
+        leagues: League rows with tm_league_id, country and tm_code.
+        workers: Cores used by `cdist` (-1 for all).
+    """
+
+    def __init__(self, db_matches: pd.DataFrame, club_names: Dict[int, str],
+                 leagues: Iterable[dict], workers: int = -1):
+        self.club_names = club_names
+        self.workers = workers
+
+        self.league_id_by_tm_code: Dict[str, int] = {}
+        self.league_ids_by_country: Dict[str, list] = {}
+        for league in leagues:
+            if league.get('tm_code'):
+                self.league_id_by_tm_code[league['tm_code']] = league['tm_league_id']
+            self.league_ids_by_country.setdefault(league.get('country'), []).append(league['tm_league_id'])
+
+        matches = db_matches.dropna(subset=['home_club_id', 'away_club_id', 'home_team_score', 'away_team_score'])
+        matches = matches.assign(match_date=pd.to_datetime(matches['date'].astype(str).str[:10]))
+        matches = matches.rename(columns={'home_team_score': 'home_score', 'away_team_score': 'away_score'})
+        self.db_games = matches[SCORE_LINE + ['home_club_id', 'away_club_id']].astype(
+            {'league_id': 'int64', 'home_score': 'int64', 'away_score': 'int64',
+             'home_club_id': 'int64', 'away_club_id': 'int64'}
+        )
+
+    def block_league_ids(self, country: str, tm_code: Optional[str]) -> list:
+        """Database leagues a (country, tier) key is compared against."""
+        if tm_code in self.league_id_by_tm_code:
+            return [self.league_id_by_tm_code[tm_code]]
+        return list(self.league_ids_by_country.get(country, []))
+
+    def _odds_games(self, odds: pd.DataFrame) -> pd.DataFrame:
+        odds = odds.dropna(subset=['match_date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'league_code'])
+        context = {code: get_league_info(code) or {} for code in odds['league_code'].unique()}
+        league_column = {
+            field: odds['league_code'].map({code: info.get(field) for code, info in context.items()}).astype(object)
+            for field in ('country', 'tier', 'tm_code')
+        }
+        odds = odds.assign(match_date=pd.to_datetime(odds['match_date']), **league_column) \
+            .dropna(subset=['country'])
+        games = odds.rename(columns={'FTHG': 'home_score', 'FTAG': 'away_score'})
+        return games[BLOCK + ['tm_code', 'match_date', 'HomeTeam', 'AwayTeam', 'home_score', 'away_score']].astype(
+            {'tier': 'int64', 'home_score': 'int64', 'away_score': 'int64',
+             'HomeTeam': object, 'AwayTeam': object}
+        )
+
+    def _blocks(self, games: pd.DataFrame) -> pd.DataFrame:
+        """(country, tier) -> league_id rows for every block in `games`."""
+        rows = [
+            {'country': country, 'tier': tier, 'league_id': league_id}
+            for (country, tier, tm_code) in games[BLOCK + ['tm_code']].drop_duplicates().itertuples(index=False)
+            for league_id in self.block_league_ids(country, tm_code)
+        ]
+        return pd.DataFrame(rows, columns=BLOCK + ['league_id']).astype({'tier': 'int64', 'league_id': 'int64'})
+
+    def _candidate_pairs(self, games: pd.DataFrame) -> pd.DataFrame:
+        """Every (odds game, database game) pair of the same block, date and score line."""
+        return games.merge(self._blocks(games), on=BLOCK).merge(self.db_games, on=SCORE_LINE)
+
+    def _fuzzy_scores(self, pairs: pd.DataFrame) -> pd.DataFrame:
+        """`pairs` with home_fuzzy/away_fuzzy: each side's name against its candidate club."""
+        pairs = pairs.assign(home_fuzzy=np.float32(0), away_fuzzy=np.float32(0))
+        for _, block in pairs.groupby(BLOCK):
+            teams = pd.unique(np.concatenate([block['HomeTeam'].to_numpy(), block['AwayTeam'].to_numpy()]))
+            club_ids = pd.unique(np.concatenate([block['home_club_id'].to_numpy(), block['away_club_id'].to_numpy()]))
+            scores = process.cdist(
+                [_normalize(t) for t in teams],
+                [_normalize(self.club_names.get(int(c), '')) for c in club_ids],
+                scorer=fuzz.ratio, dtype=np.float32, workers=self.workers,
+            )
+            team_pos = pd.Series(np.arange(len(teams)), index=teams)
+            club_pos = pd.Series(np.arange(len(club_ids)), index=club_ids)
+            for side in ('home', 'away'):
+                rows = team_pos[block[f'{side.capitalize()}Team']].to_numpy()
+                cols = club_pos[block[f'{side}_club_id']].to_numpy()
+                pairs.loc[block.index, f'{side}_fuzzy'] = scores[rows, cols]
+        return pairs
+
+    def resolve(self, odds: pd.DataFrame, min_confidence: float = 70,
+                min_matches: int = MIN_MATCHES) -> pd.DataFrame:
+        """
+        Resolve the teams in `odds` (columns match_date, HomeTeam, AwayTeam, FTHG,
+        FTAG, league_code) to clubs, one row per accepted (team name, club).
+        """
+        games = self._odds_games(odds)
+        pairs = self._candidate_pairs(games) if not games.empty else games
+        if pairs.empty:
+            return pd.DataFrame(columns=MAPPING_COLUMNS)
+        pairs = self._fuzzy_scores(pairs)
+        pairs['confidence'] = 50 + 25 * (pairs['home_fuzzy'].astype(float) + pairs['away_fuzzy'].astype(float)) / 100
+        pairs = pairs[pairs['confidence'] >= min_confidence]
+
+        sides = pd.concat([
+            pairs[BLOCK + ['confidence']].assign(team=pairs[f'{side.capitalize()}Team'],
+                                                 club_id=pairs[f'{side}_club_id'],
+                                                 fuzzy_score=pairs[f'{side}_fuzzy'].astype(float))
+            for side in ('home', 'away')
+        ], ignore_index=True)
+        candidates = sides.groupby(KEY + ['club_id'], as_index=False).agg(
+            match_count=('confidence', 'size'), confidence=('confidence', 'sum'), fuzzy=('fuzzy_score', 'sum'),
+        )
+
+        # Club paired most often per key, then merge keys of the same name (e.g. a promoted team's two tiers)
+        best = candidates.sort_values(['match_count', 'confidence'], ascending=False).drop_duplicates(subset=KEY)
+        grouped = best.groupby(['team', 'club_id'], as_index=False)[['match_count', 'confidence', 'fuzzy']].sum()
+        grouped = grouped[grouped['match_count'] >= min_matches]
+        if grouped.empty:
+            return pd.DataFrame(columns=MAPPING_COLUMNS)
+        return pd.DataFrame({
+            'oddscheck_team_name': grouped['team'],
+            'db_club_id': grouped['club_id'].astype('int64'),
+            'db_club_name': grouped['club_id'].map(lambda c: self.club_names.get(int(c), '')),
+            'match_count': grouped['match_count'],
+            'avg_confidence': (grouped['confidence'] / grouped['match_count']).round(2),
+            'avg_fuzzy_score': (grouped['fuzzy'] / grouped['match_count']).round(2),
+        }).sort_values(['oddscheck_team_name', 'db_club_id'], ignore_index=True)
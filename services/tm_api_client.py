@@ -0,0 +1,196 @@
+import time
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from config.constants import HEADERS
+
+TM_API_BASE = "https://tmapi-alpha.transfermarkt.technology"
+
+
+def _to_int(value: Any) -> Optional[int]:
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class TMApiClient:
+    def __init__(self, timeout: int = 40, retries: int = 3, retry_sleep_seconds: float = 1.5):
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_sleep_seconds = retry_sleep_seconds
+
+        self.club_name_cache: Dict[int, str] = {}
+        self.player_profile_cache: Dict[int, Dict[str, Any]] = {}
+        self.player_market_cache: Dict[int, List[Dict[str, Any]]] = {}
+
+    def fetch_json(self, endpoint: str) -> Dict[str, Any]:
+        url = f"{TM_API_BASE}{endpoint}"
+        last_error: Optional[Exception] = None
+
+        for attempt in range(1, self.retries + 1):
+            try:
+                response = self.session.get(url, timeout=self.timeout)
+                response.raise_for_status()
+                payload = response.json()
+                if not payload.get("success", False):
+                    raise RuntimeError(f"TM API returned success=false for {endpoint}: {payload.get('message')}")
+                return payload
+            except Exception as exc:
+                last_error = exc
+                if attempt < self.retries:
+                    time.sleep(self.retry_sleep_seconds * attempt)
+                else:
+                    raise RuntimeError(f"Failed to fetch {url}: {exc}") from exc
+
+        raise RuntimeError(f"Unreachable code in fetch_json for {url}: {last_error}")
+
+    def get_game(self, match_id: int) -> Dict[str, Any]:
+        """Return the `data` block of `/game/{match_id}` (clubs, lineups, result, date)."""
+        return self.fetch_json(f"/game/{match_id}").get("data", {})
+
+    def get_club_name(self, club_id: Optional[int]) -> Optional[str]:
+        if club_id is None or club_id <= 0:
+            return None
+        if club_id in self.club_name_cache:
+            return self.club_name_cache[club_id]
+
+        payload = self.fetch_json(f"/club/{club_id}")
+        data = payload.get("data", {})
+        name = data.get("name") or data.get("baseDetails", {}).get("shortName") or str(club_id)
+        self.club_name_cache[club_id] = name
+        return name
+
+    def get_player_profile(self, player_id: int) -> Dict[str, Any]:
+        if player_id in self.player_profile_cache:
+            return self.player_profile_cache[player_id]
+
+        payload = self.fetch_json(f"/player/{player_id}")
+        data = payload.get("data", {})
+
+        transfer_history: List[Dict[str, Any]] = []
+        for assignment in data.get("clubAssignments") or []:
+            club_id = _to_int(assignment.get("clubId"))
+            transfer_history.append(
+                {
+                    "club_id": club_id,
+                    "club_name": self.get_club_name(club_id),
+                    "type": assignment.get("type"),
+                    "start": assignment.get("start"),
+                    "debut": assignment.get("debut"),
+                    "shirt_number": assignment.get("shirtNumber"),
+                    "is_captain": assignment.get("isCaptain"),
+                    "source": "club_assignments",
+                }
+            )
+
+        # TM player profile often has only current assignment. Reconstruct broader club tenure
+        # history from valuation timeline so Player_tenure includes other clubs in the career.
+        inferred_tenures = self._infer_tenures_from_market_history(player_id)
+        transfer_history = self._merge_tenure_histories(transfer_history, inferred_tenures)
+
+        profile = {
+            "player_id": player_id,
+            "name": data.get("name"),
+            "dob": data.get("lifeDates", {}).get("dateOfBirth"),
+            "nationality": data.get("nationalityDetails", {}).get("nationalities", {}).get("nationalityId"),
+            "position": data.get("attributes", {}).get("position", {}).get("name"),
+            "transfer_history": transfer_history,
+        }
+        self.player_profile_cache[player_id] = profile
+        return profile
+
+    def _infer_tenures_from_market_history(self, player_id: int) -> List[Dict[str, Any]]:
+        history = self.get_player_market_value_history(player_id)
+        if not history:
+            return []
+
+        points = [h for h in history if h.get("club_id") is not None and h.get("date")]
+        points.sort(key=lambda h: h.get("date"))
+        if not points:
+            return []
+
+        tenures: List[Dict[str, Any]] = []
+        current = {
+            "club_id": points[0].get("club_id"),
+            "club_name": points[0].get("club_name"),
+            "start": points[0].get("date"),
+            "end": points[0].get("date"),
+            "type": "historical",
+            "debut": None,
+            "shirt_number": None,
+            "is_captain": False,
+            "source": "market_value_history",
+        }
+
+        for point in points[1:]:
+            point_club_id = point.get("club_id")
+            point_date = point.get("date")
+
+            if point_club_id == current.get("club_id"):
+                current["end"] = point_date
+            else:
+                tenures.append(current)
+                current = {
+                    "club_id": point_club_id,
+                    "club_name": point.get("club_name"),
+                    "start": point_date,
+                    "end": point_date,
+                    "type": "historical",
+                    "debut": None,
+                    "shirt_number": None,
+                    "is_captain": False,
+                    "source": "market_value_history",
+                }
+
+        tenures.append(current)
+        return tenures
+
+    def _merge_tenure_histories(
+        self,
+        primary: List[Dict[str, Any]],
+        secondary: List[Dict[str, Any]],
+    ) -> List[Dict[str, Any]]:
+        merged: List[Dict[str, Any]] = []
+        seen = set()
+
+        # Prefer clubAssignments for the same (club_id, start) pair and append inferred extras.
+        for row in primary + secondary:
+            key = (_to_int(row.get("club_id")), row.get("start"))
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(row)
+
+        merged.sort(key=lambda r: (r.get("start") or "", r.get("club_name") or ""))
+        return merged
+
+    def get_player_market_value_history(self, player_id: int) -> List[Dict[str, Any]]:
+        if player_id in self.player_market_cache:
+            return self.player_market_cache[player_id]
+
+        payload = self.fetch_json(f"/player/{player_id}/market-value-history")
+        history = payload.get("data", {}).get("history") or []
+
+        mapped: List[Dict[str, Any]] = []
+        for item in history:
+            market_value = item.get("marketValue") or {}
+            club_id = _to_int(item.get("clubId"))
+            mapped.append(
+                {
+                    "date": market_value.get("determined"),
+                    "value": market_value.get("value"),
+                    "currency": market_value.get("currency"),
+                    "club_id": club_id,
+                    "club_name": self.get_club_name(club_id),
+                    "age": item.get("age"),
+                }
+            )
+
+        self.player_market_cache[player_id] = mapped
+        return mapped
@@ -1,3 +1,7 @@
+import re
+import threading
+from types import SimpleNamespace
+
 import pytest
 from repositories.coach.fake_coach_repository import FakeCoachRepository
 from models.coach import Coach
@@ -13,3 +17,211 @@ def fake_repo():
 @pytest.fixture
 def new_coach():
     return Coach(tm_coach_id=2, name="New Coach", dob="1980-01-01", country="ES", coaching_license="UEFA")
+
+
+# ---------------------------------------------------------------------------
+# In-memory Supabase / PostgREST client
+#
+# Enough of the postgrest-py builder for the paged reads, upserts and deletes
+# the services issue: filters (eq, neq, gt, gte, lt, lte, in_, is_, not_, or_),
+# order, limit / range, upsert with on_conflict, delete. Every call is logged
+# on its table (`calls`) and selects are counted (`reads`). A table's
+# `on_execute(action, rows)` hook runs before each request is applied and can
+# raise to simulate a failing request.
+# ---------------------------------------------------------------------------
+
+def _comparable(row_value, value):
+    if isinstance(row_value, (int, float)) and isinstance(value, (int, float)):
+        return row_value, value
+    return str(row_value), str(value)
+
+
+_OPERATORS = {
+    "eq": lambda a, b: a == b,
+    "neq": lambda a, b: a != b,
+    "gt": lambda a, b: a > b,
+    "gte": lambda a, b: a >= b,
+    "lt": lambda a, b: a < b,
+    "lte": lambda a, b: a <= b,
+}
+
+
+def _compare(op, row_value, value):
+    if op == "is":
+        return row_value is None if value in (None, "null") else row_value is value
+    if row_value is None:
+        return False
+    return _OPERATORS[op](*_comparable(row_value, value))
+
+
+def _split_terms(expression):
+    """Top-level comma-separated terms of a PostgREST logic expression."""
+    terms, depth, start = [], 0, 0
+    for i, char in enumerate(expression):
+        depth += char == "("
+        depth -= char == ")"
+        if char == "," and depth == 0:
+            terms.append(expression[start:i])
+            start = i + 1
+    terms.append(expression[start:])
+    return terms
+
+
+def _logic(expression):
+    """Row predicate of an `or_` expression such as 'date.gt.X,and(date.eq.X,id.gt.5)'."""
+    match = re.fullmatch(r"(and|or)\((.*)\)", expression)
+    if match:
+        parts = [_logic(term) for term in _split_terms(match.group(2))]
+        combine = all if match.group(1) == "and" else any
+        return lambda row: combine(part(row) for part in parts)
+    column, op, value = expression.split(".", 2)
+    value = int(value) if re.fullmatch(r"-?\d+", value) else value
+    return lambda row: _compare(op, row.get(column), value)
+
+
+class FakePostgrestTable:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls, self.upserts, self.deleted = [], [], []
+        self.reads = 0
+        self.on_execute = None
+        self.lock = threading.Lock()
+
+
+class FakePostgrestQuery:
+    def __init__(self, client, table):
+        self.client, self.table = client, table
+        self.predicates, self.orders = [], []
+        self.offset, self.count = 0, None
+        self.action, self.payload = "select", None
+        self._negate = False
+
+    def _log(self, *call):
+        self.table.calls.append(call)
+
+    # ── Actions ──────────────────────────────────────────────────────────────
+
+    def select(self, columns="*", **_):
+        self.client.reads += 1
+        self.table.reads += 1
+        self._log("select", columns)
+        return self
+
+    def upsert(self, rows, on_conflict="", returning=None, **_):
+        rows = rows if isinstance(rows, list) else [rows]
+        self._log("upsert", len(rows), on_conflict, returning)
+        self.action = "upsert"
+        self.payload = (rows, on_conflict, returning)
+        return self
+
+    def delete(self, **_):
+        self._log("delete")
+        self.action = "delete"
+        return self
+
+    # ── Filters ──────────────────────────────────────────────────────────────
+
+    @property
+    def not_(self):
+        self._negate = True
+        return self
+
+    def _filter(self, predicate, *call):
+        negate, self._negate = self._negate, False
+        self._log(*(("not",) if negate else ()), *call)
+        self.predicates.append((lambda row: not predicate(row)) if negate else predicate)
+        return self
+
+    def eq(self, column, value):
+        return self._filter(lambda row: _compare("eq", row.get(column), value), "eq", column, value)
+
+    def neq(self, column, value):
+        return self._filter(lambda row: _compare("neq", row.get(column), value), "neq", column, value)
+
+    def gt(self, column, value):
+        return self._filter(lambda row: _compare("gt", row.get(column), value), "gt", column, value)
+
+    def gte(self, column, value):
+        return self._filter(lambda row: _compare("gte", row.get(column), value), "gte", column, value)
+
+    def lt(self, column, value):
+        return self._filter(lambda row: _compare("lt", row.get(column), value), "lt", column, value)
+
+    def lte(self, column, value):
+        return self._filter(lambda row: _compare("lte", row.get(column), value), "lte", column, value)
+
+    def in_(self, column, values):
+        values = list(values)
+        return self._filter(lambda row: row.get(column) in values, "in", column, values)
+
+    def is_(self, column, value):
+        return self._filter(lambda row: _compare("is", row.get(column), value), "is", column, value)
+
+    def or_(self, expression):
+        return self._filter(_logic(f"or({expression})"), "or", expression)
+
+    # ── Modifiers ────────────────────────────────────────────────────────────
+
+    def order(self, column, desc=False, **_):
+        self._log("order", column, desc)
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, n):
+        self.count = n
+        return self
+
+    def range(self, start, end):
+        self.offset, self.count = start, end - start + 1
+        return self
+
+    # ── Execution ────────────────────────────────────────────────────────────
+
+    def _matching(self):
+        rows = [row for row in self.table.rows if all(p(row) for p in self.predicates)]
+        for column, desc in reversed(self.orders):
+            # PostgreSQL puts NULLs last ascending, first descending
+            rows.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=desc)
+        end = None if self.count is None else self.offset + self.count
+        return rows[self.offset:end]
+
+    def _upsert(self):
+        rows, on_conflict, returning = self.payload
+        keys = [k.strip() for k in on_conflict.split(",") if k.strip()]
+        for row in rows:
+            existing = next((i for i, r in enumerate(self.table.rows)
+                             if keys and all(r.get(k) == row.get(k) for k in keys)), None)
+            if existing is None:
+                self.table.rows.append(dict(row))
+            else:
+                self.table.rows[existing] = {**self.table.rows[existing], **row}
+        self.table.upserts.extend(rows)
+        return [] if str(getattr(returning, "value", returning)) == "minimal" else rows
+
+    def execute(self):
+        if self.table.on_execute is not None:
+            self.table.on_execute(self.action, self.payload[0] if self.payload else None)
+        with self.table.lock:
+            if self.action == "upsert":
+                return SimpleNamespace(data=self._upsert(), count=None)
+            rows = self._matching()
+            if self.action == "delete":
+                gone = {id(row) for row in rows}
+                self.table.rows[:] = [r for r in self.table.rows if id(r) not in gone]
+                self.table.deleted.extend(rows)
+            return SimpleNamespace(data=rows, count=None)
+
+
+class FakeSupabaseClient:
+    def __init__(self, tables):
+        self.tables = {name: FakePostgrestTable(rows) for name, rows in tables.items()}
+        self.reads = 0
+
+    def table(self, name):
+        return FakePostgrestQuery(self, self.tables[name])
+
+
+@pytest.fixture
+def fake_supabase():
+    """Factory of in-memory clients: `fake_supabase({"Match": [row, ...]})`."""
+    return FakeSupabaseClient
@@ -0,0 +1,114 @@
+import random
+from datetime import date, timedelta
+from unittest.mock import MagicMock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from repositories.coach.supabase_coach_repository import SupabaseCoachRepository
+from repositories.tenure.coach_tenure_index import CoachTenureIndex, FIRST_MATCH, NO_COACH, UNIQUE
+
+
+def reference_first_match(rows, club_id, match_date):
+    """The pandas filter + iterrows mapping the MTE ETL used before the index."""
+    team_coaches = pd.DataFrame(rows, dtype=object)  # keep None as None (pandas 3 would turn it into NaN)
+    team_coaches = team_coaches[team_coaches['club_id'] == club_id]
+    match_date_pd = pd.to_datetime(match_date)
+    for _, tenure in team_coaches.iterrows():
+        from_date = pd.to_datetime(tenure['start_date']) if tenure['start_date'] else pd.NaT
+        until_date = pd.to_datetime(tenure['end_date']) if tenure['end_date'] else pd.Timestamp.max
+        if pd.notna(from_date) and from_date <= match_date_pd <= until_date:
+            return int(tenure['coach_id'])
+    return None
+
+
+def reference_unique(rows, club_id, match_date):
+    day = date.fromisoformat(match_date)
+    coaches = {
+        r['coach_id'] for r in rows
+        if r['club_id'] == club_id and r['start_date']
+        and date.fromisoformat(r['start_date']) <= day
+        and (r['end_date'] is None or day <= date.fromisoformat(r['end_date']))
+    }
+    return coaches.pop() if len(coaches) == 1 else None
+
+
+@pytest.fixture
+def random_tenures():
+    rng = random.Random(7)
+    rows, tenure_id = [], 0
+    for club_id in range(1, 25):
+        day = date(2000, 1, 1)
+        for _ in range(rng.randint(1, 8)):
+            start = day + timedelta(days=rng.randint(-60, 60))  # sometimes overlaps the previous one
+            end = start + timedelta(days=rng.randint(30, 900))
+            tenure_id += 1
+            rows.append({
+                "id": tenure_id, "coach_id": rng.randint(1, 40), "club_id": club_id,
+                "start_date": start.isoformat(),
+                "end_date": None if rng.random() < 0.1 else end.isoformat(),
+                "role": "Manager",
+            })
+            day = end + timedelta(days=rng.randint(0, 30))
+    rng.shuffle(rows)
+    queries = [(rng.randint(0, 26), (date(1999, 6, 1) + timedelta(days=rng.randint(0, 9000))).isoformat())
+               for _ in range(400)]
+    return rows, queries
+
+
+def test_lookup_matches_reference_implementations(random_tenures):
+    rows, queries = random_tenures
+    index = CoachTenureIndex.from_rows(rows)
+    for club_id, match_date in queries:
+        assert index.lookup(club_id, match_date, policy=FIRST_MATCH) == reference_first_match(rows, club_id, match_date)
+        assert index.lookup(club_id, match_date, policy=UNIQUE) == reference_unique(rows, club_id, match_date)
+
+
+@pytest.mark.parametrize("policy", [FIRST_MATCH, UNIQUE])
+def test_lookup_many_matches_scalar_lookup(random_tenures, policy):
+    rows, queries = random_tenures
+    index = CoachTenureIndex.from_rows(rows)
+    clubs = [q[0] for q in queries] + [None]
+    dates = [q[1] for q in queries] + ["2010-01-01"]
+
+    batch = index.lookup_many(clubs, dates, policy=policy)
+
+    expected = [index.lookup(c, d, policy=policy) for c, d in zip(clubs, dates)]
+    assert batch.tolist() == [NO_COACH if e is None else e for e in expected]
+
+
+def test_add_tenure_updates_end_date_in_place():
+    index = CoachTenureIndex.from_rows([{"coach_id": 1, "club_id": 5, "start_date": "2020-01-01", "end_date": None}])
+    assert index.lookup(5, "2022-01-01") == 1
+    index.add(1, 5, "2020-01-01", "2021-06-30")
+    assert len(index) == 1
+    assert index.lookup(5, "2022-01-01") is None
+    assert index.lookup_many(np.array([5]), ["2021-01-01"]).tolist() == [1]
+
+
+def test_refresh_uses_keyset_pagination():
+    pages = [
+        [{"id": 1, "coach_id": 1, "club_id": 5, "start_date": "2020-01-01", "end_date": None, "role": "Manager"},
+         {"id": 2, "coach_id": 2, "club_id": 6, "start_date": "2020-01-01", "end_date": None, "role": "Manager"}],
+        [{"id": 3, "coach_id": 3, "club_id": 7, "start_date": "2020-01-01", "end_date": None, "role": "Manager"}],
+    ]
+    client = MagicMock()
+    query = client.table.return_value.select.return_value.eq.return_value.gt.return_value.order.return_value.limit.return_value
+    query.execute.side_effect = [MagicMock(data=pages[0]), MagicMock(data=pages[1])]
+
+    index = CoachTenureIndex.from_client(client, page_size=2)
+
+    gt = client.table.return_value.select.return_value.eq.return_value.gt
+    assert [c.args for c in gt.call_args_list] == [("id", 0), ("id", 2)]
+    assert len(index) == 3 and index.max_id == 3
+
+
+def test_repository_answers_from_index_without_querying():
+    client = MagicMock()
+    index = CoachTenureIndex.from_rows([{"coach_id": 448, "club_id": 148, "start_date": "2008-10-25", "end_date": None}])
+    repo = SupabaseCoachRepository(client=client, tenure_index=index)
+
+    assert repo.get_coach_id_by_date(148, date(2010, 8, 14)) == [{"coach_id": 448}]
+    assert repo.get_coach_id_by_date(148, date(2001, 1, 1)) == []
+    client.table.assert_not_called()
@@ -0,0 +1,131 @@
+import asyncio
+import time
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+
+from models.coach import Coach
+from models.coach_tenure import CoachTenure
+from models.match import Match
+from pipelines.async_season_pipeline import run_async_season_pipeline
+from repositories.coach.fake_coach_repository import AsyncFakeCoachRepository, FakeCoachRepository
+from repositories.league_season_state.fake_league_season_state_repository import AsyncFakeLeagueSeasonStateRepository
+from repositories.match.fake_match_repository import AsyncFakeMatchRepository
+from repositories.pipeline_context import AsyncPipelineContext
+from repositories.tenure.fake_coach_tenure_repository import AsyncFakeCoachTenureRepository
+
+
+def make_match(match_id, home_coach_id=448, away_coach_id=524):
+    return Match(tm_match_id=match_id, home_club_id=148, away_club_id=281, season_id=2010, league_id=1,
+                 date=date(2010, 8, 14), home_coach_id=home_coach_id, away_coach_id=away_coach_id,
+                 attendance=None, home_team_score=1, away_team_score=0, home_team_points=3, away_team_points=0)
+
+
+def make_coach(coach_id):
+    coach = Coach(tm_coach_id=coach_id, name=f"Coach {coach_id}", country="PT")
+    tenures = [CoachTenure(coach_id=coach_id, club_id=100 + i, start_date=date(2000 + i, 7, 1),
+                           end_date=None, role="Manager", is_current=False) for i in range(3)]
+    return coach, tenures
+
+
+def fixture_rows(*match_ids):
+    return [{"match_id": str(m), "date": "2010-08-14"} for m in match_ids]
+
+
+@pytest.fixture
+def context():
+    return AsyncPipelineContext(
+        coach_repo=AsyncFakeCoachRepository(),
+        match_repo=AsyncFakeMatchRepository(),
+        tenure_repo=AsyncFakeCoachTenureRepository(),
+        state_repo=AsyncFakeLeagueSeasonStateRepository(),
+        coach_cache=set(),
+        match_cache=set(),
+        tenure_cache=set(),
+    )
+
+
+def run(context, **kwargs):
+    return asyncio.run(run_async_season_pipeline(league_id=1, league_code="GB1", season_id=2010,
+                                                 session=None, context=context, **kwargs))
+
+
+def test_async_fake_matches_sync_fake():
+    coach, _ = make_coach(1)
+    sync_repo, async_repo = FakeCoachRepository(), AsyncFakeCoachRepository()
+    assert sync_repo.save(coach) == asyncio.run(async_repo.save(coach))
+    assert sync_repo.fetch_all_ids() == asyncio.run(async_repo.fetch_all_ids())
+
+
+@patch("pipelines.async_season_pipeline.fetch_coach", side_effect=lambda session, coach_id: make_coach(coach_id))
+@patch("pipelines.async_season_pipeline.fetch_match")
+@patch("pipelines.async_season_pipeline.get_matches_with_dates")
+def test_async_pipeline_saves_matches_coaches_and_state(mock_matches, mock_fetch_match, mock_fetch_coach, context):
+    mock_matches.return_value = fixture_rows(1, 2, 3)
+    mock_fetch_match.side_effect = lambda session, match_id, *args: make_match(int(match_id))
+
+    assert run(context) == []
+
+    assert set(context.match_repo.matches) == {1, 2, 3}
+    assert set(context.coach_repo.coaches) == {448, 524}
+    assert len(context.tenure_repo.coach_tenures) == 6
+    # Each coach page is fetched once even though later fetches overlap earlier writes
+    assert sorted(call.args[1] for call in mock_fetch_coach.call_args_list) == [448, 524]
+    state = context.state_repo.states[(1, 2010)]
+    assert (state.total_matches_processed, state.status) == (3, "completed")
+
+
+@patch("pipelines.async_season_pipeline.fetch_coach", side_effect=lambda session, coach_id: make_coach(coach_id))
+@patch("pipelines.async_season_pipeline.fetch_match")
+@patch("pipelines.async_season_pipeline.get_matches_with_dates")
+def test_fetch_of_next_match_overlaps_previous_write(mock_matches, mock_fetch_match, mock_fetch_coach, context):
+    events = []
+    mock_matches.return_value = fixture_rows(1, 2)
+    context.coach_cache.update({448, 524})
+
+    def slow_fetch(session, match_id, *args):
+        time.sleep(0.02)
+        events.append(("fetched", int(match_id)))
+        return make_match(int(match_id))
+
+    save = context.match_repo.save
+
+    async def slow_save(match):
+        events.append(("write_start", match.tm_match_id))
+        await asyncio.sleep(0.2)
+        events.append(("write_end", match.tm_match_id))
+        return await save(match)
+
+    mock_fetch_match.side_effect = slow_fetch
+    context.match_repo.save = slow_save
+
+    assert run(context) == []
+    assert events.index(("fetched", 2)) < events.index(("write_end", 1))
+    assert set(context.match_repo.matches) == {1, 2}
+
+
+@patch("pipelines.async_season_pipeline.fetch_coach", side_effect=lambda session, coach_id: make_coach(coach_id))
+@patch("pipelines.async_season_pipeline.fetch_match")
+@patch("pipelines.async_season_pipeline.get_matches_with_dates")
+def test_failed_fetch_and_write_only_fail_their_match(mock_matches, mock_fetch_match, mock_fetch_coach, context):
+    mock_matches.return_value = fixture_rows(1, 2, 3)
+
+    def fetch(session, match_id, *args):
+        if int(match_id) == 2:
+            raise ValueError("missing result")
+        return make_match(int(match_id))
+
+    save = context.match_repo.save
+
+    async def failing_save(match):
+        if match.tm_match_id == 3:
+            raise Exception("Supabase save error")
+        return await save(match)
+
+    mock_fetch_match.side_effect = fetch
+    context.match_repo.save = failing_save
+
+    assert sorted(run(context)) == ["2", "3"]
+    assert set(context.match_repo.matches) == {1}
+    assert context.state_repo.states[(1, 2010)].status == "completed_with_errors"
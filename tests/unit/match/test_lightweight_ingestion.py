@@ -0,0 +1,105 @@
+from unittest.mock import patch
+
+import pytest
+
+from models.coach_tenure import CoachTenure
+from pipelines.match_pipeline import run_lightweight_match_pipeline
+from pipelines.season_pipeline import run_season_pipeline
+from repositories.league_season_state.fake_league_season_state_repository import FakeLeagueSeasonStateRepository
+from repositories.match.fake_match_repository import FakeMatchRepository
+from repositories.match.standings_index import StandingsIndex
+from repositories.pipeline_context import PipelineContext
+from repositories.tenure.coach_tenure_index import CoachTenureIndex
+
+
+@pytest.fixture
+def tenure_index():
+    return CoachTenureIndex.from_rows([
+        {"coach_id": 448, "club_id": 148, "start_date": "2008-07-01", "end_date": "2012-06-30", "role": "Manager"},
+        {"coach_id": 524, "club_id": 281, "start_date": "2009-07-01", "end_date": None, "role": "Manager"},
+        {"coach_id": 999, "club_id": 281, "start_date": "2009-07-01", "end_date": None, "role": "Assistant Manager"},
+    ])
+
+
+@pytest.fixture
+def context(tenure_index):
+    return PipelineContext(
+        coach_repo=None,
+        match_repo=FakeMatchRepository(),
+        tenure_repo=None,
+        state_repo=FakeLeagueSeasonStateRepository(),
+        coach_cache=set(),
+        match_cache=set(),
+        tenure_cache=set(),
+        tenure_index=tenure_index,
+    )
+
+
+def fixture_row(**overrides):
+    row = {"match_id": "1028917", "date": "2010-08-14", "home_club_id": "148", "away_club_id": "281",
+           "home_goals": 0, "away_goals": 0}
+    row.update(overrides)
+    return row
+
+
+def test_index_lookup_gaps_and_ambiguity(tenure_index):
+    assert tenure_index.lookup("148", "2010-08-14") == 448
+    assert tenure_index.lookup(148, "2013-01-01") is None  # gap after tenure ended
+    assert tenure_index.lookup(281, "2020-01-01") == 524   # open tenure, assistant ignored
+    tenure_index.add_tenure(CoachTenure(coach_id=777, club_id=148, start_date="2012-06-01",
+                                         end_date=None, role="Manager", is_current=False))
+    assert tenure_index.lookup(148, "2012-06-15") is None  # overlapping managers
+
+
+def test_lightweight_match_saved_without_report(context):
+    assert run_lightweight_match_pipeline(fixture_row(), league_id=1, season_id=2010, context=context) is True
+
+    match = context.match_repo.matches[1028917]
+    assert (match.home_coach_id, match.away_coach_id) == (448, 524)
+    assert (match.home_team_points, match.away_team_points) == (1, 1)
+    assert match.attendance is None
+    assert 1028917 in context.match_cache
+
+
+@pytest.mark.parametrize("overrides", [
+    {"home_goals": None, "away_goals": None},
+    {"date": None},
+    {"home_club_id": "9999"},
+    {"date": "2009-01-01"},
+])
+def test_lightweight_declines_when_index_cannot_answer(context, overrides):
+    assert run_lightweight_match_pipeline(fixture_row(**overrides), league_id=1, season_id=2010, context=context) is False
+    assert context.match_repo.matches == {}
+
+
+@patch("pipelines.season_pipeline.run_match_pipeline")
+@patch("pipelines.season_pipeline.get_matches_with_dates")
+def test_season_pipeline_only_fetches_reports_on_fallback(mock_matches, mock_full, context):
+    mock_matches.return_value = [fixture_row(), fixture_row(match_id="1028918", home_club_id="9999")]
+
+    errors = run_season_pipeline(league_id=1, league_code="GB1", season_id=2010, session=None,
+                                 context=context, lightweight=True)
+
+    assert errors == []
+    assert 1028917 in context.match_repo.matches
+    mock_full.assert_called_once()
+    assert mock_full.call_args.kwargs["match_id"] == "1028918"
+
+
+@patch("pipelines.season_pipeline.get_matches_with_dates")
+def test_saved_matches_update_the_standings(mock_matches, context, fake_supabase):
+    client = fake_supabase({"Match": [
+        {"tm_match_id": 1028900, "league_id": 1, "season_id": 2010, "date": "2010-08-07",
+         "home_club_id": 148, "away_club_id": 300, "home_team_score": 2, "away_team_score": 0},
+    ]})
+    context.standings = StandingsIndex.from_client(client, [(1, 2010)])
+    assert context.standings.as_of(148, "2010-08-15")["points"] == 3
+    mock_matches.return_value = [fixture_row()]  # 0-0 at home to 281
+
+    run_season_pipeline(league_id=1, league_code="GB1", season_id=2010, session=None,
+                        context=context, lightweight=True)
+
+    after = context.standings.as_of(148, "2010-08-15")
+    assert (after["played"], after["points"], after["position"]) == (2, 4, 1)
+    assert context.standings.as_of(281, "2010-08-15")["points"] == 1
+    assert context.standings.as_of(148, "2010-08-14")["points"] == 3  # the day's own match is not counted
@@ -0,0 +1,40 @@
+from datetime import date
+
+from repositories.match.match_date_index import MatchDateIndex
+
+
+def match(match_id, day, league_id, home, away):
+    return {"tm_match_id": match_id, "date": f"2024-08-{day:02d}", "home_team_score": 1, "away_team_score": 0,
+            "home_club_id": home, "away_club_id": away, "league_id": league_id}
+
+
+def make_client(fake_supabase):
+    matches = [match(i, 10 + i % 3, 1 if i % 2 else 2, 100 + i, 200 + i) for i in range(1, 11)]
+    matches.append(match(99, 25, 1, 148, 281))
+    clubs = [{"tm_club_id": i, "name": f"Club {i}"} for i in list(range(100, 111)) + list(range(200, 211)) + [148, 281]]
+    return fake_supabase({"Match": matches, "Club": clubs})
+
+
+def test_prefetch_pages_through_range_and_leagues(fake_supabase):
+    client = make_client(fake_supabase)
+    index = MatchDateIndex.from_client(client, date(2024, 8, 10), date(2024, 8, 12), league_ids=[1], page_size=2)
+
+    assert index.match_count == 5
+    assert all(m["league_id"] == 1 for m in index.candidates(date(2024, 8, 11)))
+    assert index.candidates("2024-08-25") == []
+    assert index.club_names[101] == "Club 101"
+    # 3 full pages + 1 short page of matches, one Club read
+    assert client.reads == 4
+
+
+def test_candidates_filter_by_league():
+    index = MatchDateIndex([match(1, 10, 1, 100, 200), match(2, 10, 2, 101, 201)])
+    assert [m["tm_match_id"] for m in index.candidates(date(2024, 8, 10))] == [1, 2]
+    assert [m["tm_match_id"] for m in index.candidates(date(2024, 8, 10), [2])] == [2]
+
+
+def test_prefetch_without_leagues_loads_every_league(fake_supabase):
+    index = MatchDateIndex.from_client(make_client(fake_supabase), date(2024, 8, 10), date(2024, 8, 31))
+    assert index.match_count == 11
+    assert {m["league_id"] for ms in index.by_date.values() for m in ms} == {1, 2}
+    assert index.club_names[148] == "Club 148"
@@ -0,0 +1,119 @@
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from pages.match_page import MatchPage, MissingCoachException, MissingResultException
+from services.match_service import (GAME_ATTENDANCE_PATH, GAME_AWAY_GOALS_PATH, GAME_COACH_PATH,
+                                    GAME_HOME_GOALS_PATH, MatchService)
+from services.match_source import FallbackMatchSource, HtmlMatchSource, JsonMatchSource
+
+MATCH_ID = 1028917
+RECORDED_GAME = f"tests/fixtures/game_{MATCH_ID}_recorded.json"  # scripts/record_tmapi_game.py
+
+
+class RecordedTMApiClient:
+    """Serves a `/game/{id}` payload instead of calling tmapi."""
+
+    def __init__(self, payload):
+        self.payload = payload
+        self.calls = 0
+
+    def get_game(self, match_id):
+        self.calls += 1
+        return self.payload["data"]
+
+
+def _set(data, path, value):
+    for key in path[:-1]:
+        data = data.setdefault(key, {})
+    data[path[-1]] = value
+
+
+@pytest.fixture
+def game_payload():
+    """
+    A payload with the fields parse_game reads, placed at the configured paths.
+    It exercises parse_game's handling only; the paths themselves are checked by
+    test_recorded_json_and_html_sources_produce_the_same_match.
+    """
+    data = {
+        "baseDetails": {"date": {"dateTimeUTC": "2010-08-14T14:00:00+00:00"}},
+        "homeClub": {"clubId": 148},
+        "awayClub": {"clubId": 281},
+    }
+    _set(data, GAME_HOME_GOALS_PATH, 0)
+    _set(data, GAME_AWAY_GOALS_PATH, 0)
+    _set(data["homeClub"], GAME_COACH_PATH, 448)
+    _set(data["awayClub"], GAME_COACH_PATH, 524)
+    _set(data, GAME_ATTENDANCE_PATH, 35928)
+    return {"success": True, "data": data}
+
+
+@pytest.fixture
+def match_page():
+    with open("tests/fixtures/match_page_1028917_test.html", encoding="utf-8") as f:
+        return MatchPage(session=requests.session(), match_id=MATCH_ID, html_content=f.read())
+
+
+@pytest.mark.skipif(not os.path.exists(RECORDED_GAME),
+                    reason=f"record the payload with scripts/record_tmapi_game.py --match-id {MATCH_ID}")
+def test_recorded_json_and_html_sources_produce_the_same_match(match_page):
+    with open(RECORDED_GAME, encoding="utf-8") as f:
+        recorded = json.load(f)
+    html_match = MatchService.parse(league_id=1, season_id=2010, page=match_page)
+
+    json_match = JsonMatchSource(RecordedTMApiClient(recorded)).get_match(
+        MATCH_ID, league_id=1, season_id=2010, match_date=str(html_match.date))
+
+    assert json_match == html_match
+
+
+def test_json_source_builds_the_match(game_payload):
+    match = JsonMatchSource(RecordedTMApiClient(game_payload)).get_match(MATCH_ID, 1, 2010, "2010-08-14")
+
+    assert (match.home_club_id, match.away_club_id) == (148, 281)
+    assert (match.home_coach_id, match.away_coach_id) == (448, 524)
+    assert (match.home_team_points, match.away_team_points, match.attendance) == (1, 1, 35928)
+
+
+def test_json_source_keeps_the_local_date_of_a_late_kickoff(game_payload):
+    # 21:30 in Sao Paulo is 00:30 UTC the next day
+    game_payload["data"]["baseDetails"]["date"]["dateTimeUTC"] = "2024-03-10T00:30:00+00:00"
+    source = JsonMatchSource(RecordedTMApiClient(game_payload))
+
+    assert str(source.get_match(MATCH_ID, 1, 2024, "2024-03-09").date) == "2024-03-09"
+    with pytest.raises(ValueError):
+        source.get_match(MATCH_ID, 1, 2024)  # no fixture-list date: don't guess from the UTC kickoff
+
+
+def test_json_source_raises_on_missing_coach(game_payload):
+    _set(game_payload["data"]["awayClub"], GAME_COACH_PATH, None)
+    with pytest.raises(MissingCoachException) as exc:
+        JsonMatchSource(RecordedTMApiClient(game_payload)).get_match(MATCH_ID, 1, 2010, "2010-08-14")
+    assert exc.value.missing_side == "away"
+
+
+def test_json_source_raises_on_missing_result(game_payload):
+    game_payload["data"]["result"] = {}
+    with pytest.raises(MissingResultException):
+        JsonMatchSource(RecordedTMApiClient(game_payload)).get_match(MATCH_ID, 1, 2010, "2010-08-14")
+
+
+def test_json_source_leaves_missing_attendance_unknown(game_payload):
+    _set(game_payload["data"], GAME_ATTENDANCE_PATH, None)
+    match = JsonMatchSource(RecordedTMApiClient(game_payload)).get_match(MATCH_ID, 1, 2010, "2010-08-14")
+    assert match.attendance is None
+
+
+def test_fallback_uses_html_when_json_is_incomplete(game_payload, match_page):
+    game_payload["data"]["result"] = {}
+    source = FallbackMatchSource(JsonMatchSource(RecordedTMApiClient(game_payload)), HtmlMatchSource(session=None))
+
+    with patch("services.match_source.MatchPage", return_value=match_page):
+        match = source.get_match(MATCH_ID, 1, 2010, "2010-08-14")
+
+    assert match.attendance == 35928
+    assert (source.primary_hits, source.fallback_hits) == (0, 1)
@@ -0,0 +1,132 @@
+import random
+from datetime import date, timedelta
+
+from models.match import Match
+from repositories.match.standings_index import STATS, StandingsIndex
+
+
+def season_rows(seed=3, matches=300, league_id=1, season_id=2020, first_id=1):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(matches):
+        home, away = rng.sample(range(100, 118), 2)
+        rows.append({
+            "tm_match_id": first_id + i, "league_id": league_id, "season_id": season_id,
+            "date": (date(2020, 8, 1) + timedelta(days=rng.randint(0, 200))).isoformat(),
+            "home_club_id": home, "away_club_id": away,
+            "home_team_score": rng.randint(0, 4), "away_team_score": rng.randint(0, 4),
+        })
+    return rows
+
+
+def reference_table(rows, before_day):
+    """Naive per-match loop: club -> stats, plus positions."""
+    table = {}
+    for r in rows:
+        for club in (r["home_club_id"], r["away_club_id"]):
+            table.setdefault(club, dict.fromkeys(STATS, 0))
+    for r in rows:
+        if r["date"] >= before_day:
+            continue
+        for club, gf, ga in ((r["home_club_id"], r["home_team_score"], r["away_team_score"]),
+                             (r["away_club_id"], r["away_team_score"], r["home_team_score"])):
+            t = table[club]
+            t["played"] += 1
+            t["won"] += gf > ga
+            t["drawn"] += gf == ga
+            t["lost"] += gf < ga
+            t["points"] += 3 if gf > ga else 1 if gf == ga else 0
+            t["goals_for"] += gf
+            t["goals_against"] += ga
+    order = sorted(table, key=lambda c: (-table[c]["points"], -(table[c]["goals_for"] - table[c]["goals_against"]),
+                                         -table[c]["goals_for"], c))
+    return table, {club: i + 1 for i, club in enumerate(order)}
+
+
+def test_as_of_matches_naive_reference():
+    rows = season_rows()
+    index = StandingsIndex()
+    assert index.add_matches(rows) == len(rows)
+
+    for day in ("2020-09-15", "2020-12-01", "2021-03-01"):
+        table, positions = reference_table(rows, day)
+        for club in table:
+            standing = index.as_of(club, day)
+            assert {k: standing[k] for k in STATS} == table[club]
+            assert standing["position"] == positions[club]
+
+
+def test_incremental_adds_equal_rebuild():
+    rows = sorted(season_rows(seed=8), key=lambda r: r["date"])
+    incremental = StandingsIndex()
+    incremental.add_matches(rows[:60])
+    assert incremental.as_of(100, rows[59]["date"]) is not None  # builds the season once
+    for row in rows[60:]:  # in date order with every club known: each add extends the tables in place
+        incremental.add_match(row)
+    assert not incremental.season(1, 2020)._stale
+    late = dict(rows[10], tm_match_id=9999, home_team_score=9)  # a match before the last matchday
+    incremental.add_match(late)
+    incremental.add_match(dict(rows[-1], home_team_score=rows[-1]["home_team_score"] + 1))  # corrected result
+
+    rebuilt = StandingsIndex()
+    rebuilt.add_matches(rows[:-1] + [late, dict(rows[-1], home_team_score=rows[-1]["home_team_score"] + 1)])
+
+    a, b = incremental.season(1, 2020), rebuilt.season(1, 2020)
+    a._ensure(), b._ensure()
+    assert (a.days == b.days).all() and (a.clubs == b.clubs).all()
+    assert (a.tables == b.tables).all() and (a.positions == b.positions).all()
+
+
+def test_as_of_excludes_the_day_itself_and_handles_unknowns():
+    index = StandingsIndex()
+    index.add_match(Match(tm_match_id=1, home_club_id=10, away_club_id=20, season_id=2020, league_id=1,
+                          date=date(2020, 8, 10), home_coach_id=1, away_coach_id=2, home_team_score=2,
+                          away_team_score=0, home_team_points=3, away_team_points=0))
+    index.add_match({"tm_match_id": 2, "league_id": 1, "season_id": 2020, "date": "2020-08-17",
+                     "home_club_id": 20, "away_club_id": 10, "home_team_score": 1, "away_team_score": 1})
+    assert not index.add_match({"tm_match_id": 3, "league_id": 1, "season_id": 2020, "date": "2020-08-24",
+                                "home_club_id": 10, "away_club_id": 20,
+                                "home_team_score": None, "away_team_score": None})  # not played yet
+
+    first_day = index.as_of(10, "2020-08-10")
+    assert first_day["played"] == 0 and first_day["position"] is None
+    assert index.as_of(10, "2020-08-17") == {"played": 1, "won": 1, "drawn": 0, "lost": 0, "points": 3,
+                                             "goals_for": 2, "goals_against": 0, "goal_difference": 2,
+                                             "position": 1}
+    assert index.as_of(20, "2020-08-17", before=False)["points"] == 1
+    assert index.as_of(20, "2020-08-17", league_id=1, season_id=2020)["position"] == 2
+    assert index.as_of(30, "2020-08-17") is None
+    assert index.as_of(10, "2020-07-01") is None  # before every loaded season
+    assert index.season(1, 2020).table("2020-08-18")["club_id"].tolist() == [10, 20]
+
+
+def test_as_of_many_is_vectorized_as_of():
+    index = StandingsIndex()
+    index.add_matches(season_rows(seed=4))
+    season = index.season(1, 2020)
+    clubs = [100, 105, 117, 999, 100]
+    days = ["2020-08-01", "2020-10-10", "2021-01-20", "2020-10-10", "2022-01-01"]
+
+    out = season.as_of_many(clubs, days)
+
+    for i, (club, day) in enumerate(zip(clubs, days)):
+        expected = season.as_of(club, day)
+        if expected is None:
+            assert out.loc[i].isna().all()
+        else:
+            assert out.loc[i, "points"] == expected["points"]
+            if expected["position"] is None:
+                assert out.isna().loc[i, "position"]
+            else:
+                assert out.loc[i, "position"] == expected["position"]
+
+
+def test_from_client_loads_requested_seasons_with_keyset_pages(fake_supabase):
+    rows = season_rows(matches=25) + season_rows(matches=10, season_id=2021, first_id=100)
+    client = fake_supabase({"Match": rows})
+
+    index = StandingsIndex.from_client(client, [(1, 2020)], page_size=10)
+
+    assert len(index) == 25
+    assert client.reads == 3
+    assert index.season(1, 2021) is None
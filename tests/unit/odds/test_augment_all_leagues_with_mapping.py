@@ -0,0 +1,56 @@
+"""
+Unit tests for scripts/augment_all_leagues_with_mapping.py
+
+Coverage:
+  - club IDs / names joined on both sides, rows with an unmapped team dropped
+  - only AUGMENT_COLUMNS kept, mixed date formats normalized to YYYY-MM-DD
+  - categorical team columns behave like plain strings
+"""
+
+import pandas as pd
+
+from scripts.augment_all_leagues_with_mapping import AUGMENT_COLUMNS, augment_all_leagues
+
+
+def _rows():
+    return pd.DataFrame({
+        "Div": ["E0"] * 3,
+        "Date": ["03/08/2012", "14/08/10", "2012-08-20"],
+        "HomeTeam": ["Arsenal", "Chelsea", "Leeds"],
+        "AwayTeam": ["Chelsea", "Arsenal", "Arsenal"],
+        "FTHG": [1, 2, 0], "FTAG": [0, 2, None],
+        "B365H": [1.5, 2.0, 3.0],
+        "OddsH": [1.6, 2.1, 3.1], "OddsD": [3.5, 3.2, 3.3], "OddsA": [5.0, 3.4, 2.2],
+        "league_code": ["E0"] * 3,
+    })
+
+
+def _mapping():
+    return pd.DataFrame({
+        "oddscheck_team_name": ["Arsenal", "Chelsea", "Chelsea"],
+        "db_club_id": [11, 631, 999],
+        "db_club_name": ["Arsenal FC", "Chelsea FC", "Wrong"],
+        "avg_confidence": [95, 90, 40],
+    })
+
+
+def test_augments_projected_rows_with_club_ids_and_iso_dates():
+    out = augment_all_leagues(all_leagues_df=_rows(), mapping_df=_mapping(), output_file=None)
+
+    assert list(out["HomeTeam"]) == ["Arsenal", "Chelsea"]  # Leeds is unmapped
+    assert list(out["tm_home_team_id"]) == [11, 631] and list(out["tm_away_team_id"]) == [631, 11]
+    assert list(out["tm_away_team_name"]) == ["Chelsea FC", "Arsenal FC"]
+    assert list(out["Date"]) == ["2012-08-03", "2010-08-14"]
+    assert "B365H" not in out.columns and "Div" not in out.columns
+    assert set(out.columns) == set(AUGMENT_COLUMNS) | {
+        "tm_home_team_id", "tm_home_team_name", "tm_away_team_id", "tm_away_team_name"}
+
+
+def test_categorical_team_columns_give_the_same_result(tmp_path):
+    plain = augment_all_leagues(all_leagues_df=_rows(), mapping_df=_mapping(), output_file=None)
+    rows = _rows().astype({"HomeTeam": "category", "AwayTeam": "category", "league_code": "category"})
+    out_file = tmp_path / "augmented.csv"
+    categorical = augment_all_leagues(all_leagues_df=rows, mapping_df=_mapping(), output_file=str(out_file))
+
+    assert categorical["tm_home_team_id"].tolist() == plain["tm_home_team_id"].tolist()
+    assert pd.read_csv(out_file)["HomeTeam"].tolist() == ["Arsenal", "Chelsea"]
@@ -0,0 +1,118 @@
+"""
+Unit tests for services/coach_performance.py
+
+Coverage:
+  - totals and last-N sums per coach x club x season x difficulty match a pandas groupby
+  - July-June seasons
+  - rows priced from odds and from Elo ratings are aggregated apart
+  - refresh upserts the coaches' groups and deletes the aggregate rows left without a group
+"""
+
+import random
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.coach_performance import (
+    AGGREGATE_TABLE,
+    ROLLING_WINDOWS,
+    aggregate,
+    existing_coaches,
+    refresh,
+    season_of,
+)
+from services.match_team_expectation import MTE_TABLE
+
+
+@pytest.fixture
+def mte_rows():
+    rng = random.Random(3)
+    rows = []
+    for match_id in range(1, 801):
+        xpts = round(rng.uniform(0.3, 2.6), 3)
+        actual = rng.choice([0, 1, 3])
+        rows.append({
+            "match_id": match_id,
+            "match_date": (date(2019, 1, 1) + timedelta(days=rng.randint(0, 1500))).isoformat(),
+            "club_id": rng.randint(1, 4),
+            "coach_id": rng.randint(1, 6),
+            "difficulty": rng.choice(["high", "medium", "low"]),
+            "xpts": xpts, "actual_pts": actual, "delta_pts": round(actual - xpts, 3),
+        })
+    return pd.DataFrame(rows)
+
+
+def reference(rows, difficulty, n):
+    rows = rows.assign(season=season_of(rows["match_date"]).astype(int))
+    if difficulty != "all":
+        rows = rows[rows["difficulty"] == difficulty]
+    rows = rows.sort_values(["coach_id", "club_id", "season", "match_date", "match_id"])
+    grouped = rows.groupby(["coach_id", "club_id", "season"])
+    out = grouped.agg(matches=("match_id", "size"), delta_pts_total=("delta_pts", "sum"),
+                      last_match_id=("match_id", "last"))
+    out[f"delta_pts_last_{n}"] = grouped["delta_pts"].apply(lambda s: s.tail(n).sum())
+    out[f"xpts_last_{n}"] = grouped["xpts"].apply(lambda s: s.tail(n).sum())
+    return out.reset_index()
+
+
+def test_season_of_uses_july_cutoff():
+    assert season_of(["2024-06-30", "2024-07-01", "2025-01-15T20:00:00", None]).tolist()[:3] == [2023, 2024, 2024]
+    assert np.isnan(season_of([None])[0])
+
+
+@pytest.mark.parametrize("difficulty", ["all", "high", "low"])
+def test_aggregate_matches_groupby_reference(mte_rows, difficulty):
+    out = aggregate(mte_rows)
+    out = out[out["difficulty"] == difficulty].reset_index(drop=True)
+
+    for n in ROLLING_WINDOWS:
+        expected = reference(mte_rows, difficulty, n)
+        assert out[["coach_id", "club_id", "season", "matches", "last_match_id"]].values.tolist() == \
+            expected[["coach_id", "club_id", "season", "matches", "last_match_id"]].values.tolist()
+        assert np.allclose(out["delta_pts_total"], expected["delta_pts_total"], atol=1e-6)
+        assert np.allclose(out[f"delta_pts_last_{n}"], expected[f"delta_pts_last_{n}"], atol=1e-6)
+        assert np.allclose(out[f"xpts_last_{n}"], expected[f"xpts_last_{n}"], atol=1e-6)
+        assert (out[f"matches_last_{n}"] == np.minimum(out["matches"], n)).all()
+
+
+def test_aggregate_keeps_probability_sources_apart(mte_rows):
+    rows = mte_rows.assign(probability_source=np.where(mte_rows["match_id"] % 3 == 0, "elo", "odds"))
+
+    out = aggregate(rows)
+
+    for source, subset in rows.groupby("probability_source"):
+        expected = aggregate(subset.drop(columns="probability_source"))
+        got = out[out["probability_source"] == source].reset_index(drop=True)
+        assert got.drop(columns="probability_source").equals(expected.drop(columns="probability_source"))
+    assert set(out["probability_source"]) == {"elo", "odds"}
+
+
+def test_aggregate_ignores_rows_without_coach():
+    rows = pd.DataFrame([
+        {"match_id": 1, "match_date": "2024-08-10", "club_id": 1, "coach_id": None, "difficulty": "low",
+         "xpts": 2.0, "actual_pts": 3, "delta_pts": 1.0},
+    ])
+    assert aggregate(rows).empty
+
+
+def test_refresh_upserts_groups_and_deletes_stale_rows(mte_rows, fake_supabase):
+    client = fake_supabase({
+        MTE_TABLE: mte_rows.to_dict("records"),
+        AGGREGATE_TABLE: [
+            {"id": 1, "coach_id": 1, "club_id": 99, "season": 2019, "difficulty": "all",
+             "probability_source": "odds"},  # no rows left
+            {"id": 2, "coach_id": 1, "club_id": 1, "season": 2019, "difficulty": "all", "probability_source": "odds"},
+            {"id": 3, "coach_id": 5, "club_id": 99, "season": 2019, "difficulty": "all",
+             "probability_source": "odds"},  # not refreshed
+        ],
+    })
+
+    written, failed = refresh(client, {1, 2})
+
+    upserts = client.tables[AGGREGATE_TABLE].upserts
+    assert failed == 0 and written == len(upserts)
+    assert {r["coach_id"] for r in upserts} == {1, 2}
+    assert [r["id"] for r in client.tables[AGGREGATE_TABLE].deleted] == [1]
+    assert existing_coaches(client, [1, 2, 3]) == set(mte_rows.loc[mte_rows["match_id"] <= 3, "coach_id"])
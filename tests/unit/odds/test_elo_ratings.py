@@ -0,0 +1,127 @@
+"""
+Unit tests for services/elo_ratings.py
+
+Coverage:
+  - matchday batches give the same ratings as a per-match loop with start-of-day ratings
+  - processing in two runs through the persisted state equals one run
+  - update_ratings streams pages in date order and holds back a date split across pages
+  - probabilities have the odds_to_probabilities shape and feed MTE rows for matches without odds
+"""
+
+import random
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from repositories.tenure.coach_tenure_index import CoachTenureIndex
+from services.elo_ratings import EloRatings, RatingStore, update_ratings, win_draw_loss
+from services.match_team_expectation import ELO_SOURCE, expectation_frame
+
+
+@pytest.fixture
+def matches():
+    rng = random.Random(5)
+    rows = []
+    for match_id in range(1, 601):
+        home, away = rng.sample(range(1, 13), 2)
+        rows.append({
+            "tm_match_id": match_id,
+            "date": (date(2020, 8, 1) + timedelta(days=rng.randint(0, 120))).isoformat(),
+            "home_club_id": home, "away_club_id": away,
+            "home_team_score": rng.randint(0, 3), "away_team_score": rng.randint(0, 3),
+        })
+    return pd.DataFrame(rows)
+
+
+def reference_ratings(matches, k=20.0, home_advantage=60.0):
+    ratings = {}
+    for day, day_matches in matches.sort_values(["date", "tm_match_id"]).groupby("date", sort=True):
+        start = dict(ratings)
+        for m in day_matches.itertuples():
+            rh, ra = start.get(m.home_club_id, 1500.0), start.get(m.away_club_id, 1500.0)
+            expected = 1 / (1 + 10 ** ((ra - rh - home_advantage) / 400))
+            score = 1.0 if m.home_team_score > m.away_team_score else 0.5 if m.home_team_score == m.away_team_score else 0.0
+            change = k * (score - expected)
+            ratings[m.home_club_id] = ratings.get(m.home_club_id, 1500.0) + change
+            ratings[m.away_club_id] = ratings.get(m.away_club_id, 1500.0) - change
+    return ratings
+
+
+def test_matchday_batches_match_per_match_reference(matches):
+    engine = EloRatings()
+    out = engine.process(matches)
+
+    expected = reference_ratings(matches)
+    assert engine.ratings.keys() == expected.keys()
+    assert all(engine.ratings[c] == pytest.approx(expected[c]) for c in expected)
+    assert len(out) == len(matches)
+    assert (engine.last_date, engine.last_match_id) == tuple(
+        matches.sort_values(["date", "tm_match_id"]).iloc[-1][["date", "tm_match_id"]])
+
+
+def test_two_runs_through_store_equal_one_run(matches, tmp_path):
+    store = RatingStore(tmp_path)
+    cutoff = "2020-10-01"
+    first = EloRatings()
+    store.save(first, first.process(matches[matches["date"] < cutoff]))
+
+    resumed = store.load()
+    new = resumed.process(matches)  # only the matches after the watermark are rated
+    store.save(resumed, new)
+
+    single = EloRatings()
+    all_at_once = single.process(matches)
+    assert len(new) == (matches["date"] >= cutoff).sum()
+    assert resumed.ratings == pytest.approx(single.ratings)
+    stored = store.probabilities().sort_values("match_id").reset_index(drop=True)
+    assert np.allclose(stored[["p_home", "p_draw", "p_away"]].astype(float),
+                       all_at_once.sort_values("match_id")[["p_home", "p_draw", "p_away"]].astype(float))
+
+
+def test_win_draw_loss_shape_and_home_edge():
+    probs = win_draw_loss(np.array([1500.0, 1800.0]), np.array([1500.0, 1400.0]))
+
+    assert probs.shape == (2, 3)
+    assert np.allclose(probs.sum(axis=1), 1.0, atol=1e-3)
+    assert probs[0, 0] > probs[0, 2]  # home advantage
+    assert probs[1, 0] > probs[0, 0] and probs[1, 1] < probs[0, 1]
+
+
+def test_update_ratings_streams_pages_and_resumes(matches, tmp_path, fake_supabase):
+    rows = matches.to_dict("records") + [
+        {"tm_match_id": 999, "date": "2021-05-01", "home_club_id": 1, "away_club_id": 2,
+         "home_team_score": None, "away_team_score": None},  # not played yet
+    ]
+    client = fake_supabase({"Match": rows})
+    store = RatingStore(tmp_path)
+
+    new = update_ratings(client, store, page_size=7)  # pages split most dates
+
+    single = EloRatings()
+    single.process(matches)
+    assert len(new) == len(matches)
+    assert store.load().ratings == pytest.approx(single.ratings)
+
+    assert update_ratings(client, store, page_size=7).empty  # nothing new
+
+
+def test_model_probabilities_fill_matches_without_odds(tmp_path):
+    store = RatingStore(tmp_path)
+    engine = EloRatings()
+    played = pd.DataFrame({"tm_match_id": [1], "date": ["2021-01-10"], "home_club_id": [1], "away_club_id": [2],
+                           "home_team_score": [2], "away_team_score": [0]})
+    store.save(engine, engine.process(played))
+    index = CoachTenureIndex.from_rows([{"coach_id": 7, "club_id": 1, "start_date": "2020-01-01", "end_date": None}])
+    matches = played.assign(league_id="GB3", odds_home=None, odds_draw=None, odds_away=None)
+    fixture = matches.assign(tm_match_id=2, date="2021-01-17", home_team_score=None, away_team_score=None)
+    both = pd.concat([matches, fixture], ignore_index=True)
+
+    out = expectation_frame(both, index, store.aligned(both["tm_match_id"]))
+
+    assert out["match_id"].tolist() == [1]  # the unplayed fixture is skipped
+    assert out.loc[0, ["p_win", "p_draw", "p_loss"]].tolist() == win_draw_loss(
+        np.array([1500.0]), np.array([1500.0]))[0].tolist()
+    assert out.loc[0, "actual_pts"] == 3
+    assert out.loc[0, "probability_source"] == ELO_SOURCE
@@ -0,0 +1,263 @@
+"""
+Unit tests for services/match_team_expectation.py
+
+Coverage:
+  - the column-wise transform gives the same records as the per-match loop it replaced
+  - matches with missing or non-positive odds and sides without a coach are left out
+  - an empty input gives an empty frame with the table's columns
+  - affected_matches: matches updated since the watermark plus matches of clubs with tenure changes
+  - stale_keys / delete_expectations: rows that an incremental run no longer produces,
+    only of the sources the run produces
+  - watermarks persist between runs, for the same with_ratings setting
+"""
+
+import random
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+
+from repositories.tenure.coach_tenure_index import CoachTenureIndex, FIRST_MATCH
+from services.match_team_expectation import (
+    EXPECTATION_COLUMNS,
+    ELO_SOURCE,
+    MTE_TABLE,
+    ODDS_SOURCE,
+    affected_matches,
+    delete_expectations,
+    expectation_frame,
+    expectation_records,
+    latest_updated_at,
+    load_watermarks,
+    save_watermarks,
+    stale_keys,
+)
+
+
+# ── Reference: the per-match transform the MTE ETL used before ────────────────
+
+def reference_probabilities(odds_home, odds_draw, odds_away):
+    if pd.isna(odds_home) or pd.isna(odds_draw) or pd.isna(odds_away):
+        return None, None, None
+    if odds_home <= 0 or odds_draw <= 0 or odds_away <= 0:
+        return None, None, None
+    implied_home, implied_draw, implied_away = 1.0 / odds_home, 1.0 / odds_draw, 1.0 / odds_away
+    total = implied_home + implied_draw + implied_away
+    return round(implied_home / total, 4), round(implied_draw / total, 4), round(implied_away / total, 4)
+
+
+def reference_difficulty(p_win, is_home):
+    if is_home:
+        return 'high' if p_win < 0.34 else 'medium' if p_win <= 0.532 else 'low'
+    return 'high' if p_win < 0.205 else 'medium' if p_win <= 0.367 else 'low'
+
+
+def reference_points(goals_for, goals_against):
+    return 3 if goals_for > goals_against else 1 if goals_for == goals_against else 0
+
+
+def reference_expectations(matches_df, coach_index):
+    rows = []
+    for match in matches_df.to_dict('records'):
+        p_home, p_draw, p_away = reference_probabilities(match['odds_home'], match['odds_draw'], match['odds_away'])
+        if p_home is None:
+            continue
+        for is_home, own, other, p_win, p_loss in ((True, 'home', 'away', p_home, p_away),
+                                                    (False, 'away', 'home', p_away, p_home)):
+            club_id, match_date = match[f'{own}_club_id'], match['date']
+            coach_id = None if pd.isna(club_id) or pd.isna(match_date) else \
+                coach_index.lookup(int(club_id), match_date, policy=FIRST_MATCH)
+            if coach_id is None:
+                continue
+            x_pts = round(3 * p_win + 1 * p_draw, 3)
+            actual = reference_points(match[f'{own}_team_score'], match[f'{other}_team_score'])
+            rows.append({
+                'match_id': int(match['tm_match_id']),
+                'match_date': match['date'],
+                'league_id': match['league_id'],
+                'club_id': int(club_id),
+                'is_home': is_home,
+                'coach_id': coach_id,
+                'xpts': x_pts,
+                'actual_pts': actual,
+                'delta_pts': round(actual - x_pts, 3),
+                'difficulty': reference_difficulty(p_win, is_home),
+                'p_win': p_win,
+                'p_draw': p_draw,
+                'p_loss': p_loss,
+                'goals_for': int(match[f'{own}_team_score']),
+                'goals_against': int(match[f'{other}_team_score']),
+                'probability_source': 'odds',
+            })
+    return rows
+
+
+def _match(match_id, day, home, away, updated_at, odds=2.0):
+    return {"tm_match_id": match_id, "date": day, "league_id": "GB1", "home_club_id": home, "away_club_id": away,
+            "home_team_score": 1, "away_team_score": 0, "odds_home": odds, "odds_draw": 3.4, "odds_away": 3.8,
+            "updated_at": updated_at}
+
+
+# ── Fixtures ──────────────────────────────────────────────────────────────────
+
+@pytest.fixture
+def season():
+    rng = random.Random(11)
+    tenures, tenure_id = [], 0
+    for club_id in range(1, 21):
+        day = date(2015, 1, 1)
+        for _ in range(rng.randint(1, 5)):
+            start = day + timedelta(days=rng.randint(-40, 40))  # sometimes overlaps the previous one
+            end = start + timedelta(days=rng.randint(60, 700))
+            tenure_id += 1
+            tenures.append({"id": tenure_id, "coach_id": rng.randint(1, 60), "club_id": club_id,
+                            "start_date": start.isoformat(), "end_date": end.isoformat(), "role": "Manager"})
+            day = end + timedelta(days=rng.randint(0, 60))
+    rng.shuffle(tenures)
+
+    odds_choices = [1.2, 1.85, 2.1, 2.75, 3.3, 4.5, 7.0, 11.0]
+    matches = []
+    for match_id in range(1, 1501):
+        odds = [rng.choice(odds_choices) for _ in range(3)]
+        if rng.random() < 0.03:
+            odds[rng.randrange(3)] = rng.choice([None, 0.0, -1.5])
+        matches.append({
+            "tm_match_id": 10_000 + match_id,
+            "date": (date(2015, 1, 1) + timedelta(days=rng.randint(0, 2500))).isoformat(),
+            "league_id": rng.choice(["GB1", "ES1", None]),
+            "home_club_id": rng.randint(1, 23),  # 21-23 have no tenures
+            "away_club_id": rng.randint(1, 23),
+            "home_team_score": rng.randint(0, 4),
+            "away_team_score": rng.randint(0, 4),
+            "odds_home": odds[0], "odds_draw": odds[1], "odds_away": odds[2],
+        })
+    return pd.DataFrame(matches), CoachTenureIndex.from_rows(tenures)
+
+
+# ── Tests ─────────────────────────────────────────────────────────────────────
+
+def test_records_match_reference_transform(season):
+    matches, index = season
+
+    records = expectation_records(matches, index)
+
+    expected = reference_expectations(matches, index)
+    assert len(expected) > 1000
+    assert records == expected
+    assert [type(records[0][c]) for c in ('match_id', 'coach_id', 'actual_pts', 'is_home', 'xpts')] == \
+        [int, int, int, bool, float]
+
+
+def test_skips_bad_odds_and_sides_without_coach():
+    index = CoachTenureIndex.from_rows([
+        {"coach_id": 7, "club_id": 1, "start_date": "2020-01-01", "end_date": None},
+    ])
+    matches = pd.DataFrame({
+        "tm_match_id": [1, 2, 3],
+        "date": ["2021-05-01", "2021-05-02", "2019-05-01"],
+        "league_id": ["GB1"] * 3,
+        "home_club_id": [1, 1, 1],
+        "away_club_id": [2, 2, 2],
+        "home_team_score": [2, 0, 1],
+        "away_team_score": [1, 0, 1],
+        "odds_home": [2.0, None, 2.0],
+        "odds_draw": [3.4, 3.4, 3.4],
+        "odds_away": [3.8, 3.8, 3.8],
+    })
+
+    out = expectation_frame(matches, index)
+
+    # Match 2 has no home odds, match 3 predates the tenure, club 2 has no coach
+    assert out[["match_id", "club_id", "coach_id", "actual_pts", "difficulty"]].values.tolist() == \
+        [[1, 1, 7, 3, 'medium']]
+
+
+def test_empty_matches_give_empty_frame():
+    out = expectation_frame(pd.DataFrame(columns=["tm_match_id", "date", "league_id", "home_club_id",
+                                                  "away_club_id", "home_team_score", "away_team_score",
+                                                  "odds_home", "odds_draw", "odds_away"]),
+                            CoachTenureIndex())
+    assert out.empty
+    assert list(out.columns) == EXPECTATION_COLUMNS
+
+
+def test_affected_matches_combines_match_and_tenure_changes(fake_supabase):
+    client = fake_supabase({
+        "Match": [
+            _match(1, "2021-01-10", 1, 2, "2024-01-01"),
+            _match(2, "2021-02-10", 3, 4, "2024-03-01"),   # odds changed after the watermark
+            _match(3, "2021-03-10", 5, 1, "2024-01-01"),   # club 5 has a new tenure from March
+            _match(4, "2021-01-10", 5, 6, "2024-01-01"),   # ... but this one is before it
+            _match(5, "2021-04-10", 3, 5, "2024-03-01"),   # both reasons, listed once
+        ],
+        "Coach_tenure": [
+            {"id": 1, "club_id": 5, "start_date": "2021-03-01", "updated_at": "2024-03-02"},
+            {"id": 2, "club_id": 6, "start_date": "2019-01-01", "updated_at": "2023-12-01"},
+        ],
+    })
+
+    out = affected_matches(client, {"Match": "2024-02-01", "Coach_tenure": "2024-02-01"}, page_size=2)
+
+    assert sorted(out["tm_match_id"]) == [2, 3, 5]
+    assert latest_updated_at(client, "Coach_tenure") == "2024-03-02"
+
+
+def test_affected_matches_empty_when_nothing_changed(fake_supabase):
+    client = fake_supabase({"Match": [_match(1, "2021-01-10", 1, 2, "2024-01-01")], "Coach_tenure": []})
+
+    out = affected_matches(client, {"Match": "2024-01-01", "Coach_tenure": ""})
+
+    assert out.empty and "tm_match_id" in out.columns
+
+
+def test_stale_keys_and_delete(fake_supabase):
+    index = CoachTenureIndex.from_rows([
+        {"coach_id": 7, "club_id": 1, "start_date": "2020-01-01", "end_date": None},
+    ])
+    matches = pd.DataFrame([
+        _match(1, "2021-01-10", 1, 2, "2024-01-01"),             # club 2 lost its coach
+        _match(2, "2021-01-17", 1, 3, "2024-01-01", odds=None),  # odds removed
+    ])
+    records = expectation_records(matches, index)
+
+    gone, pairs = stale_keys(matches, records)
+
+    assert gone == [2]
+    assert pairs == {(1, 2)}
+    client = fake_supabase({MTE_TABLE: [{"match_id": 1, "club_id": 1}, {"match_id": 1, "club_id": 2},
+                                        {"match_id": 2, "club_id": 1}, {"match_id": 2, "club_id": 3}]})
+    assert delete_expectations(client, gone, pairs) == 2
+    assert client.tables[MTE_TABLE].rows == [{"match_id": 1, "club_id": 1}]
+
+
+def test_watermarks_round_trip(tmp_path):
+    path = tmp_path / "state.json"
+    assert load_watermarks(path) is None
+
+    save_watermarks(path, {"Match": "2024-03-01", "Coach_tenure": ""})
+
+    assert load_watermarks(path) == {"Match": "2024-03-01", "Coach_tenure": ""}
+    assert load_watermarks(path, with_ratings=True) is None  # Elo rows were not maintained
+
+    save_watermarks(path, {"Match": "2024-03-02", "Coach_tenure": ""}, with_ratings=True)
+
+    assert load_watermarks(path, with_ratings=True) == {"Match": "2024-03-02", "Coach_tenure": ""}
+    assert load_watermarks(path) is None
+
+
+def test_delete_without_ratings_keeps_elo_rows(fake_supabase):
+    index = CoachTenureIndex.from_rows([
+        {"coach_id": 7, "club_id": 1, "start_date": "2020-01-01", "end_date": None},
+    ])
+    matches = pd.DataFrame([
+        _match(1, "2021-01-10", 1, 2, "2024-01-01", odds=None),  # priced by Elo in an earlier run
+        _match(2, "2021-01-17", 1, 3, "2024-01-01", odds=None),  # odds removed
+    ])
+    gone, pairs = stale_keys(matches, expectation_records(matches, index))
+    client = fake_supabase({MTE_TABLE: [{"match_id": 1, "club_id": 1, "probability_source": ELO_SOURCE},
+                                        {"match_id": 2, "club_id": 1, "probability_source": ODDS_SOURCE}]})
+
+    delete_expectations(client, gone, pairs, sources=(ODDS_SOURCE,))
+
+    assert gone == [1, 2]
+    assert client.tables[MTE_TABLE].rows == [{"match_id": 1, "club_id": 1, "probability_source": ELO_SOURCE}]
@@ -0,0 +1,142 @@
+from unittest.mock import MagicMock
+
+import pandas as pd
+import pytest
+
+from services.odds_reconciliation import (
+    OddsUpdate, fetch_match_odds_frame, prepare_csv_frame, prepare_db_frame, reconcile, write_odds,
+)
+
+
+def csv_row(date, home, away, fthg, ftag, odds=(2.0, 3.4, 3.8)):
+    return {"Date": date, "HomeTeam": f"H{home}", "AwayTeam": f"A{away}", "tm_home_team_id": float(home),
+            "tm_away_team_id": float(away), "FTHG": float(fthg), "FTAG": float(ftag),
+            "OddsH": odds[0], "OddsD": odds[1], "OddsA": odds[2]}
+
+
+def db_row(match_id, date, home, away, hs, as_, odds=(None, None, None)):
+    return {"tm_match_id": match_id, "date": date, "home_club_id": home, "away_club_id": away,
+            "home_team_score": hs, "away_team_score": as_,
+            "odds_home": odds[0], "odds_draw": odds[1], "odds_away": odds[2]}
+
+
+@pytest.fixture
+def frames():
+    csv_df = pd.DataFrame([
+        csv_row("2024-08-10", 148, 281, 1, 0),
+        csv_row("2024-08-10", 631, 985, 2, 2),           # DB already has odds
+        csv_row("2024-08-17", 281, 631, 3, 1),           # no such Match
+        csv_row("2024-08-17", 985, 148, 0, 1, odds=(1.9, None, 4.0)),  # incomplete odds
+        csv_row("2024-08-24", float("nan"), 148, 1, 1),  # unmapped team
+    ])
+    db_df = pd.DataFrame([
+        db_row(1, "2024-08-10", 148, 281, 1, 0),
+        db_row(2, "2024-08-10", 631, 985, 2, 2, odds=(1.5, 4.0, 6.0)),
+        db_row(3, "2024-08-17", 985, 148, 0, 1),
+    ])
+    return prepare_csv_frame(csv_df), prepare_db_frame(db_df)
+
+
+def test_reconcile_joins_on_typed_composite_key(frames):
+    csv_df, db_df = frames
+    assert len(csv_df) == 4 and csv_df["home_club_id"].dtype == "Int64"  # the unmapped team's row is kept
+
+    result = reconcile(csv_df, db_df)
+
+    assert result.updates().to_dict("records") == [
+        {"tm_match_id": 1, "odds_home": 2.0, "odds_draw": 3.4, "odds_away": 3.8}
+    ]
+    assert list(result.already_complete["home_club_id"]) == [631]
+    assert result.unmatched[["away_club_id", "reason"]].to_dict("records") == [
+        {"away_club_id": 631, "reason": "No matching record in database"},
+        {"away_club_id": 148, "reason": "Home team not in database"},
+    ]
+
+
+def test_write_odds_sends_one_rpc_per_chunk():
+    client = MagicMock()
+    client.rpc.return_value.execute.return_value = MagicMock(data=2)
+    updates = pd.DataFrame({"tm_match_id": [1, 2, 3, 4], "odds_home": [2.0] * 4,
+                            "odds_draw": [3.0] * 4, "odds_away": [4.0] * 4})
+
+    assert write_odds(client, updates, chunk_size=2) == 4
+    assert client.rpc.call_count == 2
+    name, params = client.rpc.call_args_list[0].args
+    assert name == "bulk_update_match_odds"
+    assert params["p_match_ids"] == [1, 2] and params["p_odds_away"] == [4.0, 4.0]
+
+
+def test_write_odds_retries_then_raises(monkeypatch):
+    monkeypatch.setattr("services.odds_reconciliation.time.sleep", lambda s: None)
+    client = MagicMock()
+    client.rpc.return_value.execute.side_effect = [Exception("timeout"), MagicMock(data=1)]
+    updates = pd.DataFrame({"tm_match_id": [1], "odds_home": [2.0], "odds_draw": [3.0], "odds_away": [4.0]})
+    assert write_odds(client, updates) == 1
+
+    client.rpc.return_value.execute.side_effect = Exception("down")
+    with pytest.raises(Exception, match="down"):
+        write_odds(client, updates)
+
+
+def test_odds_update_applies_written_odds_to_matches(frames):
+    csv_df, db_df = frames
+    update = OddsUpdate(csv_rows=csv_df, matches=db_df, reconciliation=reconcile(csv_df, db_df))
+
+    with_odds = update.matches_with_odds().set_index("tm_match_id")
+    assert sorted(with_odds.index) == [1, 2]
+    assert with_odds.loc[1, "odds_home"] == 2.0 and with_odds.loc[2, "odds_home"] == 1.5
+
+
+def test_fetch_restricts_the_scan_to_a_date_range():
+    client = MagicMock()
+    query = client.table.return_value.select.return_value
+    for method in ("gte", "lte", "gt", "order", "limit"):
+        getattr(query, method).return_value = query
+    query.execute.return_value = MagicMock(data=[db_row(1, "2024-08-10", 148, 281, 1, 0)])
+
+    df = fetch_match_odds_frame(client, start_date="2024-08-10", end_date="2024-08-17")
+
+    assert list(df["tm_match_id"]) == [1]
+    query.gte.assert_called_once_with("date", "2024-08-10")
+    query.lte.assert_called_once_with("date", "2024-08-17")
+
+
+def test_empty_delta_reconciles_to_nothing():
+    csv_df, db_df = prepare_csv_frame(pd.DataFrame()), prepare_db_frame(pd.DataFrame())
+    update = OddsUpdate(csv_rows=csv_df, matches=db_df, reconciliation=reconcile(csv_df, db_df))
+    assert update.reconciliation.updates().empty and update.matches_with_odds().empty
+
+
+def test_tolerant_pass_matches_fixtures_dated_a_day_apart():
+    csv_df = prepare_csv_frame(pd.DataFrame([
+        csv_row("2024-08-10", 148, 281, 1, 0),   # exact
+        csv_row("2024-08-11", 148, 281, 1, 0),   # duplicate a day later: its Match is taken
+        csv_row("2024-08-18", 631, 985, 2, 2),   # DB dates it the 17th
+        csv_row("2024-08-19", 631, 985, 2, 2),   # further from the same Match: stays unmatched
+        csv_row("2024-08-30", 985, 148, 0, 1),   # 13 days off
+        csv_row("2024-08-24", 148, 631, 1, 1),   # DB says 2-1
+    ]))
+    db_df = prepare_db_frame(pd.DataFrame([
+        db_row(1, "2024-08-10", 148, 281, 1, 0),
+        db_row(2, "2024-08-17", 631, 985, 2, 2),
+        db_row(3, "2024-08-17", 985, 148, 0, 1),
+        db_row(4, "2024-08-23", 148, 631, 2, 1),
+    ]))
+
+    result = reconcile(csv_df, db_df, date_tolerance_days=1)
+
+    assert sorted(result.matched["tm_match_id"]) == [1, 2]
+    shifted = result.shifted()
+    assert list(shifted["tm_match_id"]) == [2] and list(shifted["date_offset_days"]) == [-1]
+    assert len(result.unmatched) == 4
+    assert "tm_match_id" not in result.unmatched.columns
+
+    exact_only = reconcile(csv_df, db_df, date_tolerance_days=0)
+    assert list(exact_only.matched["tm_match_id"]) == [1] and len(exact_only.unmatched) == 5
+
+
+def test_tolerant_pass_respects_complete_odds():
+    csv_df = prepare_csv_frame(pd.DataFrame([csv_row("2024-08-11", 148, 281, 1, 0)]))
+    db_df = prepare_db_frame(pd.DataFrame([db_row(1, "2024-08-10", 148, 281, 1, 0, odds=(1.5, 4.0, 6.0))]))
+    result = reconcile(csv_df, db_df)
+    assert result.matched.empty and list(result.already_complete["tm_match_id"]) == [1]
@@ -0,0 +1,130 @@
+"""
+Unit tests for utils/odds_store.py
+
+Coverage:
+  - write replaces only the partitions present in the new frames
+  - read: column projection, partition filters, schemas that differ per partition
+  - export_csv / import_csv round trip and the legacy-CSV fallback reader
+  - ingested_at stamps: rewrites only restamp new/modified rows, delta reads
+  - categorical reads and vectorized multi-format date parsing
+"""
+
+import pandas as pd
+import pytest
+
+from utils.odds_store import OddsStore, load_football_data, parse_match_dates
+
+
+def _frame(season, league, teams, **extra):
+    rows = [{"Date": "01/08/2025", "HomeTeam": home, "AwayTeam": away, "FTHG": 1, "FTAG": 0,
+             "league_code": league, "season_code": season, **extra} for home, away in teams]
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = OddsStore(tmp_path / "store")
+    store.write([
+        _frame("2425", "E0", [("Arsenal", "Chelsea")]),
+        _frame("2526", "E0", [("Arsenal", "Fulham"), ("Spurs", "Villa")], B365H=1.8),
+        _frame("2526", "SP1", [("Betis", "Sevilla")], B365H=2.1, PSH=2.2),
+    ])
+    return store
+
+
+def test_partitions_written_per_season_and_league(store):
+    assert store.partitions() == [("2425", "E0"), ("2526", "E0"), ("2526", "SP1")]
+    assert len(store.read()) == 4
+
+
+def test_write_replaces_only_changed_partitions(store):
+    untouched = store.root / "season_code=2425" / "league_code=E0" / "part-0.parquet"
+    before = untouched.stat().st_mtime_ns
+
+    assert store.write([_frame("2526", "E0", [("Arsenal", "Fulham")], B365H=1.5)]) == [("2526", "E0")]
+
+    assert untouched.stat().st_mtime_ns == before
+    e0 = store.read(filters={"season_code": "2526", "league_code": "E0"})
+    assert list(e0["HomeTeam"]) == ["Arsenal"] and e0["B365H"].iloc[0] == 1.5
+    assert not list(store.root.rglob(".*"))  # no scratch directories left behind
+
+
+def test_read_projects_columns_and_unifies_schemas(store):
+    df = store.read(columns=["HomeTeam", "PSH", "season_code", "NotAColumn"])
+    assert list(df.columns) == ["HomeTeam", "PSH", "season_code"]
+    assert df["PSH"].notna().sum() == 1  # only SP1 has the column
+
+    spain = store.read(filters={"league_code": ["SP1"]})
+    assert list(spain["HomeTeam"]) == ["Betis"]
+
+
+def test_duplicate_rows_keep_the_last(tmp_path):
+    store = OddsStore(tmp_path / "store")
+    dup = pd.concat([_frame("2526", "E0", [("Arsenal", "Fulham")], B365H=1.5),
+                     _frame("2526", "E0", [("Arsenal", "Fulham")], B365H=1.9)])
+    store.write([dup])
+    assert list(store.read()["B365H"]) == [1.9]
+
+
+def test_export_and_import_round_trip(store, tmp_path):
+    csv_path = tmp_path / "all_leagues_full.csv"
+    exported = store.export_csv(csv_path)
+    assert len(pd.read_csv(csv_path)) == len(exported) == 4
+
+    fresh = OddsStore(tmp_path / "fresh")
+    fresh.import_csv(csv_path)
+    assert fresh.partitions() == store.partitions()
+
+
+def test_load_falls_back_to_legacy_csv(tmp_path):
+    csv_path = tmp_path / "all_leagues_full.csv"
+    _frame("0001", "E0", [("Arsenal", "Chelsea")]).to_csv(csv_path, index=False)
+
+    df = load_football_data(columns=["HomeTeam", "season_code"], filters={"season_code": "0001"},
+                            store=OddsStore(tmp_path / "missing"), csv_path=csv_path)
+    assert list(df.columns) == ["HomeTeam", "season_code"]
+    assert list(df["season_code"]) == ["0001"]
+
+
+def test_rewrite_stamps_only_new_and_modified_rows(store):
+    first = store.latest_ingested()
+    assert first is not None
+    assert "ingested_at" not in store.read().columns
+
+    store.write([_frame("2526", "E0", [("Arsenal", "Fulham"), ("Spurs", "Villa"), ("Leeds", "Everton")],
+                        B365H=1.8).assign(B365H=[1.8, 2.5, 3.0])])
+
+    delta = store.read(columns=["HomeTeam", "B365H"], ingested_after=first)
+    assert sorted(delta["HomeTeam"]) == ["Leeds", "Spurs"]
+    assert store.latest_ingested() > first
+    assert store.read(ingested_after=store.latest_ingested()).empty
+
+
+def test_rows_written_before_stamping_are_not_part_of_a_delta(tmp_path):
+    import pyarrow.parquet as pq
+
+    store = OddsStore(tmp_path / "store")
+    store.write([_frame("2526", "E0", [("Arsenal", "Chelsea")])])
+    part = store.root / "season_code=2526" / "league_code=E0" / "part-0.parquet"
+    pq.write_table(pq.read_table(part).drop(["ingested_at"]), part)  # as written by older versions
+
+    store.write([_frame("2526", "E0", [("Arsenal", "Chelsea"), ("Leeds", "Everton")])])
+    assert list(store.read(ingested_after="")["HomeTeam"]) == ["Leeds"]
+    assert len(store.read()) == 2
+
+
+def test_read_returns_requested_columns_as_categoricals(store):
+    df = store.read(columns=["HomeTeam", "league_code", "FTHG"], categories=["HomeTeam", "league_code"])
+    assert isinstance(df["HomeTeam"].dtype, pd.CategoricalDtype)
+    assert isinstance(df["league_code"].dtype, pd.CategoricalDtype)
+    assert df["FTHG"].dtype == "int64"
+
+
+def test_parse_match_dates_tries_each_format_in_order():
+    dates = pd.Series(["03/08/2012", "14/08/10", "2012-08-03", "03-08-2012", "08/14/2010", "bad", None],
+                      index=range(10, 17))
+    parsed = parse_match_dates(dates)
+    assert list(parsed.index) == list(dates.index)
+    assert parsed.dt.strftime("%Y-%m-%d").tolist()[:5] == [
+        "2012-08-03", "2010-08-14", "2012-08-03", "2012-08-03", "2010-08-14"]
+    assert parsed.iloc[5:].isna().all()
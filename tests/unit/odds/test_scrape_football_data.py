@@ -6,10 +6,10 @@ Coverage:
   - _parse_last_modified: valid header, None input, malformed input
   - _load_meta / _save_meta: round-trip, missing file, corrupt file
   - discover_csv_links: filters by known FD codes, season, returns correct shape
-  - download_csv: freshness skip, force override, HTTP error, missing cols,
-                  empty body, all-null columns stripped, happy path
-  - merge_and_write: no existing file, dedup (new wins), corrupt existing file,
-                     no frames (no-op)
+  - download_csv: conditional GET (304 skip, ETag), freshness skip, force override,
+                  HTTP error, missing cols, empty body, all-null columns stripped, happy path
+  - run: parallel downloads keep link order, share the Last-Modified cache and
+         land in the Parquet store plus the compatibility CSV
 """
 
 import io
@@ -236,25 +236,45 @@ class TestDownloadCsv:
         assert "season_code" in df.columns
         assert (df["season_code"] == "2526").all()
 
-    def test_freshness_skip_when_cached_lm_is_newer(self):
+    def test_not_modified_skips_with_single_conditional_get(self):
+        from scripts.scrape_football_data import download_csv
+        cached_lm = "Tue, 01 Jul 2025 00:00:00 GMT"
+        sess = self._make_session(get_status=304, get_content=b"")
+        meta = {"2526/E0": cached_lm, "2526/E0:etag": '"abc"'}
+        result = download_csv("http://example.com/E0.csv", "E0", "2526", force=False, meta=meta, session=sess)
+        assert result is None
+        sess.head.assert_not_called()
+        sess.get.assert_called_once()
+        sent = sess.get.call_args.kwargs["headers"]
+        assert sent == {"If-Modified-Since": cached_lm, "If-None-Match": '"abc"'}
+
+    def test_freshness_skip_when_server_ignores_conditional_headers(self):
         from scripts.scrape_football_data import download_csv
         server_lm = "Mon, 01 Jan 2025 00:00:00 GMT"
         cached_lm = "Tue, 01 Jul 2025 00:00:00 GMT"  # newer than server
-        sess = self._make_session(head_headers={"Last-Modified": server_lm})
+        sess = self._make_session(get_headers={"Last-Modified": server_lm})
         meta = {"2526/E0": cached_lm}
         result = download_csv("http://example.com/E0.csv", "E0", "2526", force=False, meta=meta, session=sess)
         assert result is None
-        sess.get.assert_not_called()
+        assert meta["2526/E0"] == cached_lm
+
+    def test_first_download_sends_no_conditional_headers(self):
+        from scripts.scrape_football_data import download_csv
+        sess = self._make_session()
+        df = download_csv("http://example.com/E0.csv", "E0", "2526", force=False, meta={}, session=sess)
+        assert df is not None
+        assert sess.get.call_args.kwargs["headers"] == {}
 
     def test_force_skips_freshness_check(self):
         from scripts.scrape_football_data import download_csv
         server_lm = "Mon, 01 Jan 2025 00:00:00 GMT"
         cached_lm = "Tue, 01 Jul 2025 00:00:00 GMT"
-        sess = self._make_session(head_headers={"Last-Modified": server_lm})
+        sess = self._make_session(get_headers={"Last-Modified": server_lm})
         meta = {"2526/E0": cached_lm}
         result = download_csv("http://example.com/E0.csv", "E0", "2526", force=True, meta=meta, session=sess)
         assert result is not None  # downloaded despite cached being newer
         sess.get.assert_called_once()
+        assert sess.get.call_args.kwargs["headers"] == {}
 
     def test_http_error_returns_none(self):
         from scripts.scrape_football_data import download_csv
@@ -306,6 +326,13 @@ class TestDownloadCsv:
         download_csv("http://example.com/E0.csv", "E0", "2526", force=True, meta=meta, session=sess)
         assert meta.get("2526/E0") == lm
 
+    def test_etag_stored_in_meta(self):
+        from scripts.scrape_football_data import download_csv
+        sess = self._make_session(get_headers={"ETag": '"v2"'})
+        meta = {}
+        download_csv("http://example.com/E0.csv", "E0", "2526", force=True, meta=meta, session=sess)
+        assert meta.get("2526/E0:etag") == '"v2"'
+
     def test_latin1_fallback_encoding(self):
         """CSV with latin-1 characters should parse without error."""
         from scripts.scrape_football_data import download_csv
@@ -317,70 +344,32 @@ class TestDownloadCsv:
 
 
 # ---------------------------------------------------------------------------
-# merge_and_write
+# run
 # ---------------------------------------------------------------------------
 
-class TestMergeAndWrite:
-    def _make_frame(self, rows: list[dict]) -> pd.DataFrame:
-        return pd.DataFrame(rows)
-
-    def test_writes_new_file_when_none_exists(self, tmp_path):
-        from scripts.scrape_football_data import merge_and_write
-        out = tmp_path / "out.csv"
-        frames = [self._make_frame([
-            {"Date": "01/08/2025", "HomeTeam": "Arsenal", "AwayTeam": "Chelsea", "league_code": "E0"}
-        ])]
-        merged = merge_and_write(frames, out)
-        assert out.exists()
-        assert len(merged) == 1
-
-    def test_new_row_overwrites_existing_duplicate(self, tmp_path):
-        from scripts.scrape_football_data import merge_and_write
-        out = tmp_path / "out.csv"
-        # Write old version with OddsH=1.5
-        old = self._make_frame([
-            {"Date": "01/08/2025", "HomeTeam": "Arsenal", "AwayTeam": "Chelsea",
-             "league_code": "E0", "OddsH": 1.5}
-        ])
-        old.to_csv(out, index=False)
-
-        # New download with updated OddsH=2.0
-        new_frames = [self._make_frame([
-            {"Date": "01/08/2025", "HomeTeam": "Arsenal", "AwayTeam": "Chelsea",
-             "league_code": "E0", "OddsH": 2.0}
-        ])]
-        merged = merge_and_write(new_frames, out)
-        assert len(merged) == 1
-        assert merged["OddsH"].iloc[0] == 2.0
-
-    def test_distinct_rows_are_both_kept(self, tmp_path):
-        from scripts.scrape_football_data import merge_and_write
-        out = tmp_path / "out.csv"
-        old = self._make_frame([
-            {"Date": "01/08/2025", "HomeTeam": "Arsenal", "AwayTeam": "Chelsea", "league_code": "E0"}
-        ])
-        old.to_csv(out, index=False)
-
-        new_frames = [self._make_frame([
-            {"Date": "05/08/2025", "HomeTeam": "Brentford", "AwayTeam": "Villa", "league_code": "E0"}
-        ])]
-        merged = merge_and_write(new_frames, out)
-        assert len(merged) == 2
-
-    def test_corrupt_existing_file_is_replaced(self, tmp_path):
-        from scripts.scrape_football_data import merge_and_write
-        out = tmp_path / "out.csv"
-        out.write_text("this is not a valid csv \x00\xff")
-        frames = [self._make_frame([
-            {"Date": "01/08/2025", "HomeTeam": "Arsenal", "AwayTeam": "Chelsea", "league_code": "E0"}
-        ])]
-        # Should not raise; should replace corrupt file
-        merged = merge_and_write(frames, out)
-        assert len(merged) == 1
-
-    def test_empty_frames_list_does_not_write(self, tmp_path):
-        from scripts.scrape_football_data import merge_and_write
-        out = tmp_path / "out.csv"
-        merged = merge_and_write([], out)
-        # Returns empty DataFrame; output file may or may not exist
-        assert merged.empty
+class TestRun:
+    def test_parallel_downloads_keep_order_and_update_cache(self, tmp_path):
+        import scripts.scrape_football_data as sfd
+        from utils.odds_store import OddsStore
+        links = [{"season": "2526", "fd_code": f"E{i}", "url": f"http://example.com/E{i}.csv"} for i in range(6)]
+
+        def fake_download(url, fd_code, season, force, meta, session):
+            if fd_code == "E2":
+                return None  # unchanged
+            meta[f"{season}/{fd_code}"] = f"lm-{fd_code}"
+            return pd.DataFrame([{"Date": "01/08/2025", "HomeTeam": fd_code, "AwayTeam": "X",
+                                  "league_code": fd_code, "season_code": season}])
+
+        meta_file = tmp_path / "meta.json"
+        with patch.object(sfd, "discover_csv_links", return_value=links), \
+                patch.object(sfd, "download_csv", side_effect=fake_download), \
+                patch.object(sfd, "META_FILE", meta_file), \
+                patch.object(sfd, "RAW_DIR", tmp_path), \
+                patch.object(sfd, "CRAWL_DELAY", 0):
+            merged = sfd.run(season="2526", output_file=tmp_path / "out.csv", session=MagicMock(headers={}),
+                             workers=4, store=OddsStore(tmp_path / "store"))
+
+        assert list(merged["HomeTeam"]) == ["E0", "E1", "E3", "E4", "E5"]
+        assert (tmp_path / "out.csv").exists()
+        saved = json.loads(meta_file.read_text())
+        assert saved == {f"2526/E{i}": f"lm-E{i}" for i in range(6) if i != 2}
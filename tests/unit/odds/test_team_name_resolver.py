@@ -0,0 +1,113 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from services.team_name_resolver import MAPPING_COLUMNS, TeamNameResolver
+
+LEAGUES = [
+    {"tm_league_id": 1, "country": "England", "tm_code": "GB1"},
+    {"tm_league_id": 2, "country": "England", "tm_code": "GB2"},
+]
+CLUBS = {148: "Tottenham Hotspur", 281: "Manchester City", 631: "Chelsea FC", 985: "Manchester United",
+         1003: "Leicester City", 1039: "Queens Park Rangers", 2000: "Tottenham Hotspur"}
+
+
+def db_match(match_id, day, league_id, home, away, home_score, away_score):
+    return {"tm_match_id": match_id, "date": f"2024-08-{day:02d}", "league_id": league_id,
+            "home_club_id": home, "away_club_id": away, "home_team_score": home_score, "away_team_score": away_score}
+
+
+def odds_row(day, home, away, fthg, ftag, league_code="E0"):
+    return {"match_date": date(2024, 8, day), "HomeTeam": home, "AwayTeam": away,
+            "FTHG": float(fthg), "FTAG": float(ftag), "league_code": league_code}
+
+
+@pytest.fixture
+def resolver():
+    matches = pd.DataFrame([
+        db_match(1, 10, 1, 148, 281, 1, 0),
+        db_match(2, 10, 1, 631, 985, 2, 2),
+        db_match(3, 17, 1, 281, 631, 3, 1),
+        db_match(4, 17, 1, 985, 148, 0, 1),
+        db_match(5, 24, 1, 148, 631, 2, 0),
+        db_match(6, 24, 1, 985, 281, 1, 2),
+        # Same score-lines and a same-named club in the second tier, on the same dates
+        db_match(7, 10, 2, 2000, 1003, 1, 0),
+        db_match(8, 17, 2, 1003, 2000, 0, 1),
+        db_match(9, 24, 2, 2000, 1003, 2, 0),
+    ])
+    return TeamNameResolver(matches, CLUBS, LEAGUES, workers=1)
+
+
+@pytest.fixture
+def odds():
+    return pd.DataFrame([
+        odds_row(10, "Tottenham", "Man City", 1, 0),
+        odds_row(10, "Chelsea", "Man United", 2, 2),
+        odds_row(17, "Man City", "Chelsea", 3, 1),
+        odds_row(17, "Man United", "Tottenham", 0, 1),
+        odds_row(24, "Tottenham", "Chelsea", 2, 0),
+        odds_row(24, "Man United", "Man City", 1, 2),
+    ])
+
+
+def test_score_evidence_separates_similar_names(resolver, odds):
+    result = resolver.resolve(odds, min_confidence=70)
+
+    assert list(result.columns) == MAPPING_COLUMNS
+    mapping = dict(zip(result["oddscheck_team_name"], result["db_club_id"]))
+    assert mapping == {"Chelsea": 631, "Man City": 281, "Man United": 985, "Tottenham": 148}
+    row = result.set_index("oddscheck_team_name").loc["Man City"]
+    assert row["match_count"] == 3 and row["db_club_name"] == "Manchester City"
+
+
+def test_categorical_rows_resolve_like_plain_ones(resolver, odds):
+    categorical = odds.astype({"HomeTeam": "category", "AwayTeam": "category", "league_code": "category"})
+    assert resolver.resolve(categorical, min_confidence=70).equals(resolver.resolve(odds, min_confidence=70))
+
+
+def test_candidates_are_blocked_by_tier(resolver, odds):
+    # Tier 1 "Tottenham" must never resolve to the tier-2 club of the same name
+    result = resolver.resolve(odds, min_confidence=0)
+    assert 2000 not in set(result["db_club_id"])
+
+    tier2 = pd.DataFrame([
+        odds_row(10, "Tottenham", "Leicester", 1, 0, league_code="E1"),
+        odds_row(17, "Leicester", "Tottenham", 0, 1, league_code="E1"),
+        odds_row(24, "Tottenham", "Leicester", 2, 0, league_code="E1"),
+    ])
+    result = resolver.resolve(tier2, min_confidence=0)
+    assert dict(zip(result["oddscheck_team_name"], result["db_club_id"])) == {"Leicester": 1003, "Tottenham": 2000}
+
+
+def test_unknown_leagues_and_low_confidence_are_dropped(resolver):
+    odds = pd.DataFrame([
+        odds_row(10, "Tottenham", "Man City", 1, 0, league_code="XX"),
+        odds_row(24, "Spurs", "Citizens", 5, 5),
+    ])
+    assert resolver.resolve(odds, min_confidence=70).empty
+
+
+def test_poor_name_match_is_carried_by_score_line_and_opponent():
+    # fuzz.ratio("qpr", "queens park rangers") is 27: per-team scoring (50 + 50 * 0.27) never reaches 70
+    fixtures = [(148, 1, 0), (281, 2, 1), (631, 0, 0), (985, 3, 1), (148, 2, 2), (631, 0, 2)]
+    names = {148: "Tottenham", 281: "Man City", 631: "Chelsea", 985: "Man United"}
+    matches, odds = [], []
+    for day, (opponent, home_score, away_score) in enumerate(fixtures, start=1):
+        home, away = (1039, opponent) if day % 2 else (opponent, 1039)
+        matches.append(db_match(day, day, 1, home, away, home_score, away_score))
+        odds.append(odds_row(day, "QPR" if home == 1039 else names[home],
+                             "QPR" if away == 1039 else names[away], home_score, away_score))
+    resolver = TeamNameResolver(pd.DataFrame(matches), CLUBS, LEAGUES, workers=1)
+
+    result = resolver.resolve(pd.DataFrame(odds), min_confidence=70).set_index("oddscheck_team_name")
+
+    assert result.loc["QPR", "db_club_id"] == 1039
+    assert result.loc["QPR", "match_count"] == 6
+    assert result.loc["QPR", "avg_fuzzy_score"] < 30 <= 70 <= result.loc["QPR", "avg_confidence"]
+
+
+def test_single_match_candidate_is_rejected(resolver, odds):
+    assert resolver.resolve(odds.iloc[:1], min_confidence=70).empty
+    assert resolver.resolve(odds.iloc[:1], min_confidence=70, min_matches=1)["db_club_id"].tolist() == [281, 148]
@@ -5,10 +5,10 @@ Coverage:
   - _check_file: missing file, empty file, valid file
   - _print_summary: smoke test (doesn't raise)
   - step1_scrape: success, scrape returns empty + no existing file, exception
-  - step2_match_oddscheck: success, empty result, exception, missing prerequisite
-  - step3_augment: success, subprocess failure, missing prerequisite
-  - step4_update_odds: success, subprocess failure, missing prerequisite
-  - step5_populate_mte: success, subprocess failure, exception
+  - step2_match_oddscheck: success, empty result, exception, missing prerequisite, in-memory input
+  - step3_augment: success, failure, missing prerequisite, in-memory handoff without checkpoint
+  - step4_update_odds: success, failure, missing prerequisite
+  - step4_report / step5_populate_mte: in-memory handoff, failure, exception
   - run_pipeline:
       - all steps skipped → True
       - dry_run forces step 4+5 skip
@@ -20,6 +20,12 @@ Coverage:
       - full success → True, correct result keys
       - skip_scrape does not call step1
       - skip_matching does not call step2
+      - outputs are handed to the next step in memory
+      - report and step 5 run concurrently
+  - auto-skip: unchanged inputs skip steps 2-5, a changed input re-runs the
+    steps that depend on it, --no-auto-skip and failed steps
+  - delta: steps get the rows stamped since the last run, the watermark only
+    moves after a successful run, --full-history, unreconciled rows are retried
 """
 
 import time
@@ -27,8 +33,9 @@ import sys
 import types
 from pathlib import Path
 from unittest.mock import MagicMock, patch, call
-import subprocess
+import threading
 
+import pandas as pd
 import pytest
 
 
@@ -36,12 +43,25 @@ import pytest
 # Helpers
 # ---------------------------------------------------------------------------
 
-def _make_completed_process(returncode: int = 0, stdout: str = "", stderr: str = "") -> MagicMock:
-    proc = MagicMock(spec=subprocess.CompletedProcess)
-    proc.returncode = returncode
-    proc.stdout = stdout
-    proc.stderr = stderr
-    return proc
+def _fake_module(name: str, **attrs) -> types.ModuleType:
+    """
+    Stand-in for a step's script module, so the lazy import inside the step
+    never loads the real file (which needs Supabase credentials).
+    """
+    module = types.ModuleType(name)
+    for attr, value in attrs.items():
+        setattr(module, attr, value)
+    return module
+
+
+@pytest.fixture(autouse=True)
+def _isolated_manifest(tmp_path):
+    """Keep the step manifest and odds store out of data/ and the DB watermarks offline."""
+    with patch("scripts.update_odds_pipeline.MANIFEST_FILE", tmp_path / "manifest.json"), \
+         patch("scripts.update_odds_pipeline.ODDS_STORE_DIR", tmp_path / "store"), \
+         patch("scripts.update_odds_pipeline.UNMATCHED_FILE", tmp_path / "unmatched.csv"), \
+         patch("scripts.update_odds_pipeline._db_watermark", return_value="2026-01-01T00:00:00+00:00"):
+        yield
 
 
 # ---------------------------------------------------------------------------
@@ -112,7 +132,7 @@ class TestStep1Scrape:
              patch("scripts.update_odds_pipeline.ALL_LEAGUES_FULL", all_csv):
             result = step1_scrape(season="2526", force=False)
 
-        assert result is True
+        assert result is fake_df
 
     def test_scrape_returns_empty_and_no_existing_file_is_false(self, tmp_path, capsys):
         from scripts.update_odds_pipeline import step1_scrape
@@ -158,12 +178,27 @@ class TestStep2MatchOddscheck:
         # lazy `from scripts.match_oddscheck_to_db import ...` never loads the
         # real file (which requires thefuzz / supabase).
         fake_mod = types.ModuleType("scripts.match_oddscheck_to_db")
-        fake_mod.match_clubs_to_database = MagicMock(return_value=fake_mapping)
+        fake_mod.resolve_clubs_to_database = MagicMock(return_value=fake_mapping)
         with patch.dict(sys.modules, {"scripts.match_oddscheck_to_db": fake_mod}), \
              patch("scripts.update_odds_pipeline.ALL_LEAGUES_FULL", all_leagues):
             result = step2_match_oddscheck()
 
-        assert result is True
+        assert result is fake_mapping
+
+    def test_uses_in_memory_rows_without_prerequisite_file(self, tmp_path):
+        from scripts.update_odds_pipeline import step2_match_oddscheck
+
+        football_data = pd.DataFrame({"HomeTeam": ["Arsenal"]})
+        fake_mapping = pd.DataFrame({"club_name": ["Arsenal"], "db_club_id": [1]})
+        resolve = MagicMock(return_value=fake_mapping)
+        with patch.dict(sys.modules, {"scripts.match_oddscheck_to_db":
+                                      _fake_module("scripts.match_oddscheck_to_db", resolve_clubs_to_database=resolve)}), \
+             patch("scripts.update_odds_pipeline.ALL_LEAGUES_FULL", tmp_path / "missing.csv"):
+            result = step2_match_oddscheck(football_data=football_data, min_confidence=80)
+
+        assert result is fake_mapping
+        assert resolve.call_args.kwargs["df"] is football_data
+        assert resolve.call_args.kwargs["min_confidence"] == 80
 
     def test_empty_result_returns_false(self, tmp_path, capsys):
         from scripts.update_odds_pipeline import step2_match_oddscheck
@@ -173,7 +208,7 @@ class TestStep2MatchOddscheck:
         all_leagues.write_text("col\nval\n")
 
         fake_mod = types.ModuleType("scripts.match_oddscheck_to_db")
-        fake_mod.match_clubs_to_database = MagicMock(return_value=pd.DataFrame())
+        fake_mod.resolve_clubs_to_database = MagicMock(return_value=pd.DataFrame())
         with patch.dict(sys.modules, {"scripts.match_oddscheck_to_db": fake_mod}), \
              patch("scripts.update_odds_pipeline.ALL_LEAGUES_FULL", all_leagues):
             result = step2_match_oddscheck()
@@ -187,7 +222,7 @@ class TestStep2MatchOddscheck:
         all_leagues.write_text("col\nval\n")
 
         fake_mod = types.ModuleType("scripts.match_oddscheck_to_db")
-        fake_mod.match_clubs_to_database = MagicMock(side_effect=Exception("db down"))
+        fake_mod.resolve_clubs_to_database = MagicMock(side_effect=Exception("db down"))
         with patch.dict(sys.modules, {"scripts.match_oddscheck_to_db": fake_mod}), \
              patch("scripts.update_odds_pipeline.ALL_LEAGUES_FULL", all_leagues):
             result = step2_match_oddscheck()
@@ -216,7 +251,7 @@ class TestStep3Augment:
             result = step3_augment()
         assert result is False
 
-    def test_subprocess_failure_returns_false(self, tmp_path, capsys):
+    def test_augment_failure_returns_false(self, tmp_path, capsys):
         from scripts.update_odds_pipeline import step3_augment
         all_f = tmp_path / "all.csv"
         mapping_f = tmp_path / "mapping.csv"
@@ -225,31 +260,50 @@ class TestStep3Augment:
 
         with patch("scripts.update_odds_pipeline.ALL_LEAGUES_FULL", all_f), \
              patch("scripts.update_odds_pipeline.MAPPING_FILE", mapping_f), \
-             patch("subprocess.run", return_value=_make_completed_process(returncode=1, stderr="fail")):
+             patch("scripts.augment_all_leagues_with_mapping.augment_all_leagues",
+                   side_effect=KeyError("HomeTeam")):
             result = step3_augment()
 
         assert result is False
+        assert "ERROR" in capsys.readouterr().out
 
-    def test_subprocess_success_returns_true(self, tmp_path):
+    def test_success_writes_checkpoint_and_returns_frame(self, tmp_path):
         from scripts.update_odds_pipeline import step3_augment
         all_f = tmp_path / "all.csv"
         mapping_f = tmp_path / "mapping.csv"
         aug_f = tmp_path / "augmented.csv"
         all_f.write_text("col\nval\n")
         mapping_f.write_text("col\nval\n")
-        aug_f.write_text("col\nval\n")
+        augmented = pd.DataFrame({"HomeTeam": ["A"]})
 
         with patch("scripts.update_odds_pipeline.ALL_LEAGUES_FULL", all_f), \
              patch("scripts.update_odds_pipeline.MAPPING_FILE", mapping_f), \
              patch("scripts.update_odds_pipeline.AUGMENTED_FILE", aug_f), \
-             patch("subprocess.run", return_value=_make_completed_process(returncode=0)):
+             patch("scripts.augment_all_leagues_with_mapping.augment_all_leagues",
+                   return_value=augmented) as augment:
             result = step3_augment()
 
-        assert result is True
+        assert result is augmented
+        assert augment.call_args.kwargs["output_file"] == str(aug_f)
+
+    def test_in_memory_handoff_without_checkpoint(self, tmp_path):
+        from scripts.update_odds_pipeline import step3_augment
+        football_data = pd.DataFrame({"HomeTeam": ["Arsenal"], "AwayTeam": ["Chelsea"]})
+        mapping = pd.DataFrame({"oddscheck_team_name": ["Arsenal", "Chelsea"], "db_club_id": [11, 631],
+                                "db_club_name": ["Arsenal FC", "Chelsea FC"], "avg_confidence": [90, 90]})
+
+        with patch("scripts.update_odds_pipeline.ALL_LEAGUES_FULL", tmp_path / "missing.csv"), \
+             patch("scripts.update_odds_pipeline.MAPPING_FILE", tmp_path / "missing_mapping.csv"), \
+             patch("scripts.update_odds_pipeline.AUGMENTED_FILE", tmp_path / "augmented.csv"):
+            result = step3_augment(football_data=football_data.assign(Date="2024-08-10", FTHG=1, FTAG=0),
+                                   mapping=mapping, checkpoint=False)
+
+        assert list(result["tm_home_team_id"]) == [11] and list(result["tm_away_team_id"]) == [631]
+        assert not (tmp_path / "augmented.csv").exists()
 
 
 # ---------------------------------------------------------------------------
-# step4_update_odds
+# step4_update_odds / step4_report
 # ---------------------------------------------------------------------------
 
 class TestStep4UpdateOdds:
@@ -259,23 +313,41 @@ class TestStep4UpdateOdds:
             result = step4_update_odds()
         assert result is False
 
-    def test_subprocess_failure_returns_false(self, tmp_path, capsys):
+    def test_failure_returns_false(self, tmp_path, capsys):
         from scripts.update_odds_pipeline import step4_update_odds
-        aug_f = tmp_path / "aug.csv"
-        aug_f.write_text("col\nval\n")
-        with patch("scripts.update_odds_pipeline.AUGMENTED_FILE", aug_f), \
-             patch("subprocess.run", return_value=_make_completed_process(returncode=1)):
-            result = step4_update_odds()
+        update = MagicMock(side_effect=Exception("rpc missing"))
+        with patch.dict(sys.modules, {"scripts.update_odds_batch":
+                                      _fake_module("scripts.update_odds_batch", batch_update_odds=update)}):
+            result = step4_update_odds(augmented=pd.DataFrame({"Date": ["2024-08-10"]}))
         assert result is False
 
-    def test_subprocess_success_returns_true(self, tmp_path):
+    def test_success_returns_update_from_checkpoint(self, tmp_path):
         from scripts.update_odds_pipeline import step4_update_odds
         aug_f = tmp_path / "aug.csv"
-        aug_f.write_text("col\nval\n")
+        aug_f.write_text("Date,HomeTeam,B365H,OddsH\n2025-08-01,A,1.9,2.0\n")
+        odds_update = object()
+        update = MagicMock(return_value=odds_update)
         with patch("scripts.update_odds_pipeline.AUGMENTED_FILE", aug_f), \
-             patch("subprocess.run", return_value=_make_completed_process(returncode=0)):
+             patch.dict(sys.modules, {"scripts.update_odds_batch":
+                                      _fake_module("scripts.update_odds_batch", batch_update_odds=update)}):
             result = step4_update_odds()
-        assert result is True
+        assert result is odds_update
+        # Only the columns the reconciliation reads
+        assert list(update.call_args.kwargs["csv_df"].columns) == ["Date", "HomeTeam", "OddsH"]
+        assert update.call_args.kwargs["write_logs"] is False
+
+    def test_report_writes_logs_for_the_update(self):
+        from scripts.update_odds_pipeline import step4_report
+        save = MagicMock(return_value=("matched.csv", None))
+        odds_update = object()
+        with patch.dict(sys.modules, {"scripts.update_odds_batch":
+                                      _fake_module("scripts.update_odds_batch", save_match_logs=save)}):
+            assert step4_report(odds_update=odds_update) is True
+        assert save.call_args.args[0] is odds_update
+
+    def test_report_without_update_is_a_no_op(self):
+        from scripts.update_odds_pipeline import step4_report
+        assert step4_report(odds_update=None) is True
 
 
 # ---------------------------------------------------------------------------
@@ -283,23 +355,30 @@ class TestStep4UpdateOdds:
 # ---------------------------------------------------------------------------
 
 class TestStep5PopulateMte:
-    def test_subprocess_failure_returns_false(self, capsys):
-        from scripts.update_odds_pipeline import step5_populate_mte
-        with patch("subprocess.run", return_value=_make_completed_process(returncode=1)):
-            result = step5_populate_mte()
-        assert result is False
-
-    def test_subprocess_success_returns_true(self):
+    def _run(self, run_etl, **kwargs):
         from scripts.update_odds_pipeline import step5_populate_mte
-        with patch("subprocess.run", return_value=_make_completed_process(returncode=0)):
-            result = step5_populate_mte()
-        assert result is True
+        with patch.dict(sys.modules, {"scripts.populate_match_team_expectation":
+                                      _fake_module("scripts.populate_match_team_expectation", run_etl=run_etl)}):
+            return step5_populate_mte(**kwargs)
+
+    def test_write_errors_return_false(self, capsys):
+        assert self._run(MagicMock(return_value=(10, 5))) is False
+
+    def test_success_returns_true(self):
+        run_etl = MagicMock(return_value=(10, 0))
+        assert self._run(run_etl) is True
+        assert run_etl.call_args.kwargs["matches_df"] is None
+
+    def test_uses_matches_from_odds_update(self):
+        run_etl = MagicMock(return_value=(2, 0))
+        matches = pd.DataFrame({"tm_match_id": [1]})
+        odds_update = MagicMock()
+        odds_update.matches_with_odds.return_value = matches
+        assert self._run(run_etl, odds_update=odds_update) is True
+        assert run_etl.call_args.kwargs["matches_df"] is matches
 
     def test_exception_returns_false(self, capsys):
-        from scripts.update_odds_pipeline import step5_populate_mte
-        with patch("subprocess.run", side_effect=OSError("binary not found")):
-            result = step5_populate_mte()
-        assert result is False
+        assert self._run(MagicMock(side_effect=OSError("db down"))) is False
 
 
 # ---------------------------------------------------------------------------
@@ -388,6 +467,7 @@ class TestRunPipeline:
              patch("scripts.update_odds_pipeline.step2_match_oddscheck", return_value=True), \
              patch("scripts.update_odds_pipeline.step3_augment", return_value=True), \
              patch("scripts.update_odds_pipeline.step4_update_odds", return_value=True), \
+             patch("scripts.update_odds_pipeline.step4_report", return_value=True), \
              patch("scripts.update_odds_pipeline.step5_populate_mte", return_value=False):
             result = run_pipeline()
         assert result is False
@@ -398,6 +478,7 @@ class TestRunPipeline:
              patch("scripts.update_odds_pipeline.step2_match_oddscheck", return_value=True), \
              patch("scripts.update_odds_pipeline.step3_augment", return_value=True), \
              patch("scripts.update_odds_pipeline.step4_update_odds", return_value=True), \
+             patch("scripts.update_odds_pipeline.step4_report", return_value=True), \
              patch("scripts.update_odds_pipeline.step5_populate_mte", return_value=True):
             result = run_pipeline()
         assert result is True
@@ -408,6 +489,7 @@ class TestRunPipeline:
              patch("scripts.update_odds_pipeline.step2_match_oddscheck", return_value=True), \
              patch("scripts.update_odds_pipeline.step3_augment", return_value=True), \
              patch("scripts.update_odds_pipeline.step4_update_odds", return_value=True), \
+             patch("scripts.update_odds_pipeline.step4_report", return_value=True), \
              patch("scripts.update_odds_pipeline.step5_populate_mte", return_value=True):
             run_pipeline(skip_scrape=True)
         mock1.assert_not_called()
@@ -418,6 +500,7 @@ class TestRunPipeline:
              patch("scripts.update_odds_pipeline.step2_match_oddscheck") as mock2, \
              patch("scripts.update_odds_pipeline.step3_augment", return_value=True), \
              patch("scripts.update_odds_pipeline.step4_update_odds", return_value=True), \
+             patch("scripts.update_odds_pipeline.step4_report", return_value=True), \
              patch("scripts.update_odds_pipeline.step5_populate_mte", return_value=True):
             run_pipeline(skip_matching=True)
         mock2.assert_not_called()
@@ -428,6 +511,252 @@ class TestRunPipeline:
              patch("scripts.update_odds_pipeline.step2_match_oddscheck", return_value=True) as mock2, \
              patch("scripts.update_odds_pipeline.step3_augment", return_value=True), \
              patch("scripts.update_odds_pipeline.step4_update_odds", return_value=True), \
+             patch("scripts.update_odds_pipeline.step4_report", return_value=True), \
              patch("scripts.update_odds_pipeline.step5_populate_mte", return_value=True):
             run_pipeline(min_confidence=85)
-        mock2.assert_called_once_with(min_confidence=85, no_resume=False)
+        mock2.assert_called_once_with(football_data=True, min_confidence=85, no_resume=False, since=None)
+
+    def test_outputs_are_handed_over_in_memory(self):
+        from scripts.update_odds_pipeline import run_pipeline
+        football_data, mapping, augmented, odds_update = object(), object(), object(), object()
+        with patch("scripts.update_odds_pipeline.step1_scrape", return_value=football_data), \
+             patch("scripts.update_odds_pipeline.step2_match_oddscheck", return_value=mapping), \
+             patch("scripts.update_odds_pipeline.step3_augment", return_value=augmented) as mock3, \
+             patch("scripts.update_odds_pipeline.step4_update_odds", return_value=odds_update) as mock4, \
+             patch("scripts.update_odds_pipeline.step4_report", return_value=True) as report, \
+             patch("scripts.update_odds_pipeline.step5_populate_mte", return_value=True) as mock5:
+            assert run_pipeline(checkpoints=False) is True
+        assert mock3.call_args.kwargs == {"football_data": football_data, "mapping": mapping,
+                                          "checkpoint": False, "since": None}
+        assert mock4.call_args.kwargs == {"augmented": augmented, "since": None}
+        assert report.call_args.kwargs == {"odds_update": odds_update}
+        assert mock5.call_args.kwargs == {"odds_update": odds_update}
+
+    def test_skipped_step_hands_none_to_the_next(self):
+        from scripts.update_odds_pipeline import run_pipeline
+        with patch("scripts.update_odds_pipeline.step1_scrape") as mock1, \
+             patch("scripts.update_odds_pipeline.step2_match_oddscheck", return_value=True) as mock2, \
+             patch("scripts.update_odds_pipeline.step3_augment", return_value=True):
+            assert run_pipeline(skip_scrape=True, dry_run=True) is True
+        mock1.assert_not_called()
+        assert mock2.call_args.kwargs["football_data"] is None
+
+    def test_report_and_mte_run_concurrently(self):
+        from scripts.update_odds_pipeline import run_pipeline
+        # Each waits for the other: only passes if both run at the same time
+        barrier = threading.Barrier(2, timeout=5)
+
+        def wait_for_other(**kwargs):
+            barrier.wait()
+            return True
+
+        with patch("scripts.update_odds_pipeline.step1_scrape", return_value=True), \
+             patch("scripts.update_odds_pipeline.step2_match_oddscheck", return_value=True), \
+             patch("scripts.update_odds_pipeline.step3_augment", return_value=True), \
+             patch("scripts.update_odds_pipeline.step4_update_odds", return_value=True), \
+             patch("scripts.update_odds_pipeline.step4_report", return_value=True), \
+             patch("scripts.update_odds_pipeline.step4_report", side_effect=wait_for_other), \
+             patch("scripts.update_odds_pipeline.step5_populate_mte", side_effect=wait_for_other):
+            assert run_pipeline() is True
+
+
+# ---------------------------------------------------------------------------
+# run_pipeline — fingerprint-based auto-skip
+# ---------------------------------------------------------------------------
+
+class TestAutoSkip:
+    """Steps 2-5 are skipped when the manifest says their inputs are unchanged."""
+
+    @pytest.fixture
+    def files(self, tmp_path):
+        paths = {
+            "ALL_LEAGUES_FULL": tmp_path / "all.csv",
+            "MAPPING_FILE": tmp_path / "mapping.csv",
+            "AUGMENTED_FILE": tmp_path / "augmented.csv",
+            "ODDS_STORE_DIR": tmp_path / "store",
+        }
+        paths["ALL_LEAGUES_FULL"].write_text("Date,HomeTeam\n01/08/2025,A\n")
+        patches = [patch(f"scripts.update_odds_pipeline.{name}", path) for name, path in paths.items()]
+        for p in patches:
+            p.start()
+        yield paths
+        for p in patches:
+            p.stop()
+
+    def _run(self, files, mapping_text="team,club\nA,1\n", step4_writes=None, **kwargs):
+        from scripts.update_odds_pipeline import run_pipeline
+
+        calls = []
+
+        def step2(**_):
+            calls.append("step2")
+            files["MAPPING_FILE"].write_text(mapping_text)
+            return pd.DataFrame({"team": ["A"]})
+
+        def step3(**_):
+            calls.append("step3")
+            files["AUGMENTED_FILE"].write_text("Date,HomeTeam,tm_home_team_id\n01/08/2025,A,1\n")
+            return pd.DataFrame({"tm_home_team_id": [1]})
+
+        def record(name, result=True, then=None):
+            def step(**_):
+                calls.append(name)
+                if then:
+                    then()
+                return result
+            return step
+
+        with patch("scripts.update_odds_pipeline.step1_scrape", return_value=None), \
+             patch("scripts.update_odds_pipeline.step2_match_oddscheck", side_effect=step2), \
+             patch("scripts.update_odds_pipeline.step3_augment", side_effect=step3), \
+             patch("scripts.update_odds_pipeline.step4_update_odds", side_effect=record("step4", None, step4_writes)), \
+             patch("scripts.update_odds_pipeline.step4_report", return_value=True), \
+             patch("scripts.update_odds_pipeline.step5_populate_mte", side_effect=record("step5")):
+            assert run_pipeline(**kwargs) is True
+        return calls
+
+    def test_unchanged_inputs_skip_steps(self, files):
+        assert self._run(files) == ["step2", "step3", "step4", "step5"]
+        assert self._run(files) == []
+
+    def test_changed_output_file_reruns_its_step(self, files):
+        self._run(files)
+        files["AUGMENTED_FILE"].write_text("edited by hand\n")
+        # Step 3 rewrites the checkpoint with the same content, so step 4 is still current
+        assert self._run(files) == ["step3"]
+
+    def test_changed_watermark_reruns_dependent_steps(self, files):
+        self._run(files)
+        with patch("scripts.update_odds_pipeline._db_watermark",
+                   side_effect=lambda table: "later" if table == "Coach_tenure" else "2026-01-01T00:00:00+00:00"):
+            assert self._run(files) == ["step5"]
+        with patch("scripts.update_odds_pipeline._db_watermark", return_value="later"):
+            # Match moved: matching, odds update and MTE read it; augment does not
+            assert self._run(files) == ["step2", "step4", "step5"]
+
+    def test_odds_writes_do_not_rerun_the_matching(self, files):
+        watermark = {"Match": "t0"}
+
+        def write_odds():
+            watermark["Match"] = watermark["Match"] + "+odds"
+
+        with patch("scripts.update_odds_pipeline._db_watermark", side_effect=lambda table: watermark.get(table, "t0")):
+            assert self._run(files, step4_writes=write_odds) == ["step2", "step3", "step4", "step5"]
+            # Step 4 moved Match after step 2 read it, which alone does not rerun step 2
+            assert self._run(files, step4_writes=write_odds) == []
+            watermark["Match"] = "t1"  # a match saved by the crawler
+            assert self._run(files, step4_writes=write_odds) == ["step2", "step4", "step5"]
+
+    def test_no_auto_skip_runs_every_step(self, files):
+        self._run(files)
+        assert self._run(files, auto_skip=False) == ["step2", "step3", "step4", "step5"]
+
+    def test_failed_step_is_not_recorded(self, files, tmp_path):
+        from scripts.update_odds_pipeline import run_pipeline
+        from utils.step_manifest import StepManifest
+
+        self._run(files)
+        with patch("scripts.update_odds_pipeline.step1_scrape", return_value=None), \
+             patch("scripts.update_odds_pipeline.step2_match_oddscheck", return_value=False), \
+             patch("scripts.update_odds_pipeline._db_watermark", return_value="later"):
+            assert run_pipeline() is False
+        assert StepManifest(tmp_path / "manifest.json").entry("step2_matching") == {}
+
+
+# ---------------------------------------------------------------------------
+# Delta-only processing
+# ---------------------------------------------------------------------------
+
+class TestDelta:
+    """Steps 1-4 process the rows ingested since the last successful run."""
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        from utils.odds_store import OddsStore
+
+        store = OddsStore(tmp_path / "store")
+        store.write([pd.DataFrame({"Date": ["01/08/2025"], "HomeTeam": ["A"], "AwayTeam": ["B"],
+                                   "league_code": ["E0"], "season_code": ["2526"]})])
+        return store
+
+    def _add_fixture(self, store, home):
+        rows = store.read()
+        rows.loc[len(rows)] = {**rows.iloc[0].to_dict(), "HomeTeam": home}
+        store.write([rows])
+
+    def _run(self, odds_update=None, **kwargs):
+        from scripts.update_odds_pipeline import run_pipeline
+        with patch("scripts.scrape_football_data.run", return_value=pd.DataFrame()), \
+             patch("scripts.update_odds_pipeline.ALL_LEAGUES_FULL", Path(__file__)), \
+             patch("scripts.update_odds_pipeline.step2_match_oddscheck", return_value=True) as mock2, \
+             patch("scripts.update_odds_pipeline.step3_augment", return_value=True), \
+             patch("scripts.update_odds_pipeline.step4_update_odds", return_value=odds_update), \
+             patch("scripts.update_odds_pipeline.step4_report", return_value=True), \
+             patch("scripts.update_odds_pipeline.step5_populate_mte", return_value=True):
+            ok = run_pipeline(auto_skip=False, **kwargs)
+        return ok, mock2.call_args.kwargs
+
+    def test_first_run_is_full_then_only_new_rows(self, store):
+        ok, kwargs = self._run()
+        assert ok and kwargs["since"] is None and kwargs["football_data"] is None
+
+        self._add_fixture(store, "C")
+        ok, kwargs = self._run()
+        assert kwargs["since"] is not None
+        assert list(kwargs["football_data"]["HomeTeam"]) == ["C"]
+
+        ok, kwargs = self._run()
+        assert kwargs["football_data"].empty
+
+    def test_watermark_stays_when_the_odds_update_is_skipped(self, store):
+        self._run()
+        self._add_fixture(store, "C")
+        self._run(skip_odds_update=True)
+        _, kwargs = self._run()
+        assert list(kwargs["football_data"]["HomeTeam"]) == ["C"]
+
+    def test_full_history_processes_every_row(self, store):
+        self._run()
+        self._add_fixture(store, "C")
+        _, kwargs = self._run(full_history=True)
+        assert kwargs["since"] is None
+
+    def test_unmatched_row_is_retried_until_it_matches(self, store):
+        from services.odds_reconciliation import Reconciliation
+
+        today = pd.Timestamp.now().normalize()
+        rows = store.read()
+        rows.loc[len(rows)] = {**rows.iloc[0].to_dict(), "Date": today.strftime("%d/%m/%Y"), "HomeTeam": "C"}
+        store.write([rows])
+
+        def odds_update(matched_home):
+            # Step 4's rows carry the augmented YYYY-MM-DD date
+            matched = pd.DataFrame({"Date": [today.strftime("%Y-%m-%d")] * len(matched_home),
+                                    "HomeTeam": matched_home, "AwayTeam": ["B"] * len(matched_home),
+                                    "league_code": ["E0"] * len(matched_home)})
+            return MagicMock(reconciliation=Reconciliation(matched=matched, already_complete=matched.iloc[0:0],
+                                                           unmatched=pd.DataFrame()))
+
+        self._run(odds_update=odds_update([]))  # run 1: C's Match is not in the database yet
+        _, kwargs = self._run(odds_update=odds_update(["C"]))  # run 2: no new rows, C is retried and matched
+        assert list(kwargs["football_data"]["HomeTeam"]) == ["C"]
+
+        _, kwargs = self._run(odds_update=odds_update([]))
+        assert kwargs["football_data"].empty
+
+    def test_old_unmatched_rows_are_not_retried(self, store):
+        from scripts.update_odds_pipeline import UNMATCHED_FILE, _save_unreconciled
+
+        update = MagicMock()
+        update.reconciliation.matched = update.reconciliation.already_complete = pd.DataFrame()
+        assert _save_unreconciled(store.read(), update, today=pd.Timestamp("2025-08-10")) == 1
+        assert _save_unreconciled(store.read(), update, today=pd.Timestamp("2025-12-01")) == 0
+        assert pd.read_csv(UNMATCHED_FILE).empty
+
+    def test_empty_delta_keeps_the_mapping(self, tmp_path, capsys):
+        from scripts.update_odds_pipeline import step2_match_oddscheck
+        mapping_f = tmp_path / "mapping.csv"
+        mapping_f.write_text("oddscheck_team_name,db_club_id\nA,1\n")
+        with patch("scripts.update_odds_pipeline.MAPPING_FILE", mapping_f):
+            assert step2_match_oddscheck(football_data=pd.DataFrame(), since="2026-01-01") is None
+        assert "no new or modified rows" in capsys.readouterr().out
@@ -0,0 +1,109 @@
+from datetime import date, datetime
+from unittest.mock import MagicMock
+
+import pytest
+
+from models.coach import Coach
+from models.coach_tenure import CoachTenure
+from models.league_season_state import LeagueSeasonState
+from models.match import Match
+from repositories.coach.fake_coach_repository import FakeCoachRepository
+from repositories.coach.sqlite_coach_repository import SqliteCoachRepository
+from repositories.league_season_state.sqlite_league_season_state_repository import SqliteLeagueSeasonStateRepository
+from repositories.match.fake_match_repository import FakeMatchRepository
+from repositories.match.sqlite_match_repository import SqliteMatchRepository
+from repositories.sqlite_database import SqliteDatabase
+from repositories.tenure.sqlite_coach_tenure_repository import SqliteCoachTenureRepository
+
+
+@pytest.fixture
+def db():
+    database = SqliteDatabase()
+    yield database
+    database.close()
+
+
+def make_match(match_id=1028917, **overrides):
+    data = dict(tm_match_id=match_id, home_club_id=148, away_club_id=281, season_id=2010, league_id=1,
+                date="2010-08-14", home_coach_id=448, away_coach_id=524, attendance=35928,
+                home_team_score=0, away_team_score=0, home_team_points=1, away_team_points=1)
+    data.update(overrides)
+    return Match(**data)
+
+
+def test_match_repository_standalone(db):
+    repo = SqliteMatchRepository(db)
+    repo.save(make_match())
+    repo.save(make_match(1028918, season_id=2011))
+    repo.save(make_match(attendance=None))  # upsert, not a duplicate
+
+    assert repo.fetch_all_ids() == {1028917, 1028918}
+    assert repo.fetch_ids_by_year_league(season_id=2010, league_id=1) == {1028917}
+    assert db.query('SELECT attendance FROM "Match" WHERE tm_match_id = 1028917') == [{"attendance": None}]
+
+
+def test_coach_and_tenure_lookups(db):
+    coaches = SqliteCoachRepository(db)
+    tenures = SqliteCoachTenureRepository(db)
+    coaches.save(Coach(tm_coach_id=448, name="Harry Redknapp", country="England"))
+
+    tenure = CoachTenure(coach_id=448, club_id=148, start_date=date(2008, 10, 25), end_date=None,
+                         role="Manager", is_current=False)
+    assert tenures.save(tenure) is None  # club unknown locally, like Supabase
+    db.upsert("Club", [{"tm_club_id": 148, "name": "Tottenham"}])
+    assert tenures.save(tenure) is not None
+
+    assert coaches.fetch_all_ids() == {448}
+    assert coaches.get_coach_id_by_name("Harry Redknapp") == [{"tm_coach_id": 448}]
+    assert coaches.get_coach_id_by_date(148, date(2010, 8, 14)) == [{"coach_id": 448}]
+    assert coaches.get_coach_id_by_date(148, date(2007, 1, 1)) == []
+    assert tenures.fetch_all_ids() == [(448, 148, "2008-10-25")]
+
+
+def test_replica_forwards_writes_upstream(db):
+    upstream = FakeMatchRepository()
+    repo = SqliteMatchRepository(db, upstream=upstream)
+    repo.save(make_match())
+    assert 1028917 in upstream.matches
+    assert repo.fetch_all_ids() == {1028917}
+
+
+def test_replica_does_not_store_rejected_writes(db):
+    upstream = MagicMock()
+    upstream.save.side_effect = Exception("Supabase save error")
+    repo = SqliteCoachRepository(db, upstream=upstream)
+    with pytest.raises(Exception):
+        repo.save(Coach(tm_coach_id=1, name="X", country="PT"))
+    assert repo.fetch_all_ids() == set()
+
+
+def test_state_round_trip(db):
+    repo = SqliteLeagueSeasonStateRepository(db)
+    state = LeagueSeasonState(league_id=1, season_id=2010, failed_match_ids=[5, 6],
+                              last_processed_match_date=datetime(2010, 8, 14),
+                              last_updated_at=datetime(2024, 1, 1, 12, 0))
+    repo.save_state(state)
+    assert repo.get_state(1, 2010) == state
+    repo.delete_state(1, 2010)
+    assert repo.get_state(1, 2010) is None
+
+
+def test_sync_pulls_only_rows_newer_than_watermark(db):
+    client = MagicMock()
+    query = client.table.return_value.select.return_value
+    query.order.return_value = query
+    query.gt.return_value = query
+    query.range.return_value.execute.side_effect = [
+        MagicMock(data=[{"tm_club_id": 1, "name": "A", "updated_at": "2024-01-01T00:00:00+00:00"},
+                        {"tm_club_id": 2, "name": "B", "updated_at": "2024-02-01T00:00:00+00:00", "extra": 1}]),
+        MagicMock(data=[{"tm_club_id": 2, "name": "B2", "updated_at": "2024-03-01T00:00:00+00:00"}]),
+    ]
+
+    assert db.sync_table(client, "Club") == 2
+    query.gt.assert_not_called()
+    assert db.get_watermark("Club") == "2024-02-01T00:00:00+00:00"
+
+    assert db.sync_table(client, "Club") == 1
+    query.gt.assert_called_once_with("updated_at", "2024-02-01T00:00:00+00:00")
+    assert db.query('SELECT tm_club_id, name FROM "Club" ORDER BY tm_club_id') == [
+        {"tm_club_id": 1, "name": "A"}, {"tm_club_id": 2, "name": "B2"}]
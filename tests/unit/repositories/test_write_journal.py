@@ -0,0 +1,189 @@
+from types import SimpleNamespace
+
+import pytest
+from postgrest.exceptions import APIError
+
+from models.coach_tenure import CoachTenure
+from models.match import Match
+from repositories.match.fake_match_repository import FakeMatchRepository
+from repositories.match.journaled_match_repository import JournaledMatchRepository
+from repositories.sqlite_database import SqliteDatabase
+from repositories.tenure.journaled_coach_tenure_repository import JournaledCoachTenureRepository
+from repositories.write_journal import JournalFlusher, WriteJournal
+from utils.write_filter import WriteFilter, save_through_filter
+
+
+class FakeSupabase:
+    """Records bulk upserts; rows whose id is in `bad_ids` are rejected like an FK violation."""
+
+    def __init__(self, clubs=(), bad_ids=(), outage=False):
+        self.clubs = set(clubs)
+        self.bad_ids = set(bad_ids)
+        self.outage = outage
+        self.upserts = []
+        self._table = None
+
+    def table(self, name):
+        self._table = name
+        return self
+
+    def upsert(self, rows, on_conflict=None):
+        self._pending = (self._table, rows)
+        return self
+
+    def select(self, *_):
+        return self
+
+    def in_(self, _, ids):
+        self._pending = ("Club?", ids)
+        return self
+
+    def execute(self):
+        table, rows = self._pending
+        if table == "Club?":
+            return SimpleNamespace(data=[{"tm_club_id": i} for i in rows if i in self.clubs])
+        if self.outage:
+            raise ConnectionError("connection reset")
+        if any(r.get("tm_coach_id", r.get("tm_match_id")) in self.bad_ids for r in rows):
+            raise APIError({"message": "violates foreign key constraint", "code": "23503"})
+        self.upserts.append((table, [dict(r) for r in rows]))
+        return SimpleNamespace(data=rows)
+
+
+@pytest.fixture
+def journal():
+    j = WriteJournal(path=None)
+    yield j
+    j.close()
+
+
+def make_match(match_id, season_id=2010):
+    return Match(tm_match_id=match_id, home_club_id=1, away_club_id=2, season_id=season_id, league_id=1,
+                 date="2010-08-14", home_coach_id=10, away_coach_id=20, attendance=None,
+                 home_team_score=1, away_team_score=0, home_team_points=3, away_team_points=0)
+
+
+def test_flush_runs_in_fk_order_and_dedupes_keys(journal):
+    journal.append("Match", {"tm_match_id": 1, "attendance": 1})
+    journal.append("Coach_tenure", {"coach_id": 10, "club_id": 5, "start_date": "2010-01-01"})
+    journal.append("Coach", {"tm_coach_id": 10, "name": "A"})
+    journal.append("Match", {"tm_match_id": 1, "attendance": 2})
+    client = FakeSupabase(clubs={5})
+
+    JournalFlusher(journal, client).flush_once()
+
+    assert [t for t, _ in client.upserts] == ["Coach", "Coach_tenure", "Match"]
+    assert client.upserts[2][1] == [{"tm_match_id": 1, "attendance": 2}]
+    assert journal.counts() == {}
+
+
+def test_rejected_rows_are_isolated_and_kept(journal):
+    for coach_id in range(1, 9):
+        journal.append("Coach", {"tm_coach_id": coach_id, "name": str(coach_id)})
+    client = FakeSupabase(bad_ids={5})
+    flusher = JournalFlusher(journal, client, max_attempts=2)
+
+    flusher.flush_once()
+    assert flusher.flushed["Coach"] == 7
+    assert journal.counts() == {"Coach": 1}
+
+    flusher.flush_once()
+    assert [d["row"]["tm_coach_id"] for d in journal.dead_letters(max_attempts=2)] == [5]
+    flusher.flush_once()  # exhausted rows are no longer retried
+    assert journal.dead_letters(max_attempts=2)[0]["attempts"] == 2
+
+
+def test_outage_keeps_rows_without_counting_attempts(journal):
+    journal.append("Coach", {"tm_coach_id": 1, "name": "A"})
+    flusher = JournalFlusher(journal, FakeSupabase(outage=True), retries=2, backoff=0)
+
+    with pytest.raises(ConnectionError):
+        flusher.flush_once()
+    assert journal.dead_letters(max_attempts=1) == []
+
+    flusher.client = FakeSupabase()
+    flusher.flush_once()
+    assert journal.counts() == {}
+
+
+def test_tenures_at_unknown_clubs_are_dropped(journal):
+    journal.append("Coach_tenure", {"coach_id": 10, "club_id": 5, "start_date": "2010-01-01"})
+    journal.append("Coach_tenure", {"coach_id": 10, "club_id": 6, "start_date": "2012-01-01"})
+    client = FakeSupabase(clubs={5})
+    flusher = JournalFlusher(journal, client)
+
+    flusher.flush_once()
+
+    assert client.upserts == [("Coach_tenure", [{"coach_id": 10, "club_id": 5, "start_date": "2010-01-01"}])]
+    assert flusher.skipped["Coach_tenure"] == 1
+
+
+def test_background_flusher_drains_on_stop(journal):
+    client = FakeSupabase()
+    flusher = JournalFlusher(journal, client, interval=60).start()
+    journal.append("Coach", {"tm_coach_id": 1, "name": "A"})
+    flusher.stop(drain=True)
+    assert journal.counts() == {}
+
+
+def test_journaled_repository_reads_include_unflushed_rows(journal):
+    reader = FakeMatchRepository()
+    reader.save(make_match(1))
+    repo = JournaledMatchRepository(journal, reader=reader)
+
+    assert repo.save(make_match(2)) is not None
+    repo.save(make_match(3, season_id=2011))
+
+    assert set(repo.fetch_all_ids()) == {1, 2, 3}
+    assert repo.fetch_ids_by_year_league(season_id=2010, league_id=1) == {2}
+
+
+def test_tenure_at_unknown_club_is_not_journaled_or_marked_written(journal):
+    clubs = set()
+    repo = JournaledCoachTenureRepository(journal, club_exists=lambda club_id: club_id in clubs)
+    tenure = CoachTenure(coach_id=10, club_id=5, start_date="2010-01-01", end_date=None,
+                         role="Manager", is_current=False)
+    write_filter = WriteFilter()
+
+    save_through_filter(write_filter, "Coach_tenure", (10, 5, "2010-01-01"), tenure, repo.save)
+    assert journal.counts() == {}
+
+    clubs.add(5)  # the club shows up later: the tenure is saved on the next run
+    save_through_filter(write_filter, "Coach_tenure", (10, 5, "2010-01-01"), tenure, repo.save)
+    assert journal.counts() == {"Coach_tenure": 1}
+
+
+def test_rows_appended_mid_pass_wait_for_the_next_pass(journal):
+    journal.append("Coach", {"tm_coach_id": 1, "name": "A"})
+    client = FakeSupabase()
+    upsert = client.upsert
+
+    def upsert_and_append(rows, on_conflict=None):
+        if client._table == "Coach" and not client.upserts:
+            # the crawler saves a new coach and its match while Coach is being flushed
+            journal.append("Coach", {"tm_coach_id": 2, "name": "B"})
+            journal.append("Match", {"tm_match_id": 7, "home_coach_id": 2})
+        return upsert(rows, on_conflict)
+
+    client.upsert = upsert_and_append
+    flusher = JournalFlusher(journal, client)
+
+    flusher.flush_once()
+    assert [t for t, _ in client.upserts] == ["Coach"]
+    assert journal.counts() == {"Coach": 1, "Match": 1}
+
+    flusher.flush_once()
+    assert [t for t, _ in client.upserts] == ["Coach", "Coach", "Match"]
+    assert journal.counts() == {}
+
+
+def test_flushed_rows_are_mirrored_into_the_replica(journal):
+    replica = SqliteDatabase(":memory:")
+    journal.append("Coach", {"tm_coach_id": 1, "name": "A"})
+    journal.append("Coach", {"tm_coach_id": 5, "name": "rejected"})
+    flusher = JournalFlusher(journal, FakeSupabase(bad_ids={5}), replica=replica)
+
+    flusher.flush_once()
+
+    assert replica.has_row("Coach", tm_coach_id=1)
+    assert not replica.has_row("Coach", tm_coach_id=5)
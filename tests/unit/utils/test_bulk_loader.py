@@ -0,0 +1,170 @@
+import threading
+import time
+
+from postgrest.exceptions import APIError
+from postgrest.types import ReturnMethod
+
+from utils.bulk_loader import BulkLoader, is_row_error
+
+CHECK_VIOLATION = {"code": "23514", "message": "violates check constraint", "hint": None, "details": None}
+UNAVAILABLE = {"code": 503, "message": "JSON could not be generated", "hint": None, "details": "Service Unavailable"}
+
+
+class Endpoint:
+    """
+    on_execute hook of the fake table: rejects any chunk containing a row with
+    bad=True, fails the first `fail_times` requests with `error`, and tracks
+    how many requests are in flight.
+    """
+
+    def __init__(self, fail_times=0, error=UNAVAILABLE, delay=0.0):
+        self.fail_times = fail_times
+        self.error = error
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, action, rows):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            with self.lock:
+                if self.fail_times:
+                    self.fail_times -= 1
+                    raise APIError(self.error)
+            if any(r.get("bad") for r in rows):
+                raise APIError(CHECK_VIOLATION)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def _client(fake_supabase, endpoint):
+    client = fake_supabase({"t": []})
+    client.tables["t"].on_execute = endpoint
+    return client
+
+
+def _stored(client):
+    return {r["id"] for r in client.tables["t"].rows}
+
+
+def _sizes(client):
+    return [call[1] for call in client.tables["t"].calls if call[0] == "upsert"]
+
+
+def _rows(n, bad=()):
+    return [{"id": i, "bad": i in bad} for i in range(n)]
+
+
+def test_only_data_errors_are_row_errors():
+    assert is_row_error(APIError(CHECK_VIOLATION))
+    assert is_row_error(APIError({**CHECK_VIOLATION, "code": "23503"}))  # foreign key
+    assert not is_row_error(APIError(UNAVAILABLE))
+    assert not is_row_error(APIError({**CHECK_VIOLATION, "code": "PGRST204"}))  # unknown column: every row
+    assert not is_row_error(ConnectionError("reset by peer"))
+
+
+def test_writes_all_rows_with_minimal_return(fake_supabase):
+    client = _client(fake_supabase, Endpoint())
+    loader = BulkLoader(client, "t", on_conflict="id", chunk_size=100, min_chunk_size=10)
+
+    result = loader.load(_rows(1000))
+
+    assert result.written == 1000 and result.failed == 0
+    assert _stored(client) == set(range(1000))
+    calls = [c for c in client.tables["t"].calls if c[0] == "upsert"]
+    assert {c[3] for c in calls} == {ReturnMethod.minimal}
+    assert {c[2] for c in calls} == {"id"}
+
+
+def test_quick_chunks_grow(fake_supabase):
+    client = _client(fake_supabase, Endpoint())
+    loader = BulkLoader(client, "t", chunk_size=10, min_chunk_size=10, max_chunk_size=160, max_workers=1)
+
+    loader.load(_rows(1000))
+
+    assert _sizes(client)[:5] == [10, 20, 40, 80, 160]
+    assert loader.chunk_size == 160
+
+
+def test_bad_rows_are_isolated_by_splitting(fake_supabase, capsys):
+    client = _client(fake_supabase, Endpoint())
+    sleeps = []
+    loader = BulkLoader(client, "t", on_conflict="id", chunk_size=64, min_chunk_size=8, max_chunk_size=64,
+                        max_retries=2, max_logged_rows=1, sleep=sleeps.append)
+
+    result = loader.load(_rows(256, bad={5, 200}))
+
+    assert result.written == 254
+    assert sorted(r["id"] for r in result.failed_rows) == [5, 200]
+    assert _stored(client) == set(range(256)) - {5, 200}
+    assert result.splits > 0 and result.retries == 0 and sleeps == []  # data errors are not retried
+    assert result.error is None
+    assert loader.chunk_size < 64  # failures shrink the chunks
+    out = capsys.readouterr().out
+    assert out.count("row rejected") == 1 and "2 rows not written (1 not listed)" in out
+
+
+def test_transient_failures_are_retried_with_backoff(fake_supabase):
+    client = _client(fake_supabase, Endpoint(fail_times=2))
+    sleeps = []
+    loader = BulkLoader(client, "t", chunk_size=50, min_chunk_size=50, max_workers=1,
+                        max_retries=3, backoff=0.5, sleep=sleeps.append)
+
+    result = loader.load(_rows(50))
+
+    assert result.written == 50 and result.failed == 0
+    assert result.retries == 2 and result.splits == 0
+    assert sleeps == [0.5, 1.0]
+
+
+def test_split_halves_keep_their_backoff(fake_supabase):
+    endpoint = Endpoint()
+    client = _client(fake_supabase, endpoint)
+    sleeps = []
+    loader = BulkLoader(client, "t", chunk_size=8, min_chunk_size=8, max_chunk_size=8, max_workers=1,
+                        backoff=0.5, sleep=sleeps.append)
+
+    blips = []
+
+    def flaky_after_split(action, rows):
+        if len(rows) == 4 and not blips:
+            blips.append(rows[0]["id"])
+            raise APIError(UNAVAILABLE)  # the first half hits a blip
+        endpoint(action, rows)
+
+    client.tables["t"].on_execute = flaky_after_split
+    result = loader.load(_rows(8, bad={7}))
+
+    assert result.written == 7 and [r["id"] for r in result.failed_rows] == [7]
+    assert blips == [0] and result.retries == 1 and sleeps == [0.5]
+
+
+def test_outage_fails_the_load_without_bisecting(fake_supabase):
+    endpoint = Endpoint(fail_times=10 ** 6)
+    client = _client(fake_supabase, endpoint)
+    sleeps = []
+    loader = BulkLoader(client, "t", chunk_size=500, max_workers=4, max_retries=3, sleep=sleeps.append)
+
+    result = loader.load(_rows(2000))
+
+    assert result.written == 0 and result.failed == 2000
+    assert result.splits == 0 and result.requests <= 3 * 4  # every chunk in flight, tried max_retries times
+    assert isinstance(result.error, APIError)
+
+
+def test_requests_run_concurrently(fake_supabase):
+    endpoint = Endpoint(delay=0.02)
+    client = _client(fake_supabase, endpoint)
+    loader = BulkLoader(client, "t", chunk_size=10, min_chunk_size=10, max_chunk_size=10, max_workers=4)
+    progress = []
+
+    result = loader.load(_rows(200), on_progress=lambda done, total: progress.append((done, total)))
+
+    assert result.written == 200 and result.requests == 20
+    assert 1 < endpoint.max_in_flight <= 4
+    assert progress[-1] == (200, 200)
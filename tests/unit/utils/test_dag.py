@@ -0,0 +1,46 @@
+import pytest
+
+from utils.dag import SKIPPED, Dag
+
+
+def test_outputs_flow_to_dependents_and_skips_pass_none():
+    dag = Dag()
+    dag.add("a", lambda: 2)
+    dag.add("b", lambda x: x * 10, inputs={"x": "a"}, skip=True)
+    dag.add("c", lambda x, y: (x, y), inputs={"x": "a", "y": "b"})
+
+    assert dag.run() == {"a": True, "b": None, "c": True}
+    assert dag.outputs["c"] == (2, None)
+
+
+def test_node_can_skip_itself_at_run_time():
+    dag = Dag()
+    dag.add("a", lambda: SKIPPED)
+    dag.add("b", lambda x: x, inputs={"x": "a"})
+
+    assert dag.run() == {"a": None, "b": True}
+    assert dag.outputs["b"] is None
+
+
+def test_failure_stops_scheduling_new_nodes():
+    calls = []
+    dag = Dag(max_workers=1)
+    dag.add("a", lambda: False)
+    dag.add("b", lambda: calls.append("b"))
+    dag.add("c", lambda x: calls.append("c"), inputs={"x": "a"})
+
+    results = dag.run()
+    assert results["a"] is False and "c" not in results
+    assert "c" not in calls
+
+
+def test_exceptions_fail_the_node(capsys):
+    dag = Dag()
+    dag.add("a", lambda: 1 / 0)
+    assert dag.run() == {"a": False}
+    assert "division by zero" in capsys.readouterr().out
+
+
+def test_unknown_dependency_is_rejected():
+    with pytest.raises(ValueError):
+        Dag().add("a", lambda x: x, inputs={"x": "missing"})
@@ -0,0 +1,58 @@
+from multiprocessing import get_context
+
+import numpy as np
+
+from utils.id_set import IdSet
+
+
+def _count_members(args):
+    handle, candidates = args
+    ids = IdSet.attach(handle)
+    try:
+        return int(ids.contains_many(candidates).sum())
+    finally:
+        ids.release()
+
+
+def test_set_like_behaviour():
+    ids = IdSet([5, "3", 9, 3])
+    ids.add(7)
+    ids.add("7")
+    assert len(ids) == 4
+    assert 3 in ids and "9" in ids and 7 in ids
+    assert 4 not in ids and None not in ids and "abc" not in ids
+    assert list(ids) == [3, 5, 7, 9]
+
+
+def test_contains_many_and_merge():
+    ids = IdSet(range(0, 100, 2))
+    ids.merge(IdSet([101, 103]))
+    mask = ids.contains_many([0, 1, 98, 99, 101, 1000])
+    assert mask.tolist() == [True, False, True, False, True, False]
+
+
+def test_set_difference_in_both_directions():
+    ids = IdSet([1, 2, 3])
+    assert {1, 4, 5} - ids == {4, 5}
+    assert list(ids - {2}) == [1, 3]
+
+
+def test_many_adds_are_buffered_then_merged():
+    ids = IdSet()
+    for i in range(10_000):
+        ids.add(i * 3)
+    assert len(ids) == 10_000
+    assert ids.contains_many([2997, 2998]).tolist() == [True, False]
+    assert ids.nbytes == 8 * 10_000
+
+
+def test_shared_memory_across_process_pool():
+    ids = IdSet(range(0, 300_000, 3))
+    handle = ids.share()
+    try:
+        chunks = [(handle, np.arange(start, start + 30)) for start in (0, 30, 299_970)]
+        with get_context("spawn").Pool(2) as pool:
+            assert pool.map(_count_members, chunks) == [10, 10, 10]
+    finally:
+        ids.release()
+    assert 3 in ids and len(ids) == 100_000
@@ -0,0 +1,41 @@
+import pandas as pd
+
+from utils.step_manifest import StepManifest, fingerprint_file, fingerprint_frame
+
+
+def test_file_fingerprint_reuses_the_hash_when_size_and_mtime_match(tmp_path):
+    f = tmp_path / "a.csv"
+    f.write_text("x\n1\n")
+    first = fingerprint_file(f)
+    assert fingerprint_file(f, previous={**first, "sha256": "cached"})["sha256"] == "cached"
+    f.write_text("x\n22\n")
+    assert fingerprint_file(f, previous=first)["sha256"] != first["sha256"]
+    assert fingerprint_file(tmp_path / "missing.csv") is None
+
+
+def test_frame_fingerprint_follows_content():
+    df = pd.DataFrame({"a": [1, 2]})
+    assert fingerprint_frame(df) == fingerprint_frame(df.copy())
+    assert fingerprint_frame(df) != fingerprint_frame(df.rename(columns={"a": "b"}))
+    assert fingerprint_frame(df) != fingerprint_frame(df.assign(a=[1, 3]))
+
+
+def test_step_is_current_until_an_input_or_output_file_changes(tmp_path):
+    out = tmp_path / "out.csv"
+    out.write_text("result\n")
+    manifest = StepManifest(tmp_path / "manifest.json")
+    manifest.record("step", {"source": "abc"}, files={out: fingerprint_file(out)})
+
+    reloaded = StepManifest(tmp_path / "manifest.json")
+    assert reloaded.is_current("step", {"source": "abc"})
+    assert not reloaded.is_current("step", {"source": "abd"})
+    assert not reloaded.is_current("other", {"source": "abc"})
+
+    out.write_text("edited\n")
+    assert not reloaded.is_current("step", {"source": "abc"})
+
+
+def test_unknown_inputs_never_match(tmp_path):
+    manifest = StepManifest(tmp_path / "manifest.json")
+    manifest.record("step", {"watermark": None})
+    assert not manifest.is_current("step", {"watermark": None})
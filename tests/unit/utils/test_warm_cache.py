@@ -0,0 +1,119 @@
+import pytest
+
+from repositories.match.supabase_match_repository import SupabaseMatchRepository
+from utils.id_set import IdSet
+from utils.warm_cache import LruTier, WarmCache
+
+
+@pytest.fixture
+def client(fake_supabase):
+    return fake_supabase({
+        "Coach": [{"tm_coach_id": 1, "updated_at": "2024-01-01"}, {"tm_coach_id": 2, "updated_at": "2024-01-02"}],
+        "Club": [{"tm_club_id": 148, "updated_at": "2024-01-01"}],
+        "Match": [{"tm_match_id": 10, "season_id": 2010, "league_id": 1, "updated_at": "2024-01-01"}],
+        "League": [{"updated_at": "2024-01-01"}],
+        "Season": [{"updated_at": "2024-01-01"}],
+    })
+
+
+def test_lru_tier_evicts_by_count_and_bytes():
+    tier = LruTier("t", max_entries=2)
+    tier.put("a", 1)
+    tier.put("b", 2)
+    tier.get("a")
+    tier.put("c", 3)
+    assert "b" not in tier and {"a", "c"} <= {k for k, _ in tier.items()}
+    assert tier.evictions == 1
+
+    tier = LruTier("t", max_entries=100, max_bytes=2000)
+    for i in range(10):
+        tier.put(i, IdSet(range(i * 100, i * 100 + 50)))
+    assert tier.nbytes <= 2000 and 9 in tier and 0 not in tier
+
+
+def test_delta_sync_only_pulls_new_rows(client):
+    cache = WarmCache()
+    assert cache.sync(client)["Coach"] == 2
+    assert cache.watermarks["Coach"] == "2024-01-02"
+
+    client.tables["Coach"].rows.append({"tm_coach_id": 3, "updated_at": "2024-02-01"})
+    counts = cache.sync(client)
+    assert counts["Coach"] == 1 and counts["Club"] == 0
+    assert ("gt", "updated_at", "2024-01-02") in client.tables["Coach"].calls
+    assert set(cache.ids["Coach"]) == {1, 2, 3}
+
+
+def test_metadata_dropped_when_league_tables_change(client):
+    cache = WarmCache()
+    cache.sync(client)
+    cache.metadata.put("leagues", [{"tm_league_id": 1}])
+    cache.sync(client)
+    assert "leagues" in cache.metadata
+
+    client.tables["Season"].rows.append({"updated_at": "2024-03-01"})
+    cache.sync(client)
+    assert "leagues" not in cache.metadata
+
+
+def test_snapshot_round_trip(tmp_path, client):
+    cache = WarmCache()
+    cache.sync(client)
+    cache.match_ids(2010, 1, loader=lambda: {10, 11})
+    cache.add_match(12, 2010, 1)
+    cache.metadata.put(("league_seasons", 1), [{"season_id": 2010}])
+    cache.save(tmp_path / "cache.npz")
+
+    warm = WarmCache.load(tmp_path / "cache.npz")
+    assert set(warm.ids["Coach"]) == {1, 2}
+    assert set(warm.match_ids(2010, 1, loader=lambda: pytest.fail("should be cached"))) == {10, 11, 12}
+    assert warm.metadata.get(("league_seasons", 1)) == [{"season_id": 2010}]
+    assert warm.watermarks == cache.watermarks
+
+
+def test_unreadable_snapshot_starts_cold(tmp_path):
+    path = tmp_path / "cache.npz"
+    path.write_bytes(b"not a snapshot")
+    assert len(WarmCache.load(path).ids["Coach"]) == 0
+
+
+def test_match_repository_reads_ids_from_warm_cache(fake_supabase):
+    client = fake_supabase({"Match": [{"tm_match_id": 10, "season_id": 2010, "league_id": 1},
+                                      {"tm_match_id": 20, "season_id": 2011, "league_id": 1}]})
+    cache = WarmCache()
+    repo = SupabaseMatchRepository(client=client, warm_cache=cache)
+
+    assert set(repo.fetch_ids_by_year_league(2010, 1)) == {10}
+    assert set(repo.fetch_ids_by_year_league(2010, 1)) == {10}
+    assert client.tables["Match"].reads == 1
+    assert 10 in repo.fetch_all_ids()
+
+
+def test_reconcile_drops_rows_deleted_upstream(client):
+    cache = WarmCache()
+    cache.sync(client)
+    client.tables["Match"].rows.append({"tm_match_id": 11, "season_id": 2010, "league_id": 1,
+                                         "updated_at": "2024-01-05"})
+    cache.sync(client)
+    cache.match_ids(2010, 1, loader=lambda: [10, 11])
+
+    client.tables["Match"].rows.pop(0)  # match 10 deleted upstream to force reprocessing
+    cache.sync(client)
+    assert cache.has_id("Match", 10)  # the delta sync cannot see deletes
+
+    cache.sync(client, reconcile=True)
+    assert not cache.has_id("Match", 10) and cache.has_id("Match", 11)
+    assert list(cache.match_ids(2010, 1, loader=lambda: [])) == [11]
+    assert not cache.reconcile_due()
+
+
+def test_reconcile_runs_when_due(client, tmp_path):
+    cache = WarmCache()
+    cache.sync(client)
+    cache.reconciled_at = "2020-01-01T00:00:00+00:00"
+    cache.save(tmp_path / "cache.npz")
+
+    restored = WarmCache.load(tmp_path / "cache.npz")
+    assert restored.reconcile_due()
+    client.tables["Coach"].rows.pop(0)
+    restored.sync(client)
+    assert not restored.has_id("Coach", 1) and not restored.reconcile_due()
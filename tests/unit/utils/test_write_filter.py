@@ -0,0 +1,100 @@
+import pytest
+import requests
+
+from models.coach import Coach
+from pages.coach_page import CoachPage
+from pipelines.coach_pipeline import run_coach_pipeline
+from repositories.coach.fake_coach_repository import FakeCoachRepository
+from repositories.pipeline_context import PipelineContext
+from repositories.tenure.fake_coach_tenure_repository import FakeCoachTenureRepository
+from utils.write_filter import WriteFilter, row_hash, save_through_filter
+
+
+@pytest.fixture
+def coach_page():
+    with open("tests/fixtures/coach_page_1705_test.html", encoding="utf-8") as f:
+        return CoachPage(session=requests.session(), coach_id="1705", html_content=f.read())
+
+
+class CountingRepo:
+    def __init__(self):
+        self.saved = []
+
+    def save(self, model):
+        self.saved.append(model)
+        return model
+
+
+def test_row_hash_ignores_key_order():
+    assert row_hash({"a": 1, "b": "x"}) == row_hash({"b": "x", "a": 1})
+    assert row_hash({"a": 1}) != row_hash({"a": 2})
+
+
+def test_unchanged_row_is_skipped_and_counted():
+    wf = WriteFilter()
+    repo = CountingRepo()
+    coach = Coach(tm_coach_id=1, name="A", country="PT")
+
+    assert save_through_filter(wf, "Coach", 1, coach, repo.save) is True
+    assert save_through_filter(wf, "Coach", 1, coach, repo.save) is False
+    assert len(repo.saved) == 1
+    assert wf.report() == {"Coach": 1}
+
+
+def test_changed_row_is_written():
+    wf = WriteFilter()
+    repo = CountingRepo()
+    save_through_filter(wf, "Coach", 1, Coach(tm_coach_id=1, name="A", country="PT"), repo.save)
+    save_through_filter(wf, "Coach", 1, Coach(tm_coach_id=1, name="A", country="ES"), repo.save)
+    assert len(repo.saved) == 2
+    assert wf.report() == {}
+
+
+def test_save_returning_none_is_not_recorded():
+    wf = WriteFilter()
+    row = {"coach_id": 1, "club_id": 2}
+    wf.save_if_changed("Coach_tenure", (1, 2, None), row, lambda: None)
+    assert wf.should_write("Coach_tenure", (1, 2, None), row) is True
+
+
+def test_prime_from_db_rows_uses_written_columns_only():
+    wf = WriteFilter()
+    db_rows = [{"player_id": 7, "name": "X", "updated_at": "2026-01-01T00:00:00"}]
+    wf.prime("Player", db_rows, key_fields=["player_id"], columns=["player_id", "name"])
+    assert wf.should_write("Player", 7, {"player_id": 7, "name": "X"}) is False
+    assert wf.report() == {"Player": 1}
+
+
+def test_cache_file_round_trip(tmp_path):
+    cache_file = tmp_path / "wf.json"
+    wf = WriteFilter(cache_file=cache_file)
+    wf.mark_written("Match", 10, {"tm_match_id": 10, "attendance": 100})
+    wf.save()
+
+    reloaded = WriteFilter(cache_file=cache_file)
+    assert reloaded.should_write("Match", 10, {"tm_match_id": 10, "attendance": 100}) is False
+    assert reloaded.should_write("Match", 10, {"tm_match_id": 10, "attendance": 101}) is True
+
+
+def test_coach_pipeline_skips_unchanged_rows_on_second_run(coach_page):
+    wf = WriteFilter()
+
+    def make_context():
+        return PipelineContext(
+            coach_repo=FakeCoachRepository(),
+            match_repo=None,
+            tenure_repo=FakeCoachTenureRepository(),
+            state_repo=None,
+            coach_cache=set(),
+            match_cache=set(),
+            tenure_cache=set(),
+            write_filter=wf,
+        )
+
+    run_coach_pipeline(session=None, coach_id="1705", context=make_context(), page=coach_page)
+    second = make_context()
+    run_coach_pipeline(session=None, coach_id="1705", context=second, page=coach_page)
+
+    assert second.coach_repo.coaches == {}
+    assert wf.report()["Coach"] == 1
+    assert wf.report()["Coach_tenure"] > 0
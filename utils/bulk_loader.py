@@ -0,0 +1,174 @@
+"""
+Chunked, concurrent upserts of many rows into one Supabase table.
+
+Rows are cut into chunks whose size adapts to how long requests take
+(doubling while a chunk comes back well under `target_seconds`, halving when
+it takes longer or fails), and up to `max_workers` chunks are in flight at
+once. Upserts are sent with `returning=minimal`, so PostgREST does not echo
+the rows back.
+
+Failures are told apart by what PostgREST says went wrong:
+
+- The data (an APIError with a SQLSTATE data exception or integrity
+  violation code: constraint, FK, type): the chunk is split in half at once,
+  down to the single row, so one bad row only costs O(log n) extra requests
+  and does not take its neighbours down with it.
+- Anything else (connection errors, timeouts, 5xx): the chunk is retried with
+  exponential backoff, split halves included. A chunk that still fails after
+  `max_retries` fails the load: the rows not written yet end up in
+  `failed_rows` without further requests, so an outage costs a few requests
+  instead of a bisection of every chunk.
+
+Only the first `max_logged_rows` rejected rows are printed.
+"""
+
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from postgrest.exceptions import APIError
+from postgrest.types import ReturnMethod
+
+Row = Dict[str, Any]
+
+# SQLSTATE classes of errors caused by the rows themselves: data exception, integrity constraint violation
+ROW_ERROR_CLASSES = ("22", "23")
+
+
+def is_row_error(exc: Exception) -> bool:
+    """True when PostgREST rejected the data (e.g. 23503 FK, 23514 check, 22P02 bad value), not the request."""
+    code = getattr(exc, "code", None)
+    return isinstance(exc, APIError) and isinstance(code, str) and code[:2] in ROW_ERROR_CLASSES
+
+
+@dataclass
+class LoadResult:
+    written: int = 0
+    failed_rows: List[Row] = field(default_factory=list)
+    requests: int = 0
+    retries: int = 0
+    splits: int = 0
+    error: Optional[Exception] = None  # the error that failed the load, if any
+
+    @property
+    def failed(self) -> int:
+        return len(self.failed_rows)
+
+
+@dataclass
+class _Chunk:
+    rows: Sequence[Row]
+    attempt: int = 0      # retries of this chunk so far
+    delay: float = 0.0    # backoff before sending it
+
+
+class BulkLoader:
+    """
+    Upserts rows into `table` (conflict target `on_conflict`) in adaptive
+    chunks with up to `max_workers` concurrent requests.
+    """
+
+    def __init__(self, client: Any, table: str, on_conflict: str = "", chunk_size: int = 500,
+                 min_chunk_size: int = 50, max_chunk_size: int = 5000, max_workers: int = 4,
+                 max_retries: int = 3, backoff: float = 1.0, target_seconds: float = 2.0,
+                 max_logged_rows: int = 10, sleep: Callable[[float], None] = time.sleep):
+        self.client = client
+        self.table = table
+        self.on_conflict = on_conflict
+        self.min_chunk_size = max(1, min_chunk_size)
+        self.max_chunk_size = max(self.min_chunk_size, max_chunk_size)
+        self.chunk_size = min(max(chunk_size, self.min_chunk_size), self.max_chunk_size)
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max(1, max_retries)
+        self.backoff = backoff
+        self.target_seconds = target_seconds
+        self.max_logged_rows = max_logged_rows
+        self.sleep = sleep
+
+    def _send(self, chunk: _Chunk) -> float:
+        if chunk.delay:
+            self.sleep(chunk.delay)
+        started = time.monotonic()
+        self.client.table(self.table).upsert(
+            list(chunk.rows), on_conflict=self.on_conflict, returning=ReturnMethod.minimal
+        ).execute()
+        return time.monotonic() - started
+
+    def _adapt(self, sent: int, elapsed: Optional[float]) -> None:
+        """Grow after a quick full-size chunk, shrink after a slow or failed one (elapsed None)."""
+        if elapsed is None or elapsed > self.target_seconds:
+            self.chunk_size = max(self.min_chunk_size, self.chunk_size // 2)
+        elif elapsed < self.target_seconds / 2 and sent >= self.chunk_size:
+            self.chunk_size = min(self.max_chunk_size, self.chunk_size * 2)
+
+    def _reject(self, row: Row, exc: Exception, result: LoadResult) -> None:
+        if len(result.failed_rows) < self.max_logged_rows:
+            print(f"   ❌ {self.table}: row rejected ({exc}): {row}")
+        result.failed_rows.append(row)
+
+    def _failed(self, chunk: _Chunk, exc: Exception, queue: deque, result: LoadResult) -> None:
+        self._adapt(len(chunk.rows), None)
+        if is_row_error(exc):
+            if len(chunk.rows) == 1:
+                self._reject(chunk.rows[0], exc, result)
+                return
+            # Look for the bad row(s); the halves get their own retries
+            result.splits += 1
+            mid = len(chunk.rows) // 2
+            queue.appendleft(_Chunk(chunk.rows[mid:]))
+            queue.appendleft(_Chunk(chunk.rows[:mid]))
+        elif chunk.attempt + 1 < self.max_retries and result.error is None:
+            result.retries += 1
+            queue.append(_Chunk(chunk.rows, chunk.attempt + 1, self.backoff * 2 ** chunk.attempt))
+        else:
+            # Not the rows' fault: splitting would only multiply the requests
+            if result.error is None:
+                result.error = exc
+                print(f"   ❌ {self.table}: chunk of {len(chunk.rows)} rows failed after "
+                      f"{chunk.attempt + 1} attempts ({exc}); stopping the load")
+            result.failed_rows.extend(chunk.rows)
+
+    def load(self, rows: Sequence[Row], on_progress: Optional[Callable[[int, int], None]] = None) -> LoadResult:
+        """Upsert every row; rows that could not be written end up in `failed_rows`."""
+        rows = list(rows)
+        result = LoadResult()
+        queue: deque = deque()  # retries and split halves, sent before new chunks
+        cursor = 0
+        in_flight = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while True:
+                if result.error is not None:
+                    # The load failed: nothing more is sent
+                    for chunk in queue:
+                        result.failed_rows.extend(chunk.rows)
+                    queue.clear()
+                    result.failed_rows.extend(rows[cursor:])
+                    cursor = len(rows)
+                while len(in_flight) < self.max_workers and (queue or cursor < len(rows)):
+                    if queue:
+                        chunk = queue.popleft()
+                    else:
+                        chunk = _Chunk(rows[cursor:cursor + self.chunk_size])
+                        cursor += len(chunk.rows)
+                    in_flight[pool.submit(self._send, chunk)] = chunk
+                    result.requests += 1
+                if not in_flight:
+                    break
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chunk = in_flight.pop(future)
+                    try:
+                        elapsed = future.result()
+                    except Exception as exc:
+                        self._failed(chunk, exc, queue, result)
+                        continue
+                    result.written += len(chunk.rows)
+                    self._adapt(len(chunk.rows), elapsed)
+                    if on_progress:
+                        on_progress(result.written, len(rows))
+        if result.failed > self.max_logged_rows:
+            print(f"   ❌ {self.table}: {result.failed:,} rows not written "
+                  f"({result.failed - self.max_logged_rows:,} not listed)")
+        return result
@@ -0,0 +1,89 @@
+"""
+Minimal in-process DAG runner.
+
+Each node is a callable; `inputs` maps its keyword arguments to the nodes
+whose outputs they receive. Nodes whose dependencies are done run
+concurrently on a thread pool. A node fails by raising or by returning False;
+after a failure no new node is started (fail-fast), but nodes already running
+are allowed to finish. A skipped node passes None to its dependents; a node
+can also decide to skip itself at run time by returning SKIPPED.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Returned by a node that decided not to do its work (recorded like skip=True)
+SKIPPED = object()
+
+
+@dataclass
+class DagNode:
+    name: str
+    fn: Callable[..., Any]
+    inputs: Dict[str, str] = field(default_factory=dict)
+    skip: bool = False
+
+    @property
+    def deps(self) -> Tuple[str, ...]:
+        return tuple(self.inputs.values())
+
+
+@dataclass
+class Dag:
+    max_workers: int = 4
+    nodes: Dict[str, DagNode] = field(default_factory=dict)
+    outputs: Dict[str, Any] = field(default_factory=dict)
+    # name -> True (ok), False (failed) or None (skipped); nodes never started are absent
+    results: Dict[str, Optional[bool]] = field(default_factory=dict)
+
+    def add(self, name: str, fn: Callable[..., Any], inputs: Optional[Dict[str, str]] = None,
+            skip: bool = False) -> None:
+        inputs = dict(inputs or {})
+        missing = [d for d in inputs.values() if d not in self.nodes]
+        if missing:
+            raise ValueError(f"Node {name!r} depends on unknown node(s) {missing}")
+        self.nodes[name] = DagNode(name=name, fn=fn, inputs=inputs, skip=skip)
+
+    def _ready(self, pending: List[str]) -> List[str]:
+        return [name for name in pending if all(d in self.results for d in self.nodes[name].deps)]
+
+    def run(self) -> Dict[str, Optional[bool]]:
+        """Run every node once; returns `results`."""
+        pending = list(self.nodes)
+        running = {}
+        failed = False
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                if not failed:
+                    for name in self._ready(pending):
+                        pending.remove(name)
+                        node = self.nodes[name]
+                        if node.skip:
+                            self.results[name] = None
+                            self.outputs[name] = None
+                            continue
+                        kwargs = {arg: self.outputs[dep] for arg, dep in node.inputs.items()}
+                        running[pool.submit(node.fn, **kwargs)] = name
+                    # Skipping can make more nodes ready without anything running
+                    if self._ready(pending) and not failed:
+                        continue
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        output = future.result()
+                    except Exception as exc:
+                        print(f"[ERROR] {name} failed: {exc}")
+                        output = False
+                    if output is SKIPPED:
+                        self.results[name] = None
+                        self.outputs[name] = None
+                        continue
+                    ok = output is not False
+                    self.results[name] = ok
+                    self.outputs[name] = output if ok else None
+                    failed = failed or not ok
+        return self.results
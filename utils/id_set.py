@@ -0,0 +1,164 @@
+import sys
+from bisect import bisect_left
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any, Iterable, Iterator, Optional
+
+import numpy as np
+
+# Recent adds are kept in a small Python set and folded into the sorted array
+# once it grows past this size, so `add` stays O(1) amortised.
+_MERGE_THRESHOLD = 4096
+
+
+def _as_int(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(frozen=True)
+class SharedIdSetHandle:
+    """Picklable reference to an IdSet exported to shared memory (pass it to workers)."""
+    name: str
+    size: int
+
+
+class IdSet:
+    """
+    Set of integer IDs stored as a sorted int64 numpy array (8 bytes per ID).
+
+    Supports the parts of the `set` API the pipelines use (`in`, `add`, `len`,
+    iteration, `-`) plus `contains_many` for batch membership and `merge`.
+    `share()` copies the IDs into a `multiprocessing.shared_memory` block that
+    worker processes open with `IdSet.attach(handle)` without copying.
+    """
+
+    def __init__(self, ids: Iterable[Any] = ()):
+        self._ids = np.empty(0, dtype=np.int64)
+        self._pending: set[int] = set()
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._owns_shm = False
+        self.update(ids)
+
+    @classmethod
+    def from_array(cls, ids: np.ndarray) -> "IdSet":
+        id_set = cls()
+        id_set._ids = np.unique(np.asarray(ids, dtype=np.int64))
+        return id_set
+
+    def _flush(self) -> None:
+        if self._pending:
+            pending = np.fromiter(self._pending, dtype=np.int64, count=len(self._pending))
+            self._ids = np.union1d(self._ids, pending)
+            self._pending = set()
+
+    def add(self, value: Any) -> None:
+        id_ = _as_int(value)
+        if id_ is None or id_ in self:
+            return
+        self._pending.add(id_)
+        if len(self._pending) >= _MERGE_THRESHOLD:
+            self._flush()
+
+    def update(self, values: Iterable[Any]) -> None:
+        if isinstance(values, IdSet):
+            self.merge(values)
+            return
+        ids = [i for i in (_as_int(v) for v in values) if i is not None]
+        if ids:
+            self._ids = np.union1d(self._ids, np.asarray(ids, dtype=np.int64))
+
+    def merge(self, other: "IdSet") -> "IdSet":
+        """Add every ID from `other` (in place) and return self."""
+        other._flush()
+        self._flush()
+        self._ids = np.union1d(self._ids, other._ids)
+        return self
+
+    def __contains__(self, value: Any) -> bool:
+        id_ = _as_int(value)
+        if id_ is None:
+            return False
+        if id_ in self._pending:
+            return True
+        i = bisect_left(self._ids, id_)
+        return i < len(self._ids) and self._ids[i] == id_
+
+    def contains_many(self, values: Iterable[Any]) -> np.ndarray:
+        """Boolean membership mask for a batch of IDs."""
+        self._flush()
+        query = np.asarray(values, dtype=np.int64)
+        if not len(self._ids):
+            return np.zeros(len(query), dtype=bool)
+        pos = np.searchsorted(self._ids, query).clip(max=len(self._ids) - 1)
+        return self._ids[pos] == query
+
+    def __len__(self) -> int:
+        return len(self._ids) + len(self._pending)
+
+    def __iter__(self) -> Iterator[int]:
+        self._flush()
+        return (int(i) for i in self._ids)
+
+    def __sub__(self, other: Iterable[Any]) -> "IdSet":
+        self._flush()
+        other_ids = other if isinstance(other, IdSet) else IdSet(other)
+        return IdSet.from_array(self._ids[~other_ids.contains_many(self._ids)])
+
+    def __rsub__(self, other: Iterable[Any]) -> set:
+        # set - IdSet keeps returning a plain set, as callers expect
+        return {v for v in other if v not in self}
+
+    def __repr__(self) -> str:
+        return f"IdSet({len(self)} ids)"
+
+    @property
+    def nbytes(self) -> int:
+        return self._ids.nbytes
+
+    def share(self) -> SharedIdSetHandle:
+        """
+        Export the IDs to a new shared-memory block. The exporting process owns
+        the block and must call `release()` when the workers are done.
+        """
+        self._flush()
+        shm = shared_memory.SharedMemory(create=True, size=max(self._ids.nbytes, 1))
+        np.ndarray(self._ids.shape, dtype=np.int64, buffer=shm.buf)[:] = self._ids
+        self.release()
+        self._shm = shm
+        self._owns_shm = True
+        return SharedIdSetHandle(name=shm.name, size=len(self._ids))
+
+    @classmethod
+    def attach(cls, handle: SharedIdSetHandle) -> "IdSet":
+        """
+        Open a set exported with `share()` (read-only view, no copy). Meant for
+        workers of a pool started by the exporting process.
+        """
+        if sys.version_info >= (3, 13):
+            shm = shared_memory.SharedMemory(name=handle.name, track=False)
+        else:
+            # Pool workers share the exporting process's resource tracker, so the
+            # duplicate registration made here is harmless
+            shm = shared_memory.SharedMemory(name=handle.name)
+        id_set = cls()
+        id_set._ids = np.ndarray((handle.size,), dtype=np.int64, buffer=shm.buf)
+        id_set._ids.flags.writeable = False
+        id_set._shm = shm
+        return id_set
+
+    def release(self, unlink: Optional[bool] = None) -> None:
+        """
+        Drop the shared-memory block. The process that called `share()` also
+        unlinks it (unless `unlink=False`); attached workers only close it.
+        """
+        if self._shm is None:
+            return
+        self._ids = np.array(self._ids, dtype=np.int64)  # detach from the buffer before closing
+        self._shm.close()
+        if unlink if unlink is not None else self._owns_shm:
+            self._shm.unlink()
+        self._shm = None
+        self._owns_shm = False
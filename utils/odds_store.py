@@ -0,0 +1,272 @@
+"""
+Partitioned Parquet store for the football-data.co.uk odds CSVs.
+
+Layout: <root>/season_code=<SSSS>/league_code=<CODE>/part-0.parquet
+
+Every downloaded CSV is one season/league file upstream, so a run replaces
+exactly the partitions it downloaded and leaves the rest untouched. Readers
+get partition pruning and column projection through `read(columns, filters)`.
+`export_csv` writes the legacy all_leagues_full.csv for older consumers.
+Team and league columns can be loaded as categoricals (`categories`), and
+`parse_match_dates` parses the mixed date formats of the CSVs column-wise.
+
+Every row carries an `ingested_at` stamp (UTC ISO string): rewriting a
+partition keeps the stamp of rows that came back unchanged and stamps new or
+modified rows with the write time, so `read(ingested_after=...)` returns the
+delta of a refresh. Rows written before stamping existed have no stamp and are
+only part of full reads.
+"""
+
+import os
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+DEFAULT_STORE_DIR = DATA_DIR / "football_data_parquet"
+LEGACY_CSV = DATA_DIR / "all_leagues_full.csv"
+
+PARTITION_COLS = ["season_code", "league_code"]
+# A fixture's identity within the store: later ingests of the same key replace earlier ones
+DEDUP_COLS = ["Date", "HomeTeam", "AwayTeam", "league_code"]
+UNKNOWN_PARTITION = "unknown"
+INGESTED_COL = "ingested_at"
+# Low-cardinality text columns worth loading as categoricals
+CATEGORY_COLS = ["HomeTeam", "AwayTeam", "league_code", "season_code"]
+# Date formats seen in football-data CSVs, in the order they are tried
+DATE_FORMATS = ["%d/%m/%Y", "%d/%m/%y", "%Y-%m-%d", "%d-%m-%Y", "%m/%d/%Y", "%m/%d/%y"]
+
+_PARTITIONING = ds.partitioning(
+    pa.schema([(col, pa.string()) for col in PARTITION_COLS]), flavor="hive"
+)
+
+FilterValue = Union[str, Sequence[str]]
+
+
+def _partition_dir(root: Path, season_code: str, league_code: str) -> Path:
+    return root / f"season_code={season_code}" / f"league_code={league_code}"
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="microseconds")
+
+
+def _row_hashes(df: pd.DataFrame, columns: List[str]) -> pd.Series:
+    # Compared as text: a Parquet round trip may change dtypes but not values
+    return pd.util.hash_pandas_object(df[columns].astype(str), index=False)
+
+
+def _stamp_ingestion(body: pd.DataFrame, previous: Optional[pd.DataFrame], ingested_at: str) -> pd.DataFrame:
+    """Stamp `body` rows with `ingested_at`, keeping the stamp of rows identical to a `previous` row."""
+    body = body.drop(columns=[INGESTED_COL], errors="ignore")
+    if previous is None or previous.empty:
+        return body.assign(**{INGESTED_COL: ingested_at})
+    columns = [c for c in body.columns if c in previous.columns]
+    old_hashes = _row_hashes(previous, columns)
+    old_stamps = (previous[INGESTED_COL] if INGESTED_COL in previous.columns
+                  else pd.Series(None, index=previous.index, dtype=object))
+    stamp_by_hash = pd.Series(old_stamps.to_numpy(), index=old_hashes.to_numpy())
+    stamp_by_hash = stamp_by_hash[~stamp_by_hash.index.duplicated(keep="last")]
+
+    new_hashes = _row_hashes(body, columns)
+    unchanged = new_hashes.isin(stamp_by_hash.index).to_numpy()
+    stamps = pd.Series(ingested_at, index=body.index, dtype=object)
+    stamps[unchanged] = new_hashes[unchanged].map(stamp_by_hash).to_numpy()
+    return body.assign(**{INGESTED_COL: stamps})
+
+
+def _filter_expression(filters: Optional[Dict[str, FilterValue]]):
+    """{"season_code": "2526", "league_code": ["E0", "E1"]} -> dataset expression."""
+    expr = None
+    for column, value in (filters or {}).items():
+        if isinstance(value, (list, tuple, set)):
+            term = ds.field(column).isin([str(v) for v in value])
+        else:
+            term = ds.field(column) == str(value)
+        expr = term if expr is None else expr & term
+    return expr
+
+
+class OddsStore:
+    """Season/league-partitioned Parquet dataset of football-data rows."""
+
+    def __init__(self, root: Path = DEFAULT_STORE_DIR):
+        self.root = Path(root)
+
+    def exists(self) -> bool:
+        return any(self.root.glob("season_code=*/league_code=*/*.parquet"))
+
+    def partitions(self) -> List[Tuple[str, str]]:
+        """Sorted (season_code, league_code) pairs present in the store."""
+        found = []
+        for path in self.root.glob("season_code=*/league_code=*"):
+            if any(path.glob("*.parquet")):
+                found.append((path.parent.name.split("=", 1)[1], path.name.split("=", 1)[1]))
+        return sorted(found)
+
+    # --- writes ------------------------------------------------------------------
+
+    def write_partition(self, season_code: str, league_code: str, df: pd.DataFrame,
+                        ingested_at: Optional[str] = None) -> Path:
+        """
+        Replace one partition with `df` (partition columns are stored in the path only).
+        New or modified rows are stamped with `ingested_at` (now by default).
+        """
+        target = _partition_dir(self.root, season_code, league_code)
+        # Dot-prefixed scratch names never match the partition globs
+        tmp = target.with_name(f".{target.name}.tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+
+        body = df.drop(columns=[c for c in PARTITION_COLS if c in df.columns])
+        dedup = [c for c in DEDUP_COLS if c in body.columns]
+        if dedup:
+            body = body.drop_duplicates(subset=dedup, keep="last")
+        previous_file = target / "part-0.parquet"
+        previous = pq.read_table(previous_file).to_pandas() if previous_file.exists() else None
+        body = _stamp_ingestion(body, previous, ingested_at or _now())
+        pq.write_table(pa.Table.from_pandas(body, preserve_index=False), tmp / "part-0.parquet")
+
+        # Swap the directory in, so readers never see a half-written partition
+        if target.exists():
+            old = target.with_name(f".{target.name}.old")
+            shutil.rmtree(old, ignore_errors=True)
+            os.replace(target, old)
+            os.replace(tmp, target)
+            shutil.rmtree(old, ignore_errors=True)
+        else:
+            os.replace(tmp, target)
+        return target
+
+    def write(self, frames: Iterable[pd.DataFrame]) -> List[Tuple[str, str]]:
+        """Replace the partitions covered by `frames`; returns the partitions written."""
+        frames = [f for f in frames if f is not None and not f.empty]
+        if not frames:
+            return []
+        combined = pd.concat(frames, ignore_index=True)
+        for col in PARTITION_COLS:
+            if col not in combined.columns:
+                combined[col] = UNKNOWN_PARTITION
+            combined[col] = combined[col].fillna(UNKNOWN_PARTITION).astype(str)
+
+        written, ingested_at = [], _now()
+        for (season_code, league_code), part in combined.groupby(PARTITION_COLS, sort=True):
+            # A league-season CSV has a fixed column set; drop columns that only other files had
+            part = part.dropna(axis=1, how="all")
+            self.write_partition(season_code, league_code, part, ingested_at=ingested_at)
+            written.append((season_code, league_code))
+        return written
+
+    def import_csv(self, csv_path: Path = LEGACY_CSV) -> List[Tuple[str, str]]:
+        """One-off migration of an existing all_leagues_full.csv into the store."""
+        return self.write([pd.read_csv(csv_path, low_memory=False, dtype={"season_code": str})])
+
+    # --- reads -------------------------------------------------------------------
+
+    def _dataset(self) -> ds.Dataset:
+        files = sorted(str(p) for p in self.root.glob("season_code=*/league_code=*/*.parquet"))
+        # Files from different seasons have different odds columns; read them with a unified schema
+        schemas = [pq.read_schema(f) for f in files]
+        schema = pa.unify_schemas(
+            schemas + [pa.schema([(col, pa.string()) for col in PARTITION_COLS])],
+            promote_options="permissive",
+        )
+        return ds.dataset(files, format="parquet", schema=schema,
+                          partitioning=_PARTITIONING, partition_base_dir=str(self.root))
+
+    def read(self, columns: Optional[Sequence[str]] = None,
+             filters: Optional[Dict[str, FilterValue]] = None,
+             ingested_after: Optional[str] = None,
+             categories: Sequence[str] = ()) -> pd.DataFrame:
+        """
+        Load rows as a DataFrame, in (season_code, league_code, file) order.
+
+        Args:
+            columns: Columns to load (others are never read from disk). Missing ones are skipped.
+                     `ingested_at` is only returned when asked for.
+            filters: Partition filters, e.g. {"season_code": "2526", "league_code": ["E0", "E1"]}.
+            ingested_after: Only rows new or modified after this `ingested_at` stamp.
+            categories: Columns to return as pandas Categoricals.
+        """
+        if not self.exists():
+            return pd.DataFrame(columns=list(columns) if columns else None)
+        dataset = self._dataset()
+        if columns is None:
+            columns = [c for c in dataset.schema.names if c != INGESTED_COL]
+        else:
+            columns = [c for c in columns if c in dataset.schema.names]
+        expr = _filter_expression(filters)
+        if ingested_after is not None and INGESTED_COL in dataset.schema.names:
+            term = ds.field(INGESTED_COL) > ingested_after
+            expr = term if expr is None else expr & term
+        elif ingested_after is not None:
+            return pd.DataFrame(columns=columns)
+        table = dataset.to_table(columns=columns, filter=expr)
+        return table.to_pandas(categories=[c for c in categories if c in table.column_names])
+
+    def latest_ingested(self) -> Optional[str]:
+        """The newest `ingested_at` stamp in the store (None when nothing is stamped)."""
+        if not self.exists():
+            return None
+        dataset = self._dataset()
+        if INGESTED_COL not in dataset.schema.names:
+            return None
+        return pc.max(dataset.to_table(columns=[INGESTED_COL]).column(INGESTED_COL)).as_py()
+
+    def export_csv(self, path: Path = LEGACY_CSV) -> pd.DataFrame:
+        """Write the whole store to the legacy single-CSV path and return it."""
+        df = self.read()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        df.to_csv(tmp, index=False)
+        os.replace(tmp, path)
+        return df
+
+
+def load_football_data(columns: Optional[Sequence[str]] = None,
+                       filters: Optional[Dict[str, FilterValue]] = None,
+                       store: Optional[OddsStore] = None,
+                       csv_path: Path = LEGACY_CSV,
+                       categories: Sequence[str] = ()) -> pd.DataFrame:
+    """Read football-data rows from the Parquet store, or from the legacy CSV if there is no store yet."""
+    store = store or OddsStore()
+    if store.exists():
+        return store.read(columns=columns, filters=filters, categories=categories)
+    dtype = {column: "category" for column in categories}
+    dtype.setdefault("season_code", str)
+    df = pd.read_csv(csv_path, low_memory=False, dtype=dtype,
+                     usecols=(lambda c: c in set(columns)) if columns else None)
+    for column, value in (filters or {}).items():
+        values = [str(v) for v in value] if isinstance(value, (list, tuple, set)) else [str(value)]
+        df = df[df[column].astype(str).isin(values)]
+    return df
+
+
+def parse_match_dates(dates: pd.Series) -> pd.Series:
+    """
+    Parse football-data dates (any of DATE_FORMATS; the first format that
+    fits wins) to datetime64, NaT where none fits.
+
+    Every distinct string is parsed once per format with a vectorized
+    `to_datetime`, then broadcast back to the rows.
+    """
+    codes, uniques = pd.factorize(dates.astype("string").str.strip(), use_na_sentinel=True)
+    uniques = pd.Series(uniques, dtype="string")
+    parsed = np.full(len(uniques) + 1, np.datetime64("NaT"), dtype="datetime64[ns]")
+    for fmt in DATE_FORMATS:
+        missing = np.isnat(parsed[:-1])
+        if not missing.any():
+            break
+        attempt = pd.to_datetime(uniques[missing], format=fmt, errors="coerce")
+        parsed[:-1][missing] = attempt.to_numpy(dtype="datetime64[ns]")
+    # Missing values have code -1, which picks the trailing NaT
+    return pd.Series(parsed[codes], index=dates.index, name=dates.name)
@@ -0,0 +1,130 @@
+"""
+Input/output fingerprints of pipeline steps, kept between runs.
+
+A step records the fingerprints of its inputs (files, directories, DataFrames,
+DB watermarks, parameters) and of its outputs when it completes. On the next
+run it can be skipped when its inputs fingerprint the same and its output files
+are still what it wrote.
+
+File fingerprints are (size, mtime_ns, sha256); the hash is only recomputed
+when size or mtime moved, so an unchanged multi-megabyte CSV costs one stat().
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+_CHUNK = 1024 * 1024
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_CHUNK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def fingerprint_file(path: Path, previous: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """(size, mtime_ns, sha256) of `path`, or None if it does not exist."""
+    path = Path(path)
+    if not path.is_file():
+        return None
+    stat = path.stat()
+    if previous and previous.get("size") == stat.st_size and previous.get("mtime_ns") == stat.st_mtime_ns:
+        return previous
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": _sha256(path)}
+
+
+def fingerprint_tree(root: Path, pattern: str = "**/*") -> Optional[str]:
+    """Hash of the (relative path, size, mtime) of every file under `root` matching `pattern`."""
+    root = Path(root)
+    files = sorted(p for p in root.glob(pattern) if p.is_file())
+    if not files:
+        return None
+    digest = hashlib.sha256()
+    for path in files:
+        stat = path.stat()
+        digest.update(f"{path.relative_to(root)}|{stat.st_size}|{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def fingerprint_frame(df: pd.DataFrame) -> str:
+    """Content hash of a DataFrame (values, index and column names)."""
+    digest = hashlib.sha256(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    digest.update("|".join(map(str, df.columns)).encode())
+    return digest.hexdigest()
+
+
+class StepManifest:
+    """
+    JSON file of {step: {"inputs": ..., "output": ..., "files": {path: fingerprint}, "completed_at": ...}}.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if self.path.exists():
+            try:
+                self.steps = json.loads(self.path.read_text())
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Ignoring unreadable step manifest {self.path}: {e}")
+
+    def entry(self, step: str) -> Dict[str, Any]:
+        return self.steps.get(step, {})
+
+    def output_of(self, step: str) -> Optional[str]:
+        return self.entry(step).get("output")
+
+    def is_current(self, step: str, inputs: Dict[str, Any]) -> bool:
+        """
+        True when `step` completed before with exactly these inputs and its
+        output files are unchanged. Unknown inputs (None) never match.
+        """
+        entry = self.entry(step)
+        if not entry or entry.get("inputs") != inputs:
+            return False
+        if any(value is None for value in inputs.values()):
+            return False
+        for path, recorded in entry.get("files", {}).items():
+            if recorded is None or fingerprint_file(Path(path), previous=recorded) != recorded:
+                return False
+        return True
+
+    def record(self, step: str, inputs: Dict[str, Any], output: Optional[str] = None,
+               files: Optional[Dict[str, Any]] = None) -> None:
+        with self._lock:
+            self.steps[step] = {
+                "inputs": inputs,
+                "output": output,
+                "files": {str(p): fp for p, fp in (files or {}).items()},
+                "completed_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            }
+            self._save()
+
+    def refresh_inputs(self, step: str, inputs: Dict[str, Any]) -> None:
+        """Overwrite some of the inputs `step` recorded, keeping its output and files."""
+        with self._lock:
+            entry = self.steps.get(step)
+            if entry is None:
+                return
+            entry["inputs"] = {**entry.get("inputs", {}), **inputs}
+            self._save()
+
+    def forget(self, step: str) -> None:
+        with self._lock:
+            if self.steps.pop(step, None) is not None:
+                self._save()
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(self.steps, indent=2, sort_keys=True, default=str))
+        os.replace(tmp, self.path)
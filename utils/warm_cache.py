@@ -0,0 +1,355 @@
+import json
+import sys
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, Tuple
+
+import numpy as np
+from supabase import Client
+
+from utils.id_set import IdSet
+
+DEFAULT_SNAPSHOT_FILE = Path(__file__).parent.parent / "data" / "warm_cache.npz"
+
+# table -> ID column kept as a full IdSet mirror
+ID_TABLES = {"Coach": "tm_coach_id", "Club": "tm_club_id", "Match": "tm_match_id"}
+
+# Changes to these tables invalidate the league/season metadata tier
+METADATA_TABLES = ["League", "Season"]
+
+# How often `sync` replaces the ID mirrors with a full scan to drop deleted rows
+RECONCILE_EVERY = timedelta(days=7)
+
+
+def _sizeof(value: Any) -> int:
+    """Approximate in-memory size of a cached value."""
+    if isinstance(value, IdSet):
+        return value.nbytes + 8 * len(value._pending) + 64
+    try:
+        return len(json.dumps(value, default=str)) + 64
+    except (TypeError, ValueError):
+        return sys.getsizeof(value)
+
+
+class LruTier:
+    """
+    Bounded mapping that evicts least-recently-used entries once it holds more
+    than `max_entries` entries or more than `max_bytes` (approximate) bytes.
+    """
+
+    def __init__(self, name: str, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def items(self) -> Iterator[Tuple[Hashable, Any]]:
+        return iter(list(self._data.items()))
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        if key not in self._data:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._data.move_to_end(key)
+        return self._data[key]
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Read without touching recency or hit counters."""
+        return self._data.get(key, default)
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self.discard(key)
+        size = _sizeof(value)
+        self._data[key] = value
+        self._sizes[key] = size
+        self.nbytes += size
+        self._evict()
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        if key in self._data:
+            return self.get(key)
+        self.misses += 1
+        value = loader()
+        self.put(key, value)
+        return value
+
+    def resize(self, key: Hashable) -> None:
+        """Re-measure an entry that was mutated in place (e.g. an IdSet that grew)."""
+        if key in self._data:
+            size = _sizeof(self._data[key])
+            self.nbytes += size - self._sizes[key]
+            self._sizes[key] = size
+            self._evict()
+
+    def discard(self, key: Hashable) -> None:
+        if key in self._data:
+            del self._data[key]
+            self.nbytes -= self._sizes.pop(key)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._sizes.clear()
+        self.nbytes = 0
+
+    def _evict(self) -> None:
+        # Always keep the newest entry, even if it alone is over budget
+        while len(self._data) > 1 and (len(self._data) > self.max_entries or self.nbytes > self.max_bytes):
+            key, _ = self._data.popitem(last=False)
+            self.nbytes -= self._sizes.pop(key)
+            self.evictions += 1
+
+
+class WarmCache:
+    """
+    Cross-run cache of the lookups the crawler repeats on every start.
+
+    Tiers:
+      - `ids`: full IdSet mirrors of Coach, Club and Match IDs
+      - `match_sets`: LRU of match IDs per (season_id, league_id)
+      - `metadata`: LRU of JSON-serialisable league/season metadata
+
+    `save()` writes a snapshot at the end of a run; `load()` + `sync(client)` on
+    the next start pull only rows whose `updated_at` is newer than the snapshot
+    (see scripts/add_updated_at_columns.sql).
+
+    The delta sync only sees inserts and updates. A Match or Coach deleted
+    upstream (the usual way to force reprocessing) stays in the ID mirrors,
+    and the pipelines keep skipping it, until the next reconciliation:
+    `reconcile(client)` rebuilds the mirrors from a full ID scan, and `sync`
+    runs it when the last one is older than `reconcile_every` (or with
+    `reconcile=True`, e.g. right after deleting rows).
+    """
+
+    def __init__(self, max_match_sets: int = 256, max_metadata: int = 1024,
+                 max_tier_bytes: int = 64 * 1024 * 1024):
+        self.ids: Dict[str, IdSet] = {table: IdSet() for table in ID_TABLES}
+        self.match_sets = LruTier("match_sets", max_entries=max_match_sets, max_bytes=max_tier_bytes)
+        self.metadata = LruTier("metadata", max_entries=max_metadata, max_bytes=max_tier_bytes)
+        self.watermarks: Dict[str, str] = {}
+        self.reconciled_at: Optional[str] = None
+        self.synced = False
+
+    # --- IDs ---------------------------------------------------------------------
+
+    def has_id(self, table: str, id_: Any) -> bool:
+        return id_ in self.ids[table]
+
+    def add_id(self, table: str, id_: Any) -> None:
+        self.ids[table].add(id_)
+
+    def match_ids(self, season_id: int, league_id: int, loader: Callable[[], Any]) -> IdSet:
+        """Match IDs of one league-season, loaded once through `loader` and kept up to date."""
+        key = (int(season_id), int(league_id))
+        ids = self.match_sets.get(key)
+        if ids is None:
+            ids = IdSet(loader())
+            self.match_sets.put(key, ids)
+            self.ids["Match"].update(ids)
+        return ids
+
+    def add_match(self, match_id: Any, season_id: Any, league_id: Any) -> None:
+        self.ids["Match"].add(match_id)
+        key = (int(season_id), int(league_id))
+        ids = self.match_sets.peek(key)
+        if ids is not None:
+            ids.add(match_id)
+            self.match_sets.resize(key)
+
+    # --- delta sync --------------------------------------------------------------
+
+    def _changed_rows(self, client: Client, table: str, columns: str, page_size: int,
+                      key: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Rows of `table` with updated_at past the table's watermark, advancing the watermark."""
+        watermark = self.watermarks.get(table)
+        offset = 0
+        while True:
+            query = client.table(table).select(columns)
+            if watermark:
+                query = query.gt("updated_at", watermark)
+            query = query.order("updated_at")
+            if key:
+                query = query.order(key)
+            batch = query.range(offset, offset + page_size - 1).execute().data or []
+            for row in batch:
+                if row.get("updated_at") and row["updated_at"] > self.watermarks.get(table, ""):
+                    self.watermarks[table] = row["updated_at"]
+                yield row
+            if len(batch) < page_size:
+                return
+            offset += page_size
+
+    def _all_rows(self, client: Client, table: str, columns: str, key: str,
+                  page_size: int) -> Iterator[Dict[str, Any]]:
+        """Keyset scan of the whole table, for databases without updated_at."""
+        last = None
+        while True:
+            query = client.table(table).select(columns)
+            if last is not None:
+                query = query.gt(key, last)
+            batch = query.order(key).limit(page_size).execute().data or []
+            yield from batch
+            if len(batch) < page_size:
+                return
+            last = batch[-1][key]
+
+    def reconcile(self, client: Client, page_size: int = 1000) -> Dict[str, int]:
+        """
+        Replace the ID mirrors (and the cached per-season match sets) with a full
+        keyset scan of the ID columns, dropping IDs deleted upstream. Returns the
+        number of dropped IDs per table.
+        """
+        removed = {}
+        for table, column in ID_TABLES.items():
+            extra = ", season_id, league_id" if table == "Match" else ""
+            fresh = IdSet()
+            by_season = defaultdict(list)
+            for row in self._all_rows(client, table, f"{column}{extra}", column, page_size):
+                fresh.add(row[column])
+                if table == "Match":
+                    by_season[(int(row["season_id"]), int(row["league_id"]))].append(row[column])
+            removed[table] = sum(1 for id_ in self.ids[table] if id_ not in fresh)
+            self.ids[table] = fresh
+            if table == "Match":
+                for key, _ in self.match_sets.items():
+                    self.match_sets.put(key, IdSet(by_season.get(key, ())))
+        self.reconciled_at = datetime.now(timezone.utc).isoformat()
+        print("🧹 Warm cache reconcile, dropped deleted IDs: " + ", ".join(f"{t}={n}" for t, n in removed.items()))
+        return removed
+
+    def reconcile_due(self, every: timedelta = RECONCILE_EVERY) -> bool:
+        if self.reconciled_at is None:
+            return True
+        return datetime.now(timezone.utc) - datetime.fromisoformat(self.reconciled_at) >= every
+
+    def sync(self, client: Client, page_size: int = 1000, reconcile: bool = False,
+             reconcile_every: timedelta = RECONCILE_EVERY) -> Dict[str, int]:
+        """
+        Pull IDs changed upstream since the snapshot (everything on a cold start),
+        then reconcile deletions when forced or due.
+        """
+        cold = not any(self.watermarks.get(table) for table in ID_TABLES)
+        counts = {}
+        for table, column in ID_TABLES.items():
+            extra = ", season_id, league_id" if table == "Match" else ""
+            count = 0
+            try:
+                rows = self._changed_rows(client, table, f"{column}, updated_at{extra}", page_size, key=column)
+                for row in rows:
+                    self._add_row(table, column, row)
+                    count += 1
+            except Exception as e:
+                print(f"⚠️  Delta sync of {table} failed ({e}), reloading all IDs")
+                for row in self._all_rows(client, table, f"{column}{extra}", column, page_size):
+                    self._add_row(table, column, row)
+                    count += 1
+            counts[table] = count
+        for table in METADATA_TABLES:
+            try:
+                changed = sum(1 for _ in self._changed_rows(client, table, "updated_at", page_size))
+            except Exception as e:
+                print(f"⚠️  Delta sync of {table} failed ({e}), dropping cached metadata")
+                changed = len(self.metadata)
+            if changed:
+                self.metadata.clear()
+            counts[table] = changed
+        if cold:
+            # A cold sync just read every row: nothing deleted can be cached
+            self.reconciled_at = datetime.now(timezone.utc).isoformat()
+        elif reconcile or self.reconcile_due(reconcile_every):
+            self.reconcile(client, page_size=page_size)
+        self.synced = True
+        print("🔄 Warm cache sync: " + ", ".join(f"{t}={n}" for t, n in counts.items()))
+        return counts
+
+    def _add_row(self, table: str, column: str, row: Dict[str, Any]) -> None:
+        if table == "Match":
+            self.add_match(row[column], row["season_id"], row["league_id"])
+        else:
+            self.add_id(table, row[column])
+
+    # --- snapshots ---------------------------------------------------------------
+
+    def save(self, path: Path = DEFAULT_SNAPSHOT_FILE) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        match_keys, match_arrays = [], []
+        for key, ids in self.match_sets.items():
+            match_keys.append(key)
+            match_arrays.append(np.fromiter(ids, dtype=np.int64, count=len(ids)))
+        meta = {
+            "watermarks": self.watermarks,
+            "reconciled_at": self.reconciled_at,
+            "metadata": [[list(key) if isinstance(key, tuple) else key, value]
+                         for key, value in self.metadata.items()],
+        }
+        arrays = {f"ids_{table}": np.fromiter(ids, dtype=np.int64, count=len(ids))
+                  for table, ids in self.ids.items()}
+        # Write next to the target and rename, so an interrupted save keeps the old snapshot
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez_compressed(
+                f,
+                match_keys=np.asarray(match_keys, dtype=np.int64).reshape(-1, 2),
+                match_sizes=np.asarray([len(a) for a in match_arrays], dtype=np.int64),
+                match_ids=np.concatenate(match_arrays) if match_arrays else np.empty(0, dtype=np.int64),
+                meta=np.asarray(json.dumps(meta, default=str)),
+                **arrays,
+            )
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path = DEFAULT_SNAPSHOT_FILE, **kwargs) -> "WarmCache":
+        """Start from the snapshot at `path` (or empty if there is none or it is unreadable)."""
+        cache = cls(**kwargs)
+        path = Path(path)
+        if not path.exists():
+            return cache
+        try:
+            with np.load(path) as data:
+                for table in ID_TABLES:
+                    if f"ids_{table}" in data:
+                        cache.ids[table] = IdSet.from_array(data[f"ids_{table}"])
+                offsets = np.concatenate([[0], np.cumsum(data["match_sizes"])])
+                match_ids = data["match_ids"]
+                for i, (season_id, league_id) in enumerate(data["match_keys"]):
+                    cache.match_sets.put((int(season_id), int(league_id)),
+                                         IdSet.from_array(match_ids[offsets[i]:offsets[i + 1]]))
+                meta = json.loads(str(data["meta"]))
+        except Exception as e:
+            print(f"⚠️  Ignoring unreadable warm cache snapshot {path}: {e}")
+            return cls(**kwargs)
+        cache.watermarks = meta.get("watermarks", {})
+        cache.reconciled_at = meta.get("reconciled_at")
+        for key, value in meta.get("metadata", []):
+            cache.metadata.put(tuple(key) if isinstance(key, list) else key, value)
+        return cache
+
+    # --- reporting ---------------------------------------------------------------
+
+    def memory_usage(self) -> Dict[str, int]:
+        usage = {f"ids.{table}": ids.nbytes for table, ids in self.ids.items()}
+        usage["match_sets"] = self.match_sets.nbytes
+        usage["metadata"] = self.metadata.nbytes
+        return usage
+
+    def print_report(self) -> None:
+        usage = self.memory_usage()
+        print("🧊 Warm cache:")
+        for table, ids in self.ids.items():
+            print(f"   {table} IDs: {len(ids)} ({usage[f'ids.{table}'] / 1024:.0f} KiB)")
+        for tier in (self.match_sets, self.metadata):
+            print(f"   {tier.name}: {len(tier)} entries ({tier.nbytes / 1024:.0f} KiB), "
+                  f"{tier.hits} hits, {tier.misses} misses, {tier.evictions} evictions")
@@ -0,0 +1,134 @@
+import hashlib
+import json
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Sequence
+
+DEFAULT_CACHE_FILE = Path(__file__).parent.parent / "data" / ".write_filter_cache.json"
+
+
+def row_hash(row: Dict[str, Any]) -> str:
+    """Hash the canonical JSON form of a row (sorted keys, no whitespace)."""
+    canonical = json.dumps(row, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _key_str(key: Any) -> str:
+    """Stable string form of a primary key (scalar or tuple) for the JSON cache."""
+    if isinstance(key, (tuple, list)):
+        return json.dumps([str(k) if k is not None else None for k in key])
+    return str(key)
+
+
+class WriteFilter:
+    """
+    Drops upserts whose row content has not changed since it was last written.
+
+    Keeps one content hash per (table, primary key). Hashes come either from
+    previous writes (optionally persisted to `cache_file` between runs) or are
+    primed from rows already stored in the database.
+    """
+
+    def __init__(self, cache_file: Optional[Path] = None):
+        self.cache_file = Path(cache_file) if cache_file else None
+        self.hashes: Dict[str, Dict[str, str]] = defaultdict(dict)
+        self.skipped: Dict[str, int] = defaultdict(int)
+        self.written: Dict[str, int] = defaultdict(int)
+        if self.cache_file is not None:
+            self.load()
+
+    def is_unchanged(self, table: str, key: Any, row: Dict[str, Any]) -> bool:
+        return self.hashes[table].get(_key_str(key)) == row_hash(row)
+
+    def should_write(self, table: str, key: Any, row: Dict[str, Any]) -> bool:
+        """Return False (and count the avoided write) when the row is unchanged."""
+        if self.is_unchanged(table, key, row):
+            self.skipped[table] += 1
+            return False
+        return True
+
+    def mark_written(self, table: str, key: Any, row: Dict[str, Any]) -> None:
+        self.hashes[table][_key_str(key)] = row_hash(row)
+        self.written[table] += 1
+
+    def save_if_changed(self, table: str, key: Any, row: Dict[str, Any], save: Callable[[], Any]) -> bool:
+        """
+        Call `save()` only if the row changed. The hash is recorded when the
+        save returns something other than None (repositories return None when
+        they decided not to persist, e.g. a tenure whose club is missing).
+        """
+        if not self.should_write(table, key, row):
+            return False
+        result = save()
+        if result is not None:
+            self.mark_written(table, key, row)
+        return True
+
+    def forget(self, table: str, key: Any) -> None:
+        self.hashes[table].pop(_key_str(key), None)
+
+    def prime(self, table: str, rows: Iterable[Dict[str, Any]], key_fields: Sequence[str],
+              columns: Optional[Sequence[str]] = None) -> int:
+        """
+        Seed hashes from rows read back from the database.
+
+        `columns` should list the fields the writer actually sends, so DB-only
+        columns (created_at, updated_at, serial ids) don't make every row look changed.
+        """
+        count = 0
+        for row in rows:
+            payload = {c: row.get(c) for c in columns} if columns else dict(row)
+            key = tuple(row.get(f) for f in key_fields) if len(key_fields) > 1 else row.get(key_fields[0])
+            self.hashes[table][_key_str(key)] = row_hash(payload)
+            count += 1
+        return count
+
+    def report(self) -> Dict[str, int]:
+        """Number of avoided writes per table."""
+        return dict(self.skipped)
+
+    def print_report(self) -> None:
+        if not self.skipped and not self.written:
+            return
+        print("📉 Write filter summary:")
+        for table in sorted(set(self.skipped) | set(self.written)):
+            print(f"   {table}: {self.skipped.get(table, 0)} unchanged (skipped), {self.written.get(table, 0)} written")
+
+    def load(self) -> None:
+        if self.cache_file is None or not self.cache_file.exists():
+            return
+        try:
+            data = json.loads(self.cache_file.read_text())
+        except Exception:
+            return
+        for table, hashes in data.items():
+            self.hashes[table].update(hashes)
+
+    def save(self) -> None:
+        if self.cache_file is None:
+            return
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        self.cache_file.write_text(json.dumps(self.hashes))
+
+
+def save_through_filter(write_filter: Optional[WriteFilter], table: str, key: Any, model: Any,
+                        save: Callable[[Any], Any]) -> bool:
+    """Save a pydantic model, skipping it if the filter has seen identical content."""
+    if write_filter is None:
+        save(model)
+        return True
+    return write_filter.save_if_changed(table, key, model.model_dump(mode="json"), lambda: save(model))
+
+
+async def async_save_through_filter(write_filter: Optional[WriteFilter], table: str, key: Any, model: Any,
+                                    save: Callable[[Any], Awaitable[Any]]) -> bool:
+    """`save_through_filter` for async repositories."""
+    if write_filter is None:
+        await save(model)
+        return True
+    row = model.model_dump(mode="json")
+    if not write_filter.should_write(table, key, row):
+        return False
+    if await save(model) is not None:
+        write_filter.mark_written(table, key, row)
+    return True